@@ -0,0 +1,56 @@
+"""
+Compares submitting an indicator feed in a single request with chunked, parallel submission (``chunk_size`` and
+``max_workers``), against the local mock server with simulated latency and a cap on request body size.
+
+Run from the repository root with
+``PYTHONPATH=. python benchmarks/bench_bulk_submit.py [--indicators N] [--chunk-size C] [--latency L]``.
+"""
+from __future__ import print_function
+
+import argparse
+import time
+
+from requests import HTTPError
+
+from mock_server import MockServer
+from trustar import TruStar, Indicator
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--indicators', type=int, default=50000)
+    parser.add_argument('--chunk-size', type=int, default=1000)
+    parser.add_argument('--max-body-bytes', type=int, default=1000000)
+    parser.add_argument('--latency', type=float, default=0.05)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 4, 8])
+    args = parser.parse_args()
+
+    indicators = [Indicator(value="10.%d.%d.%d" % (i // 65536 % 256, i // 256 % 256, i % 256),
+                            source="benchmark", notes="indicator %d" % i)
+                  for i in range(args.indicators)]
+
+    with MockServer(latency=args.latency, max_body_bytes=args.max_body_bytes) as server:
+        ts = TruStar(config=server.config(pool_maxsize=max(args.workers)))
+
+        try:
+            ts.submit_indicators(indicators)
+            print("single request:  accepted")
+        except HTTPError as e:
+            print("single request:  rejected (%s)" % e.response.status_code)
+
+        for workers in args.workers:
+            del server.submitted_indicators[:]
+            start = time.time()
+            results = ts.submit_indicators(indicators, chunk_size=args.chunk_size,
+                                           max_payload_bytes=args.max_body_bytes, max_workers=workers)
+            elapsed = time.time() - start
+
+            assert all(result.succeeded for result in results)
+            assert len(server.submitted_indicators) == len(indicators)
+
+            print("max_workers=%-3d %8d indicators in %3d chunks in %6.2fs  (%9.0f indicators/s)"
+                  % (workers, len(indicators), len(results), elapsed, len(indicators) / elapsed))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""
+Compares decoding pages of indicators into |Indicator| objects and flattening them back into rows, with decoding them
+in columnar mode into a |ColumnBatch|.  Decoding only; no requests are made.
+
+Run from the repository root with ``PYTHONPATH=. python benchmarks/bench_columnar_decode.py [--indicators N]``.
+"""
+from __future__ import print_function
+
+import argparse
+import time
+
+from trustar import Indicator, Page
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+COLUMNS = ['value', 'indicatorType', 'firstSeen', 'lastSeen', 'sightings', 'source']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--indicators', type=int, default=1000000)
+    parser.add_argument('--page-size', type=int, default=1000)
+    args = parser.parse_args()
+
+    pages = []
+    for start in range(0, args.indicators, args.page_size):
+        items = [{"value": "10.%d.%d.%d" % (i // 65536 % 256, i // 256 % 256, i % 256), "indicatorType": "IP",
+                  "firstSeen": 1500000000000 + i, "lastSeen": 1600000000000 + i, "sightings": i % 7,
+                  "source": "feed", "notes": None, "tags": [], "enclaveIds": ["mock-enclave"]}
+                 for i in range(start, min(start + args.page_size, args.indicators))]
+        pages.append({"items": items, "pageNumber": len(pages), "pageSize": args.page_size,
+                      "totalElements": args.indicators, "hasNext": True})
+
+    def objects():
+        rows = 0
+        for page in pages:
+            for indicator in Page.from_dict(page, content_type=Indicator).items:
+                row = (indicator.value, indicator.type, indicator.first_seen, indicator.last_seen,
+                       indicator.sightings, indicator.source)
+                rows += 1
+        return rows
+
+    def columnar(use_numpy=False):
+        rows = 0
+        for page in pages:
+            rows += len(Page.from_dict(page, columnar=True, columns=COLUMNS, use_numpy=use_numpy).items)
+        return rows
+
+    cases = [("Indicator objects -> rows", objects), ("columnar (lists)", columnar)]
+    if numpy is not None:
+        cases.append(("columnar (NumPy arrays)", lambda: columnar(use_numpy=True)))
+
+    for name, decode in cases:
+        start = time.time()
+        rows = decode()
+        elapsed = time.time() - start
+        print("%-28s %8d indicators in %6.2fs  (%9.0f indicators/s)" % (name, rows, elapsed, rows / elapsed))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+"""
+Compares request throughput with and without connection pooling, against the local mock server.
+
+"unpooled" reproduces the SDK's previous behaviour of calling ``requests.request`` for every API call, which opens a new
+connection each time.  "pooled" uses the session owned by |ApiClient|.
+
+Run from the repository root with ``PYTHONPATH=. python benchmarks/bench_connection_pool.py [--requests N] [--threads T]``.
+"""
+from __future__ import print_function
+
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from mock_server import MockServer
+from trustar import TruStar
+
+
+def run(call, num_requests, threads):
+    start = time.time()
+    if threads <= 1:
+        for _ in range(num_requests):
+            call()
+    else:
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            list(executor.map(lambda _: call(), range(num_requests)))
+    return num_requests / (time.time() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--threads', type=int, default=1)
+    parser.add_argument('--latency', type=float, default=0.0)
+    args = parser.parse_args()
+
+    with MockServer(latency=args.latency) as server:
+        ts = TruStar(config=server.config(pool_maxsize=max(10, args.threads)))
+        client = ts._client
+        url = "%s/ping" % client.base
+
+        def unpooled():
+            requests.request("GET", url, headers=client._get_headers())
+
+        results = [
+            ("unpooled (requests.request per call)", run(unpooled, args.requests, args.threads)),
+            ("pooled (ApiClient session)", run(ts.ping, args.requests, args.threads)),
+        ]
+
+    print("%d requests, %d thread(s)" % (args.requests, args.threads))
+    for name, rate in results:
+        print("  %-40s %10.1f req/s" % (name, rate))
+    print("  speedup: %.2fx" % (results[1][1] / results[0][1]))
+
+
+if __name__ == '__main__':
+    main()
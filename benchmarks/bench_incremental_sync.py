@@ -0,0 +1,75 @@
+"""
+Compares re-pulling a month of reports and a week of indicators from the local mock server with an incremental
+|LocalMirror| sync that only fetches what changed since the previous sync, and times queries answered from the mirror.
+
+Run from the repository root with
+``PYTHONPATH=. python benchmarks/bench_incremental_sync.py [--reports N] [--indicators N] [--changes C]``.
+"""
+from __future__ import print_function
+
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+from mock_server import MockServer, DAY
+from trustar import TruStar, LocalMirror
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--reports', type=int, default=2000)
+    parser.add_argument('--indicators', type=int, default=50000)
+    parser.add_argument('--changes', type=int, default=50, help="the reports and indicators changed between syncs")
+    parser.add_argument('--latency', type=float, default=0.005)
+    parser.add_argument('--workers', type=int, default=8)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    try:
+        with MockServer(latency=args.latency, total_reports=args.reports, report_interval=30 * DAY // args.reports,
+                        total_indicators=args.indicators, indicator_interval=7 * DAY // args.indicators) as server:
+            ts = TruStar(config=server.config(pool_maxsize=args.workers))
+            mirror = LocalMirror(os.path.join(directory, "mirror.db"))
+            from_time = server.now - 30 * DAY
+
+            def sync(name):
+                server.httpd.request_count = 0
+                result = mirror.sync(ts, from_time=from_time, max_workers=args.workers)
+                print("%-12s %5d reports, %6d indicators, %5d requests in %6.2fs"
+                      % (name, result.reports, result.indicators, server.request_count, result.elapsed))
+                return result
+
+            full = sync("full pull")
+            assert full.reports == args.reports and full.indicators == args.indicators
+
+            server.update_reports(args.changes)
+            server.see_indicators(args.changes)
+
+            # re-pulling everything is what polling without a mirror costs
+            mirror.clear()
+            sync("re-pull")
+
+            server.update_reports(args.changes)
+            server.see_indicators(args.changes)
+            delta = sync("delta sync")
+            assert delta.reports >= args.changes and delta.indicators >= args.changes
+            assert mirror.count()['reports'] == args.reports
+
+            server.httpd.request_count = 0
+            start = time.time()
+            for i in range(1000):
+                report = mirror.get_correlated_reports(["10.0.%d.%d" % (i // 256 % 256, i % 256)])[0]
+                mirror.get_enclave_tags(report.id)
+            elapsed = time.time() - start
+            assert server.request_count == 0
+            print("local queries: 1000 correlated report lookups with tags in %.3fs (%.0fus each), 0 requests"
+                  % (elapsed, 1e6 * elapsed / 1000))
+            mirror.close()
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+"""
+Measures repeated enrichment of a hot set of indicators with |get_indicators_metadata|, without a cache and with each
+|IndicatorCache| backend, against the local mock server with simulated latency.
+
+Run from the repository root with
+``PYTHONPATH=. python benchmarks/bench_indicator_cache.py [--indicators N] [--rounds R] [--latency L]``.
+"""
+from __future__ import print_function
+
+import argparse
+import os
+import random
+import shutil
+import tempfile
+import time
+
+from mock_server import MockServer
+from trustar import TruStar, Indicator, MemoryIndicatorCache, SQLiteIndicatorCache
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--indicators', type=int, default=500)
+    parser.add_argument('--batch-size', type=int, default=50)
+    parser.add_argument('--rounds', type=int, default=200)
+    parser.add_argument('--latency', type=float, default=0.05)
+    args = parser.parse_args()
+
+    hot_set = [Indicator(value="10.0.%d.%d" % (i // 256 % 256, i % 256)) for i in range(args.indicators)]
+    rng = random.Random(0)
+    batches = [rng.sample(hot_set, args.batch_size) for _ in range(args.rounds)]
+
+    tmp_dir = tempfile.mkdtemp()
+    caches = [
+        ("no cache", None),
+        ("MemoryIndicatorCache", MemoryIndicatorCache()),
+        ("SQLiteIndicatorCache", SQLiteIndicatorCache(os.path.join(tmp_dir, "cache.db"))),
+    ]
+
+    try:
+        with MockServer(latency=args.latency) as server:
+            for name, cache in caches:
+                ts = TruStar(config=server.config(indicator_cache=cache))
+                ts.ping()
+                requests_before = server.request_count
+                start = time.time()
+                for batch in batches:
+                    ts.get_indicators_metadata(batch)
+                elapsed = time.time() - start
+
+                hit_ratio = "" if cache is None else "  hit ratio %.2f" % cache.hit_ratio
+                print("%-22s %4d batches in %6.2fs  %4d requests%s"
+                      % (name, len(batches), elapsed, server.request_count - requests_before, hit_ratio))
+    finally:
+        shutil.rmtree(tmp_dir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+"""
+Measures |get_indicators_metadata| on a large list of indicators, which is split into batches by URL length and
+requested concurrently, against the local mock server with simulated latency and a cap on URL length.
+
+Run from the repository root with
+``PYTHONPATH=. python benchmarks/bench_indicator_metadata.py [--indicators N] [--latency L]``.
+"""
+from __future__ import print_function
+
+import argparse
+import time
+
+from requests import HTTPError
+
+from mock_server import MockServer
+from trustar import TruStar, Indicator
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--indicators', type=int, default=20000)
+    parser.add_argument('--max-url-length', type=int, default=8000)
+    parser.add_argument('--latency', type=float, default=0.05)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 4, 8])
+    args = parser.parse_args()
+
+    indicators = [Indicator(value="10.%d.%d.%d" % (i // 65536 % 256, i // 256 % 256, i % 256), type="IP")
+                  for i in range(args.indicators)]
+
+    with MockServer(latency=args.latency, max_url_length=args.max_url_length) as server:
+        ts = TruStar(config=server.config(pool_maxsize=max(args.workers), max_url_length=args.max_url_length))
+
+        # what the method did before: every value in a single request
+        try:
+            ts._client.get("indicators/metadata", params={'values': [i.value for i in indicators],
+                                                          'types': [i.type for i in indicators]})
+            print("single request:  accepted")
+        except HTTPError as e:
+            print("single request:  rejected (%s)" % e.response.status_code)
+
+        for workers in args.workers:
+            requests_before = server.request_count
+            start = time.time()
+            results = ts.get_indicators_metadata(indicators, max_workers=workers)
+            elapsed = time.time() - start
+
+            # batches are merged back in input order
+            assert [i.value for i in results] == [i.value for i in indicators]
+
+            print("max_workers=%-3d %8d indicators in %3d requests in %6.2fs  (%9.0f indicators/s)"
+                  % (workers, len(results), server.request_count - requests_before, elapsed, len(results) / elapsed))
+
+
+if __name__ == '__main__':
+    main()
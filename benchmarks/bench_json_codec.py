@@ -0,0 +1,69 @@
+"""
+Compares the throughput of each installed |JsonCodec| on representative payloads: encoding report submissions and
+indicator submissions, and decoding pages of reports and of indicators with tags into model objects.  Encoding only
+and decoding only; no requests are made.
+
+Run from the repository root with ``PYTHONPATH=. python benchmarks/bench_json_codec.py [--repeat N]``.
+"""
+from __future__ import print_function
+
+import argparse
+import json
+import time
+
+from trustar import Indicator, Page, Report, Tag, get_codec
+from trustar.codec import CODECS
+
+
+def get_payloads():
+    tags = [Tag(name="tag-%d" % i, enclave_id="mock-enclave") for i in range(5)]
+    indicators = [Indicator(value="10.%d.%d.%d" % (i // 65536 % 256, i // 256 % 256, i % 256), type="IP",
+                            first_seen=1500000000000 + i, last_seen=1600000000000 + i, sightings=i % 7,
+                            source="feed", notes="seen in https://example.com/alerts/%d" % i, tags=tags)
+                  for i in range(1000)]
+    report = Report(title="Phishing campaign", body="Observed indicators:\n" + "\n".join(
+        indicator.value for indicator in indicators[:200]), time_began=1500000000000, external_id="ext-1",
+        external_url="https://example.com/reports/1", is_enclave=True, enclave_ids=["mock-enclave"])
+
+    indicator_page = {"items": [dict(indicator.to_dict(), tags=[tag.to_dict() for tag in tags])
+                                for indicator in indicators],
+                      "pageNumber": 0, "pageSize": 1000, "totalElements": 100000, "hasNext": True}
+    report_page = {"items": [dict(report.to_dict(), id="report-%d" % i, reportBody=report.body[:2000])
+                             for i in range(25)],
+                   "pageSize": 25, "hasNext": True}
+    return report, indicators, json.dumps(indicator_page).encode('utf-8'), json.dumps(report_page).encode('utf-8')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    report, indicators, indicator_page, report_page = get_payloads()
+
+    cases = [
+        ("encode report", lambda codec: codec.dumps(report.to_dict())),
+        ("encode 1000 indicators", lambda codec: codec.dumps({"enclaveIds": ["mock-enclave"], "tags": None,
+                                                              "content": [indicator.to_dict()
+                                                                          for indicator in indicators]})),
+        ("decode page of 25 reports", lambda codec: Page.from_dict(codec.loads(report_page), content_type=Report)),
+        ("decode page of 1000 indicators", lambda codec: Page.from_dict(codec.loads(indicator_page),
+                                                                        content_type=Indicator)),
+        ("loads only, 1000 indicators", lambda codec: codec.loads(indicator_page)),
+    ]
+
+    names = [name for name in ('json', 'ujson', 'orjson') if CODECS[name].is_available()]
+    print("%-32s" % "" + "".join("%12s" % name for name in names) + "   (operations/s)")
+    for case, run in cases:
+        rates = []
+        for name in names:
+            codec = get_codec(name)
+            start = time.time()
+            for _ in range(args.repeat):
+                run(codec)
+            rates.append(args.repeat / (time.time() - start))
+        print("%-32s" % case + "".join("%12.1f" % rate for rate in rates))
+
+
+if __name__ == '__main__':
+    main()
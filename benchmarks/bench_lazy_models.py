@@ -0,0 +1,51 @@
+"""
+Compares decoding responses into |Indicator| and |Report| objects eagerly with wrapping them in |LazyIndicator| and
+|LazyReport| objects, for callers that read only one attribute, and for a ``to_dict`` round trip.  Decoding only; no
+requests are made.
+
+Run from the repository root with ``PYTHONPATH=. python benchmarks/bench_lazy_models.py [--items N]``.
+"""
+from __future__ import print_function
+
+import argparse
+import time
+
+from trustar import Indicator, LazyIndicator, LazyReport, Report
+
+
+def timed(func):
+    start = time.time()
+    func()
+    return time.time() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--items', type=int, default=200000)
+    args = parser.parse_args()
+
+    indicators = [{"value": "10.%d.%d.%d" % (i // 65536 % 256, i // 256 % 256, i % 256), "indicatorType": "IP",
+                   "firstSeen": 1500000000000 + i, "lastSeen": 1600000000000 + i, "sightings": i % 7,
+                   "tags": [{"name": "tag-%d" % (i % 10), "guid": "guid-%d" % (i % 10), "enclaveId": "mock-enclave"},
+                            {"name": "feed", "guid": "guid-feed", "enclaveId": "mock-enclave"}],
+                   "enclaveIds": ["mock-enclave"]}
+                  for i in range(args.items)]
+    reports = [{"id": "report-%d" % i, "title": "Report %d" % i, "reportBody": "body", "timeBegan": 1500000000000 + i,
+                "distributionType": "ENCLAVE", "enclaveIds": ["mock-enclave"], "created": i, "updated": i}
+               for i in range(args.items)]
+
+    cases = [
+        ("Indicator", indicators, Indicator, LazyIndicator, lambda indicator: indicator.value),
+        ("Report", reports, Report, LazyReport, lambda report: report.id),
+    ]
+
+    for name, items, eager, lazy, read in cases:
+        for mode, model in (("eager", eager), ("lazy", lazy)):
+            read_one = timed(lambda: [read(model.from_dict(item)) for item in items])
+            round_trip = timed(lambda: [model.from_dict(item).to_dict() for item in items])
+            print("%-9s %-5s x %7d  read one attribute: %5.2fs   to_dict round trip: %5.2fs"
+                  % (name, mode, len(items), read_one, round_trip))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""
+Simulates per-event enrichment code calling |get_indicator_metadata| for one indicator at a time on many threads, and
+compares the requests sent and the time taken with and without ``batch_lookups``.
+
+Run from the repository root with
+``PYTHONPATH=. python benchmarks/bench_micro_batching.py [--threads N] [--lookups N] [--window S]``.
+"""
+from __future__ import print_function
+
+import argparse
+import threading
+import time
+
+from mock_server import MockServer
+from trustar import TruStar
+
+
+def enrich(ts, threads, lookups):
+    """
+    Look up ``lookups`` distinct indicators on each of ``threads`` threads, one at a time.
+
+    :return: The number of seconds taken, and the number of indicators found.
+    """
+
+    found = []
+
+    def worker(thread):
+        count = 0
+        for i in range(lookups):
+            value = "10.%d.%d.%d" % (thread, i // 256 % 256, i % 256)
+            # one in ten events has an indicator the server does not know
+            if i % 10 == 9:
+                value = "unknown-%d-%d.example.com" % (thread, i)
+            if ts.get_indicator_metadata(value) is not None:
+                count += 1
+        found.append(count)
+
+    workers = [threading.Thread(target=worker, args=(thread,)) for thread in range(threads)]
+    start = time.time()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    return time.time() - start, sum(found)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--threads', type=int, default=32)
+    parser.add_argument('--lookups', type=int, default=50, help="lookups made by each thread")
+    parser.add_argument('--window', type=float, default=0.01, help="the batch_window config value")
+    parser.add_argument('--max-size', type=int, default=100, help="the batch_max_size config value")
+    parser.add_argument('--latency', type=float, default=0.02)
+    args = parser.parse_args()
+
+    with MockServer(latency=args.latency) as server:
+        for batch in [False, True]:
+            ts = TruStar(config=server.config(batch_lookups=batch, batch_window=args.window,
+                                              batch_max_size=args.max_size, pool_maxsize=args.threads))
+            ts.get_request_quotas()
+            server.httpd.request_count = 0
+            elapsed, found = enrich(ts, args.threads, args.lookups)
+            total = args.threads * args.lookups
+            assert found == total - total // 10
+            print("batch_lookups=%-5s %5d lookups (%d found), %5d requests sent in %6.2fs  (%.1fms per lookup)"
+                  % (batch, total, found, server.request_count, elapsed, 1000 * elapsed * args.threads / total))
+
+
+if __name__ == '__main__':
+    main()
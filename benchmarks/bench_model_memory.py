@@ -0,0 +1,75 @@
+"""
+Compares the memory used per |Indicator| object by the ``__slots__`` based model with the previous layout, which
+stored the same attributes in a per-instance ``__dict__``, when holding many indicators at once, e.g. for
+de-duplication.
+
+Run from the repository root with ``PYTHONPATH=. python benchmarks/bench_model_memory.py [--indicators N]``.
+"""
+from __future__ import print_function
+
+import argparse
+import gc
+import time
+import tracemalloc
+
+from trustar import Indicator, Report
+
+
+class DictIndicator(object):
+    """
+    The previous |Indicator| layout: the same attributes, stored in a per-instance ``__dict__``.
+    """
+
+    __init__ = Indicator.__init__
+
+
+class DictReport(object):
+    """
+    The previous |Report| layout.
+    """
+
+    __init__ = Report.__init__
+
+
+def measure(create, items):
+    gc.collect()
+    tracemalloc.start()
+    start = time.time()
+    objects = [create(item) for item in items]
+    elapsed = time.time() - start
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del objects
+    return size, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--indicators', type=int, default=1000000)
+    args = parser.parse_args()
+
+    # the items of a get_indicators page: only the value and type are set
+    items = [{"value": "10.%d.%d.%d" % (i // 65536 % 256, i // 256 % 256, i % 256), "indicatorType": "IP"}
+             for i in range(args.indicators)]
+    reports = [{"id": "report-%d" % i, "title": "Report %d" % i, "timeBegan": i, "created": i, "updated": i}
+               for i in range(args.indicators // 10)]
+
+    cases = [
+        ("Indicator", items, lambda d: DictIndicator(value=d['value'], type=d['indicatorType']),
+         lambda d: Indicator(value=d['value'], type=d['indicatorType'])),
+        ("Report", reports, lambda d: DictReport(id=d['id'], title=d['title'], time_began=d['timeBegan'],
+                                                 created=d['created'], updated=d['updated']),
+         lambda d: Report(id=d['id'], title=d['title'], time_began=d['timeBegan'], created=d['created'],
+                          updated=d['updated'])),
+    ]
+
+    for name, data, create_before, create_after in cases:
+        before, before_time = measure(create_before, data)
+        after, after_time = measure(create_after, data)
+        print("%-9s x %8d  __dict__: %6.1f bytes/object (%5.2fs)   __slots__: %6.1f bytes/object (%5.2fs)   %.0f%% less"
+              % (name, len(data), before / len(data), before_time, after / len(data), after_time,
+                 100.0 * (before - after) / before))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""
+Compares ``normalize_timestamp`` with the implementation it replaced, which looked up the system time zone and parsed
+every string with ``dateutil``, over a mix of epoch ints, ISO-8601 strings with and without offsets, and free-form
+strings.  Also times ``normalize_timestamps`` over the same inputs as one column.  No requests are made.
+
+Run from the repository root with ``PYTHONPATH=. python benchmarks/bench_normalize_timestamp.py [--items N]``.
+"""
+from __future__ import print_function
+
+import argparse
+import time
+from datetime import datetime
+
+import dateutil.parser
+import pytz
+from tzlocal import get_localzone
+
+from trustar.utils import normalize_timestamp, normalize_timestamps
+
+
+def baseline_normalize_timestamp(date_time):
+    """
+    The previous implementation, adapted to time zones without ``localize``.
+    """
+
+    datetime_dt = datetime.now()
+    current_time = int(time.time()) * 1000
+
+    if isinstance(date_time, int):
+        if date_time < 10000000000:
+            date_time *= 1000
+        if date_time > current_time:
+            raise ValueError("The given time %s is in the future." % date_time)
+        return date_time
+
+    if isinstance(date_time, str):
+        datetime_dt = dateutil.parser.parse(date_time)
+    elif isinstance(date_time, datetime):
+        datetime_dt = date_time
+
+    if not datetime_dt.tzinfo:
+        datetime_dt = datetime_dt.replace(tzinfo=get_localzone()).astimezone(pytz.utc)
+    return datetime_dt.isoformat()
+
+
+def get_inputs(count):
+    inputs = []
+    for i in range(count):
+        seconds = 1500000000 + i * 37
+        kind = i % 10
+        if kind < 3:
+            inputs.append(seconds * 1000)
+        elif kind < 5:
+            inputs.append(seconds)
+        elif kind < 7:
+            inputs.append(datetime.utcfromtimestamp(seconds).strftime("%Y-%m-%dT%H:%M:%S"))
+        elif kind < 9:
+            inputs.append(datetime.utcfromtimestamp(seconds).strftime("%Y-%m-%dT%H:%M:%S.000+00:00"))
+        else:
+            inputs.append(datetime.utcfromtimestamp(seconds).strftime("%b %d %Y %H:%M:%S"))
+    return inputs
+
+
+def timed(func):
+    start = time.time()
+    result = func()
+    return time.time() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--items', type=int, default=1000000)
+    args = parser.parse_args()
+
+    inputs = get_inputs(args.items)
+
+    baseline_time, expected = timed(lambda: [baseline_normalize_timestamp(date_time) for date_time in inputs])
+    fast_time, results = timed(lambda: [normalize_timestamp(date_time) for date_time in inputs])
+    batch_time, batch_results = timed(lambda: normalize_timestamps(inputs))
+
+    assert results == expected and batch_results == expected
+
+    print("%d mixed timestamps" % len(inputs))
+    print("  baseline (tzlocal + dateutil per call): %6.2fs" % baseline_time)
+    print("  normalize_timestamp:                    %6.2fs" % fast_time)
+    print("  normalize_timestamps:                   %6.2fs" % batch_time)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,43 @@
+"""
+Compares serial pagination with parallel page prefetch (``max_workers``) when exporting indicators from the local mock
+server with simulated network latency.
+
+Run from the repository root with
+``PYTHONPATH=. python benchmarks/bench_page_prefetch.py [--indicators N] [--page-size S] [--latency L]``.
+"""
+from __future__ import print_function
+
+import argparse
+import time
+
+from mock_server import MockServer
+from trustar import TruStar
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--indicators', type=int, default=20000)
+    parser.add_argument('--page-size', type=int, default=1000)
+    parser.add_argument('--latency', type=float, default=0.05)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 4, 8])
+    args = parser.parse_args()
+
+    with MockServer(latency=args.latency, total_indicators=args.indicators) as server:
+        ts = TruStar(config=server.config(pool_maxsize=max(args.workers)))
+        expected = None
+        for workers in args.workers:
+            start = time.time()
+            values = [i.value for i in ts.get_indicators(page_size=args.page_size, max_workers=workers)]
+            elapsed = time.time() - start
+
+            # prefetching must not change the order of the results
+            if expected is None:
+                expected = values
+            assert values == expected
+
+            print("max_workers=%-3d %8d indicators in %6.2fs  (%9.0f indicators/s)"
+                  % (workers, len(values), elapsed, len(values) / elapsed))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+"""
+Compares serial report harvesting with concurrent, time-sliced harvesting (``get_reports(max_workers=...)``) over a
+multi-month backfill from the local mock server.
+
+Run from the repository root with
+``PYTHONPATH=. python benchmarks/bench_report_harvest.py [--reports N] [--days D] [--latency L]``.
+"""
+from __future__ import print_function
+
+import argparse
+import time
+
+from mock_server import MockServer, DAY
+from trustar import TruStar
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--reports', type=int, default=5000)
+    parser.add_argument('--days', type=int, default=90, help="the span of the backfill")
+    parser.add_argument('--latency', type=float, default=0.02)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 4, 8])
+    args = parser.parse_args()
+
+    interval = args.days * DAY // args.reports
+    with MockServer(latency=args.latency, total_reports=args.reports, report_interval=interval) as server:
+        ts = TruStar(config=server.config(pool_maxsize=max(args.workers)))
+        from_time = server.now - args.days * DAY
+        expected = None
+
+        for workers in args.workers:
+            for ordered in ([True] if workers == 1 else [True, False]):
+                start = time.time()
+                ids = [r.id for r in ts.get_reports(from_time=from_time, to_time=server.now,
+                                                    max_workers=workers, ordered=ordered)]
+                elapsed = time.time() - start
+
+                if expected is None:
+                    expected = ids
+                if ordered:
+                    assert ids == expected
+                else:
+                    assert sorted(ids) == sorted(expected)
+
+                print("max_workers=%-3d ordered=%-5s %6d reports in %6.2fs  (%8.0f reports/s)"
+                      % (workers, ordered, len(ids), elapsed, len(ids) / elapsed))
+
+
+if __name__ == '__main__':
+    main()
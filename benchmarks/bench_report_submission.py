@@ -0,0 +1,64 @@
+"""
+Compares submitting reports one at a time, as the examples used to, with |submit_reports|, and checks that its retries
+never create a report twice, even when the server fails requests or creates reports without the response arriving.
+
+Run from the repository root with
+``PYTHONPATH=. python benchmarks/bench_report_submission.py [--reports N] [--workers N] [--rate R]``.
+"""
+from __future__ import print_function
+
+import argparse
+import time
+
+from mock_server import MockServer
+from trustar import TruStar, Report, RetryPolicy
+
+
+def make_reports(count, prefix):
+    return [Report(title="Report %d" % i, body="Report %d mentions 10.1.%d.%d" % (i, i // 256 % 256, i % 256),
+                   external_id="%s-%d" % (prefix, i), enclave_ids=['mock-enclave'])
+            for i in range(count)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--reports', type=int, default=200)
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--rate', type=float, default=100, help="reports per second for the paced run")
+    parser.add_argument('--latency', type=float, default=0.02)
+    parser.add_argument('--example-sleep', type=float, default=2, help="the sleep between submissions in the examples")
+    args = parser.parse_args()
+
+    with MockServer(latency=args.latency) as server:
+        ts = TruStar(config=server.config(pool_maxsize=args.workers))
+        ts.get_request_quotas()
+
+        start = time.time()
+        for report in make_reports(args.reports, "serial"):
+            ts.submit_report(report)
+        elapsed = time.time() - start
+        print("serial loop            %4d reports in %6.2fs  (%.2fs with the examples' %gs sleeps)"
+              % (args.reports, elapsed, elapsed + args.reports * args.example_sleep, args.example_sleep))
+
+        for name, rate in [("submit_reports", None), ("submit_reports paced", args.rate)]:
+            start = time.time()
+            results = ts.submit_reports(make_reports(args.reports, name), max_workers=args.workers, rate=rate)
+            elapsed = time.time() - start
+            assert all(result.succeeded for result in results)
+            print("%-22s %4d reports in %6.2fs  (%.0f reports/s)" % (name, len(results), elapsed, len(results) / elapsed))
+
+    # the server fails 5% of requests, and creates 5% of reports without responding
+    with MockServer(latency=args.latency, fail_rate=0.05, lost_response_rate=0.05) as server:
+        ts = TruStar(config=server.config(pool_maxsize=args.workers, retry_policy=RetryPolicy(base_delay=0.01)))
+        results = ts.submit_reports(make_reports(args.reports, "flaky"), max_workers=args.workers)
+        external_ids = [report["externalTrackingId"] for report in server.submitted_reports]
+        succeeded = sum(1 for result in results if result.succeeded)
+        retried = sum(1 for result in results if result.attempts > 1)
+        print("flaky server: %d/%d succeeded, %d retried, %d failures injected, %d reports created, %d duplicates"
+              % (succeeded, len(results), retried, server.failures, len(external_ids),
+                 len(external_ids) - len(set(external_ids))))
+        assert len(external_ids) == len(set(external_ids))
+
+
+if __name__ == '__main__':
+    main()
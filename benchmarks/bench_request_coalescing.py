@@ -0,0 +1,71 @@
+"""
+Simulates an alert storm, in which many enrichment threads look up the same few reports and indicators at the same
+moment, and compares the requests sent and the time taken with and without ``coalesce_requests``.
+
+Run from the repository root with
+``PYTHONPATH=. python benchmarks/bench_request_coalescing.py [--threads N] [--lookups N] [--hot-keys K]``.
+"""
+from __future__ import print_function
+
+import argparse
+import random
+import threading
+import time
+
+from mock_server import MockServer
+from trustar import TruStar, Indicator
+
+
+def storm(ts, threads, lookups, hot_keys):
+    """
+    Make ``lookups`` lookups on each of ``threads`` threads, all of them for one of ``hot_keys`` reports or indicators.
+
+    :return: The number of seconds taken.
+    """
+
+    barrier = threading.Barrier(threads)
+
+    def enrich(seed):
+        rand = random.Random(seed)
+        barrier.wait()
+        for _ in range(lookups):
+            i = rand.randrange(hot_keys)
+            kind = rand.randrange(3)
+            if kind == 0:
+                ts.get_report_details("report-%d" % i)
+            elif kind == 1:
+                ts.get_enclave_tags("report-%d" % i)
+            else:
+                ts.get_indicators_metadata([Indicator("10.0.0.%d" % i)])
+
+    workers = [threading.Thread(target=enrich, args=(seed,)) for seed in range(threads)]
+    start = time.time()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return time.time() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--threads', type=int, default=32)
+    parser.add_argument('--lookups', type=int, default=50, help="lookups made by each thread")
+    parser.add_argument('--hot-keys', type=int, default=10, help="distinct reports and indicators looked up")
+    parser.add_argument('--latency', type=float, default=0.02)
+    args = parser.parse_args()
+
+    with MockServer(latency=args.latency) as server:
+        for coalesce in [False, True]:
+            ts = TruStar(config=server.config(coalesce_requests=coalesce, pool_maxsize=args.threads))
+            ts.get_request_quotas()
+            server.httpd.request_count = 0
+            elapsed = storm(ts, args.threads, args.lookups, args.hot_keys)
+            stats = ts.coalescing_stats
+            print("coalesce_requests=%-5s %5d lookups, %5d requests sent in %6.2fs  (coalescing ratio %s)"
+                  % (coalesce, args.threads * args.lookups, server.request_count, elapsed,
+                     "%.2f" % stats.coalescing_ratio if stats.coalescing_ratio is not None else "n/a"))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""
+Compares submitting large reports and indicator submissions with and without gzip request compression
+(``compress_requests``), against the local mock server emulating a link of limited bandwidth, and reads pages of
+indicators with and without compressed responses.  Reports the client's |TransferStats| for each run.
+
+Run from the repository root with
+``PYTHONPATH=. python benchmarks/bench_request_compression.py [--reports N] [--report-kb K] [--bandwidth B]``.
+"""
+from __future__ import print_function
+
+import argparse
+import random
+import time
+
+from mock_server import MockServer
+from trustar import Indicator, Report, TruStar
+
+WORDS = ("the actor used a spear phishing email with a malicious attachment that dropped a loader which contacted "
+         "its command and control server over https and downloaded a second stage payload").split()
+
+
+def get_report_body(rng, num_bytes):
+    """
+    :return: Text resembling a threat report pasted from a PDF, with IP addresses and hashes among the prose.
+    """
+
+    parts = []
+    size = 0
+    while size < num_bytes:
+        if rng.random() < 0.05:
+            part = "%d.%d.%d.%d" % tuple(rng.randrange(256) for _ in range(4))
+        elif rng.random() < 0.02:
+            part = "%032x" % rng.getrandbits(128)
+        else:
+            part = rng.choice(WORDS)
+        parts.append(part)
+        size += len(part) + 1
+    return " ".join(parts)
+
+
+def run(name, server, compress, func, **config):
+    ts = TruStar(config=server.config(compress_requests=compress, **config))
+    ts.ping()
+    ts.transfer_stats.reset()
+
+    start = time.time()
+    func(ts)
+    elapsed = time.time() - start
+
+    stats = ts.transfer_stats
+    print("%-40s %6.2fs   sent %7.2f MB (%5.1f%%)   received %6.2f MB (%5.1f%%)   compressing %5.2fs"
+          % (name, elapsed, stats.request_bytes / 1e6, 100 * (stats.request_compression_ratio or 1),
+             stats.response_bytes / 1e6, 100 * (stats.response_compression_ratio or 1), stats.compression_time))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--reports', type=int, default=20)
+    parser.add_argument('--report-kb', type=int, default=1000)
+    parser.add_argument('--indicators', type=int, default=20000)
+    parser.add_argument('--bandwidth', type=float, default=10e6, help="bytes per second")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    bodies = [get_report_body(rng, args.report_kb * 1000) for _ in range(args.reports)]
+    indicators = [Indicator(value="%d.%d.%d.%d" % tuple(rng.randrange(256) for _ in range(4)), type="IP",
+                            source="feed", notes="observed in campaign %d" % (i % 100)) for i in range(args.indicators)]
+
+    def submit_reports(ts):
+        for i, body in enumerate(bodies):
+            ts.submit_report(Report(title="Report %d" % i, body=body, time_began=1500000000000))
+
+    def submit_indicators(ts):
+        ts.submit_indicators(indicators, chunk_size=5000)
+
+    def read_indicators(ts):
+        for _ in ts.get_indicators(page_size=1000):
+            pass
+
+    with MockServer(bandwidth=args.bandwidth, total_indicators=args.indicators, indicator_tags=5,
+                    compress_responses=True) as server:
+        for compress in (False, True):
+            suffix = " (gzip)" if compress else ""
+            run("%d reports of %d KB%s" % (args.reports, args.report_kb, suffix), server, compress, submit_reports)
+            run("%d indicators%s" % (args.indicators, suffix), server, compress, submit_indicators)
+
+    for compress_responses in (False, True):
+        with MockServer(bandwidth=args.bandwidth, total_indicators=args.indicators, indicator_tags=5,
+                        compress_responses=compress_responses) as server:
+            run("read %d indicators%s" % (args.indicators, " (gzip responses)" if compress_responses else ""),
+                server, False, read_indicators)
+
+
+if __name__ == '__main__':
+    main()
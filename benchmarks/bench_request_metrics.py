@@ -0,0 +1,63 @@
+"""
+Measures the overhead of per-request metrics (the ``metrics_sinks`` config value) on a fast local mock server, and
+prints the per-endpoint summary and Prometheus exposition collected by a |HistogramSink|.
+
+Run from the repository root with
+``PYTHONPATH=. python benchmarks/bench_request_metrics.py [--requests N] [--fail-rate F]``.
+"""
+from __future__ import print_function
+
+import argparse
+import time
+
+from mock_server import MockServer
+from trustar import TruStar, HistogramSink, Indicator, RetryPolicy
+
+
+def run(ts, requests):
+    start = time.time()
+    for i in range(requests):
+        if i % 2:
+            ts.get_indicators_page(page_number=i % 10, page_size=25)
+        else:
+            ts.get_indicators_metadata([Indicator("10.0.0.%d" % (i % 256))])
+    return time.time() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--fail-rate', type=float, default=0.02)
+    args = parser.parse_args()
+
+    with MockServer(fail_rate=args.fail_rate) as server:
+        policy = RetryPolicy(base_delay=0.001, max_delay=0.01)
+        disabled = TruStar(config=server.config(retry_policy=policy))
+        sink = HistogramSink()
+        enabled = TruStar(config=server.config(retry_policy=policy, metrics_sinks=[sink]))
+
+        # warm up connections and tokens
+        run(disabled, 50)
+        run(enabled, 50)
+        sink.reset()
+
+        timings = {'disabled': [], 'enabled': []}
+        for _ in range(3):
+            timings['disabled'].append(run(disabled, args.requests))
+            timings['enabled'].append(run(enabled, args.requests))
+        for name in ['disabled', 'enabled']:
+            best = min(timings[name])
+            print("metrics %-8s %6d requests in %6.3fs  (%6.1fus per request)"
+                  % (name, args.requests, best, 1e6 * best / args.requests))
+
+        for (method, path), stats in sorted(sink.get_stats().items()):
+            print("%-4s %-22s %6d requests, p50 %.3fs, p99 %.3fs, ttfb mean %.4fs, %d retries, statuses %s"
+                  % (method, path, stats['requests'], stats['total_time']['p50'], stats['total_time']['p99'],
+                     stats['ttfb']['mean'], stats['retries'], stats['status_codes']))
+
+        exposition = sink.to_prometheus()
+        print("\n".join(line for line in exposition.splitlines() if line.startswith("trustar_api_requests_total")))
+
+
+if __name__ == '__main__':
+    main()
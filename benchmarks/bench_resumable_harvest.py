@@ -0,0 +1,110 @@
+"""
+Compares restarting an interrupted harvest from scratch with resuming it from a checkpoint (``checkpoint=`` and
+``resume_from=``), for both the time-based |get_reports| and the page-number-based |get_indicators|, and measures the
+cost of saving a checkpoint after every page with each store.
+
+Run from the repository root with
+``PYTHONPATH=. python benchmarks/bench_resumable_harvest.py [--reports N] [--indicators N] [--crash-at F]``.
+"""
+from __future__ import print_function
+
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+from mock_server import MockServer, DAY
+from trustar import TruStar, FileCheckpointStore, SQLiteCheckpointStore
+
+
+class Crash(Exception):
+    pass
+
+
+def harvest(get_items, checkpoint=None, crash_after=None):
+    """
+    :return: The IDs harvested, and whether the harvest crashed after ``crash_after`` items.
+    """
+
+    ids = []
+    resume_from = checkpoint.load() if checkpoint is not None else None
+    try:
+        for item in get_items(checkpoint=checkpoint, resume_from=resume_from):
+            if crash_after is not None and len(ids) >= crash_after:
+                raise Crash()
+            ids.append(item)
+    except Crash:
+        return ids, True
+    return ids, False
+
+
+def run(name, server, get_items, total, crash_at, store):
+    crash_after = int(total * crash_at)
+
+    # restart from scratch: everything harvested before the crash is fetched again
+    server.httpd.request_count = 0
+    start = time.time()
+    harvest(get_items, crash_after=crash_after)
+    restarted, _ = harvest(get_items)
+    elapsed = time.time() - start
+    print("%-10s restart: %6d items, %5d requests in %6.2fs" % (name, len(restarted), server.request_count, elapsed))
+
+    checkpoint = store.checkpoint(name)
+    checkpoint.clear()
+    server.httpd.request_count = 0
+    start = time.time()
+    before, crashed = harvest(get_items, checkpoint=checkpoint, crash_after=crash_after)
+    after, _ = harvest(get_items, checkpoint=checkpoint)
+    elapsed = time.time() - start
+    assert crashed
+    # the page being processed at the time of the crash is harvested again
+    assert set(before) | set(after) == set(restarted)
+    print("%-10s resume:  %6d items, %5d requests in %6.2fs  (%d items re-harvested)"
+          % (name, len(before) + len(after), server.request_count, elapsed, len(set(before) & set(after))))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--reports', type=int, default=5000)
+    parser.add_argument('--indicators', type=int, default=50000)
+    parser.add_argument('--page-size', type=int, default=100)
+    parser.add_argument('--latency', type=float, default=0.005)
+    parser.add_argument('--crash-at', type=float, default=0.8, help="the fraction harvested before the crash")
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    try:
+        interval = 30 * DAY // args.reports
+        with MockServer(latency=args.latency, total_reports=args.reports, report_interval=interval,
+                        total_indicators=args.indicators) as server:
+            ts = TruStar(config=server.config())
+            from_time = server.now - 30 * DAY
+
+            def get_reports(**kwargs):
+                return (r.id for r in ts.get_reports(from_time=from_time, to_time=server.now, **kwargs))
+
+            def get_indicators(**kwargs):
+                return (i.value for i in ts.get_indicators(to_time=server.now, page_size=args.page_size, **kwargs))
+
+            store = FileCheckpointStore(os.path.join(directory, "checkpoints.json"))
+            run("reports", server, get_reports, args.reports, args.crash_at, store)
+            run("indicators", server, get_indicators, args.indicators, args.crash_at, store)
+
+            # the cost of checkpointing every page of a full export
+            stores = [("none", None),
+                      ("file", FileCheckpointStore(os.path.join(directory, "overhead.json"))),
+                      ("sqlite", SQLiteCheckpointStore(os.path.join(directory, "overhead.db")))]
+            for name, overhead_store in stores:
+                checkpoint = overhead_store.checkpoint("overhead") if overhead_store is not None else None
+                start = time.time()
+                count = sum(1 for _ in get_indicators(checkpoint=checkpoint))
+                elapsed = time.time() - start
+                print("checkpoint=%-7s %6d indicators in %6.2fs  (%.2fms per page)"
+                      % (name, count, elapsed, 1000 * elapsed / (count // args.page_size)))
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main()
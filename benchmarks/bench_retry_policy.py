@@ -0,0 +1,71 @@
+"""
+Exports pages of indicators from the local mock server while it fails a fraction of requests with a 503 or drops
+their connections, with and without retries by a |RetryPolicy|.  Reports whether each export completed, how long it
+took, and the client's |RetryStats|.  Also submits reports through dropped connections, to show that ``POST``
+requests are not retried, so that no report is submitted twice.
+
+Run from the repository root with
+``PYTHONPATH=. python benchmarks/bench_retry_policy.py [--indicators N] [--fail-rate F] [--drop-rate D]``.
+"""
+from __future__ import print_function
+
+import argparse
+import time
+
+from mock_server import MockServer
+from trustar import Report, RetryPolicy, TruStar
+
+
+def run(name, server, policy, func):
+    ts = TruStar(config=server.config(retry_policy=policy))
+    ts.ping()
+    ts.retry_stats.reset()
+
+    start = time.time()
+    try:
+        result = "%d items" % func(ts)
+    except Exception as e:
+        result = "failed: %s" % type(e).__name__
+    elapsed = time.time() - start
+
+    print("%-34s %6.2fs   %-28s %s" % (name, elapsed, result, ts.retry_stats))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--indicators', type=int, default=20000)
+    parser.add_argument('--page-size', type=int, default=100)
+    parser.add_argument('--fail-rate', type=float, default=0.05)
+    parser.add_argument('--drop-rate', type=float, default=0.01)
+    parser.add_argument('--reports', type=int, default=200)
+    parser.add_argument('--base-delay', type=float, default=0.05, help="seconds before the first retry")
+    args = parser.parse_args()
+
+    def export_indicators(ts):
+        return sum(1 for _ in ts.get_indicators(page_size=args.page_size))
+
+    def submit_reports(ts):
+        submitted = 0
+        for i in range(args.reports):
+            try:
+                ts.submit_report(Report(title="Report %d" % i, body="body", time_began=1500000000000))
+                submitted += 1
+            except Exception:
+                pass
+        return submitted
+
+    no_retries = RetryPolicy(max_attempts=1)
+    backoff = RetryPolicy(base_delay=args.base_delay)
+
+    for policy_name, policy in (("no retries", no_retries), ("backoff", backoff)):
+        with MockServer(total_indicators=args.indicators, fail_rate=args.fail_rate, drop_rate=args.drop_rate) as server:
+            run("export (%s)" % policy_name, server, policy, export_indicators)
+
+    with MockServer(drop_rate=args.drop_rate * 5) as server:
+        run("submit %d reports (backoff)" % args.reports, server, backoff, submit_reports)
+        print("%-34s %d received by the server, %d connections dropped"
+              % ("", len(server.submitted_reports), server.failures))
+
+
+if __name__ == '__main__':
+    main()
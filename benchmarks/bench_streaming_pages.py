@@ -0,0 +1,77 @@
+"""
+Compares reading pages of indicators with tags from the mock server by decoding each whole response, with decoding
+each indicator from the response stream as it is generated (``streaming=True``), for throughput and for the peak
+memory allocated by the client while reading.  The server runs in a separate process, so that its allocations are not
+counted.
+
+Run from the repository root with
+``PYTHONPATH=. python benchmarks/bench_streaming_pages.py [--indicators N] [--page-size P] [--tags T]``.
+"""
+from __future__ import print_function
+
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import time
+import tracemalloc
+
+from mock_server import get_config
+from trustar import TruStar
+
+
+def start_server(indicators, tags):
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    sock.close()
+
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "mock_server.py")
+    process = subprocess.Popen([sys.executable, path, "--port", str(port), "--total-indicators", str(indicators),
+                                "--indicator-tags", str(tags)], stdout=subprocess.PIPE)
+    # wait until the server is listening
+    process.stdout.readline()
+    return process, port
+
+
+def read_indicators(ts, page_size, streaming):
+    count = 0
+    for indicator in ts.get_indicators(page_size=page_size, streaming=streaming):
+        count += len(indicator.tags)
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--indicators', type=int, default=20000)
+    parser.add_argument('--page-size', type=int, default=1000)
+    parser.add_argument('--tags', type=int, default=20)
+    args = parser.parse_args()
+
+    process, port = start_server(args.indicators, args.tags)
+    try:
+        ts = TruStar(config=get_config(port))
+        ts.ping()
+
+        for streaming in (False, True):
+            start = time.time()
+            count = read_indicators(ts, args.page_size, streaming)
+            elapsed = time.time() - start
+
+            # measured in a second pass, since tracing allocations slows everything down
+            tracemalloc.start()
+            read_indicators(ts, args.page_size, streaming)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            mode = "streaming" if streaming else "whole response"
+            print("%-15s %d indicators, %d tags in %5.2fs   peak memory %6.1f MB"
+                  % (mode, args.indicators, count, elapsed, peak / 1e6))
+    finally:
+        process.terminate()
+        process.wait()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+"""
+Measures loading a |WhitelistIndex| from the local mock server, and the rate of local membership checks against it,
+for a mix of whitelisted domains, IP addresses within whitelisted CIDR blocks, and values that are not whitelisted.
+
+Run from the repository root with
+``PYTHONPATH=. python benchmarks/bench_whitelist_index.py [--whitelist-size N] [--checks C]``.
+"""
+from __future__ import print_function
+
+import argparse
+import random
+import time
+
+from mock_server import MockServer
+from trustar import TruStar
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--whitelist-size', type=int, default=100000)
+    parser.add_argument('--page-size', type=int, default=1000)
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--checks', type=int, default=1000000)
+    parser.add_argument('--latency', type=float, default=0.01)
+    args = parser.parse_args()
+
+    with MockServer(latency=args.latency, whitelist_size=args.whitelist_size) as server:
+        ts = TruStar(config=server.config(pool_maxsize=args.workers))
+
+        start = time.time()
+        index = ts.get_whitelist_index(page_size=args.page_size, max_workers=args.workers)
+        print("loaded %d entries in %.2fs" % (len(index), time.time() - start))
+
+    rng = random.Random(0)
+    values = []
+    for _ in range(args.checks):
+        kind = rng.randrange(4)
+        if kind == 0:
+            values.append("whitelisted-%d.example.com" % rng.randrange(args.whitelist_size))
+        elif kind == 1:
+            values.append("172.%d.%d.%d" % (rng.randrange(16, 32), rng.randrange(256), rng.randrange(256)))
+        elif kind == 2:
+            values.append("unknown-%d.example.org" % rng.randrange(args.whitelist_size))
+        else:
+            values.append("10.%d.%d.%d" % (rng.randrange(256), rng.randrange(256), rng.randrange(256)))
+
+    start = time.time()
+    whitelisted = sum(1 for value in values if value in index)
+    elapsed = time.time() - start
+    print("%d checks (%d whitelisted) in %.2fs  (%.2fM checks/s)"
+          % (len(values), whitelisted, elapsed, len(values) / elapsed / 1e6))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,655 @@
+"""
+A local stand-in for the TruSTAR REST API, used to benchmark the SDK without touching the live API or burning quota.
+
+Run standalone with ``PYTHONPATH=. python benchmarks/mock_server.py --port 8000``, or start it in-process with
+``MockServer().start()`` and point a |TruStar| client at ``server.config()``.
+"""
+from __future__ import print_function
+
+import argparse
+import gzip
+import json
+import random
+import sys
+import threading
+import time
+
+try:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
+    from urllib.parse import urlparse, parse_qs
+except ImportError:
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn
+    from urlparse import urlparse, parse_qs
+
+
+API_PREFIX = "/api/1.3"
+
+DAY = 24 * 60 * 60 * 1000
+
+# the real endpoint returns reports from a window of at most two weeks, in pages of at most 25
+REPORTS_WINDOW = 14 * DAY
+REPORTS_PAGE_SIZE = 25
+
+
+def get_config(port, **kwargs):
+    """
+    :param int port: The port a mock server is listening on, e.g. one started in another process.
+    :return: A |TruStar| config dictionary pointing at the server.  Keyword arguments override config values.
+    """
+
+    config = {
+        'user_api_key': 'mock-key',
+        'user_api_secret': 'mock-secret',
+        'auth_endpoint': "http://127.0.0.1:%d/oauth/token" % port,
+        'api_endpoint': "http://127.0.0.1:%d%s" % (port, API_PREFIX),
+        'enclave_ids': ['mock-enclave'],
+    }
+    config.update(kwargs)
+    return config
+
+
+class _ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+    request_queue_size = 128
+
+
+class MockHandler(BaseHTTPRequestHandler):
+
+    # HTTP/1.1 is required for connections to be kept alive between requests
+    protocol_version = "HTTP/1.1"
+
+    # headers and body are written separately; without this, keep-alive connections stall on delayed ACKs
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body, content_type="application/json"):
+        if not isinstance(body, bytes):
+            body = json.dumps(body).encode('utf-8') if content_type == "application/json" else body.encode('utf-8')
+
+        headers = {"Content-Type": content_type}
+        # like most servers, only compress bodies large enough to benefit
+        if (self.server.compress_responses and len(body) >= 1024
+                and 'gzip' in self.headers.get('Accept-Encoding', '')):
+            body = gzip.compress(body)
+            headers["Content-Encoding"] = "gzip"
+        headers["Content-Length"] = str(len(body))
+
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        self._transfer(len(body))
+
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _transfer(self, num_bytes):
+        # emulate a link of limited bandwidth
+        if self.server.bandwidth:
+            time.sleep(float(num_bytes) / self.server.bandwidth)
+
+    def _read_body(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length else b''
+        self._transfer(len(body))
+        self.server.count_body_bytes(len(body))
+        if self.headers.get('Content-Encoding') == 'gzip':
+            body = gzip.decompress(body)
+        return body
+
+    def _route(self, method):
+        self.server.count_request()
+        url = urlparse(self.path)
+        params = parse_qs(url.query)
+        body = self._read_body()
+
+        if url.path == "/oauth/token" and method == "POST":
+            token, expires_in = self.server.issue_token()
+            return self._send(200, {"access_token": token, "token_type": "bearer", "expires_in": expires_in})
+
+        if not url.path.startswith(API_PREFIX):
+            return self._send(404, {"message": "not found"})
+
+        if not self.server.is_valid_token(self.headers.get('Authorization', '')[len("Bearer "):]):
+            return self._send(400, {"error": "invalid_token", "error_description": "Expired oauth2 access token"})
+        path = url.path[len(API_PREFIX):].strip("/")
+
+        # like the real API, answer requests over the quota with a 429 telling the client how long to wait
+        wait_time = self.server.get_rate_limit_wait(path)
+        if wait_time is not None:
+            return self._send(429, {"message": "Too many requests", "waitTime": wait_time})
+
+        # inject failures after the body has been read, as if the server failed while handling the request
+        failure = self.server.get_failure()
+        if failure == 'drop':
+            self.close_connection = True
+            return
+        if failure is not None:
+            return self._send(failure, {"message": "injected failure"})
+
+        max_body_bytes = self.server.max_body_bytes
+        if max_body_bytes is not None and len(body) > max_body_bytes:
+            return self._send(413, {"message": "Request entity too large"})
+
+        if path == "ping":
+            return self._send(200, "pong\n", content_type="text/plain")
+        if path == "version":
+            return self._send(200, "1.3\n", content_type="text/plain")
+        if path == "indicators" and method == "GET":
+            return self._send(200, self.server.indicators_page(params))
+        if path in ("indicators/metadata", "indicators/details") and method == "GET":
+            max_url_length = self.server.max_url_length
+            if max_url_length is not None and len(self.path) > max_url_length:
+                return self._send(414, {"message": "Request-URI too long"})
+            values = params.get('values' if path == "indicators/metadata" else 'indicatorValues', [])
+            # values containing "unknown" are not found, as if no enclave the user can read contains them
+            return self._send(200, [{"value": value, "indicatorType": "IP", "sightings": len(value)}
+                                    for value in values if "unknown" not in value])
+        if path == "whitelist" and method == "GET":
+            return self._send(200, self.server.whitelist_page(params))
+        if path == "whitelist" and method == "POST":
+            return self._send(200, self.server.add_to_whitelist(json.loads(body.decode('utf-8'))))
+        if path == "whitelist" and method == "DELETE":
+            self.server.delete_from_whitelist(params.get('value', [None])[0])
+            return self._send(200, "", content_type="text/plain")
+        if path == "indicators" and method == "POST":
+            self.server.submit_indicators(json.loads(body.decode('utf-8'))['content'])
+            return self._send(200, "", content_type="text/plain")
+        if path == "request-quotas" and method == "GET":
+            return self._send(200, self.server.request_quotas())
+        if path == "reports" and method == "GET":
+            return self._send(200, self.server.reports_page(params))
+        if path.startswith("reports/") and path.endswith("/indicators") and method == "GET":
+            return self._send(200, self.server.report_indicators_page(path.split("/")[1], params))
+        if path.startswith("reports/") and path.endswith("/tags") and method == "GET":
+            return self._send(200, self.server.report_tags(path.split("/")[1]))
+        if path.startswith("reports/") and path.count("/") == 1 and method == "GET":
+            report = self.server.get_report(path.split("/")[1], params.get('idType', ["internal"])[0])
+            if report is None:
+                return self._send(404, {"message": "Report not found"})
+            return self._send(200, report)
+        if path == "reports" and method == "POST":
+            report_id = self.server.submit_report(json.loads(body.decode('utf-8')))
+            if self.server.lose_response():
+                # the report was created, but the client never hears about it
+                self.close_connection = True
+                return
+            return self._send(200, report_id, content_type="text/plain")
+
+        return self._send(404, {"message": "not found"})
+
+    def do_GET(self):
+        self._route("GET")
+
+    def do_POST(self):
+        self._route("POST")
+
+    def do_PUT(self):
+        self._route("PUT")
+
+    def do_DELETE(self):
+        self._route("DELETE")
+
+
+class MockServer(object):
+    """
+    A threaded HTTP server implementing the subset of the TruSTAR API used by the benchmarks.
+
+    :param int port: The port to listen on.  ``0`` picks a free port.
+    :param float latency: Seconds to sleep before sending every response.
+    :param int total_indicators: The number of indicators served by the ``indicators`` endpoint.
+    :param int total_reports: The number of reports served by the ``reports`` endpoint.
+    :param int reports_page_size: The maximum number of reports in each page of the ``reports`` endpoint.
+    :param int max_page_size: If given, the ``pageSize`` parameter of the page-number-based endpoints is capped at this.
+    :param int report_interval: The number of milliseconds between the ``updated`` times of consecutive reports.  The
+        newest report was updated at the time the server was created.
+    :param int quota_max_requests: The number of requests allowed per ``quota_time_window``, as reported by the
+        ``request-quotas`` endpoint.
+    :param int quota_time_window: The length of the request quota window in milliseconds.
+    :param bool enforce_quota: Whether API requests beyond ``quota_max_requests`` in a quota window are answered with a
+        429 whose ``waitTime`` lasts until the window resets.  Requests to ``request-quotas`` are never limited.
+    :param float rate_limit_rate: The fraction of API requests answered with a 429 regardless of the quota.
+    :param int rate_limit_wait: The ``waitTime`` of injected 429s, in milliseconds.  The SDK rounds it up to seconds.
+    :param float token_lifetime: The number of seconds each OAuth2 token is valid for.
+    :param int max_body_bytes: Request bodies larger than this are rejected with a 413, as by the real API's proxy.
+    :param int max_url_length: Requests whose path and query string are longer than this are rejected with a 414.
+    :param int whitelist_size: The number of indicators initially on the whitelist, of which one in ten is a CIDR block.
+    :param int indicator_tags: The number of tags attached to each indicator served by the ``indicators`` endpoint.
+    :param int indicator_interval: If given, the indicators served by the ``indicators`` endpoint have ``lastSeen``
+        times this many milliseconds apart, newest first, and the endpoint filters them by the ``from`` and ``to``
+        parameters.  By default, indicators have no ``lastSeen`` time and the parameters are ignored.
+    :param int bandwidth: If given, request and response bodies are delayed as if sent over a link of this many bytes
+        per second.  Requests are handled concurrently, so this limits each connection rather than the server.
+    :param bool compress_responses: Whether to gzip response bodies for clients that accept it.
+    :param float fail_rate: The fraction of API requests answered with ``fail_status`` instead of being handled.
+    :param int fail_status: The status code of injected failures.
+    :param float drop_rate: The fraction of API requests whose connection is closed without any response, after the
+        request has been read.
+    :param float lost_response_rate: The fraction of report submissions whose connection is closed without any response
+        after the report has been created.
+    :param int seed: The seed of the random choice of requests to fail.
+    :ivar failures: The number of failures injected.
+    :ivar rate_limited: The number of requests answered with a 429.
+    :ivar submitted_reports: The reports received by the ``reports`` endpoint, in no particular order.
+    :ivar request_body_bytes: The total size of the request bodies received, as sent.
+    :ivar whitelist: The whitelisted indicators, as dictionaries.
+    :ivar submitted_indicators: The indicators received by the ``indicators`` endpoint, in no particular order.
+    """
+
+    def __init__(self, port=0, latency=0.0, total_indicators=1000, total_reports=1000, report_interval=60 * 60 * 1000,
+                 reports_page_size=REPORTS_PAGE_SIZE, max_page_size=None, quota_max_requests=100000,
+                 quota_time_window=60 * 1000, enforce_quota=False, rate_limit_rate=0.0, rate_limit_wait=1000,
+                 token_lifetime=3600, max_body_bytes=None, max_url_length=None, whitelist_size=0, indicator_tags=0,
+                 indicator_interval=None, bandwidth=None, compress_responses=False, fail_rate=0.0, fail_status=503,
+                 drop_rate=0.0, lost_response_rate=0.0, seed=0):
+        self.httpd = _ThreadingHTTPServer(("127.0.0.1", port), MockHandler)
+        self.httpd.latency = latency
+        self.httpd.total_indicators = total_indicators
+        self.reports_page_size = reports_page_size
+        self.max_page_size = max_page_size
+        self.indicator_tags = indicator_tags
+        self.indicator_interval = indicator_interval
+        # the lastSeen times of indicators seen again since the server was created, by index
+        self.indicator_updates = {}
+        self._indicator_updates_version = 0
+        self._indicator_indexes = {}
+        self.httpd.bandwidth = bandwidth
+        self.httpd.compress_responses = compress_responses
+        self.fail_rate = fail_rate
+        self.fail_status = fail_status
+        self.drop_rate = drop_rate
+        self.lost_response_rate = lost_response_rate
+        self.httpd.lose_response = self._lose_response
+        self.failures = 0
+        self._random = random.Random(seed)
+        self.httpd.get_failure = self._get_failure
+        self.httpd.count_body_bytes = self._count_body_bytes
+        self.request_body_bytes = 0
+        self.httpd.submit_report = self._submit_report
+        self.submitted_reports = []
+        self.httpd.request_count = 0
+        self.httpd.lock = threading.Lock()
+        self.httpd.count_request = self._count_request
+        self.httpd.indicators_page = self._indicators_page
+        self.httpd.reports_page = self._reports_page
+        self.httpd.report_indicators_page = self._report_indicators_page
+        self.httpd.report_tags = self._report_tags
+        self.httpd.get_report = self._get_report
+        self.httpd.request_quotas = self._request_quotas
+        self.httpd.max_body_bytes = max_body_bytes
+        self.httpd.max_url_length = max_url_length
+        self.httpd.submit_indicators = self._submit_indicators
+        self.submitted_indicators = []
+        self.httpd.whitelist_page = self._whitelist_page
+        self.httpd.add_to_whitelist = self._add_to_whitelist
+        self.httpd.delete_from_whitelist = self._delete_from_whitelist
+        self.whitelist = [self._whitelisted_indicator(i) for i in range(whitelist_size)]
+        self.quota_max_requests = quota_max_requests
+        self.enforce_quota = enforce_quota
+        self.rate_limit_rate = rate_limit_rate
+        self.rate_limit_wait = rate_limit_wait
+        self.rate_limited = 0
+        self._quota_window_start = None
+        self._quota_used = 0
+        self.httpd.get_rate_limit_wait = self._get_rate_limit_wait
+        self.token_lifetime = token_lifetime
+        self.tokens = {}
+        self.token_requests = 0
+        self.httpd.issue_token = self._issue_token
+        self.httpd.is_valid_token = self._is_valid_token
+        self.quota_time_window = quota_time_window
+        self.now = int(time.time()) * 1000
+        self.reports = [{"id": "report-%d" % i,
+                         "title": "Report %d" % i,
+                         "reportBody": "Report %d mentions 10.0.%d.%d" % (i, i // 256 % 256, i % 256),
+                         "timeBegan": self.now - i * report_interval,
+                         "created": self.now - i * report_interval,
+                         "updated": self.now - i * report_interval,
+                         "distributionType": "ENCLAVE",
+                         "enclaveIds": ["mock-enclave"]}
+                        for i in range(total_reports)]
+        self.thread = None
+
+    @property
+    def port(self):
+        return self.httpd.server_address[1]
+
+    @property
+    def request_count(self):
+        return self.httpd.request_count
+
+    def _count_request(self):
+        with self.httpd.lock:
+            self.httpd.request_count += 1
+
+    @staticmethod
+    def _indicator(i):
+        return {"value": "10.0.%d.%d" % (i // 256 % 256, i % 256), "indicatorType": "IP"}
+
+    def _page_size(self, params):
+        page_size = int(params.get('pageSize', [25])[0])
+        return min(page_size, self.max_page_size) if self.max_page_size else page_size
+
+    def _indicator_last_seen(self, i):
+        return self.indicator_updates.get(i, self.now - i * self.indicator_interval)
+
+    def _get_indicator_indexes(self, from_time, to_time):
+        """
+        :return: The indexes of the indicators last seen within the window, newest first.
+        """
+
+        key = (from_time, to_time, self._indicator_updates_version)
+        indexes = self._indicator_indexes.get(key)
+        if indexes is None:
+            # indicators that have not been seen again are ordered by index
+            interval = self.indicator_interval
+            start = max(0, -(-(self.now - to_time) // interval))
+            stop = min(self.httpd.total_indicators, (self.now - from_time) // interval + 1)
+            updated = sorted((i for i, last_seen in self.indicator_updates.items() if from_time <= last_seen <= to_time),
+                             key=lambda i: -self.indicator_updates[i])
+            indexes = updated + [i for i in range(start, stop) if i not in self.indicator_updates]
+            self._indicator_indexes = {key: indexes}
+        return indexes
+
+    def _indicators_page(self, params):
+        page_number = int(params.get('pageNumber', [0])[0])
+        page_size = self._page_size(params)
+        start = page_number * page_size
+
+        if self.indicator_interval:
+            to_time = int(params.get('to', [int(time.time() * 1000)])[0])
+            from_time = int(params.get('from', [to_time - 7 * DAY])[0])
+            with self.httpd.lock:
+                indexes = self._get_indicator_indexes(from_time, to_time)
+                total = len(indexes)
+                items = []
+                for i in indexes[start:start + page_size]:
+                    item = self._indicator(i)
+                    item["lastSeen"] = self._indicator_last_seen(i)
+                    item["firstSeen"] = self.now - i * self.indicator_interval
+                    items.append(item)
+        else:
+            total = self.httpd.total_indicators
+            items = [self._indicator(i) for i in range(start, min(start + page_size, total))]
+
+        if self.indicator_tags:
+            for item in items:
+                item["tags"] = [{"name": "tag-%d" % j, "guid": "guid-%d" % j, "enclaveId": "mock-enclave"}
+                                for j in range(self.indicator_tags)]
+        return {
+            "items": items,
+            "pageNumber": page_number,
+            "pageSize": page_size,
+            "totalElements": total,
+            "hasNext": start + page_size < total
+        }
+
+    def see_indicators(self, count):
+        """
+        Mark ``count`` random indicators as seen again now, i.e. update their ``lastSeen`` times, as a sighting would.
+        Requires ``indicator_interval``.
+        """
+
+        now = int(time.time()) * 1000
+        with self.httpd.lock:
+            for i in self._random.sample(range(self.httpd.total_indicators), count):
+                self.indicator_updates[i] = now
+            self._indicator_updates_version += 1
+
+    def update_reports(self, count):
+        """
+        Update ``count`` random reports now, moving them to the front of the ``reports`` endpoint's results.
+        """
+
+        now = int(time.time()) * 1000
+        with self.httpd.lock:
+            # the endpoint pages by moving back to before the last report's update, so updates must not tie
+            for offset, report in enumerate(self._random.sample(self.reports, count)):
+                report["updated"] = now - offset
+                report["title"] += " (updated)"
+            self.reports.sort(key=lambda r: -r["updated"])
+
+    @staticmethod
+    def _report_index(report_id):
+        prefix, _, index = report_id.rpartition("-")
+        return int(index) if prefix == "report" and index.isdigit() else None
+
+    def _report_indicators_page(self, report_id, params):
+        page_number = int(params.get('pageNumber', [0])[0])
+        page_size = self._page_size(params)
+        index = self._report_index(report_id)
+        # each report mentions the indicator in its body
+        items = [self._indicator(index)] if index is not None and page_number == 0 else []
+        return {
+            "items": items,
+            "pageNumber": page_number,
+            "pageSize": page_size,
+            "totalElements": 1 if index is not None else 0,
+            "hasNext": False
+        }
+
+    def _get_report(self, report_id, id_type="internal"):
+        with self.httpd.lock:
+            if id_type.lower() == "external":
+                return next((report for report in self.submitted_reports
+                             if report.get("externalTrackingId") == report_id), None)
+            if report_id.startswith("submitted-report-"):
+                index = int(report_id.rpartition("-")[2]) - 1
+                return self.submitted_reports[index] if index < len(self.submitted_reports) else None
+            index = self._report_index(report_id)
+            if index is None or index >= len(self.reports):
+                return None
+            return next(report for report in self.reports if report["id"] == report_id)
+
+    def _report_tags(self, report_id):
+        index = self._report_index(report_id)
+        if index is None:
+            return []
+        return [{"name": "tag-%d" % (index % 5), "guid": "guid-%d" % (index % 5), "enclaveId": "mock-enclave"}]
+
+    def _current_quota_window(self):
+        now = int(time.time() * 1000)
+        return now - now % self.quota_time_window
+
+    def _get_rate_limit_wait(self, path):
+        """
+        :return: The number of milliseconds to tell the client to wait, or ``None`` to handle the request.
+        """
+
+        if path == "request-quotas" or not (self.enforce_quota or self.rate_limit_rate):
+            return None
+        with self.httpd.lock:
+            wait_time = None
+            if self.enforce_quota:
+                window_start = self._current_quota_window()
+                if window_start != self._quota_window_start:
+                    self._quota_window_start = window_start
+                    self._quota_used = 0
+                if self._quota_used >= self.quota_max_requests:
+                    wait_time = window_start + self.quota_time_window - int(time.time() * 1000)
+                else:
+                    self._quota_used += 1
+            if wait_time is None and self.rate_limit_rate and self._random.random() < self.rate_limit_rate:
+                wait_time = self.rate_limit_wait
+            if wait_time is not None:
+                self.rate_limited += 1
+            return wait_time
+
+    def _get_failure(self):
+        """
+        :return: ``'drop'`` to close the connection, a status code to respond with, or ``None`` to handle the request.
+        """
+
+        if not (self.fail_rate or self.drop_rate):
+            return None
+        with self.httpd.lock:
+            r = self._random.random()
+            if r < self.drop_rate:
+                failure = 'drop'
+            elif r < self.drop_rate + self.fail_rate:
+                failure = self.fail_status
+            else:
+                return None
+            self.failures += 1
+            return failure
+
+    def _count_body_bytes(self, num_bytes):
+        with self.httpd.lock:
+            self.request_body_bytes += num_bytes
+
+    def _submit_report(self, report):
+        with self.httpd.lock:
+            self.submitted_reports.append(report)
+            report["id"] = "submitted-report-%d" % len(self.submitted_reports)
+            return report["id"]
+
+    def _lose_response(self):
+        if not self.lost_response_rate:
+            return False
+        with self.httpd.lock:
+            lost = self._random.random() < self.lost_response_rate
+            if lost:
+                self.failures += 1
+            return lost
+
+    def _submit_indicators(self, indicators):
+        with self.httpd.lock:
+            self.submitted_indicators.extend(indicators)
+
+    @staticmethod
+    def _whitelisted_indicator(i):
+        if i % 10 == 0:
+            return {"value": "172.%d.%d.0/24" % (16 + i // 2560 % 16, i // 10 % 256), "indicatorType": "CIDR_BLOCK"}
+        return {"value": "whitelisted-%d.example.com" % i, "indicatorType": "DOMAIN"}
+
+    def _whitelist_page(self, params):
+        page_number = int(params.get('pageNumber', [0])[0])
+        page_size = self._page_size(params)
+        with self.httpd.lock:
+            items = self.whitelist[page_number * page_size:(page_number + 1) * page_size]
+            total = len(self.whitelist)
+        return {
+            "items": items,
+            "pageNumber": page_number,
+            "pageSize": page_size,
+            "totalElements": total,
+            "hasNext": (page_number + 1) * page_size < total
+        }
+
+    def _add_to_whitelist(self, terms):
+        indicators = [{"value": term, "indicatorType": "CIDR_BLOCK" if "/" in term else "DOMAIN"} for term in terms]
+        with self.httpd.lock:
+            self.whitelist.extend(indicators)
+        return indicators
+
+    def _delete_from_whitelist(self, value):
+        with self.httpd.lock:
+            self.whitelist = [indicator for indicator in self.whitelist if indicator['value'] != value]
+
+    def _reports_page(self, params):
+        to_time = int(params.get('to', [self.now])[0])
+        from_time = max(int(params.get('from', [to_time - DAY])[0]), to_time - REPORTS_WINDOW)
+
+        # reports are stored newest first, which is the order the endpoint returns them in
+        page_size = self.reports_page_size
+        items = [r for r in self.reports if from_time <= r['updated'] <= to_time][:page_size]
+        return {
+            "items": items,
+            "pageSize": page_size,
+            "hasNext": len(items) == page_size
+        }
+
+    def _issue_token(self):
+        with self.httpd.lock:
+            self.token_requests += 1
+            token = "mock-token-%d" % self.token_requests
+            self.tokens[token] = time.time() + self.token_lifetime
+        return token, self.token_lifetime
+
+    def expire_tokens(self):
+        """
+        Expire every token issued so far, as if their lifetimes had run out.
+        """
+
+        with self.httpd.lock:
+            self.tokens = dict.fromkeys(self.tokens, 0)
+
+    def _is_valid_token(self, token):
+        expires_at = self.tokens.get(token)
+        return expires_at is not None and time.time() < expires_at
+
+    def _request_quotas(self):
+        last_reset_time = self._current_quota_window()
+        with self.httpd.lock:
+            used = self._quota_used if self._quota_window_start == last_reset_time else 0
+        return [{
+            "guid": "mock-quota",
+            "maxRequests": self.quota_max_requests,
+            "usedRequests": used,
+            "timeWindow": self.quota_time_window,
+            "lastResetTime": last_reset_time,
+            "nextResetTime": last_reset_time + self.quota_time_window
+        }]
+
+    def config(self, **kwargs):
+        """
+        :return: A |TruStar| config dictionary pointing at this server.  Keyword arguments override config values.
+        """
+
+        return get_config(self.port, **kwargs)
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a local stand-in for the TruSTAR API.")
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--latency', type=float, default=0.0, help="seconds of latency added to every response")
+    parser.add_argument('--total-indicators', type=int, default=1000)
+    parser.add_argument('--total-reports', type=int, default=1000)
+    parser.add_argument('--reports-page-size', type=int, default=REPORTS_PAGE_SIZE)
+    parser.add_argument('--max-page-size', type=int, default=None, help="cap on the pageSize parameter")
+    parser.add_argument('--indicator-tags', type=int, default=0, help="number of tags attached to each indicator")
+    parser.add_argument('--fail-rate', type=float, default=0.0, help="fraction of requests answered with a 503")
+    parser.add_argument('--drop-rate', type=float, default=0.0, help="fraction of connections dropped")
+    parser.add_argument('--quota', type=int, default=None, help="enforce a quota of this many requests per minute")
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0, help="fraction of requests answered with a 429")
+    parser.add_argument('--token-lifetime', type=float, default=3600, help="seconds each OAuth2 token is valid for")
+    args = parser.parse_args()
+
+    server = MockServer(port=args.port, latency=args.latency, total_indicators=args.total_indicators,
+                        total_reports=args.total_reports, reports_page_size=args.reports_page_size,
+                        max_page_size=args.max_page_size, quota_max_requests=args.quota or 100000,
+                        enforce_quota=args.quota is not None, rate_limit_rate=args.rate_limit_rate,
+                        token_lifetime=args.token_lifetime, indicator_tags=args.indicator_tags,
+                        fail_rate=args.fail_rate, drop_rate=args.drop_rate)
+    print("Serving mock TruSTAR API on http://127.0.0.1:%d%s" % (server.port, API_PREFIX))
+    sys.stdout.flush()
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,186 @@
+"""
+Measures the throughput and request latency of each public generator and bulk method of the SDK against the local
+mock server, so that performance changes can be evaluated without the live API.  Each scenario reports the items it
+produced, the requests it made (including token refreshes and retried 429s), items per second, and the 50th, 95th and
+99th percentiles of the time taken by each SDK request, measured through the ``metrics_sinks`` config value.
+
+Run from the repository root with
+``PYTHONPATH=. python benchmarks/run_benchmarks.py [--latency S] [--workers N] [--only NAME ...] [--json PATH]``.
+Pass ``--rate-limit-rate``, ``--quota`` or ``--token-lifetime`` to measure behavior under 429s and token expiry.
+"""
+from __future__ import print_function
+
+import argparse
+import json
+import time
+
+from mock_server import MockServer, DAY
+from trustar import TruStar, CallbackSink, Indicator, Report
+
+
+def percentile(values, q):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+class Harness(object):
+    """
+    Runs scenarios against a mock server with a client whose requests are timed.
+    """
+
+    def __init__(self, server, **config):
+        self.server = server
+        self.timings = []
+        self.ts = TruStar(config=server.config(metrics_sinks=[CallbackSink(self._record)], **config))
+        self.results = []
+
+    def _record(self, metrics):
+        self.timings.append(metrics.total_time)
+
+    def run(self, name, scenario, repeat=1):
+        """
+        Run a scenario, keeping the fastest of ``repeat`` runs.
+
+        :param str name: The name of the scenario.
+        :param scenario: A function that exercises the client and returns the number of items it produced.
+        """
+
+        best = None
+        for _ in range(repeat):
+            self.timings = []
+            self.server.httpd.request_count = 0
+            rate_limited = self.server.rate_limited
+            token_requests = self.server.token_requests
+            start = time.time()
+            items = scenario(self.ts)
+            elapsed = time.time() - start
+            result = {
+                'name': name,
+                'items': items,
+                'requests': self.server.request_count,
+                'rate_limited': self.server.rate_limited - rate_limited,
+                'token_requests': self.server.token_requests - token_requests,
+                'elapsed': elapsed,
+                'items_per_second': items / elapsed if elapsed else None,
+                'p50': percentile(self.timings, 0.50),
+                'p95': percentile(self.timings, 0.95),
+                'p99': percentile(self.timings, 0.99),
+            }
+            if best is None or elapsed < best['elapsed']:
+                best = result
+
+        self.results.append(best)
+        print("%-28s %7d items %6d requests %7.2fs %10.0f items/s   p50 %6.1fms  p95 %6.1fms  p99 %6.1fms"
+              "   %d 429s, %d tokens"
+              % (name, best['items'], best['requests'], best['elapsed'], best['items_per_second'] or 0,
+                 1000 * (best['p50'] or 0), 1000 * (best['p95'] or 0), 1000 * (best['p99'] or 0),
+                 best['rate_limited'], best['token_requests']))
+        return best
+
+
+def get_scenarios(server, args):
+    """
+    :return: A list of ``(name, scenario)`` tuples, where each scenario takes a |TruStar| client and returns the number
+        of items it produced.
+    """
+
+    from_time = server.now - 30 * DAY
+    workers = args.workers
+    values = ["10.0.%d.%d" % (i // 256 % 256, i % 256) for i in range(args.lookups)]
+    report_ids = ["report-%d" % i for i in range(args.lookups // 10)]
+
+    def count(generator):
+        return sum(1 for _ in generator)
+
+    def get_indicators_for_reports(ts):
+        return sum(count(ts.get_indicators_for_report(report_id)) for report_id in report_ids)
+
+    def get_enclave_tags(ts):
+        return sum(len(ts.get_enclave_tags(report_id)) for report_id in report_ids)
+
+    def submit_reports(ts):
+        for i in range(args.submissions):
+            ts.submit_report(Report(title="Benchmark %d" % i, body="Benchmark report mentioning 10.1.0.%d" % (i % 256),
+                                    enclave_ids=['mock-enclave'], external_id="benchmark-%d" % i))
+        return args.submissions
+
+    def submit_reports_concurrently(ts):
+        reports = [Report(title="Benchmark %d" % i, body="Benchmark report mentioning 10.1.1.%d" % (i % 256),
+                          enclave_ids=['mock-enclave'], external_id="benchmark-bulk-%d" % i)
+                   for i in range(args.submissions)]
+        return sum(1 for result in ts.submit_reports(reports, max_workers=workers) if result.succeeded)
+
+    def submit_indicators(ts):
+        indicators = [Indicator(value="10.2.%d.%d" % (i // 256 % 256, i % 256)) for i in range(args.lookups * 10)]
+        ts.submit_indicators(indicators, max_workers=workers)
+        return len(indicators)
+
+    def get_request_quotas(ts):
+        for _ in range(100):
+            ts.get_request_quotas()
+        return 100
+
+    return [
+        ("get_reports", lambda ts: count(ts.get_reports(from_time=from_time, to_time=server.now))),
+        ("get_reports concurrent", lambda ts: count(ts.get_reports(from_time=from_time, to_time=server.now,
+                                                                    max_workers=workers))),
+        ("get_indicators", lambda ts: count(ts.get_indicators(page_size=args.page_size))),
+        ("get_indicators concurrent", lambda ts: count(ts.get_indicators(page_size=args.page_size,
+                                                                          max_workers=workers))),
+        ("get_indicators streaming", lambda ts: count(ts.get_indicators(page_size=args.page_size, streaming=True))),
+        ("get_indicator_columns", lambda ts: sum(len(batch) for batch in ts.get_indicator_columns(
+            page_size=args.page_size, columns=["value"], max_workers=workers))),
+        ("get_whitelist", lambda ts: count(ts.get_whitelist(max_workers=workers))),
+        ("get_whitelist_index", lambda ts: len(ts.get_whitelist_index(max_workers=workers))),
+        ("get_indicators_for_report", get_indicators_for_reports),
+        ("get_enclave_tags", get_enclave_tags),
+        ("get_indicators_metadata", lambda ts: len(ts.get_indicators_metadata([Indicator(v) for v in values],
+                                                                               max_workers=workers))),
+        ("get_indicator_details", lambda ts: len(ts.get_indicator_details(values, max_workers=workers))),
+        ("submit_report", submit_reports),
+        ("submit_reports", submit_reports_concurrently),
+        ("submit_indicators", submit_indicators),
+        ("get_request_quotas", get_request_quotas),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--latency', type=float, default=0.005, help="seconds of latency added to every response")
+    parser.add_argument('--reports', type=int, default=2000)
+    parser.add_argument('--indicators', type=int, default=20000)
+    parser.add_argument('--whitelist', type=int, default=5000)
+    parser.add_argument('--page-size', type=int, default=100)
+    parser.add_argument('--max-page-size', type=int, default=None, help="cap the server applies to pageSize")
+    parser.add_argument('--lookups', type=int, default=1000, help="indicator values looked up by the bulk methods")
+    parser.add_argument('--submissions', type=int, default=100, help="reports submitted one at a time")
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0, help="fraction of requests answered with a 429")
+    parser.add_argument('--rate-limit-wait', type=int, default=1000, help="milliseconds each injected 429 asks for")
+    parser.add_argument('--quota', type=int, default=None, help="enforce a quota of this many requests per minute")
+    parser.add_argument('--token-lifetime', type=float, default=3600, help="seconds each OAuth2 token is valid for")
+    parser.add_argument('--repeat', type=int, default=1, help="keep the fastest of this many runs of each scenario")
+    parser.add_argument('--only', nargs='*', help="run only the scenarios whose names contain one of these strings")
+    parser.add_argument('--json', help="write the results to this file, for comparing runs")
+    args = parser.parse_args()
+
+    with MockServer(latency=args.latency, total_reports=args.reports, report_interval=30 * DAY // args.reports,
+                    total_indicators=args.indicators, whitelist_size=args.whitelist,
+                    max_page_size=args.max_page_size, quota_max_requests=args.quota or 100000,
+                    enforce_quota=args.quota is not None, rate_limit_rate=args.rate_limit_rate,
+                    rate_limit_wait=args.rate_limit_wait, token_lifetime=args.token_lifetime) as server:
+        harness = Harness(server, pool_maxsize=args.workers, max_wait_time=120)
+        for name, scenario in get_scenarios(server, args):
+            if args.only and not any(s in name for s in args.only):
+                continue
+            harness.run(name, scenario, repeat=args.repeat)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'args': vars(args), 'results': harness.results}, f, indent=2, sort_keys=True)
+
+
+if __name__ == '__main__':
+    main()
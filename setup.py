@@ -29,8 +29,15 @@ setup(
                       'unicodecsv',
                       'tzlocal',
                       'PyYAML',
-                      'six'
+                      'six',
+                      'futures; python_version < "3.0"'
                       ],
+    extras_require={
+        'async': ['aiohttp'],
+        'numpy': ['numpy'],
+        'orjson': ['orjson'],
+        'ujson': ['ujson']
+    },
     include_package_data=True,
     scripts=glob('trustar/examples/**/*.py') + glob('trustar/examples/*.py'),
     use_2to3=True
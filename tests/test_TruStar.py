@@ -230,6 +230,24 @@ class TruStarTests(unittest.TestCase):
         reports = self.ts.search_reports("abc")
         self.assertGreater(len(list(reports)), 0)
 
+    def test_async_client(self):
+        """
+        Test that the asyncio client returns the same results as the synchronous one.
+        """
+        import asyncio
+
+        async def run():
+            async with AsyncTruStar() as ts:
+                pong = await ts.ping()
+                enclaves = await ts.get_user_enclaves()
+                reports = [r.id async for r in ts.get_reports(from_time=yesterday_time, to_time=current_time)]
+            return pong, enclaves, reports
+
+        pong, enclaves, reports = asyncio.run(run())
+        self.assertEqual(pong, self.ts.ping())
+        self.assertEqual(len(enclaves), len(self.ts.get_user_enclaves()))
+        self.assertEqual(reports, [r.id for r in self.ts.get_reports(from_time=yesterday_time, to_time=current_time)])
+
     def test_get_enclaves(self):
         enclaves = self.ts.get_user_enclaves()
         self.assertGreater(len(enclaves), 0)
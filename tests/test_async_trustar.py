@@ -0,0 +1,111 @@
+import asyncio
+import unittest
+
+from benchmarks.mock_server import DAY, MockServer
+from trustar import AsyncTruStar, FileCheckpointStore, Indicator, TruStar
+
+
+class AsyncTruStarTests(unittest.TestCase):
+
+    def run_client(self, server, run, **config):
+        async def main():
+            async with AsyncTruStar(config=server.config(**config)) as ts:
+                return await run(ts)
+
+        return asyncio.run(main())
+
+    def test_paging(self):
+        async def run(ts):
+            return [indicator.value async for indicator in ts.get_indicators(page_size=100)]
+
+        with MockServer(total_indicators=250) as server:
+            values = self.run_client(server, run)
+            self.assertEqual(server.request_count, 4)
+        self.assertEqual(len(values), 250)
+        self.assertEqual(len(set(values)), 250)
+
+    def test_concurrent_report_harvest(self):
+        async def run(ts):
+            serial = [report.id async for report in ts.get_reports(from_time=from_time, to_time=to_time)]
+            concurrent = [report.id async for report in ts.get_reports(from_time=from_time, to_time=to_time,
+                                                                       max_workers=4, window_size=DAY)]
+            return serial, concurrent
+
+        with MockServer(total_reports=500) as server:
+            reports = server.reports
+            to_time = reports[0]['updated']
+            from_time = reports[-1]['updated']
+            serial, concurrent = self.run_client(server, run)
+        self.assertEqual(len(serial), 500)
+        self.assertEqual(concurrent, serial)
+
+    def test_429_retried(self):
+        async def run(ts):
+            return await asyncio.gather(*[ts.get_version() for _ in range(10)])
+
+        with MockServer(rate_limit_rate=0.2, rate_limit_wait=1, seed=3) as server:
+            versions = self.run_client(server, run)
+            rate_limited = server.rate_limited
+        self.assertEqual(versions, ["1.3"] * 10)
+        self.assertGreater(rate_limited, 0)
+
+    def test_expired_token_refreshed_once(self):
+        async def run(ts):
+            await ts.get_version()
+            server.expire_tokens()
+            await asyncio.gather(*[ts.get_version() for _ in range(16)])
+            return ts.retry_stats
+
+        with MockServer(latency=0.01) as server:
+            retry_stats = self.run_client(server, run)
+        self.assertEqual(server.token_requests, 2)
+        self.assertEqual(retry_stats.retries_by_reason['expired_token'], 16)
+
+    def test_chunked_submit_indicators(self):
+        indicators = [Indicator(value="10.0.%d.%d" % (i // 256, i % 256)) for i in range(250)]
+
+        async def run(ts):
+            return await ts.submit_indicators(iter(indicators), chunk_size=100, max_workers=2)
+
+        with MockServer() as server:
+            results = self.run_client(server, run)
+            submitted = server.submitted_indicators
+        self.assertEqual([(result.index, result.count) for result in results], [(0, 100), (1, 100), (2, 50)])
+        self.assertTrue(all(result.succeeded for result in results))
+        self.assertEqual(sorted(i['value'] for i in submitted), sorted(i.value for i in indicators))
+
+    def test_batches_bounded(self):
+        in_flight = [0, 0]
+
+        async def get_batch(batch):
+            in_flight[0] += 1
+            in_flight[1] = max(in_flight)
+            await asyncio.sleep(0.01)
+            in_flight[0] -= 1
+            return batch
+
+        async def run(ts):
+            return await ts._get_batches(get_batch, [[i] for i in range(20)])
+
+        with MockServer() as server:
+            results = self.run_client(server, run, max_concurrency=3)
+        self.assertEqual(results, list(range(20)))
+        self.assertEqual(in_flight[1], 3)
+
+    def test_batched_indicator_metadata(self):
+        values = ["10.0.0.%d" % i for i in range(20)] + ["unknown.example.com"]
+
+        async def run(ts):
+            return await asyncio.gather(*[ts.get_indicator_metadata(value) for value in values])
+
+        with MockServer() as server:
+            results = self.run_client(server, run, batch_lookups=True, batch_window=0.05)
+            request_count = server.request_count
+        self.assertEqual([result['indicator'].value for result in results[:-1]], values[:-1])
+        self.assertIsNone(results[-1])
+        # one token request, and one lookup for the whole batch
+        self.assertEqual(request_count, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+import itertools
+import os
+import shutil
+import tempfile
+import unittest
+
+from benchmarks.mock_server import MockServer
+from trustar import FileCheckpointStore, SQLiteCheckpointStore, TruStar
+
+
+class FileCheckpointStoreTests(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.path = os.path.join(directory, "checkpoints")
+
+    def make_store(self):
+        return FileCheckpointStore(self.path)
+
+    def test_save_and_load(self):
+        store = self.make_store()
+        self.assertIsNone(store.load("job"))
+        store.save("job", {'page_number': 3})
+        store.save("other", {'page_number': 5})
+        # a new store reads what an earlier one saved, as a restarted process would
+        self.assertEqual(self.make_store().load("job"), {'page_number': 3})
+
+    def test_checkpoint(self):
+        checkpoint = self.make_store().checkpoint("job")
+        checkpoint.save({'from_time': 1, 'to_time': 2})
+        self.assertEqual(checkpoint.load(), {'from_time': 1, 'to_time': 2})
+        checkpoint.clear()
+        self.assertIsNone(checkpoint.load())
+
+    def test_resume_indicators(self):
+        """
+        Test that an indicator harvest stopped part way through resumes from the page after the last one consumed.
+        """
+        checkpoint = self.make_store().checkpoint("indicators")
+        with MockServer(total_indicators=1000) as server:
+            ts = TruStar(config=server.config())
+            indicators = ts.get_indicators(page_size=100, checkpoint=checkpoint)
+            first = [indicator.value for indicator in itertools.islice(indicators, 350)]
+            indicators.close()
+            self.assertEqual(checkpoint.load(), {'page_number': 3})
+
+            resumed = [indicator.value for indicator in ts.get_indicators(page_size=100, checkpoint=checkpoint,
+                                                                          resume_from=checkpoint.load())]
+        self.assertEqual(len(resumed), 700)
+        self.assertEqual(len(set(first[:300] + resumed)), 1000)
+        self.assertTrue(checkpoint.load()['done'])
+
+
+class SQLiteCheckpointStoreTests(FileCheckpointStoreTests):
+
+    def make_store(self):
+        store = SQLiteCheckpointStore(self.path)
+        self.addCleanup(store.close)
+        return store
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+import json
+import unittest
+from unittest import mock
+
+from benchmarks.mock_server import MockServer
+from trustar import Indicator, JsonCodec, OrjsonCodec, TruStar, UjsonCodec, codec, get_codec
+
+VALUES = [
+    {"value": "evil.com", "sightings": 3, "tags": [{"name": "bad"}], "whitelisted": False, "notes": None},
+    {"url": "http://evil.com/a/b", "unicode": "é中"},
+    {"big": 2 ** 70},
+    {1: "key that is not a string"},
+    [1.5, "x", None, True],
+]
+
+
+class GetCodecTests(unittest.TestCase):
+
+    def test_default(self):
+        self.assertIs(type(get_codec()), JsonCodec)
+        self.assertIs(type(get_codec('JSON')), JsonCodec)
+
+    def test_shared_instances(self):
+        self.assertIs(get_codec('json'), get_codec('json'))
+
+    def test_instance_passed_through(self):
+        instance = JsonCodec()
+        self.assertIs(get_codec(instance), instance)
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            get_codec('simplejson')
+        with self.assertRaises(ValueError):
+            get_codec(1)
+
+    def test_missing_library_falls_back(self):
+        for codec_class in [OrjsonCodec, UjsonCodec]:
+            with mock.patch.object(codec_class, 'module', None):
+                with self.assertLogs(codec.logger, "WARNING"):
+                    self.assertIs(type(get_codec(codec_class.name)), JsonCodec)
+
+    def test_auto(self):
+        with mock.patch.object(OrjsonCodec, 'module', None), mock.patch.object(UjsonCodec, 'module', None):
+            self.assertIs(type(get_codec('auto')), JsonCodec)
+        with mock.patch.object(OrjsonCodec, 'module', None), mock.patch.object(UjsonCodec, 'module', json):
+            self.assertIs(type(get_codec('auto')), UjsonCodec)
+        with mock.patch.object(OrjsonCodec, 'module', json):
+            self.assertIs(type(get_codec('auto')), OrjsonCodec)
+
+
+class CodecTests(unittest.TestCase):
+
+    def check_codec(self, codec_class):
+        if not codec_class.is_available():
+            self.skipTest("%s is not installed" % codec_class.name)
+        instance = codec_class()
+        for value in VALUES:
+            encoded = instance.dumps(value)
+            self.assertIsInstance(encoded, str)
+            self.assertEqual(json.loads(encoded), json.loads(json.dumps(value)))
+            self.assertEqual(instance.loads(encoded), json.loads(encoded))
+            self.assertEqual(instance.loads(encoded.encode('utf-8')), json.loads(encoded))
+
+    def test_json(self):
+        self.check_codec(JsonCodec)
+
+    def test_orjson(self):
+        self.check_codec(OrjsonCodec)
+
+    def test_ujson(self):
+        self.check_codec(UjsonCodec)
+
+    def test_invalid_json(self):
+        for codec_class in [JsonCodec, OrjsonCodec, UjsonCodec]:
+            if codec_class.is_available():
+                with self.assertRaises(ValueError):
+                    codec_class().loads("{not json")
+
+    def test_models(self):
+        indicator = Indicator(value="evil.com", type="URL")
+        for name in ['json', 'orjson', 'ujson']:
+            self.assertEqual(Indicator.from_json(indicator.to_json(codec=name), codec=name).to_dict(),
+                             indicator.to_dict())
+
+
+class ClientCodecTests(unittest.TestCase):
+
+    def test_client_codec(self):
+        for name in ['json', 'auto']:
+            with MockServer(total_indicators=30) as server:
+                ts = TruStar(config=server.config(json_codec=name))
+                self.assertIs(ts._client.codec, get_codec(name))
+                values = [indicator.value for indicator in ts.get_indicators(page_size=10)]
+                ts.submit_indicators([Indicator(value="evil.com")])
+                submitted = server.submitted_indicators
+            self.assertEqual(len(values), 30)
+            self.assertEqual([indicator['value'] for indicator in submitted], ["evil.com"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+import unittest
+
+from benchmarks.mock_server import MockServer
+from trustar import ColumnBatch, Indicator, Page, TruStar
+from trustar.models import column_batch
+
+ITEMS = [
+    {"value": "evil.com", "indicatorType": "URL", "firstSeen": 1},
+    {"value": "10.0.0.1", "indicatorType": "IP", "tags": [{"name": "bad"}]},
+    {"value": "bad.com", "firstSeen": 3},
+]
+
+
+class ColumnBatchTests(unittest.TestCase):
+
+    def test_from_items(self):
+        batch = ColumnBatch.from_items(ITEMS)
+        self.assertEqual(batch.names, ["value", "indicatorType", "firstSeen", "tags"])
+        self.assertEqual(batch["indicatorType"], ["URL", "IP", None])
+        self.assertEqual(batch["tags"], [None, [{"name": "bad"}], None])
+        self.assertEqual(len(batch), 3)
+
+    def test_selected_columns(self):
+        batch = ColumnBatch.from_items(ITEMS, columns=["firstSeen", "value", "missing"])
+        self.assertEqual(list(batch), [(1, "evil.com", None), (None, "10.0.0.1", None), (3, "bad.com", None)])
+
+    def test_empty(self):
+        batch = ColumnBatch.from_items([])
+        self.assertEqual(len(batch), 0)
+        self.assertEqual(list(batch), [])
+
+    def test_round_trip(self):
+        batch = ColumnBatch.from_items(ITEMS)
+        self.assertEqual(ColumnBatch.from_dict(batch.to_dict()).to_dict(), batch.to_dict())
+
+    @unittest.skipUnless(column_batch.numpy is not None, "numpy is not installed")
+    def test_numpy(self):
+        batch = ColumnBatch.from_items(ITEMS, use_numpy=True)
+        self.assertEqual(batch["value"].tolist(), ["evil.com", "10.0.0.1", "bad.com"])
+        self.assertEqual(batch["firstSeen"].tolist(), [1, None, 3])
+        self.assertEqual(batch["tags"].shape, (3,))
+
+    @unittest.skipIf(column_batch.numpy is not None, "numpy is installed")
+    def test_numpy_missing(self):
+        with self.assertRaises(ImportError):
+            ColumnBatch.from_items(ITEMS, use_numpy=True)
+
+
+class ColumnarPageTests(unittest.TestCase):
+
+    def test_from_dict(self):
+        page = Page.from_dict({"items": ITEMS, "pageNumber": 0, "pageSize": 25, "totalElements": 3},
+                              content_type=Indicator, columnar=True, columns=["value"])
+        self.assertIsInstance(page.items, ColumnBatch)
+        self.assertEqual(page.items.to_dict(), {"value": ["evil.com", "10.0.0.1", "bad.com"]})
+        self.assertEqual(len(page), 3)
+        self.assertFalse(page.has_more_pages())
+        self.assertEqual(page.to_dict()["items"], {"value": ["evil.com", "10.0.0.1", "bad.com"]})
+
+    def test_matches_objects(self):
+        with MockServer(total_indicators=250) as server:
+            ts = TruStar(config=server.config())
+            indicators = list(ts.get_indicators(page_size=100))
+            batches = list(ts.get_indicator_columns(columns=["value", "indicatorType"], page_size=100))
+        self.assertEqual([len(batch) for batch in batches], [100, 100, 50])
+        rows = [row for batch in batches for row in batch]
+        self.assertEqual(rows, [(indicator.value, indicator.type) for indicator in indicators])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+import threading
+import time
+import unittest
+from urllib.parse import urlencode
+
+from benchmarks.mock_server import MockServer
+from trustar import Indicator, TruStar
+from trustar.utils import get_url_chunks
+
+
+class UrlChunkTests(unittest.TestCase):
+
+    def get_url(self, url, chunk, params):
+        query = list(params.items()) + [(key, value) for value, type in chunk
+                                        for key, value in [('values', value), ('types', type)] if value is not None]
+        return url + "?" + urlencode(query)
+
+    def test_max_length(self):
+        url = "https://api.example.com/api/1.3/indicators/metadata"
+        params = {'enclaveIds': 'enclave'}
+        items = [("%d.example.com/path?q=a b&c" % i, "URL" if i % 2 else None) for i in range(200)]
+        chunks = list(get_url_chunks(items, get_params=lambda item: [('values', item[0]), ('types', item[1])],
+                                     url=url, max_length=500, params=params))
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual([item for chunk in chunks for item in chunk], items)
+        for chunk in chunks:
+            self.assertLessEqual(len(self.get_url(url, chunk, params)), 500)
+        # chunks are filled as far as the limit allows
+        for chunk, next_chunk in zip(chunks, chunks[1:]):
+            self.assertGreater(len(self.get_url(url, chunk + next_chunk[:1], params)), 500)
+
+    def test_oversized_item_alone(self):
+        items = ["a", "b" * 100, "c"]
+        chunks = list(get_url_chunks(items, get_params=lambda item: [('values', item)], url="http://x",
+                                     max_length=50))
+        self.assertEqual(chunks, [["a"], ["b" * 100], ["c"]])
+
+    def test_single_chunk(self):
+        chunks = list(get_url_chunks(range(10), get_params=lambda item: [('v', item)], url="http://x",
+                                     max_length=1000))
+        self.assertEqual(chunks, [list(range(10))])
+
+
+class IndicatorBatchTests(unittest.TestCase):
+
+    def test_batches_concurrent_and_ordered(self):
+        in_flight = [0, 0]
+        lock = threading.Lock()
+
+        def get_batch(batch):
+            with lock:
+                in_flight[0] += 1
+                in_flight[1] = max(in_flight)
+            time.sleep(0.01 * (5 - batch[0] % 5))
+            with lock:
+                in_flight[0] -= 1
+            return batch
+
+        ts = TruStar(config={'user_api_key': 'key', 'user_api_secret': 'secret', 'max_concurrency': 3})
+        results = ts._get_batches(get_batch, [[i] for i in range(20)])
+        self.assertEqual(results, list(range(20)))
+        self.assertEqual(in_flight[1], 3)
+
+    def test_metadata_split_by_url_length(self):
+        values = ["10.0.%d.%d" % (i // 256, i % 256) for i in range(300)]
+        with MockServer(max_url_length=1000) as server:
+            ts = TruStar(config=server.config(max_url_length=1000, max_concurrency=4, pool_maxsize=4))
+            results = ts.get_indicators_metadata([Indicator(value=value) for value in values])
+            request_count = server.request_count
+        self.assertEqual([indicator.value for indicator in results], values)
+        # a token request, and more than one batch
+        self.assertGreater(request_count, 2)
+
+    def test_details_split_by_url_length(self):
+        values = ["%d.example.com" % i for i in range(300)]
+        with MockServer(max_url_length=1000) as server:
+            ts = TruStar(config=server.config(max_url_length=1000))
+            results = ts.get_indicator_details(values)
+            request_count = server.request_count
+        self.assertEqual([indicator.value for indicator in results], values)
+        self.assertGreater(request_count, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
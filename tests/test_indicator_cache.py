@@ -0,0 +1,103 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from trustar import MemoryIndicatorCache, SQLiteIndicatorCache
+
+
+class IndicatorCacheTests(unittest.TestCase):
+
+    def make_cache(self, **kwargs):
+        return MemoryIndicatorCache(**kwargs)
+
+    def setUp(self):
+        self.fetched = []
+
+    def fetch(self, queries):
+        """
+        Look up queries as a server that knows every value except those starting with "unknown", and that returns
+        values in lower case.
+        """
+        self.fetched.append(queries)
+        return [{'value': value.lower(), 'indicatorType': type or 'URL'}
+                for value, type in queries if not value.startswith("unknown")]
+
+    def test_only_missing_queries_fetched(self):
+        cache = self.make_cache()
+        cache.lookup("metadata", [("a.com", None), ("b.com", None)], self.fetch)
+        results = cache.lookup("metadata", [("a.com", None), ("c.com", None), ("a.com", None)], self.fetch)
+        self.assertEqual([result['value'] for result in results], ["a.com", "c.com"])
+        self.assertEqual(self.fetched, [[("a.com", None), ("b.com", None)], [("c.com", None)]])
+        self.assertEqual((cache.hits, cache.misses), (2, 3))
+
+    def test_not_found_cached(self):
+        cache = self.make_cache()
+        self.assertEqual(cache.lookup("metadata", [("unknown.com", None)], self.fetch), [])
+        self.assertEqual(cache.lookup("metadata", [("unknown.com", None)], self.fetch), [])
+        self.assertEqual(len(self.fetched), 1)
+
+    def test_negative_ttl(self):
+        cache = self.make_cache(negative_ttl=0.1)
+        cache.lookup("metadata", [("unknown.com", None)], self.fetch)
+        time.sleep(0.2)
+        cache.lookup("metadata", [("unknown.com", None)], self.fetch)
+        self.assertEqual(len(self.fetched), 2)
+
+    def test_type_filter(self):
+        cache = self.make_cache()
+        self.assertEqual(cache.lookup("metadata", [("a.com", "IP")], self.fetch), [{'value': "a.com",
+                                                                                     'indicatorType': "IP"}])
+        self.assertEqual(cache.lookup("metadata", [("a.com", "URL")], self.fetch), [{'value': "a.com",
+                                                                                      'indicatorType': "URL"}])
+
+    def test_normalized_values(self):
+        """
+        Test that a result whose value the server normalized is returned and cached, rather than being dropped and
+        the query cached as not found.
+        """
+        cache = self.make_cache()
+        expected = [{'value': "evil.com", 'indicatorType': "URL"}]
+        self.assertEqual(cache.lookup("metadata", [("EVIL.com", None)], self.fetch), expected)
+        self.assertEqual(cache.lookup("metadata", [("EVIL.com", None)], self.fetch), expected)
+        self.assertEqual(len(self.fetched), 1)
+
+    def test_unmatched_results_returned(self):
+        cache = self.make_cache()
+
+        def fetch(queries):
+            return [{'value': "canonical.com", 'indicatorType': "URL"}]
+
+        self.assertEqual(cache.lookup("metadata", [("alias.com", None)], fetch),
+                         [{'value': "canonical.com", 'indicatorType': "URL"}])
+
+    def test_enclave_ids_in_key(self):
+        cache = self.make_cache()
+        cache.lookup("metadata", [("a.com", None)], self.fetch, enclave_ids=["1", "2"])
+        cache.lookup("metadata", [("a.com", None)], self.fetch, enclave_ids=["2", "1"])
+        cache.lookup("metadata", [("a.com", None)], self.fetch, enclave_ids=["3"])
+        self.assertEqual(len(self.fetched), 2)
+
+    def test_max_size(self):
+        cache = self.make_cache(max_size=2)
+        cache.lookup("metadata", [("a.com", None), ("b.com", None), ("c.com", None)], self.fetch)
+        self.assertEqual(len(cache), 2)
+
+
+class SQLiteIndicatorCacheTests(IndicatorCacheTests):
+
+    def setUp(self):
+        super(SQLiteIndicatorCacheTests, self).setUp()
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.path = os.path.join(directory, "cache.db")
+
+    def make_cache(self, **kwargs):
+        cache = SQLiteIndicatorCache(self.path, **kwargs)
+        self.addCleanup(cache.close)
+        return cache
+
+
+if __name__ == '__main__':
+    unittest.main()
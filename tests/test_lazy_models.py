@@ -0,0 +1,111 @@
+import copy
+import pickle
+import unittest
+
+from benchmarks.mock_server import MockServer
+from trustar import Indicator, LazyIndicator, LazyReport, Report, TruStar
+
+RAW_INDICATOR = {
+    "value": "evil.com",
+    "indicatorType": "URL",
+    "priorityLevel": "HIGH",
+    "correlationCount": 2,
+    "whitelisted": False,
+    "firstSeen": 1500000000000,
+    "lastSeen": 1600000000000,
+    "sightings": 3,
+    "notes": ["note"],
+    "tags": [{"name": "bad", "guid": "tag-1", "enclaveId": "enclave"}],
+    "enclaveIds": ["enclave"],
+}
+
+RAW_REPORT = {
+    "id": "report-1",
+    "title": "Title",
+    "reportBody": "Body",
+    "timeBegan": "2020-01-01T00:00:00Z",
+    "externalTrackingId": "external-1",
+    "distributionType": "COMMUNITY",
+    "enclaveIds": "enclave",
+    "created": 1500000000000,
+    "updated": 1600000000000,
+}
+
+
+class LazyModelTests(unittest.TestCase):
+
+    def test_decoded_like_eager_models(self):
+        for lazy_model, model, raw in [(LazyIndicator, Indicator, RAW_INDICATOR), (LazyReport, Report, RAW_REPORT)]:
+            lazy = lazy_model.from_dict(raw)
+            eager = model.from_dict(raw)
+            self.assertIsInstance(lazy, model)
+            for name in lazy_model._DECODERS:
+                value = getattr(lazy, name)
+                # Indicator.from_dict does not decode sightings
+                if name == 'sightings':
+                    self.assertEqual(value, raw['sightings'])
+                    continue
+                if name == 'tags':
+                    self.assertEqual([tag.to_dict() for tag in value], [tag.to_dict() for tag in eager.tags])
+                else:
+                    self.assertEqual(value, getattr(eager, name), name)
+
+    def test_clean_to_dict_copies_raw(self):
+        indicator = LazyIndicator.from_dict(RAW_INDICATOR)
+        self.assertEqual(indicator.value, "evil.com")
+        self.assertEqual(indicator.sightings, 3)
+        self.assertFalse(indicator._dirty)
+        d = indicator.to_dict()
+        self.assertEqual(d, RAW_INDICATOR)
+        self.assertIsNot(d, RAW_INDICATOR)
+        self.assertNotIn(None, LazyIndicator.from_dict(dict(RAW_INDICATOR, source=None)).to_dict(True).values())
+
+    def test_assignment_marks_dirty(self):
+        indicator = LazyIndicator.from_dict(RAW_INDICATOR)
+        indicator.notes = ["changed"]
+        self.assertTrue(indicator._dirty)
+        d = indicator.to_dict()
+        self.assertEqual(d["notes"], ["changed"])
+        self.assertEqual(d["value"], "evil.com")
+        self.assertEqual(RAW_INDICATOR["notes"], ["note"])
+
+    def test_detached_fields_mark_dirty(self):
+        indicator = LazyIndicator.from_dict(RAW_INDICATOR)
+        indicator.tags[0].name = "worse"
+        self.assertTrue(indicator._dirty)
+        self.assertEqual(indicator.to_dict()["tags"][0]["name"], "worse")
+
+    def test_unknown_attribute(self):
+        with self.assertRaises(AttributeError):
+            LazyIndicator.from_dict(RAW_INDICATOR).unknown
+
+    def test_copy_and_pickle_keep_undecoded(self):
+        indicator = LazyIndicator.from_dict(RAW_INDICATOR)
+        indicator.notes = ["changed"]
+        for other in [copy.copy(indicator), pickle.loads(pickle.dumps(indicator))]:
+            self.assertEqual(other.to_dict(), indicator.to_dict())
+            self.assertEqual(other.notes, ["changed"])
+        clean = pickle.loads(pickle.dumps(LazyReport.from_dict(RAW_REPORT)))
+        self.assertFalse(clean._dirty)
+        self.assertEqual(clean.to_dict(), RAW_REPORT)
+
+
+class LazyClientTests(unittest.TestCase):
+
+    def test_lazy_models_config(self):
+        with MockServer(total_indicators=30, total_reports=10) as server:
+            lazy = TruStar(config=server.config(lazy_models=True))
+            eager = TruStar(config=server.config())
+            indicators = list(lazy.get_indicators(page_size=10))
+            reports = list(lazy.get_reports(from_time=server.reports[-1]['updated'],
+                                            to_time=server.reports[0]['updated']))
+            expected = list(eager.get_indicators(page_size=10))
+        self.assertTrue(all(isinstance(indicator, LazyIndicator) for indicator in indicators))
+        self.assertTrue(all(isinstance(report, LazyReport) for report in reports))
+        self.assertEqual(len(reports), 10)
+        self.assertEqual([Indicator.from_dict(i.to_dict()).to_dict() for i in indicators],
+                         [i.to_dict() for i in expected])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,148 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from trustar import Indicator, LocalMirror, Report, Tag
+
+NOW = 1600000000000
+
+
+class FakeClient(object):
+    """
+    Serves reports and indicators from lists, filtered by time as the API does, and records the windows requested.
+    """
+
+    def __init__(self):
+        self.reports = []
+        self.indicators = []
+        self.report_indicators = {}
+        self.report_tags = {}
+        self.report_windows = []
+        self.indicator_windows = []
+        self.fail_after = None
+
+    def get_reports(self, enclave_ids=None, from_time=None, to_time=None, max_workers=None):
+        self.report_windows.append((from_time, to_time))
+        reports = [report for report in self.reports if from_time <= report.updated <= to_time]
+        for i, report in enumerate(sorted(reports, key=lambda report: -report.updated)):
+            if self.fail_after is not None and i >= self.fail_after:
+                raise IOError("connection lost")
+            yield report
+
+    def get_indicators(self, from_time=None, to_time=None, enclave_ids=None, page_size=None, max_workers=None):
+        self.indicator_windows.append((from_time, to_time))
+        return iter([indicator for indicator in self.indicators
+                     if from_time is None or indicator.last_seen >= from_time])
+
+    def get_indicators_for_report(self, report_id):
+        return iter(self.report_indicators.get(report_id, []))
+
+    def get_enclave_tags(self, report_id):
+        return self.report_tags.get(report_id, [])
+
+
+class LocalMirrorTests(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.mirror = LocalMirror(os.path.join(directory, "mirror.db"))
+        self.addCleanup(self.mirror.close)
+        self.client = FakeClient()
+
+    def add_report(self, id, updated, indicators=(), tags=()):
+        self.client.reports.append(Report(id=id, title=id, updated=updated, enclave_ids=["enclave"]))
+        self.client.report_indicators[id] = [Indicator(value=value) for value in indicators]
+        self.client.report_tags[id] = list(tags)
+
+    def test_high_water_mark(self):
+        self.add_report("a", NOW - 3000)
+        self.add_report("b", NOW - 2000)
+        result = self.mirror.sync_reports(self.client, from_time=NOW - 10000)
+        self.assertEqual(result.reports, 2)
+        self.assertEqual(self.mirror.get_high_water_mark("reports"), NOW - 2000)
+
+        # the next sync starts from the high-water mark, minus the overlap
+        self.add_report("c", NOW - 1000)
+        result = self.mirror.sync_reports(self.client, from_time=NOW - 10000, overlap=500)
+        self.assertEqual(self.client.report_windows[-1][0], NOW - 2500)
+        self.assertEqual(result.reports, 2)
+        self.assertEqual(self.mirror.get_high_water_mark("reports"), NOW - 1000)
+
+    def test_overlap_refetches_late_changes(self):
+        self.add_report("a", NOW - 2000)
+        self.mirror.sync_reports(self.client, from_time=NOW - 10000)
+        # a report committed late, with an updated time just before the high-water mark
+        self.add_report("late", NOW - 2100)
+        self.mirror.sync_reports(self.client, overlap=200)
+        self.assertIsNotNone(self.mirror.get_report_details("late"))
+
+    def test_upserts_idempotent(self):
+        self.add_report("a", NOW - 2000, indicators=["evil.com"], tags=[Tag(name="bad", id="tag-1")])
+        self.mirror.sync_reports(self.client, from_time=NOW - 10000)
+        counts = self.mirror.count()
+        self.mirror.sync_reports(self.client, from_time=NOW - 10000)
+        self.assertEqual(self.mirror.count(), counts)
+        self.assertEqual(counts['reports'], 1)
+        self.assertEqual(counts['report_indicators'], 1)
+        self.assertEqual(counts['report_tags'], 1)
+
+    def test_links_replaced(self):
+        self.add_report("a", NOW - 2000, indicators=["evil.com", "bad.com"], tags=[Tag(name="bad", id="tag-1")])
+        self.mirror.sync_reports(self.client, from_time=NOW - 10000)
+
+        # the report changes, dropping an indicator and a tag
+        self.client.reports[0].updated = NOW - 1000
+        self.client.report_indicators["a"] = [Indicator(value="evil.com")]
+        self.client.report_tags["a"] = [Tag(name="worse", id="tag-2")]
+        self.mirror.sync_reports(self.client)
+
+        self.assertEqual([i.value for i in self.mirror.get_indicators_for_report("a")], ["evil.com"])
+        self.assertEqual([tag.id for tag in self.mirror.get_enclave_tags("a")], ["tag-2"])
+        self.assertEqual([report.id for report in self.mirror.get_correlated_reports(["bad.com"])], [])
+
+    def test_tags_without_ids_skipped(self):
+        self.add_report("a", NOW - 2000, tags=[Tag(name="unsaved"), Tag(name="bad", id="tag-1")])
+        self.client.indicators = [Indicator(value="evil.com", last_seen=NOW - 2000, tags=[Tag(name="unsaved")])]
+        result = self.mirror.sync(self.client, from_time=NOW - 10000)
+        self.assertEqual(result.report_tags, 1)
+        self.assertEqual([tag.id for tag in self.mirror.get_enclave_tags("a")], ["tag-1"])
+        self.assertEqual(self.mirror.get_indicator_tags("evil.com"), [])
+
+    def test_query_in_batches(self):
+        values = ["%d.example.com" % i for i in range(LocalMirror.MAX_PARAMETERS * 2 + 10)]
+        self.add_report("a", NOW - 2000, indicators=values[:1])
+        self.add_report("b", NOW - 1000, indicators=values[-1:])
+        self.mirror.sync_reports(self.client, from_time=NOW - 10000)
+        reports = self.mirror.get_correlated_reports(values)
+        self.assertEqual([report.id for report in reports], ["b", "a"])
+
+    def test_interrupted_sync_does_not_advance(self):
+        for i in range(5):
+            self.add_report("report-%d" % i, NOW - 1000 * (i + 1))
+        self.client.fail_after = 2
+        with self.assertRaises(IOError):
+            self.mirror.sync_reports(self.client, from_time=NOW - 10000)
+        self.assertIsNone(self.mirror.get_high_water_mark("reports"))
+
+        # the next sync repeats the whole window
+        self.client.fail_after = None
+        result = self.mirror.sync_reports(self.client, from_time=NOW - 10000)
+        self.assertEqual(self.client.report_windows[-1][0], NOW - 10000)
+        self.assertEqual(result.reports, 5)
+
+    def test_indicators(self):
+        self.client.indicators = [Indicator(value="evil.com", last_seen=NOW - 2000, tags=[Tag(name="bad", id="t")]),
+                                  Indicator(value="bad.com", last_seen=NOW - 1000)]
+        result = self.mirror.sync_indicators(self.client)
+        self.assertEqual(result.indicators, 2)
+        self.assertEqual(self.mirror.get_high_water_mark("indicators"), NOW - 1000)
+        self.assertEqual([tag.name for tag in self.mirror.get_indicator_tags("evil.com")], ["bad"])
+
+        self.mirror.sync_indicators(self.client, overlap=100)
+        self.assertEqual(self.client.indicator_windows[-1][0], NOW - 1100)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+import unittest
+
+from trustar import HistogramSink, RequestMetrics, get_path_template
+from trustar.metrics import _Histogram
+
+
+class PathTemplateTests(unittest.TestCase):
+
+    def test_ids(self):
+        self.assertEqual(get_path_template("reports/1a09f14b"), "reports/{id}")
+        self.assertEqual(get_path_template("/reports/1a09f14b/tags/"), "reports/{id}/tags")
+        self.assertEqual(get_path_template("reports/1a09f14b/tags/5c2e"), "reports/{id}/tags/{tag_id}")
+        self.assertEqual(get_path_template("reports/1a09f14b/indicators"), "reports/{id}/indicators")
+
+    def test_static_segments(self):
+        for path in ["reports", "reports/search", "reports/tags", "indicators/metadata", "indicators/tags",
+                     "indicators/community-trending", "request-quotas"]:
+            self.assertEqual(get_path_template(path), path)
+
+    def test_values_with_slashes(self):
+        self.assertEqual(get_path_template("indicators/evil.com/tags"), "indicators/{value}/tags")
+        self.assertEqual(get_path_template("indicators/http://evil.com/a/tags"), "indicators/{value}/tags")
+        self.assertEqual(get_path_template("indicators/http://evil.com/a/b/tags/5c2e"),
+                         "indicators/{value}/tags/{tag_id}")
+        self.assertEqual(get_path_template("reports/external/id/with/slashes"), "reports/{id}")
+
+
+class HistogramTests(unittest.TestCase):
+
+    def test_quantile(self):
+        histogram = _Histogram((0.1, 0.5, 1.0))
+        self.assertIsNone(histogram.quantile(0.5))
+        for value in [0.05, 0.05, 0.2, 0.3, 0.7, 5.0]:
+            histogram.observe(value)
+        self.assertEqual(list(histogram.cumulative_counts()), [2, 4, 5])
+        self.assertEqual(histogram.quantile(0.3), 0.1)
+        self.assertEqual(histogram.quantile(0.5), 0.5)
+        self.assertEqual(histogram.quantile(0.8), 1.0)
+        self.assertEqual(histogram.quantile(0.99), float('inf'))
+        self.assertEqual(histogram.count, 6)
+        self.assertAlmostEqual(histogram.sum, 6.3)
+
+
+class HistogramSinkTests(unittest.TestCase):
+
+    def record(self, sink, method, path, total_time, status_code=200, error=None):
+        metrics = RequestMetrics(method, get_path_template(path))
+        metrics.status_code = status_code
+        metrics.error = error
+        metrics.total_time = total_time
+        metrics.ttfb = total_time
+        metrics.attempts = 1
+        sink.record(metrics)
+
+    def test_one_endpoint_per_template(self):
+        sink = HistogramSink()
+        for i in range(50):
+            self.record(sink, "POST", "indicators/http://evil.com/%d/tags" % i, 0.01)
+        self.assertEqual(list(sink.get_stats()), [("POST", "indicators/{value}/tags")])
+
+    def test_to_prometheus(self):
+        sink = HistogramSink(buckets=(0.1, 1.0))
+        self.record(sink, "GET", "reports/abc", 0.05)
+        self.record(sink, "GET", "reports/def", 0.5, status_code=404, error="HTTPError")
+        lines = sink.to_prometheus(prefix="test").splitlines()
+
+        self.assertIn("# TYPE test_requests_total counter", lines)
+        self.assertIn('test_requests_total{method="GET",path="reports/{id}"} 2', lines)
+        self.assertIn('test_errors_total{method="GET",path="reports/{id}"} 1', lines)
+        self.assertIn('test_responses_total{method="GET",path="reports/{id}",status="200"} 1', lines)
+        self.assertIn('test_responses_total{method="GET",path="reports/{id}",status="404"} 1', lines)
+        self.assertIn("# TYPE test_request_duration_seconds histogram", lines)
+        self.assertIn('test_request_duration_seconds_bucket{method="GET",path="reports/{id}",le="0.1"} 1', lines)
+        self.assertIn('test_request_duration_seconds_bucket{method="GET",path="reports/{id}",le="1.0"} 2', lines)
+        self.assertIn('test_request_duration_seconds_bucket{method="GET",path="reports/{id}",le="+Inf"} 2', lines)
+        self.assertIn('test_request_duration_seconds_count{method="GET",path="reports/{id}"} 2', lines)
+        self.assertIn('test_request_duration_seconds_sum{method="GET",path="reports/{id}"} 0.55', lines)
+
+
+if __name__ == '__main__':
+    unittest.main()
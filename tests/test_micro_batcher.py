@@ -0,0 +1,115 @@
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.mock_server import MockServer
+from trustar import Indicator, MicroBatcher, TruStar
+from trustar.indicator_client import IndicatorClient
+
+
+class MicroBatcherTests(unittest.TestCase):
+
+    def setUp(self):
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def fetch(self, keys):
+        with self.lock:
+            self.calls.append(keys)
+        return {key: key * 2 for key in keys if key >= 0}
+
+    def make_batcher(self, **kwargs):
+        batcher = MicroBatcher(self.fetch, **kwargs)
+        self.addCleanup(batcher.close)
+        return batcher
+
+    def test_batched(self):
+        batcher = self.make_batcher(window=0.1)
+        futures = [batcher.submit(key) for key in [1, 2, 2, 3, -1]]
+        self.assertEqual([future.result() for future in futures], [2, 4, 4, 6, None])
+        # duplicate keys are fetched once
+        self.assertEqual(self.calls, [[1, 2, 3, -1]])
+        self.assertEqual(batcher.lookups, 5)
+        self.assertEqual(batcher.batches, 1)
+
+    def test_max_batch_size(self):
+        batcher = self.make_batcher(window=10, max_batch_size=4)
+        start = time.time()
+        futures = [batcher.submit(key) for key in range(10)]
+        self.assertEqual([future.result() for future in futures[:8]], [key * 2 for key in range(8)])
+        # full batches are sent without waiting for the window
+        self.assertLess(time.time() - start, 5)
+        batcher.close()
+        self.assertEqual(sorted(len(keys) for keys in self.calls), [2, 4, 4])
+
+    def test_concurrent_gets(self):
+        batcher = self.make_batcher(window=0.05)
+        with ThreadPoolExecutor(16) as executor:
+            results = list(executor.map(batcher.get, range(64)))
+        self.assertEqual(results, [key * 2 for key in range(64)])
+        self.assertLess(batcher.batches, 64)
+
+    def test_exception(self):
+        def fetch(keys):
+            raise ValueError("boom")
+
+        batcher = MicroBatcher(fetch)
+        futures = [batcher.submit(key) for key in range(3)]
+        batcher.close()
+        for future in futures:
+            self.assertIsInstance(future.exception(), ValueError)
+
+    def test_cancelled(self):
+        batcher = self.make_batcher(window=0.1)
+        cancelled = batcher.submit(1)
+        kept = batcher.submit(2)
+        cancelled.cancel()
+        self.assertEqual(kept.result(), 4)
+        self.assertEqual(self.calls, [[2]])
+
+    def test_close(self):
+        batcher = MicroBatcher(self.fetch, window=10)
+        future = batcher.submit(1)
+        # the waiting lookup is fetched rather than abandoned
+        batcher.close()
+        self.assertEqual(future.result(timeout=0), 2)
+        with self.assertRaises(RuntimeError):
+            batcher.submit(2)
+
+    def test_idle_thread_exits(self):
+        batcher = self.make_batcher(window=0.001, idle_timeout=0.05)
+        self.assertEqual(batcher.get(1), 2)
+        thread = batcher._thread
+        thread.join(1)
+        self.assertFalse(thread.is_alive())
+        self.assertIsNone(batcher._thread)
+        # the next lookup starts it again
+        self.assertEqual(batcher.get(2), 4)
+
+
+class MatchMetadataBatchTests(unittest.TestCase):
+
+    def test_match(self):
+        indicators = [Indicator(value="evil.com"), Indicator(value=None), Indicator(value="bad.com")]
+        results = IndicatorClient._match_metadata_batch(["EVIL.com", "bad.com", "missing.com"], indicators)
+        self.assertEqual(results, {"EVIL.com": indicators[0], "bad.com": indicators[2]})
+
+
+class ClientMicroBatcherTests(unittest.TestCase):
+
+    def test_indicator_metadata(self):
+        with MockServer(latency=0.01) as server:
+            ts = TruStar(config=server.config(batch_lookups=True, batch_window=0.05, pool_maxsize=16))
+            ts.get_version()
+            server.httpd.request_count = 0
+            values = ["10.0.0.%d" % i for i in range(32)] + ["unknown.example.com"]
+            with ThreadPoolExecutor(16) as executor:
+                results = list(executor.map(ts.get_indicator_metadata, values))
+        self.assertEqual([result['indicator'].value for result in results[:-1]], values[:-1])
+        self.assertIsNone(results[-1])
+        self.assertLess(server.request_count, len(values))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+import copy
+import pickle
+import unittest
+
+from trustar import Indicator, Page, Report, Tag
+
+
+def make_models():
+    # Tag.from_dict reads the ID from "guid", as the API returns it, so a tag's ID does not round trip
+    tag = Tag(name="bad", enclave_id="enclave")
+    indicator = Indicator(value="evil.com", type="URL", sightings=3, tags=[tag], enclave_ids=["enclave"])
+    report = Report(id="report-1", title="Title", body="Body", enclave_ids=["enclave"], updated=1600000000000)
+    page = Page(items=[indicator], page_number=0, page_size=25, total_elements=1, has_next=False)
+    return [tag, indicator, report, page]
+
+
+class ModelSlotsTests(unittest.TestCase):
+
+    def test_no_instance_dict(self):
+        for model in make_models():
+            self.assertFalse(hasattr(model, '__dict__'), type(model).__name__)
+
+    def test_undeclared_attribute(self):
+        for model in make_models():
+            with self.assertRaises(AttributeError):
+                model.undeclared = 1
+
+    def test_round_trip(self):
+        for model in make_models():
+            self.assertEqual(type(model).from_dict(model.to_dict()).to_dict(), model.to_dict())
+
+    def test_copy_and_pickle(self):
+        for model in make_models():
+            self.assertEqual(copy.copy(model).to_dict(), model.to_dict())
+            self.assertEqual(copy.deepcopy(model).to_dict(), model.to_dict())
+            self.assertEqual(pickle.loads(pickle.dumps(model)).to_dict(), model.to_dict())
+
+    def test_subclass_without_slots(self):
+        class AnnotatedIndicator(Indicator):
+            pass
+
+        indicator = AnnotatedIndicator(value="evil.com")
+        indicator.annotation = "checked"
+        self.assertEqual(indicator.annotation, "checked")
+        self.assertEqual(indicator.to_dict()['value'], "evil.com")
+
+
+if __name__ == '__main__':
+    unittest.main()
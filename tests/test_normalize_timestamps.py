@@ -0,0 +1,92 @@
+import unittest
+from datetime import datetime
+from unittest import mock
+
+import dateutil.parser
+import pytz
+
+from trustar import utils
+from trustar.utils import _normalize_timestamp, normalize_timestamp, normalize_timestamps
+
+NOW = 1600000000000
+
+TIMESTAMPS = [
+    "2017-02-23",
+    "2017-02-23T23:01",
+    "2017-02-23T23:01:54",
+    "2017-02-23 23:01:54",
+    "2017-02-23T23:01:54.5",
+    "2017-02-23T23:01:54.123456",
+    "2017-02-23T23:01:54Z",
+    "2017-02-23T23:01:54+00:00",
+    "2017-02-23T23:01:54+0000",
+    "2017-02-23T23:01:54-0530",
+    "2017-02-23T23:01:54.123+05",
+    # not strict ISO-8601, so parsed by dateutil alone
+    "Feb 23 2017 11:01PM",
+    "23 February 2017 23:01:54 UTC",
+    "2017/02/23 23:01:54",
+    # a daylight saving time change in the local time zone
+    "2017-03-12T02:30:00",
+    "2017-11-05T01:30:00",
+]
+
+
+def dateutil_normalize(date_time, timezone):
+    """
+    The original implementation of ``normalize_timestamp`` for strings, which always parsed with ``dateutil``.
+    """
+
+    datetime_dt = dateutil.parser.parse(date_time)
+    if not datetime_dt.tzinfo:
+        datetime_dt = timezone.localize(datetime_dt).astimezone(pytz.utc)
+    return datetime_dt.isoformat()
+
+
+class NormalizeTimestampTests(unittest.TestCase):
+
+    def test_strings_match_dateutil(self):
+        for timezone in [pytz.utc, pytz.timezone("America/New_York"), pytz.timezone("Asia/Kolkata")]:
+            for date_time in TIMESTAMPS:
+                expected = dateutil_normalize(date_time, timezone)
+                self.assertEqual(_normalize_timestamp(date_time, NOW, timezone), expected, (date_time, timezone))
+
+    def test_ints(self):
+        self.assertEqual(_normalize_timestamp(1487890914, NOW, pytz.utc), 1487890914000)
+        self.assertEqual(_normalize_timestamp(1487890914000, NOW, pytz.utc), 1487890914000)
+
+    def test_future_and_invalid_use_current_time(self):
+        for date_time in [NOW + 1000, "not a timestamp"]:
+            with self.assertLogs(utils.logger, "WARNING"):
+                normalized = _normalize_timestamp(date_time, NOW, pytz.utc)
+            parsed = dateutil.parser.parse(normalized)
+            self.assertLess(abs((datetime.now(pytz.utc) - parsed).total_seconds()), 60)
+
+    def test_datetimes(self):
+        aware = datetime(2017, 2, 23, 23, 1, 54, tzinfo=pytz.utc)
+        self.assertEqual(normalize_timestamp(aware), "2017-02-23T23:01:54+00:00")
+        naive = datetime(2017, 2, 23, 23, 1, 54)
+        self.assertEqual(_normalize_timestamp(naive, NOW, pytz.timezone("America/New_York")),
+                         "2017-02-24T04:01:54+00:00")
+
+
+class NormalizeTimestampsTests(unittest.TestCase):
+
+    def test_matches_normalize_timestamp(self):
+        values = TIMESTAMPS + [1487890914, 1487890914000, datetime(2017, 2, 23, tzinfo=pytz.utc)]
+        self.assertEqual(normalize_timestamps(values), [normalize_timestamp(value) for value in values])
+
+    def test_repeated_values_parsed_once(self):
+        values = ["2017-02-23T23:01:54Z", "Feb 23 2017 11:01PM"] * 50
+        with mock.patch.object(utils, '_parse_timestamp_string', wraps=utils._parse_timestamp_string) as parse:
+            results = normalize_timestamps(values)
+        self.assertEqual(parse.call_count, 2)
+        self.assertEqual(results, [normalize_timestamp(value) for value in values])
+
+    def test_int_and_string_kept_apart(self):
+        self.assertEqual(normalize_timestamps([1487890914, "1487890914"])[0], 1487890914000)
+        self.assertIsInstance(normalize_timestamps(["1487890914", 1487890914])[0], str)
+
+
+if __name__ == '__main__':
+    unittest.main()
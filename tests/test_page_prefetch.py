@@ -0,0 +1,78 @@
+import threading
+import time
+import unittest
+
+from trustar import Page
+
+
+class FakeEndpoint(object):
+    """
+    A paginated endpoint over a list of items, which records the pages requested.
+    """
+
+    def __init__(self, total, latency=0.0):
+        self.items = list(range(total))
+        self.latency = latency
+        self.requested = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+
+    def get_page(self, page_number, page_size):
+        with self.lock:
+            self.requested.append(page_number)
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        time.sleep(self.latency)
+        with self.lock:
+            self.in_flight -= 1
+        start = page_number * page_size
+        return Page(items=self.items[start:start + page_size], page_number=page_number, page_size=page_size,
+                    total_elements=len(self.items))
+
+
+class PagePrefetchTests(unittest.TestCase):
+
+    def get_items(self, endpoint, **kwargs):
+        pages = Page.get_page_generator(endpoint.get_page, page_size=10, **kwargs)
+        return [item for page in pages for item in page.items]
+
+    def test_ordered(self):
+        endpoint = FakeEndpoint(total=205, latency=0.01)
+        self.assertEqual(self.get_items(endpoint, max_workers=4), list(range(205)))
+        self.assertEqual(sorted(endpoint.requested), list(range(21)))
+        self.assertGreater(endpoint.max_in_flight, 1)
+        self.assertLessEqual(endpoint.max_in_flight, 4)
+
+    def test_serial_by_default(self):
+        endpoint = FakeEndpoint(total=55, latency=0.001)
+        self.assertEqual(self.get_items(endpoint), list(range(55)))
+        self.assertEqual(endpoint.requested, list(range(6)))
+        self.assertEqual(endpoint.max_in_flight, 1)
+
+    def test_stragglers(self):
+        """
+        Test that elements added after the first page revealed the total are picked up serially.
+        """
+
+        endpoint = FakeEndpoint(total=30)
+        get_page = endpoint.get_page
+
+        def grow(page_number, page_size):
+            page = get_page(page_number, page_size)
+            if page_number == 0:
+                endpoint.items.extend(range(30, 45))
+            return page
+
+        endpoint.get_page = grow
+        self.assertEqual(self.get_items(endpoint, max_workers=3), list(range(45)))
+        self.assertEqual(endpoint.requested[-2:], [3, 4])
+
+    def test_single_page(self):
+        endpoint = FakeEndpoint(total=7)
+        self.assertEqual(self.get_items(endpoint, max_workers=4), list(range(7)))
+        self.assertEqual(endpoint.requested, [0])
+
+
+if __name__ == '__main__':
+    unittest.main()
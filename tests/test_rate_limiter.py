@@ -0,0 +1,119 @@
+import asyncio
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.mock_server import MockServer
+from trustar import AsyncTruStar, RateLimiter, RequestQuota, TruStar
+
+
+def make_quota(max_requests, used_requests, time_window, next_reset_time=None):
+    return RequestQuota(guid="quota", max_requests=max_requests, used_requests=used_requests, time_window=time_window,
+                        last_reset_time=None, next_reset_time=next_reset_time)
+
+
+class RateLimiterTests(unittest.TestCase):
+
+    def test_seeded_with_remaining_requests(self):
+        rate_limiter = RateLimiter()
+        rate_limiter.update([make_quota(max_requests=3, used_requests=1, time_window=60000)])
+        self.assertEqual(rate_limiter.try_acquire(), 0)
+        self.assertEqual(rate_limiter.try_acquire(), 0)
+        self.assertGreater(rate_limiter.try_acquire(), 0)
+
+    def test_refills_at_next_reset_time(self):
+        """
+        Test that an empty bucket waits for the server's window to reset, rather than refilling continuously.
+        """
+        next_reset_time = int((time.time() + 30) * 1000)
+        rate_limiter = RateLimiter()
+        rate_limiter.update([make_quota(max_requests=10, used_requests=10, time_window=60000,
+                                        next_reset_time=next_reset_time)])
+        self.assertAlmostEqual(rate_limiter.try_acquire(), 30, delta=1)
+
+    def test_refills_completely_after_reset(self):
+        next_reset_time = int((time.time() + 0.2) * 1000)
+        rate_limiter = RateLimiter()
+        rate_limiter.update([make_quota(max_requests=5, used_requests=5, time_window=60000,
+                                        next_reset_time=next_reset_time)])
+        waited = rate_limiter.acquire()
+        self.assertGreater(waited, 0)
+        for _ in range(4):
+            self.assertEqual(rate_limiter.try_acquire(), 0)
+        self.assertAlmostEqual(rate_limiter.try_acquire(), 60, delta=1)
+
+    def test_past_reset_time_starts_new_window(self):
+        rate_limiter = RateLimiter()
+        rate_limiter.update([make_quota(max_requests=2, used_requests=2, time_window=60000,
+                                        next_reset_time=int((time.time() - 1) * 1000))])
+        self.assertEqual(rate_limiter.try_acquire(), 0)
+
+    def test_refills_continuously_without_reset_time(self):
+        rate_limiter = RateLimiter()
+        rate_limiter.update([make_quota(max_requests=10, used_requests=10, time_window=1000)])
+        self.assertAlmostEqual(rate_limiter.try_acquire(), 0.1, delta=0.01)
+
+    def test_pause(self):
+        rate_limiter = RateLimiter()
+        rate_limiter.update([make_quota(max_requests=100, used_requests=0, time_window=60000)])
+        rate_limiter.pause(5)
+        self.assertAlmostEqual(rate_limiter.try_acquire(), 5, delta=0.1)
+
+    def test_failed_sync_leaves_buckets(self):
+        def fail():
+            raise IOError("unavailable")
+
+        rate_limiter = RateLimiter()
+        rate_limiter.sync(fail)
+        self.assertTrue(rate_limiter.synced)
+        self.assertEqual(rate_limiter.try_acquire(), 0)
+
+
+class RateLimitedClientTests(unittest.TestCase):
+    """
+    Test that clients sharing a rate limiter stay within a quota the mock server enforces.
+    """
+
+    def setUp(self):
+        self.server = MockServer(quota_max_requests=10, quota_time_window=1000, enforce_quota=True).start()
+        self.addCleanup(self.server.stop)
+
+    def test_sync_client(self):
+        ts = TruStar(config=self.server.config(rate_limiter=RateLimiter(), pool_maxsize=8))
+        with ThreadPoolExecutor(8) as executor:
+            versions = list(executor.map(lambda _: ts.get_version(), range(32)))
+        self.assertEqual(len(versions), 32)
+        self.assertEqual(self.server.rate_limited, 0)
+
+    def test_async_client(self):
+        async def run():
+            async with AsyncTruStar(config=self.server.config(rate_limiter=RateLimiter())) as ts:
+                return await asyncio.gather(*[ts.get_version() for _ in range(32)])
+
+        self.assertEqual(len(asyncio.run(run())), 32)
+        self.assertEqual(self.server.rate_limited, 0)
+
+    def test_async_client_pauses_on_429(self):
+        """
+        Test that a 429 received by one coroutine makes the others sharing the rate limiter wait too.
+        """
+        rate_limiter = RateLimiter()
+
+        async def run():
+            async with AsyncTruStar(config=self.server.config(rate_limiter=rate_limiter)) as ts:
+                await ts.get_version()
+                self.server.rate_limit_rate = 1.0
+                self.server.rate_limit_wait = 1000
+                request = asyncio.ensure_future(ts.get_version())
+                await asyncio.sleep(0.2)
+                self.server.rate_limit_rate = 0.0
+                # the waitTime of 1 second applies to every user of the rate limiter
+                self.assertGreater(rate_limiter.try_acquire(), 0.5)
+                await request
+
+        asyncio.run(run())
+        self.assertEqual(self.server.rate_limited, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,148 @@
+import itertools
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+
+from benchmarks.mock_server import MockServer, DAY
+from trustar import FileCheckpointStore, Report, TruStar
+from trustar.report_client import _WINDOW_END, ReportClient, _ReportDeduplicator
+from trustar.utils import parallel_chain
+
+
+class ParallelChainTests(unittest.TestCase):
+
+    def test_ordered(self):
+        items = list(parallel_chain(lambda n: range(n), [3, 0, 2], max_workers=2))
+        self.assertEqual(items, [(0, 0), (0, 1), (0, 2), (2, 0), (2, 1)])
+
+    def test_unordered(self):
+        items = list(parallel_chain(lambda n: range(n), [3, 0, 2], max_workers=2, ordered=False))
+        self.assertEqual(sorted(items), [(0, 0), (0, 1), (0, 2), (2, 0), (2, 1)])
+
+    def test_bounded(self):
+        """
+        Test that calls producing endless items stop once they are ``read_ahead`` items ahead of the consumer.
+        """
+        produced = []
+        lock = threading.Lock()
+
+        def produce(argument):
+            for i in itertools.count():
+                with lock:
+                    produced.append(argument)
+                yield i
+
+        for ordered in [True, False]:
+            del produced[:]
+            items = parallel_chain(produce, range(10), max_workers=2, read_ahead=3, ordered=ordered)
+            consumed = list(itertools.islice(items, 100))
+            time.sleep(0.1)
+            # the outstanding calls have each buffered at most read_ahead items, plus one waiting to be put
+            self.assertLessEqual(len(produced), len(consumed) + 4 * (3 + 1))
+            items.close()
+
+    def test_stops_calls_when_closed(self):
+        finished = threading.Event()
+
+        def produce(argument):
+            try:
+                for i in itertools.count():
+                    yield i
+            finally:
+                finished.set()
+
+        items = parallel_chain(produce, [0], max_workers=1, read_ahead=1)
+        next(items)
+        items.close()
+        self.assertTrue(finished.wait(1))
+
+    def test_exception(self):
+        def produce(argument):
+            yield argument
+            raise ValueError(argument)
+
+        items = parallel_chain(produce, [1, 2], max_workers=2)
+        self.assertEqual(next(items), (0, 1))
+        self.assertRaises(ValueError, next, items)
+
+
+class ReportDeduplicationTests(unittest.TestCase):
+
+    def reports(self, *ids):
+        return [Report(id=id) for id in ids]
+
+    def test_duplicates_skipped(self):
+        pages = [(0, self.reports("a", "b")), (1, self.reports("c", "a")), (0, self.reports("b", "d")),
+                 (0, _WINDOW_END), (1, _WINDOW_END), (2, self.reports("c", "e")), (2, _WINDOW_END)]
+        reports = ReportClient._get_deduplicated_reports(iter(pages))
+        self.assertEqual([report.id for report in reports], ["a", "b", "c", "d", "e"])
+
+    def test_ids_dropped(self):
+        deduplicator = _ReportDeduplicator()
+        for index in range(10):
+            deduplicator.get_new_reports(index, self.reports("%d-a" % index, "%d-b" % index))
+            deduplicator.end_window(index)
+            # only the last sub-window's IDs are kept, since the next sub-window has not ended yet
+            self.assertEqual(list(deduplicator._seen_ids), [index])
+
+        # a sub-window that ends out of order keeps its neighbours' IDs until it does
+        deduplicator = _ReportDeduplicator()
+        for index in (0, 2, 1):
+            deduplicator.get_new_reports(index, self.reports(str(index)))
+        deduplicator.end_window(0)
+        deduplicator.end_window(2)
+        self.assertEqual(sorted(deduplicator._seen_ids), [0, 1, 2])
+        deduplicator.end_window(1)
+        self.assertEqual(sorted(deduplicator._seen_ids), [2])
+
+
+class ReportHarvestTests(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = MockServer(total_reports=500, report_interval=90 * DAY // 500).start()
+        cls.ts = TruStar(config=cls.server.config(pool_maxsize=8))
+        cls.from_time = cls.server.now - 90 * DAY
+        cls.expected = [report.id for report in cls.ts.get_reports(from_time=cls.from_time, to_time=cls.server.now)]
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.stop()
+
+    def test_serial(self):
+        self.assertEqual(len(self.expected), 500)
+        self.assertEqual(len(set(self.expected)), 500)
+
+    def test_concurrent_ordered(self):
+        reports = self.ts.get_reports(from_time=self.from_time, to_time=self.server.now, max_workers=4, read_ahead=1)
+        self.assertEqual([report.id for report in reports], self.expected)
+
+    def test_concurrent_unordered(self):
+        reports = self.ts.get_reports(from_time=self.from_time, to_time=self.server.now, max_workers=4, ordered=False)
+        self.assertEqual(sorted(report.id for report in reports), sorted(self.expected))
+
+    def test_resume(self):
+        """
+        Test that a concurrent harvest stopped part way through resumes where it left off.
+        """
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        checkpoint = FileCheckpointStore(os.path.join(directory, "harvest.json")).checkpoint("reports")
+        reports = self.ts.get_reports(from_time=self.from_time, to_time=self.server.now, max_workers=4,
+                                      window_size=10 * DAY, checkpoint=checkpoint)
+        first = [report.id for report in itertools.islice(reports, 200)]
+        reports.close()
+
+        resumed = [report.id for report in self.ts.get_reports(max_workers=4, window_size=10 * DAY,
+                                                               checkpoint=checkpoint, resume_from=checkpoint.load())]
+        # the sub-window in progress when the harvest stopped is harvested again
+        self.assertEqual(set(first) | set(resumed), set(self.expected))
+        self.assertLess(len(resumed), len(self.expected))
+        self.assertTrue(checkpoint.load().get('done'))
+
+
+if __name__ == '__main__':
+    unittest.main()
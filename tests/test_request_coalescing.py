@@ -0,0 +1,79 @@
+import asyncio
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from benchmarks.mock_server import MockServer
+from trustar import AsyncTruStar, Report, TruStar
+
+
+class RequestCoalescingTests(unittest.TestCase):
+
+    def storm(self, ts, func, threads=16):
+        barrier = threading.Barrier(threads)
+
+        def call(_):
+            barrier.wait()
+            return func()
+
+        with ThreadPoolExecutor(threads) as executor:
+            return list(executor.map(call, range(threads)))
+
+    def test_identical_gets_coalesced(self):
+        with MockServer(latency=0.1) as server:
+            ts = TruStar(config=server.config(coalesce_requests=True, pool_maxsize=16))
+            ts.get_version()
+            server.httpd.request_count = 0
+            reports = self.storm(ts, lambda: ts.get_report_details("report-1"))
+        self.assertEqual(set(report.id for report in reports), {"report-1"})
+        self.assertLess(server.request_count, 16)
+        self.assertEqual(ts.coalescing_stats.requests, 17)
+        self.assertEqual(ts.coalescing_stats.coalesced, 16 - server.request_count)
+
+    def test_not_coalesced_by_default(self):
+        with MockServer(latency=0.05) as server:
+            ts = TruStar(config=server.config(pool_maxsize=16))
+            ts.get_version()
+            server.httpd.request_count = 0
+            self.storm(ts, lambda: ts.get_report_details("report-1"))
+        self.assertEqual(server.request_count, 16)
+
+    def test_posts_not_coalesced(self):
+        with MockServer(latency=0.05) as server:
+            ts = TruStar(config=server.config(coalesce_requests=True, pool_maxsize=16))
+            report = Report(title="Report", body="Body", enclave_ids=['mock-enclave'])
+            self.storm(ts, lambda: ts.submit_report(Report.from_dict(report.to_dict())))
+        self.assertEqual(len(server.submitted_reports), 16)
+
+    def test_errors_shared(self):
+        with MockServer(latency=0.1, fail_rate=1.0, fail_status=500) as server:
+            ts = TruStar(config=server.config(coalesce_requests=True, pool_maxsize=16, retry=False))
+
+            def get():
+                try:
+                    ts.get_report_details("report-1")
+                except requests.HTTPError as e:
+                    return e.response.status_code
+
+            self.assertEqual(set(self.storm(ts, get)), {500})
+        self.assertEqual(server.failures, ts.coalescing_stats.requests - ts.coalescing_stats.coalesced)
+
+    def test_async(self):
+        with MockServer(latency=0.1) as server:
+            async def run():
+                async with AsyncTruStar(config=server.config(coalesce_requests=True)) as ts:
+                    await ts.get_version()
+                    server.httpd.request_count = 0
+                    reports = await asyncio.gather(*[ts.get_report_details("report-1") for _ in range(16)])
+                    return ts, reports
+
+            ts, reports = asyncio.run(run())
+        self.assertEqual(set(report.id for report in reports), {"report-1"})
+        self.assertEqual(server.request_count, 1)
+        self.assertEqual(ts.coalescing_stats.coalesced, 15)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+import asyncio
+import gzip
+import json
+import unittest
+
+from benchmarks.mock_server import MockServer
+from trustar import AsyncTruStar, Indicator, TruStar
+
+
+def make_indicators(count):
+    return [Indicator(value="10.0.%d.%d" % (i // 256, i % 256), notes="note") for i in range(count)]
+
+
+class EncodeBodyTests(unittest.TestCase):
+
+    def make_client(self, **config):
+        config = dict({'user_api_key': 'key', 'user_api_secret': 'secret'}, **config)
+        return TruStar(config=config)._client
+
+    def test_disabled_by_default(self):
+        client = self.make_client()
+        body = "x" * 10000
+        self.assertEqual(client._encode_body(body), (body.encode('utf-8'), {}))
+
+    def test_threshold(self):
+        client = self.make_client(compress_requests=True, compress_threshold=100)
+        self.assertEqual(client._encode_body("x" * 99), (b"x" * 99, {}))
+
+        body = json.dumps([indicator.to_dict() for indicator in make_indicators(100)])
+        compressed, headers = client._encode_body(body)
+        self.assertEqual(headers, {'Content-Encoding': 'gzip'})
+        self.assertEqual(gzip.decompress(compressed).decode('utf-8'), body)
+        self.assertLess(len(compressed), len(body))
+
+        stats = client.transfer_stats
+        self.assertEqual(stats.compressed_requests, 1)
+        self.assertEqual(stats.uncompressed_request_bytes, len(body) - len(compressed))
+
+    def test_bytes_and_forms(self):
+        client = self.make_client(compress_requests=True, compress_threshold=1)
+        self.assertEqual(gzip.decompress(client._encode_body("é".encode('utf-8'))[0]), "é".encode('utf-8'))
+        form = {'grant_type': 'client_credentials'}
+        self.assertEqual(client._encode_body(form), (form, {}))
+
+
+class CompressedRequestTests(unittest.TestCase):
+
+    def test_sync(self):
+        indicators = make_indicators(500)
+        with MockServer() as server:
+            ts = TruStar(config=server.config(compress_requests=True))
+            # get a token first, since form bodies are not counted
+            ts.get_version()
+            server.request_body_bytes = 0
+            ts.submit_indicators(indicators)
+            submitted = server.submitted_indicators
+            request_body_bytes = server.request_body_bytes
+        self.assertEqual(sorted(i['value'] for i in submitted), sorted(i.value for i in indicators))
+
+        stats = ts.transfer_stats
+        self.assertEqual(stats.compressed_requests, 1)
+        self.assertEqual(stats.request_bytes, request_body_bytes)
+        self.assertLess(stats.request_compression_ratio, 0.5)
+
+    def test_async(self):
+        indicators = make_indicators(500)
+
+        async def run():
+            async with AsyncTruStar(config=server.config(compress_requests=True)) as ts:
+                await ts.submit_indicators(indicators)
+                return ts.transfer_stats
+
+        with MockServer() as server:
+            stats = asyncio.run(run())
+            submitted = server.submitted_indicators
+        self.assertEqual(len(submitted), 500)
+        self.assertEqual(stats.compressed_requests, 1)
+        self.assertLess(stats.request_compression_ratio, 0.5)
+
+    def test_compressed_responses_counted(self):
+        with MockServer(total_indicators=500, compress_responses=True) as server:
+            ts = TruStar(config=server.config())
+            values = [indicator.value for indicator in ts.get_indicators(page_size=500)]
+        stats = ts.transfer_stats
+        self.assertEqual(len(values), 500)
+        self.assertGreater(stats.compressed_responses, 0)
+        self.assertLess(stats.response_compression_ratio, 1)
+        self.assertEqual(stats.compressed_requests, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
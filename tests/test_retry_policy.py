@@ -0,0 +1,85 @@
+import unittest
+
+import requests
+
+from benchmarks.mock_server import MockServer
+from trustar import Report, RetryPolicy, TruStar
+
+
+class RetryPolicyTests(unittest.TestCase):
+
+    def test_server_errors(self):
+        policy = RetryPolicy(max_attempts=3)
+        self.assertIsNotNone(policy.get_delay("GET", 1, 0, status_code=503))
+        self.assertIsNone(policy.get_delay("GET", 1, 0, status_code=501))
+        self.assertIsNone(policy.get_delay("GET", 3, 0, status_code=503))
+
+    def test_non_idempotent(self):
+        policy = RetryPolicy()
+        self.assertIsNone(policy.get_delay("POST", 1, 0, status_code=503))
+        self.assertIsNotNone(policy.get_delay("POST", 1, 0, status_code=503, idempotent=True))
+        self.assertIsNone(policy.get_delay("PUT", 1, 0, status_code=503, idempotent=False))
+        self.assertIsNotNone(RetryPolicy(retry_non_idempotent=True).get_delay("POST", 1, 0, status_code=503))
+
+    def test_exceptions(self):
+        policy = RetryPolicy()
+        self.assertIsNotNone(policy.get_delay("GET", 1, 0, exception=requests.ConnectionError()))
+        self.assertIsNone(policy.get_delay("GET", 1, 0, exception=ValueError()))
+        # a request that never connected never reached the server, so it is safe to retry whatever its method
+        self.assertIsNone(policy.get_delay("POST", 1, 0, exception=requests.ReadTimeout()))
+        self.assertIsNotNone(policy.get_delay("POST", 1, 0, exception=requests.ConnectTimeout()))
+
+    def test_async_exceptions(self):
+        import aiohttp
+        self.assertIsNotNone(RetryPolicy().get_delay("GET", 1, 0, exception=aiohttp.ServerDisconnectedError()))
+        custom = RetryPolicy(retry_exceptions=[requests.ConnectionError])
+        self.assertIsNone(custom.get_delay("GET", 1, 0, exception=aiohttp.ServerDisconnectedError()))
+
+    def test_backoff(self):
+        policy = RetryPolicy(base_delay=1, max_delay=5)
+        for attempt, cap in [(1, 1), (2, 2), (3, 4), (4, 5), (10, 5)]:
+            for _ in range(20):
+                self.assertTrue(0 <= policy.get_backoff(attempt) <= cap)
+
+    def test_budget(self):
+        self.assertIsNone(RetryPolicy(budget=5).get_delay("GET", 1, 5, status_code=503))
+        self.assertIsNotNone(RetryPolicy(budget=None).get_delay("GET", 1, 1000, status_code=503))
+
+
+class RetryingClientTests(unittest.TestCase):
+
+    def test_get_retried(self):
+        with MockServer(fail_rate=0.3, seed=2) as server:
+            ts = TruStar(config=server.config(retry_policy=RetryPolicy(max_attempts=20, base_delay=0.001)))
+            for _ in range(20):
+                self.assertEqual(ts.get_version().strip(), "1.3")
+        self.assertGreater(server.failures, 0)
+        self.assertEqual(ts.retry_stats.retries, server.failures)
+        self.assertEqual(ts.retry_stats.gave_up, 0)
+
+    def test_not_retried_by_default(self):
+        with MockServer(fail_rate=1.0) as server:
+            ts = TruStar(config=server.config())
+            with self.assertRaises(requests.HTTPError):
+                ts.get_version()
+        self.assertEqual(server.failures, 1)
+        self.assertEqual(ts.retry_stats.retries, 0)
+
+    def test_post_not_retried(self):
+        with MockServer(fail_rate=1.0) as server:
+            ts = TruStar(config=server.config(retry_policy=RetryPolicy(base_delay=0.001)))
+            with self.assertRaises(requests.HTTPError):
+                ts.submit_report(Report(title="Report", body="Body", enclave_ids=['mock-enclave']))
+        self.assertEqual(server.failures, 1)
+
+    def test_give_up(self):
+        with MockServer(fail_rate=1.0) as server:
+            ts = TruStar(config=server.config(retry_policy=RetryPolicy(max_attempts=3, base_delay=0.001)))
+            with self.assertRaises(requests.HTTPError):
+                ts.get_version()
+        self.assertEqual(server.failures, 3)
+        self.assertEqual(ts.retry_stats.gave_up, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
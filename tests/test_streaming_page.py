@@ -0,0 +1,83 @@
+import io
+import json
+import unittest
+
+import requests
+
+from benchmarks.mock_server import MockServer
+from trustar import Indicator, StreamingPage, TruStar
+from trustar.json_stream import PageStreamParser, iter_page_items
+
+
+def make_response(body):
+    response = requests.Response()
+    response.status_code = 200
+    response.raw = io.BytesIO(json.dumps(body).encode('utf-8'))
+    return response
+
+
+class PageStreamParserTests(unittest.TestCase):
+
+    BODY = {'pageNumber': 0, 'items': [{'value': "a.com"}, None, [1, "]"], "}{", 1.5e3, {'value': "é"}, None],
+            'totalElements': 7, 'hasNext': False}
+
+    def test_chunk_sizes(self):
+        """
+        Test that the items and fields are parsed the same however the body is split into chunks.
+        """
+        text = json.dumps(self.BODY, ensure_ascii=False).encode('utf-8')
+        for chunk_size in [1, 2, 3, 7, len(text)]:
+            fields = {}
+            items = list(iter_page_items(io.BytesIO(text), set_field=fields.__setitem__, chunk_size=chunk_size))
+            self.assertEqual(items, self.BODY['items'])
+            self.assertEqual(fields, {'pageNumber': 0, 'totalElements': 7, 'hasNext': False})
+
+    def test_number_at_end_of_chunk(self):
+        parser = PageStreamParser()
+        self.assertEqual(parser.feed('{"items": [12'), [])
+        self.assertEqual(parser.feed('34, 5'), [1234])
+        self.assertEqual(parser.feed(']}'), [5])
+        self.assertEqual(parser.close(), [])
+
+    def test_number_split_within_fraction(self):
+        parser = PageStreamParser()
+        self.assertEqual(parser.feed('{"items": [1500.'), [])
+        self.assertEqual(parser.feed('25e'), [])
+        self.assertEqual(parser.feed('2, 1]}'), [150025.0, 1])
+
+    def test_invalid(self):
+        for text in ['{"items": [1,]}', '{"items": [1}', '{"items": [1]} x', '{"items": [1]']:
+            with self.assertRaises(ValueError):
+                list(iter_page_items(io.BytesIO(text.encode('utf-8'))))
+
+
+class StreamingPageTests(unittest.TestCase):
+
+    def test_null_items(self):
+        """
+        Test that null items are generated rather than ending the page early.
+        """
+        page = StreamingPage(make_response({'items': [None, {'value': "a.com"}, None], 'hasNext': False}))
+        self.assertEqual(list(page.items), [None, {'value': "a.com"}, None])
+
+    def test_fields_after_items(self):
+        page = StreamingPage(make_response({'items': [{'value': "a.com"}, {'value': "b.com"}, {'value': "c.com"}],
+                                            'pageSize': 3, 'totalElements': 6, 'hasNext': True}),
+                             content_type=Indicator)
+        first = next(page.items)
+        # reading the fields reads the rest of the response, holding the remaining items
+        self.assertTrue(page.has_more_pages())
+        self.assertEqual(page.get_total_pages(), 2)
+        self.assertEqual([first.value] + [indicator.value for indicator in page.items], ["a.com", "b.com", "c.com"])
+
+    def test_matches_buffered_pages(self):
+        with MockServer(total_indicators=500) as server:
+            ts = TruStar(config=server.config())
+            expected = [indicator.value for indicator in ts.get_indicators(page_size=100)]
+            streamed = [indicator.value for indicator in ts.get_indicators(page_size=100, streaming=True)]
+        self.assertEqual(len(expected), 500)
+        self.assertEqual(streamed, expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
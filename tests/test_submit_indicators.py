@@ -0,0 +1,97 @@
+import json
+import unittest
+
+from benchmarks.mock_server import MockServer
+from trustar import Indicator, Tag, TruStar
+from trustar.indicator_client import IndicatorClient
+
+
+def make_indicators(count, notes=None):
+    return [Indicator(value="10.0.%d.%d" % (i // 256, i % 256), notes=notes) for i in range(count)]
+
+
+class SubmissionChunkTests(unittest.TestCase):
+
+    def get_chunks(self, indicators, **kwargs):
+        return list(IndicatorClient._get_submission_chunks(indicators, ["enclave"], [{"name": "tag"}], **kwargs))
+
+    def test_chunk_size(self):
+        chunks = self.get_chunks(make_indicators(25), chunk_size=10)
+        self.assertEqual([(result.index, result.start, result.count) for result, _ in chunks],
+                         [(0, 0, 10), (1, 10, 10), (2, 20, 5)])
+        for result, body in chunks:
+            body = json.loads(body)
+            self.assertEqual(body["enclaveIds"], ["enclave"])
+            self.assertEqual(body["tags"], [{"name": "tag"}])
+            self.assertEqual([item["value"] for item in body["content"]], [i.value for i in result.items])
+            self.assertEqual(result.num_bytes, len(json.dumps(body)))
+
+    def test_max_payload_bytes(self):
+        indicators = make_indicators(100, notes="x" * 50)
+        chunks = self.get_chunks(indicators, max_payload_bytes=2000)
+        self.assertGreater(len(chunks), 1)
+        self.assertTrue(all(result.num_bytes <= 2000 for result, _ in chunks))
+        self.assertTrue(all(result.num_bytes == len(body.encode('utf-8')) for result, body in chunks))
+        self.assertEqual([i for result, _ in chunks for i in result.items], indicators)
+
+    def test_oversized_indicator_sent_alone(self):
+        indicators = make_indicators(3)
+        indicators[1].notes = "x" * 5000
+        chunks = self.get_chunks(indicators, max_payload_bytes=1000)
+        self.assertEqual([result.count for result, _ in chunks], [1, 1, 1])
+
+    def test_lazy(self):
+        def generate():
+            for indicator in make_indicators(30):
+                consumed.append(indicator)
+                yield indicator
+
+        consumed = []
+        chunks = IndicatorClient._get_submission_chunks(generate(), ["enclave"], None, chunk_size=10)
+        next(chunks)
+        self.assertLessEqual(len(consumed), 11)
+
+
+class SubmitIndicatorsTests(unittest.TestCase):
+
+    def test_single_request(self):
+        indicators = make_indicators(50)
+        with MockServer() as server:
+            ts = TruStar(config=server.config())
+            self.assertIsNone(ts.submit_indicators(indicators, tags=[Tag(name="tag", enclave_id="mock-enclave")]))
+            submitted = server.submitted_indicators
+        self.assertEqual(sorted(i['value'] for i in submitted), sorted(i.value for i in indicators))
+
+    def test_chunked(self):
+        indicators = make_indicators(250)
+        with MockServer() as server:
+            ts = TruStar(config=server.config(pool_maxsize=4))
+            results = ts.submit_indicators(iter(indicators), chunk_size=100, max_workers=4)
+            submitted = server.submitted_indicators
+        self.assertEqual([(result.index, result.count) for result in results], [(0, 100), (1, 100), (2, 50)])
+        self.assertTrue(all(result.succeeded and result.attempts == 1 for result in results))
+        self.assertEqual(sorted(i['value'] for i in submitted), sorted(i.value for i in indicators))
+
+    def test_failed_chunks_retried(self):
+        with MockServer(fail_rate=0.3, seed=4) as server:
+            # chunks are re-sent after at most max_wait_time seconds
+            ts = TruStar(config=server.config(max_wait_time=0))
+            results = ts.submit_indicators(make_indicators(100), chunk_size=10, max_attempts=20)
+            failures = server.failures
+        self.assertGreater(failures, 0)
+        self.assertTrue(all(result.succeeded for result in results))
+        self.assertEqual(sum(result.attempts for result in results), 10 + failures)
+
+    def test_client_errors_not_retried(self):
+        indicators = make_indicators(3)
+        indicators[1].notes = "x" * 10000
+        with MockServer(max_body_bytes=5000) as server:
+            ts = TruStar(config=server.config())
+            results = ts.submit_indicators(indicators, chunk_size=1, max_attempts=5)
+        self.assertEqual([result.succeeded for result in results], [True, False, True])
+        self.assertEqual(results[1].attempts, 1)
+        self.assertEqual(results[1].items, indicators[1:2])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+import asyncio
+import unittest
+
+from benchmarks.mock_server import MockServer
+from trustar import AsyncTruStar, Report, RetryPolicy, TruStar
+
+
+def make_reports(count, prefix="report", external_ids=True):
+    return [Report(title="Report %d" % i, body="Report %d mentions 10.1.0.%d" % (i, i % 256),
+                   external_id="%s-%d" % (prefix, i) if external_ids else None, enclave_ids=['mock-enclave'])
+            for i in range(count)]
+
+
+class SubmitReportsTests(unittest.TestCase):
+    """
+    Test |submit_reports| against the mock server.  Subclasses run the same tests against |AsyncTruStar|.
+    """
+
+    def submit_reports(self, server, reports, **kwargs):
+        ts = TruStar(config=server.config(retry_policy=RetryPolicy(base_delay=0.01)))
+        return ts.submit_reports(reports, **kwargs)
+
+    def test_submit(self):
+        with MockServer() as server:
+            results = self.submit_reports(server, make_reports(20), max_workers=4)
+        self.assertEqual([result.index for result in results], list(range(20)))
+        self.assertTrue(all(result.succeeded and result.attempts == 1 for result in results))
+        self.assertEqual(sorted(result.id for result in results),
+                         sorted(report["id"] for report in server.submitted_reports))
+
+    def test_unordered(self):
+        with MockServer() as server:
+            results = self.submit_reports(server, make_reports(20), max_workers=4, ordered=False)
+        self.assertEqual(sorted(result.index for result in results), list(range(20)))
+
+    def test_consumed_lazily(self):
+        """
+        Test that reports are read from the iterable only as workers become free.
+        """
+        max_workers = 2
+        with MockServer(latency=0.01) as server:
+            read_ahead = []
+
+            def generate():
+                for i, report in enumerate(make_reports(20)):
+                    read_ahead.append(i - len(server.submitted_reports))
+                    yield report
+
+            results = self.submit_reports(server, generate(), max_workers=max_workers)
+        self.assertEqual(len(results), 20)
+        self.assertLessEqual(max(read_ahead), 2 * max_workers)
+
+    def test_no_duplicates_when_responses_are_lost(self):
+        with MockServer(fail_rate=0.1, lost_response_rate=0.1, seed=1) as server:
+            results = self.submit_reports(server, make_reports(100), max_workers=4, max_attempts=5)
+        external_ids = [report["externalTrackingId"] for report in server.submitted_reports]
+        self.assertGreater(server.failures, 0)
+        self.assertTrue(all(result.succeeded for result in results))
+        self.assertEqual(len(external_ids), len(set(external_ids)))
+        self.assertEqual(sorted(external_ids), sorted(report.external_id for report in make_reports(100)))
+
+    def test_reports_without_external_id_attempted_once(self):
+        with MockServer(lost_response_rate=1.0) as server:
+            results = self.submit_reports(server, make_reports(5, external_ids=False), max_workers=2)
+        self.assertTrue(all(not result.succeeded and result.attempts == 1 for result in results))
+        self.assertEqual(len(server.submitted_reports), 5)
+
+    def test_client_errors_not_retried(self):
+        reports = make_reports(3)
+        reports[1].body = "x" * 10000
+        with MockServer(max_body_bytes=5000) as server:
+            results = self.submit_reports(server, reports, max_workers=2)
+        self.assertEqual([result.succeeded for result in results], [True, False, True])
+        self.assertEqual(results[1].attempts, 1)
+
+
+class AsyncSubmitReportsTests(SubmitReportsTests):
+
+    def submit_reports(self, server, reports, **kwargs):
+        async def run():
+            async with AsyncTruStar(config=server.config(retry_policy=RetryPolicy(base_delay=0.01))) as ts:
+                return await ts.submit_reports(reports, **kwargs)
+
+        return asyncio.run(run())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.mock_server import MockServer
+from trustar import TruStar
+from trustar.token_manager import TokenManager
+
+
+class TokenManagerTests(unittest.TestCase):
+
+    def setUp(self):
+        self.fetches = 0
+        self.lock = threading.Lock()
+
+    def fetch_token(self, expires_in=3600):
+        with self.lock:
+            self.fetches += 1
+            token = "token-%d" % self.fetches
+        # slow enough that every thread finds the token missing while the first fetch is in flight
+        time.sleep(0.05)
+        return token, expires_in
+
+    def test_single_flight(self):
+        manager = TokenManager(self.fetch_token)
+        with ThreadPoolExecutor(16) as executor:
+            tokens = list(executor.map(lambda _: manager.get_token(), range(16)))
+        self.assertEqual(set(tokens), {"token-1"})
+        self.assertEqual(self.fetches, 1)
+
+    def test_stale_token_refreshed_once(self):
+        manager = TokenManager(self.fetch_token)
+        stale_token = manager.get_token()
+        with ThreadPoolExecutor(16) as executor:
+            tokens = list(executor.map(lambda _: manager.refresh(stale_token=stale_token), range(16)))
+        self.assertEqual(set(tokens), {"token-2"})
+        self.assertEqual(self.fetches, 2)
+
+    def test_refreshed_before_expiry(self):
+        manager = TokenManager(lambda: self.fetch_token(expires_in=0.2), refresh_margin=60)
+        self.assertEqual(manager.get_token(), "token-1")
+        # the token is refreshed halfway through its lifetime, since that is less than the margin
+        self.assertEqual(manager.get_token(), "token-1")
+        time.sleep(0.15)
+        self.assertEqual(manager.get_token(), "token-2")
+
+    def test_cache_file(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, "tokens.json")
+
+        TokenManager(self.fetch_token, cache_path=path, cache_key="key").get_token()
+        self.assertEqual(TokenManager(self.fetch_token, cache_path=path, cache_key="key").get_token(), "token-1")
+        self.assertEqual(TokenManager(self.fetch_token, cache_path=path, cache_key="other").get_token(), "token-2")
+        self.assertEqual(self.fetches, 2)
+        with open(path) as f:
+            self.assertNotIn("key", f.read())
+
+
+class ClientTokenTests(unittest.TestCase):
+
+    def test_expired_token_refreshed_once(self):
+        with MockServer(latency=0.01) as server:
+            ts = TruStar(config=server.config(pool_maxsize=16))
+            ts.get_version()
+            server.expire_tokens()
+            with ThreadPoolExecutor(16) as executor:
+                list(executor.map(lambda _: ts.get_version(), range(16)))
+        self.assertEqual(server.token_requests, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import unittest
+
+from benchmarks.mock_server import MockServer
+from trustar import Indicator, TruStar, WhitelistIndex
+
+
+class WhitelistIndexTests(unittest.TestCase):
+
+    def setUp(self):
+        self.index = WhitelistIndex([Indicator(value="Evil.com", type="DOMAIN"),
+                                     Indicator(value="10.1.0.0/16", type="CIDR_BLOCK"),
+                                     Indicator(value="2001:db8::/32", type="CIDR_BLOCK"),
+                                     "192.168.0.1"])
+
+    def test_values(self):
+        self.assertIn("evil.com", self.index)
+        self.assertIn("EVIL.COM", self.index)
+        self.assertIn("192.168.0.1", self.index)
+        self.assertNotIn("good.com", self.index)
+        self.assertNotIn("192.168.0.2", self.index)
+
+    def test_cidr_blocks(self):
+        self.assertIn("10.1.255.3", self.index)
+        self.assertNotIn("10.2.0.1", self.index)
+        self.assertIn("2001:db8:1::1", self.index)
+        self.assertNotIn("2001:db9::1", self.index)
+        self.assertNotIn("not-an-ip.1", self.index)
+
+    def test_remove(self):
+        self.index.remove("10.1.0.0/16")
+        self.index.remove("EVIL.com")
+        self.assertNotIn("10.1.255.3", self.index)
+        self.assertNotIn("evil.com", self.index)
+        self.assertEqual(len(self.index), 2)
+
+
+class ClientWhitelistIndexTests(unittest.TestCase):
+
+    def test_kept_in_sync(self):
+        with MockServer(whitelist_size=250) as server:
+            ts = TruStar(config=server.config())
+            index = ts.get_whitelist_index(page_size=100, max_workers=4)
+            self.assertEqual(len(index), 250)
+            self.assertIn("whitelisted-1.example.com", index)
+            self.assertIn("172.16.0.7", index)
+
+            ts.add_terms_to_whitelist(["new.example.com"])
+            ts.delete_indicator_from_whitelist(Indicator(value="whitelisted-1.example.com", type="DOMAIN"))
+            self.assertIn("new.example.com", index)
+            self.assertNotIn("whitelisted-1.example.com", index)
+
+
+if __name__ == '__main__':
+    unittest.main()
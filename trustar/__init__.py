@@ -3,7 +3,23 @@ from __future__ import absolute_import
 from .logger import configure_logging
 configure_logging()
 
+import sys
+
 from .trustar import TruStar
+
+# the asyncio client uses syntax that is only available in Python 3.6+
+if sys.version_info >= (3, 6):
+    from .async_trustar import AsyncTruStar
+from .rate_limiter import RateLimiter
+from .cache import IndicatorCache, MemoryIndicatorCache, SQLiteIndicatorCache
+from .batcher import MicroBatcher
+from .checkpoint import Checkpoint, CheckpointStore, FileCheckpointStore, SQLiteCheckpointStore
+from .sync import LocalMirror, SyncResult
+from .codec import JsonCodec, OrjsonCodec, UjsonCodec, get_codec
+from .metrics import (CallbackSink, CoalescingStats, HistogramSink, MetricsSink, RequestMetrics, RetryStats,
+                      TransferStats, get_path_template)
+from .retry_policy import RetryPolicy
+from .whitelist_index import WhitelistIndex
 from .models import *
 from .utils import *
 
@@ -4,13 +4,127 @@ from future import standard_library
 from six import string_types
 
 # external imports
+import base64
 import requests
-import requests.auth
+import threading
 import time
+import zlib
 from math import ceil
 from requests import HTTPError
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
 import logging
 
+# package imports
+from .codec import get_codec
+from .metrics import (CallbackSink, CoalescingStats, MetricsSink, RequestMetrics, RetryStats, TransferStats,
+                      get_path_template)
+from .models import RequestQuota
+from .rate_limiter import RateLimiter
+from .token_manager import TokenManager
+
+# the seconds spent opening connections on each thread, since the last request on that thread began
+_connect_timing = threading.local()
+
+
+def _time_connect(connect):
+    """
+    Wrap a connection's ``connect`` method to add the time it takes, including DNS resolution and any TLS handshake, to
+    the current thread's connect time.
+    """
+
+    def timed_connect(self):
+        start = time.time()
+        try:
+            connect(self)
+        finally:
+            _connect_timing.elapsed = getattr(_connect_timing, 'elapsed', 0.0) + time.time() - start
+
+    return timed_connect
+
+
+class _TimedHTTPConnection(HTTPConnection):
+    connect = _time_connect(HTTPConnection.connect)
+
+
+class _TimedHTTPSConnection(HTTPSConnection):
+    connect = _time_connect(HTTPSConnection.connect)
+
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+
+class _TimedHTTPAdapter(HTTPAdapter):
+    """
+    An ``HTTPAdapter`` whose connections record how long they take to open, for |RequestMetrics|.
+    """
+
+    def init_poolmanager(self, *args, **kwargs):
+        super(_TimedHTTPAdapter, self).init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {'http': _TimedHTTPConnectionPool,
+                                                   'https': _TimedHTTPSConnectionPool}
+
+
+class _InFlightRequest(object):
+    """
+    A ``GET`` request being made by one thread, whose result is shared with every thread that makes an identical request
+    before it completes.
+    """
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.response = None
+        self.error = None
+
+    def get_result(self):
+        """
+        :return: The response, once ``done`` is set.  Raises the exception the request raised instead, if any.
+        """
+
+        if self.error is not None:
+            raise self.error
+        return self.response
+
+
+# the next step of a request after a response, as decided by ApiClient._handle_response
+_DONE = "done"
+_RETRY = "retry"
+_REFRESH_TOKEN = "refresh_token"
+
+
+class _RequestState(object):
+    """
+    The state of a request across all of its attempts, read and updated by the methods that build each attempt and
+    decide whether to retry it.  Those methods are shared by |ApiClient| and ``AsyncApiClient``, whose request loops
+    only send attempts and wait between them.
+
+    :ivar data: The encoded request body.
+    :ivar body_headers: The headers describing the encoding of the body.
+    :ivar retry: Whether the request may still be retried.
+    :ivar attempts: The number of attempts sent so far.
+    :ivar start_time: When the request began, in seconds since epoch.
+    :ivar metrics: The |RequestMetrics| to record measurements in, or ``None``.
+    """
+
+    def __init__(self, method, path, params=None, data=None, body_headers=None, idempotent=None, retry=False,
+                 metrics=None):
+        self.method = method
+        self.path = path
+        self.params = params
+        self.data = data
+        self.body_headers = body_headers or {}
+        self.idempotent = idempotent
+        self.retry = retry
+        self.metrics = metrics
+        self.attempts = 0
+        self.start_time = time.time()
+
 
 class ApiClient(object):
     """
@@ -43,6 +157,10 @@ class ApiClient(object):
         | ``verify``              | whether to use SSL verification                        |
         +-------------------------+--------------------------------------------------------+
         | ``retry``               | whether to wait and retry requests that fail with 429  |
+        |                         | or as allowed by the retry policy                      |
+        +-------------------------+--------------------------------------------------------+
+        | ``retry_policy``        | a |RetryPolicy| for server and connection errors, which |
+        |                         | are not retried if this is ``None``                    |
         +-------------------------+--------------------------------------------------------+
         | ``max_wait_time``       | allow to fail if 429 wait time is greater than this    |
         +-------------------------+--------------------------------------------------------+
@@ -56,6 +174,42 @@ class ApiClient(object):
         +-------------------------+--------------------------------------------------------+
         | ``https_proxy``         | https proxy being used - http(s)://user:pwd@{ip}:{port}|
         +-------------------------+--------------------------------------------------------+
+        | ``pool_connections``    | number of per-host connection pools to cache           |
+        +-------------------------+--------------------------------------------------------+
+        | ``pool_maxsize``        | max number of connections kept alive per host          |
+        +-------------------------+--------------------------------------------------------+
+        | ``max_retries``         | connection-level retries performed by the adapter      |
+        +-------------------------+--------------------------------------------------------+
+        | ``keep_alive``          | whether to reuse connections between requests          |
+        +-------------------------+--------------------------------------------------------+
+        | ``max_concurrency``     | max requests in flight at once for batched lookups     |
+        +-------------------------+--------------------------------------------------------+
+        | ``max_url_length``      | max URL length when splitting lookups into batches     |
+        +-------------------------+--------------------------------------------------------+
+        | ``rate_limit``          | whether to pace requests to stay within request quotas |
+        +-------------------------+--------------------------------------------------------+
+        | ``rate_limiter``        | a |RateLimiter| to use instead of the shared one        |
+        +-------------------------+--------------------------------------------------------+
+        | ``quota_sync_interval`` | seconds between rate limiter syncs with request quotas |
+        +-------------------------+--------------------------------------------------------+
+        | ``token_refresh_margin``| seconds before expiry to refresh the OAuth2 token      |
+        +-------------------------+--------------------------------------------------------+
+        | ``token_cache_path``    | file to cache OAuth2 tokens in between processes       |
+        +-------------------------+--------------------------------------------------------+
+        | ``json_codec``          | name of the |JsonCodec| for request and response bodies |
+        +-------------------------+--------------------------------------------------------+
+        | ``compress_requests``   | whether to gzip request bodies above the threshold     |
+        +-------------------------+--------------------------------------------------------+
+        | ``compress_threshold``  | min request body size in bytes to compress             |
+        +-------------------------+--------------------------------------------------------+
+        | ``compress_level``      | gzip compression level, from 1 (fastest) to 9          |
+        +-------------------------+--------------------------------------------------------+
+        | ``metrics_sinks``       | a list of |MetricsSink| objects or functions to pass   |
+        |                         | the |RequestMetrics| of every request to               |
+        +-------------------------+--------------------------------------------------------+
+        | ``coalesce_requests``   | whether identical GETs made while one is in flight     |
+        |                         | share its response instead of being sent               |
+        +-------------------------+--------------------------------------------------------+
 
         :param dict config: A dictionary of configuration options.
         """
@@ -71,6 +225,29 @@ class ApiClient(object):
         self.verify = config.get('verify')
         self.retry = config.get('retry')
         self.max_wait_time = config.get('max_wait_time')
+        self.max_concurrency = config.get('max_concurrency') or 10
+        self.max_url_length = config.get('max_url_length') or 8000
+        self.codec = get_codec(config.get('json_codec'))
+
+        # request bodies are gzipped if configured; bytes sent and received are counted either way
+        self.compress_requests = config.get('compress_requests', False)
+        self.compress_threshold = config.get('compress_threshold') or 4096
+        self.compress_level = config.get('compress_level') or 6
+        self.transfer_stats = TransferStats()
+
+        # server errors and dropped connections are only retried, with backoff, if a retry policy is configured
+        self.retry_policy = config.get('retry_policy')
+        self.retry_stats = RetryStats()
+
+        # every request is measured if any sinks are configured; otherwise nothing is
+        self.metrics_sinks = [sink if isinstance(sink, MetricsSink) else CallbackSink(sink)
+                              for sink in config.get('metrics_sinks') or []]
+
+        # identical GET requests made while one is in flight wait for its response, if configured
+        self.coalesce_requests = config.get('coalesce_requests', False)
+        self.coalescing_stats = CoalescingStats()
+        self._in_flight = {}
+        self._in_flight_lock = threading.Lock()
 
         # To support proxy
         self.proxies = dict()
@@ -79,32 +256,120 @@ class ApiClient(object):
         if config.get('https_proxy'):
             self.proxies['https'] = config.get('https_proxy')
 
-        # initialize token property
-        self.token = None
+        # the token manager refreshes the token shortly before it expires
+        refresh_margin = config.get('token_refresh_margin')
+        self.token_manager = TokenManager(fetch_token=self._fetch_token,
+                                          refresh_margin=60 if refresh_margin is None else refresh_margin,
+                                          cache_path=config.get('token_cache_path'),
+                                          cache_key="{} {}".format(self.auth, self.api_key))
+
+        # all requests share a single pooled session, so that connections are kept alive between calls
+        self.keep_alive = config.get('keep_alive', True)
+        self.session = self._create_session(pool_connections=config.get('pool_connections') or 10,
+                                            pool_maxsize=config.get('pool_maxsize') or 10,
+                                            max_retries=config.get('max_retries') or 0,
+                                            timed=bool(self.metrics_sinks))
+
+        # pace requests client-side, sharing one rate limiter per API key unless one is provided
+        self.rate_limiter = config.get('rate_limiter')
+        if self.rate_limiter is None and config.get('rate_limit'):
+            self.rate_limiter = RateLimiter.get_shared(key=(self.base, self.api_key),
+                                                       sync_interval=config.get('quota_sync_interval') or 60)
+
+    @staticmethod
+    def _create_session(pool_connections, pool_maxsize, max_retries, timed=False):
+        """
+        Create the ``requests.Session`` used for all calls made by this client.  The underlying urllib3 connection
+        pools are thread-safe, so a single session can be shared by every thread that uses this client.  Set
+        ``pool_maxsize`` to at least the number of threads making concurrent requests, otherwise surplus connections
+        will be discarded instead of returned to the pool.
+
+        :param int pool_connections: The number of per-host connection pools to cache.
+        :param int pool_maxsize: The maximum number of connections to keep alive in each pool.
+        :param int max_retries: The number of times to retry failed connections (not failed requests).
+        :param bool timed: Whether to time how long connections take to open, for |RequestMetrics|.
+        :return: The session.
+        """
+
+        adapter_class = _TimedHTTPAdapter if timed else HTTPAdapter
+        adapter = adapter_class(pool_connections=pool_connections,
+                                pool_maxsize=pool_maxsize,
+                                max_retries=max_retries)
+        session = requests.Session()
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
+
+    def close(self):
+        """
+        Close all pooled connections held by this client.
+        """
+
+        self.session.close()
+
+    @property
+    def token(self):
+        """
+        The current OAuth2 token, or ``None`` if none has been fetched yet.
+        """
+
+        return self.token_manager.token
 
     def _get_token(self):
         """
-        Returns the token.  If no token has been generated yet, gets one first.
+        Returns the token.  If no token has been generated yet, or it is about to expire, gets a new one first.
         :return: The OAuth2 token.
         """
 
-        if self.token is None:
-            self._refresh_token()
-        return self.token
+        return self.token_manager.get_token()
 
-    def _refresh_token(self):
+    def _refresh_token(self, stale_token=None):
         """
         Retrieves the OAuth2 token generated by the user's API key and API secret.
-        Sets the instance property 'token' to this new token.
+        If several threads find the same token to be expired, only one of them retrieves a new one.
+
+        :param stale_token: The token that the caller found to be expired.  Defaults to the current token.
+        """
+
+        if stale_token is None:
+            stale_token = self.token
+        self.token_manager.refresh(stale_token=stale_token)
+
+    def _fetch_token(self):
+        """
+        Requests a new OAuth2 token from the server.
         If the current token is still live, the server will simply return that.
+
+        :return: A tuple of the token and its lifetime in seconds.
+        """
+
+        headers, post_data = self._get_token_request()
+        response = self.session.post(self.auth, headers=headers, data=post_data, proxies=self.proxies,
+                                     verify=self.verify)
+
+        # raise exception if status code indicates an error
+        return self._parse_token_response(response)
+
+    def _get_token_request(self):
+        """
+        Build the headers and form data of an OAuth2 token request.
+
+        :return: A tuple of the headers dictionary and the form data dictionary.
         """
 
         # use basic auth with API key and secret
-        client_auth = requests.auth.HTTPBasicAuth(self.api_key, self.api_secret)
+        credentials = "{}:{}".format(self.api_key, self.api_secret).encode('utf-8')
+        headers = {"Authorization": "Basic " + base64.b64encode(credentials).decode('ascii')}
+        return headers, {"grant_type": "client_credentials"}
 
-        # make request
-        post_data = {"grant_type": "client_credentials"}
-        response = requests.post(self.auth, auth=client_auth, data=post_data, proxies=self.proxies)
+    @classmethod
+    def _parse_token_response(cls, response):
+        """
+        Extract the access token from the response to an OAuth2 token request.
+
+        :param response: The response object.
+        :return: A tuple of the OAuth2 token and its lifetime in seconds (``None`` if the response does not say).
+        """
 
         # raise exception if status code indicates an error
         if 400 <= response.status_code < 600:
@@ -113,8 +378,8 @@ class ApiClient(object):
                                                "unable to get token")
             raise HTTPError(message, response=response)
 
-        # set token property to the received token
-        self.token = response.json()["access_token"]
+        body = response.json()
+        return body["access_token"], body.get("expires_in")
 
     def _get_headers(self, is_json=False):
         """
@@ -138,6 +403,12 @@ class ApiClient(object):
         if is_json:
             headers['Content-Type'] = 'application/json'
 
+        # responses are decompressed transparently
+        headers['Accept-Encoding'] = 'gzip, deflate'
+
+        if not self.keep_alive:
+            headers['Connection'] = 'close'
+
         return headers
 
     @classmethod
@@ -161,62 +432,422 @@ class ApiClient(object):
                 pass
         return False
 
-    def request(self, method, path, headers=None, params=None, data=None, **kwargs):
+    def request(self, method, path, headers=None, params=None, data=None, idempotent=None, **kwargs):
         """
-        A wrapper around ``requests.request`` that handles boilerplate code specific to TruStar's API.
+        A wrapper around ``requests.Session.request`` that handles boilerplate code specific to TruStar's API.
+        If ``coalesce_requests`` is enabled, a ``GET`` request identical to one already in flight waits for that
+        request's response, or exception, instead of being sent.
 
         :param str method: The method of the request (``GET``, ``PUT``, ``POST``, or ``DELETE``)
         :param str path: The path of the request, i.e. the piece of the URL after the base URL
         :param dict headers: A dictionary of headers that will be merged with the base headers for the SDK
+        :param bool idempotent: Whether the request is safe to repeat, and so may be retried after a server or
+            connection error.  Defaults to whether ``method`` is idempotent; see |RetryPolicy|.
         :param kwargs: Any extra keyword arguments.  These will be forwarded to the call to ``requests.request``.
         :return: The response object.
         """
 
-        retry = self.retry
-        attempted = False
-        while not attempted or retry:
+        key = self._get_coalescing_key(method, path, headers, params, data, kwargs) if self.coalesce_requests else None
+        if key is None:
+            return self._measured_request(method, path, headers=headers, params=params, data=data,
+                                          idempotent=idempotent, **kwargs)
+
+        # wait for an identical request already in flight, if there is one, rather than sending another
+        with self._in_flight_lock:
+            call = self._in_flight.get(key)
+            coalesced = call is not None
+            if not coalesced:
+                call = self._in_flight[key] = _InFlightRequest()
+        self.coalescing_stats.record_request(coalesced)
+
+        if coalesced:
+            call.done.wait()
+            return call.get_result()
+
+        try:
+            call.response = self._measured_request(method, path, params=params, idempotent=idempotent)
+            return call.response
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._in_flight_lock:
+                del self._in_flight[key]
+            call.done.set()
+
+    @staticmethod
+    def _get_coalescing_key(method, path, headers, params, data, kwargs):
+        """
+        Identify a request by its method, path, and query parameters, regardless of the order the parameters were
+        given in, so that identical requests can be coalesced.
+
+        :return: The key, or ``None`` if the request may not be coalesced.  Only ``GET`` requests without extra headers,
+            a body, or extra keyword arguments (such as ``stream``) may be.
+        """
+
+        if method != "GET" or headers or data is not None or kwargs:
+            return None
+
+        if params is None:
+            items = []
+        elif isinstance(params, dict):
+            items = params.items()
+        elif isinstance(params, (list, tuple)):
+            items = params
+        else:
+            return None
+
+        canonical_params = []
+        for name, value in items:
+            # like requests, leave out parameters whose value is None
+            if value is None:
+                continue
+            if isinstance(value, (list, tuple)):
+                value = tuple(str(v) for v in value)
+            else:
+                value = str(value)
+            canonical_params.append((name, value))
+
+        # sort by name only, so that the order of repeated parameters is kept
+        canonical_params.sort(key=lambda item: item[0])
+        return method, path.strip('/'), tuple(canonical_params)
+
+    def _measured_request(self, method, path, headers=None, params=None, data=None, idempotent=None, **kwargs):
+        """
+        Make a request, passing its |RequestMetrics| to the metrics sinks if there are any.
+        """
+
+        if not self.metrics_sinks:
+            return self._request(method, path, headers=headers, params=params, data=data, idempotent=idempotent,
+                                 **kwargs)
+
+        metrics = RequestMetrics(method, get_path_template(path))
+        start_time = time.time()
+        try:
+            return self._request(method, path, headers=headers, params=params, data=data, idempotent=idempotent,
+                                 metrics=metrics, **kwargs)
+        except Exception as e:
+            metrics.error = type(e).__name__
+            raise
+        finally:
+            metrics.total_time = time.time() - start_time
+            self._emit_metrics(metrics)
+
+    def _emit_metrics(self, metrics):
+        """
+        Pass the |RequestMetrics| of a completed request to every sink.
+        """
+
+        for sink in self.metrics_sinks:
+            try:
+                sink.record(metrics)
+            except Exception:
+                self.logger.warning("Metrics sink %r failed.", sink, exc_info=True)
 
-            # get headers and merge with headers from method parameter if it exists
-            base_headers = self._get_headers(is_json=method in ["POST", "PUT"])
-            if headers is not None:
-                base_headers.update(headers)
+    def _request(self, method, path, headers=None, params=None, data=None, idempotent=None, metrics=None, **kwargs):
+        """
+        Implements ``request``, recording measurements in ``metrics`` if it is not ``None``.
+        """
+
+        state = self._begin_request(method, path, params=params, data=data, idempotent=idempotent, metrics=metrics)
+        while True:
+            token = self._get_token()
+            url, request_headers = self._prepare_request(state, headers)
 
-            url = "{}/{}".format(self.base, path)
+            # wait until the request quotas allow another request
+            if self.rate_limiter is not None and path != "request-quotas":
+                self.rate_limiter.sync(self._get_request_quotas)
+                self.rate_limiter.acquire()
 
             # make request
-            response = requests.request(method=method,
-                                        url=url,
-                                        headers=base_headers,
-                                        verify=self.verify,
-                                        params=params,
-                                        data=data,
-                                        proxies=self.proxies,
-                                        **kwargs)
-            attempted = True
-
-            # log request
-            self.logger.debug("%s %s. Trace-Id: %s. Params: %s", method, url, response.headers.get('Trace-Id'), params)
-
-            # refresh token if expired
-            if self._is_expired_token_response(response):
-                self._refresh_token()
-
-            # if "too many requests" status code received, wait until next request will be allowed and retry
-            elif retry and response.status_code == 429:
-                wait_time = ceil(response.json().get('waitTime') / 1000)
-                self.logger.debug("Waiting %d seconds until next request allowed." % wait_time)
-
-                # if wait time exceeds max wait time, allow the exception to be thrown
-                if wait_time <= self.max_wait_time:
-                    time.sleep(wait_time)
-                else:
-                    retry = False
-
-            # request cycle is complete
+            self._begin_attempt(state)
+            if metrics is not None:
+                _connect_timing.elapsed = 0.0
+            try:
+                response = self.session.request(method=method,
+                                                url=url,
+                                                headers=request_headers,
+                                                verify=self.verify,
+                                                params=params,
+                                                data=state.data,
+                                                proxies=self.proxies,
+                                                **kwargs)
+            except Exception as e:
+                delay = self._handle_exception(state, e, connect_time=self._get_connect_time(metrics))
+                if delay is None:
+                    raise
+                time.sleep(delay)
+                continue
+
+            step, wait_time = self._handle_response(state, url, response,
+                                                    connect_time=self._get_connect_time(metrics),
+                                                    streamed=kwargs.get('stream', False))
+            if step == _REFRESH_TOKEN:
+                self._refresh_token(stale_token=token)
+            elif step == _RETRY:
+                response.close()
+                time.sleep(wait_time)
             else:
-                retry = False
+                break
+
+        self._finish_request(state, response)
+        return response
+
+    def _begin_request(self, method, path, params=None, data=None, idempotent=None, metrics=None):
+        """
+        Start a request, encoding its body once rather than on every attempt.
+
+        :return: The ``_RequestState`` of the request.
+        """
+
+        data, body_headers = self._encode_body(data)
+        return _RequestState(method, path, params=params, data=data, body_headers=body_headers, idempotent=idempotent,
+                             retry=self.retry, metrics=metrics)
+
+    @staticmethod
+    def _get_connect_time(metrics):
+        """
+        :return: The seconds spent opening connections for the current attempt, if it is being measured.
+        """
+
+        return _connect_timing.elapsed if metrics is not None else 0.0
+
+    def _prepare_request(self, state, headers=None):
+        """
+        Build the URL and headers of the next attempt at a request.
+
+        :param _RequestState state: The request.
+        :param dict headers: A dictionary of headers that will be merged with the base headers for the SDK.
+        :return: A tuple of the URL and the headers dictionary.
+        """
+
+        # get headers and merge with headers from method parameter if it exists
+        request_headers = self._get_headers(is_json=state.method in ["POST", "PUT"])
+        request_headers.update(state.body_headers)
+        if headers is not None:
+            request_headers.update(headers)
+
+        return "{}/{}".format(self.base, state.path), request_headers
+
+    @staticmethod
+    def _begin_attempt(state):
+        """
+        Count an attempt at a request that is about to be sent.
+
+        :param _RequestState state: The request.
+        """
+
+        state.attempts += 1
+        if state.metrics is not None:
+            state.metrics.attempts = state.attempts
+
+    def _handle_exception(self, state, exception, connect_time=0.0):
+        """
+        Decide whether to retry an attempt at a request that raised an exception instead of returning a response.
+
+        :param _RequestState state: The request.
+        :param exception: The exception.
+        :param float connect_time: The seconds the attempt spent opening a connection.
+        :return: The number of seconds to wait before retrying, or ``None`` if the exception should be raised.
+        """
+
+        delay = self._get_retry_delay(state, exception=exception) if state.retry else None
+        if state.metrics is not None:
+            state.metrics.connect_time += connect_time
+            state.metrics.retry_wait_time += delay or 0
+        if delay is None and state.attempts > 1:
+            self.retry_stats.record_give_up()
+        return delay
+
+    def _handle_response(self, state, url, response, connect_time=0.0, streamed=False):
+        """
+        Record the response to an attempt at a request, and decide what to do next.  A response saying that the token
+        expired is retried once the token is refreshed; a 429 response is retried after the wait time it gives, unless
+        that is longer than ``max_wait_time``; and a server error is retried if the retry policy allows it.
+
+        :param _RequestState state: The request.
+        :param str url: The URL the attempt was sent to.
+        :param response: The response object.
+        :param float connect_time: The seconds the attempt spent opening a connection.
+        :param bool streamed: Whether the response body is streamed, and so must not be read yet.
+        :return: A tuple of the next step (``_REFRESH_TOKEN``, ``_RETRY`` or ``_DONE``) and the number of seconds to
+            wait before retrying.
+        """
+
+        request_bytes, response_bytes = self._record_transfer(state.data, response, streamed=streamed)
+        metrics = state.metrics
+        if metrics is not None:
+            metrics.status_code = response.status_code
+            metrics.connect_time += connect_time
+            metrics.ttfb = response.elapsed.total_seconds()
+            metrics.request_bytes += request_bytes
+            metrics.response_bytes += response_bytes
+
+        # log request
+        self.logger.debug("%s %s. Trace-Id: %s. Params: %s", state.method, url, response.headers.get('Trace-Id'),
+                          state.params)
+
+        # refresh token if expired
+        if self._is_expired_token_response(response):
+            self.retry_stats.record_retry("expired_token")
+            return _REFRESH_TOKEN, 0
+
+        if not state.retry:
+            return _DONE, None
+
+        # if "too many requests" status code received, wait until next request will be allowed and retry
+        if response.status_code == 429:
+            wait_time = self._get_wait_time(response)
+            self.logger.debug("Waiting %d seconds until next request allowed." % wait_time)
+
+            # make every other thread or coroutine sharing the rate limiter wait as well
+            if self.rate_limiter is not None:
+                self.rate_limiter.pause(wait_time)
+
+            # if wait time exceeds max wait time, allow the exception to be thrown
+            if wait_time > self.max_wait_time:
+                return _DONE, None
+            self.retry_stats.record_retry("429", wait_time)
+            if metrics is not None:
+                metrics.rate_limit_wait_time += wait_time
+            return _RETRY, wait_time
+
+        # if the retry policy allows it, wait and retry server errors
+        if response.status_code >= 500:
+            delay = self._get_retry_delay(state, response=response)
+            if delay is None:
+                return _DONE, None
+            if metrics is not None:
+                metrics.retry_wait_time += delay
+            return _RETRY, delay
+
+        # request cycle is complete
+        return _DONE, None
+
+    def _finish_request(self, state, response):
+        """
+        Raise an ``HTTPError`` if the final response to a request is an error, counting it as given up on if the
+        request was retried.
+
+        :param _RequestState state: The request.
+        :param response: The response object.
+        """
+
+        if state.attempts > 1 and response.status_code >= 400:
+            self.retry_stats.record_give_up()
+        self._raise_for_status(response)
+
+    def _get_retry_delay(self, state, response=None, exception=None):
+        """
+        Ask the retry policy whether to retry a request that failed with a server error or a connection error, and
+        record the retry if so.
+
+        :param _RequestState state: The request.
+        :param response: The response received, if any.
+        :param exception: The exception raised, if no response was received.
+        :return: The number of seconds to wait before retrying, or ``None`` if the request should not be retried.
+        """
+
+        if self.retry_policy is None:
+            return None
+
+        status_code = response.status_code if response is not None else None
+        delay = self.retry_policy.get_delay(state.method, state.attempts, time.time() - state.start_time,
+                                            status_code=status_code, exception=exception, idempotent=state.idempotent)
+        if delay is not None:
+            reason = str(status_code) if exception is None else type(exception).__name__
+            self.retry_stats.record_retry(reason, delay)
+            self.logger.debug("Retrying %s request after %s in %.2f seconds (attempt %d).", state.method, reason,
+                              delay, state.attempts + 1)
+        return delay
+
+    def _encode_body(self, data):
+        """
+        Encode a ``str`` request body as UTF-8, and gzip it if compression is enabled and the body is at least
+        ``compress_threshold`` bytes long.
+
+        :param data: The request body.  Bodies other than ``str`` and ``bytes``, e.g. form dictionaries, are returned
+            as is.
+        :return: A tuple of the body to send, and a dictionary of headers to send with it.
+        """
+
+        if not isinstance(data, (string_types, bytes)):
+            return data, {}
+
+        if not isinstance(data, bytes):
+            data = data.encode('utf-8')
+
+        if not self.compress_requests or len(data) < self.compress_threshold:
+            return data, {}
+
+        start = time.time()
+        # a wbits value of 31 produces the gzip format
+        compressor = zlib.compressobj(self.compress_level, zlib.DEFLATED, 31)
+        compressed = compressor.compress(data) + compressor.flush()
+        self.transfer_stats.record_compression(len(data), len(compressed), time.time() - start)
+        return compressed, {'Content-Encoding': 'gzip'}
+
+    def _record_transfer(self, data, response, streamed=False):
+        """
+        Count the bytes sent and received by a request in ``transfer_stats``.
+
+        :param data: The request body sent, as returned by ``_encode_body``.
+        :param response: The response object.
+        :param bool streamed: Whether the response body is streamed, in which case it has not been read yet and must
+            not be.
+        :return: A tuple of the number of request body bytes sent and of response body bytes received.
+        """
+
+        request_bytes = len(data) if isinstance(data, bytes) else 0
+
+        compressed_response = response.headers.get('Content-Encoding') in ('gzip', 'deflate')
+        content_length = response.headers.get('Content-Length')
+        if streamed:
+            response_bytes = decoded_response_bytes = int(content_length) if content_length else 0
+        else:
+            decoded_response_bytes = len(response.content or b'')
+            # urllib3 counts the bytes it read before decompressing them
+            tell = getattr(response.raw, 'tell', None)
+            if tell is not None:
+                response_bytes = tell()
+            elif content_length:
+                response_bytes = int(content_length)
+            else:
+                response_bytes = decoded_response_bytes
+
+        self.transfer_stats.record_request(request_bytes, response_bytes, decoded_response_bytes,
+                                           compressed_response)
+        return request_bytes, response_bytes
+
+    def _get_request_quotas(self):
+        """
+        Get the request quotas for the user's company, used to sync the rate limiter.
+
+        :return: A list of |RequestQuota| objects.
+        """
+
+        resp = self.get("request-quotas")
+        return [RequestQuota.from_dict(quota) for quota in self.decode(resp)]
+
+    @classmethod
+    def _get_wait_time(cls, response):
+        """
+        Get the number of seconds to wait before retrying a request that failed with a 429 status code.
+
+        :param response: The response object.
+        :return: The wait time, in seconds.
+        """
+
+        return ceil(response.json().get('waitTime') / 1000)
+
+    @classmethod
+    def _raise_for_status(cls, response):
+        """
+        Raise an ``HTTPError`` if the status code of the response indicates an error.
+
+        :param response: The response object.
+        """
 
-        # raise exception if status code indicates an error
         if 400 <= response.status_code < 600:
 
             # get response json body, if one exists
@@ -239,7 +870,25 @@ class ApiClient(object):
             # raise HTTPError
             raise HTTPError(message, response=response)
 
-        return response
+    def encode(self, obj):
+        """
+        Encode a request body with the configured |JsonCodec|.
+
+        :param obj: A JSON-serializable object, e.g. the dictionary representation of a model.
+        :return: The JSON encoding of the object.
+        """
+
+        return self.codec.dumps(obj)
+
+    def decode(self, response):
+        """
+        Decode a response body with the configured |JsonCodec|.  Equivalent to ``response.json()``.
+
+        :param response: The response object.
+        :return: The decoded body.
+        """
+
+        return self.codec.loads(response.content)
 
     def get(self, path, params=None, **kwargs):
         """
@@ -0,0 +1,1431 @@
+# external imports
+import asyncio
+import functools
+from collections import deque
+import logging
+import time
+from datetime import datetime, timedelta
+import weakref
+
+import requests
+from requests.models import RequestEncodingMixin
+from requests.structures import CaseInsensitiveDict
+from six import string_types
+
+try:
+    import aiohttp
+    import yarl
+except ImportError:
+    aiohttp = None
+
+# package imports
+from .api_client import _REFRESH_TOKEN, _RETRY, ApiClient
+from .indicator_client import IndicatorClient
+from .report_client import _WINDOW_END, REPORTS_READ_AHEAD, ReportClient, _ReportDeduplicator
+from .metrics import RequestMetrics, get_path_template
+from .trustar import TruStar
+from .models import (DistributionType, EnclavePermissions, IdType, Indicator, LazyIndicator, LazyReport, Page, Report,
+                     RequestQuota, SubmissionResult, Tag)
+from .utils import get_current_time_millis, get_url_chunks, DAY
+from .whitelist_index import WhitelistIndex
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncApiClient(ApiClient):
+    """
+    An asyncio counterpart of |ApiClient| that makes HTTP requests to the TruStar API using ``aiohttp``.  Responses are
+    converted to ``requests.Response`` objects, so that token refresh, 429 handling and error reporting behave exactly
+    as they do in |ApiClient|.  The number of requests in flight at once is bounded by the ``max_concurrency`` config
+    value.
+    """
+
+    def __init__(self, config=None):
+
+        if aiohttp is None:
+            raise ImportError("AsyncTruStar requires the 'aiohttp' package.  "
+                              "Install it with 'pip install trustar[async]'.")
+
+        super().__init__(config=config)
+
+        self.pool_maxsize = config.get('pool_maxsize') or 10
+
+        # these must be created from within a running event loop; see _get_session
+        self._session = None
+        self._semaphore = None
+        self._token_lock = None
+
+    @staticmethod
+    def _create_session(pool_connections, pool_maxsize, max_retries, timed=False):
+        # the aiohttp session is created lazily by _get_session instead
+        return None
+
+    @staticmethod
+    async def _on_connection_create_start(session, context, params):
+        if context.trace_request_ctx is not None:
+            context.trace_request_ctx['connect_start'] = time.time()
+
+    @staticmethod
+    async def _on_connection_create_end(session, context, params):
+        timing = context.trace_request_ctx
+        if timing is not None and 'connect_start' in timing:
+            timing['connect_time'] = time.time() - timing.pop('connect_start')
+
+    def _get_session(self):
+        """
+        :return: The ``aiohttp.ClientSession`` shared by all requests, creating it if necessary.
+        """
+
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.pool_maxsize, force_close=not self.keep_alive)
+            trace_configs = []
+            if self.metrics_sinks:
+                # time how long connections take to open, for RequestMetrics
+                trace_config = aiohttp.TraceConfig()
+                trace_config.on_connection_create_start.append(self._on_connection_create_start)
+                trace_config.on_connection_create_end.append(self._on_connection_create_end)
+                trace_configs.append(trace_config)
+            self._session = aiohttp.ClientSession(connector=connector, trace_configs=trace_configs)
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._token_lock = asyncio.Lock()
+        return self._session
+
+    async def close(self):
+        """
+        Close all pooled connections held by this client.
+        """
+
+        if self._session is not None:
+            await self._session.close()
+
+    def _get_token(self):
+        # only called after _get_valid_token has ensured the token is fresh
+        return self.token_manager.token
+
+    async def _get_valid_token(self):
+        """
+        :return: A token that is not about to expire, refreshing it first if necessary.
+        """
+
+        token = self.token_manager.get_valid_token()
+        if token is None:
+            token = await self._refresh_token(stale_token=self.token)
+        return token
+
+    async def _refresh_token(self, stale_token=None):
+        """
+        Retrieves the OAuth2 token generated by the user's API key and API secret.  Only one refresh is performed at a
+        time; coroutines that were waiting on a refresh that has since completed reuse the new token.
+
+        :param stale_token: The token that the caller found to be expired, if any.
+        :return: The new token.
+        """
+
+        self._get_session()
+        async with self._token_lock:
+
+            # another coroutine already replaced the stale token while this one was waiting
+            token = self.token_manager.get_valid_token()
+            if token is not None and token != stale_token:
+                return token
+
+            headers, post_data = self._get_token_request()
+            response = await self._send("POST", self.auth, headers=headers, data=post_data)
+            token, expires_in = self._parse_token_response(response)
+            self.token_manager.set_token(token, expires_in)
+            return token
+
+    async def _send(self, method, url, params=None, timing=None, **kwargs):
+        """
+        Make a single HTTP request, bounded by the concurrency semaphore.
+
+        :param dict timing: If given, the number of seconds spent opening a new connection, if one was opened, is set
+            as its ``connect_time``.
+        :return: The response, as a ``requests.Response`` object.  Its ``elapsed`` attribute is the time from sending
+            the request to receiving the response headers, as it is for ``requests``.
+        """
+
+        # encode the query string exactly as requests would (repeated keys for lists, Nones dropped)
+        if params:
+            query = RequestEncodingMixin._encode_params(params)
+            if query:
+                url = "{}?{}".format(url, query)
+
+        if not self.verify:
+            kwargs['ssl'] = False
+
+        timeout = kwargs.pop('timeout', None)
+        if timeout is not None:
+            kwargs['timeout'] = aiohttp.ClientTimeout(total=timeout)
+
+        if timing is not None:
+            kwargs['trace_request_ctx'] = timing
+
+        session = self._get_session()
+        async with self._semaphore:
+            start = time.time()
+            async with session.request(method, yarl.URL(url, encoded=True),
+                                       proxy=self.proxies.get(url.split(':', 1)[0]),
+                                       **kwargs) as resp:
+                elapsed = time.time() - start
+                content = await resp.read()
+
+        response = self._to_response(resp, content)
+        response.elapsed = timedelta(seconds=elapsed)
+        return response
+
+    @staticmethod
+    def _to_response(resp, content):
+        """
+        Convert an ``aiohttp`` response, whose body has already been read, to a ``requests.Response``.
+
+        :param resp: The ``aiohttp.ClientResponse``.
+        :param bytes content: The response body.
+        :return: The ``requests.Response``.
+        """
+
+        response = requests.Response()
+        response.status_code = resp.status
+        response.reason = resp.reason
+        response.headers = CaseInsensitiveDict(resp.headers)
+        response.url = str(resp.url)
+        response._content = content
+        return response
+
+    async def request(self, method, path, headers=None, params=None, data=None, idempotent=None, **kwargs):
+        """
+        Coroutine counterpart of |ApiClient|'s ``request`` method.
+
+        :param str method: The method of the request (``GET``, ``PUT``, ``POST``, or ``DELETE``)
+        :param str path: The path of the request, i.e. the piece of the URL after the base URL
+        :param dict headers: A dictionary of headers that will be merged with the base headers for the SDK
+        :param bool idempotent: Whether the request is safe to repeat, and so may be retried after a server or
+            connection error.  Defaults to whether ``method`` is idempotent; see |RetryPolicy|.
+        :param kwargs: Any extra keyword arguments.  These will be forwarded to ``aiohttp``.
+        :return: The response object.
+        """
+
+        key = self._get_coalescing_key(method, path, headers, params, data, kwargs) if self.coalesce_requests else None
+        if key is None:
+            return await self._measured_request(method, path, headers=headers, params=params, data=data,
+                                                idempotent=idempotent, **kwargs)
+
+        # wait for an identical request already in flight, if there is one, rather than sending another
+        future = self._in_flight.get(key)
+        self.coalescing_stats.record_request(future is not None)
+        if future is not None:
+            # shielded, so that cancelling one waiter does not cancel the request for the others
+            return await asyncio.shield(future)
+
+        future = self._in_flight[key] = asyncio.ensure_future(
+            self._measured_request(method, path, params=params, idempotent=idempotent))
+        future.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        return await asyncio.shield(future)
+
+    async def _measured_request(self, method, path, headers=None, params=None, data=None, idempotent=None, **kwargs):
+        """
+        Make a request, passing its |RequestMetrics| to the metrics sinks if there are any.
+        """
+
+        if not self.metrics_sinks:
+            return await self._request(method, path, headers=headers, params=params, data=data,
+                                       idempotent=idempotent, **kwargs)
+
+        metrics = RequestMetrics(method, get_path_template(path))
+        start_time = time.time()
+        try:
+            return await self._request(method, path, headers=headers, params=params, data=data,
+                                       idempotent=idempotent, metrics=metrics, **kwargs)
+        except Exception as e:
+            metrics.error = type(e).__name__
+            raise
+        finally:
+            metrics.total_time = time.time() - start_time
+            self._emit_metrics(metrics)
+
+    async def _request(self, method, path, headers=None, params=None, data=None, idempotent=None, metrics=None,
+                       **kwargs):
+        """
+        Implements ``request``, recording measurements in ``metrics`` if it is not ``None``.  Attempts are built, and
+        retried or not, by the same methods as |ApiClient|'s; only sending them and waiting differ.
+        """
+
+        state = self._begin_request(method, path, params=params, data=data, idempotent=idempotent, metrics=metrics)
+
+        while True:
+            token = await self._get_valid_token()
+            url, request_headers = self._prepare_request(state, headers)
+
+            # wait until the request quotas allow another request
+            if self.rate_limiter is not None and path != "request-quotas":
+                await self._wait_for_rate_limiter()
+
+            # make request
+            self._begin_attempt(state)
+            timing = {} if metrics is not None else None
+            try:
+                response = await self._send(method, url, headers=request_headers, params=params, data=state.data,
+                                            timing=timing, **kwargs)
+            except Exception as e:
+                delay = self._handle_exception(state, e, connect_time=self._get_timing_connect_time(timing))
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+                continue
+
+            step, wait_time = self._handle_response(state, url, response,
+                                                    connect_time=self._get_timing_connect_time(timing))
+            if step == _REFRESH_TOKEN:
+                await self._refresh_token(stale_token=token)
+            elif step == _RETRY:
+                await asyncio.sleep(wait_time)
+            else:
+                break
+
+        self._finish_request(state, response)
+        return response
+
+    @staticmethod
+    def _get_timing_connect_time(timing):
+        """
+        :param dict timing: The timing of the current attempt, as filled in by ``_send``, if it is being measured.
+        :return: The seconds spent opening a connection for the current attempt.
+        """
+
+        return timing.get('connect_time', 0.0) if timing is not None else 0.0
+
+    async def _wait_for_rate_limiter(self):
+        """
+        Coroutine counterpart of the rate limiter's ``sync`` and ``acquire`` methods: sync the rate limiter with the
+        request quotas if a sync is due, then wait until a request may be sent, without blocking the event loop.
+        """
+
+        rate_limiter = self.rate_limiter
+        while True:
+            if rate_limiter.begin_sync():
+                quotas = None
+                try:
+                    quotas = await self._get_request_quotas()
+                except Exception as e:
+                    self.logger.warning("Unable to sync rate limiter with request quotas: %s", e)
+                finally:
+                    rate_limiter.end_sync(quotas)
+
+            # until the first sync completes, another coroutine or thread is still fetching the quotas
+            if not rate_limiter.synced:
+                await asyncio.sleep(0.01)
+                continue
+
+            wait_time = rate_limiter.try_acquire()
+            if wait_time <= 0:
+                return
+            await asyncio.sleep(wait_time)
+
+    async def _get_request_quotas(self):
+        """
+        Coroutine counterpart of |ApiClient|'s ``_get_request_quotas`` method.
+        """
+
+        resp = await self.get("request-quotas")
+        return [RequestQuota.from_dict(quota) for quota in self.decode(resp)]
+
+
+# marks the end of the items of a call in the queues of _parallel_chain
+_DONE = object()
+
+
+async def _parallel_chain(func, iterable, max_workers, read_ahead=None, ordered=True):
+    """
+    Async counterpart of ``trustar.utils.parallel_chain``, where ``func`` returns an async iterable and each call runs
+    as a task.
+
+    :return: An async generator of ``(index, item)`` tuples.
+    """
+
+    if read_ahead is None:
+        read_ahead = 2
+    read_ahead = max(read_ahead, 1)
+
+    arguments = enumerate(iterable)
+    # the calls started and not yet finished by the consumer, as tuples of their index, queue, and task
+    pending = deque()
+    shared_queue = None if ordered else asyncio.Queue(read_ahead * max_workers)
+
+    async def produce(index, argument, queue):
+        try:
+            async for item in func(argument):
+                await queue.put((index, item, None))
+        except Exception as e:
+            await queue.put((index, None, e))
+            return
+        await queue.put((index, _DONE, None))
+
+    def fill():
+        while len(pending) < (2 * max_workers if ordered else max_workers):
+            try:
+                index, argument = next(arguments)
+            except StopIteration:
+                return
+            queue = shared_queue if shared_queue is not None else asyncio.Queue(read_ahead)
+            pending.append((index, queue, asyncio.ensure_future(produce(index, argument, queue))))
+
+    try:
+        fill()
+        while pending:
+            index, item, error = await pending[0][1].get()
+            if error is not None:
+                raise error
+            if item is _DONE:
+                for i, (pending_index, _, _) in enumerate(pending):
+                    if pending_index == index:
+                        del pending[i]
+                        break
+                fill()
+                continue
+            yield index, item
+    finally:
+        for _, _, task in pending:
+            task.cancel()
+
+
+class _AsyncMicroBatcher(object):
+    """
+    An asyncio counterpart of |MicroBatcher|: collects single lookups made by any number of coroutines into batches.  A
+    batch is fetched once ``max_batch_size`` keys are waiting, or ``window`` seconds after its first key was submitted,
+    whichever comes first.
+
+    :param fetch: A coroutine function that takes a list of distinct keys and returns a dictionary of results by key.
+        Keys missing from the dictionary have the result ``None``.
+    :param float window: The maximum number of seconds a key waits for others to join its batch.
+    :param int max_batch_size: The maximum number of keys in a batch.
+    :ivar lookups: The number of keys submitted.
+    :ivar batches: The number of batches fetched.
+    """
+
+    def __init__(self, fetch, window=0.01, max_batch_size=100):
+        self.fetch = fetch
+        self.window = window
+        self.max_batch_size = max_batch_size
+        self.lookups = 0
+        self.batches = 0
+        # the keys waiting to be batched, with the futures of their callers
+        self._pending = []
+        self._timer = None
+
+    async def get(self, key):
+        """
+        Look up a single key, waiting for the batch it joins to be fetched.
+
+        :param key: The key to look up.
+        :return: The result.  If fetching the key's batch raises an exception, so does this.
+        """
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((key, future))
+        self.lookups += 1
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+        return await future
+
+    def _flush(self):
+        """
+        Start fetching the keys that are waiting as a batch.
+        """
+
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        self.batches += 1
+        asyncio.ensure_future(self._fetch_batch(batch))
+
+    async def _fetch_batch(self, batch):
+        # callers may have been cancelled while they waited
+        batch = [(key, future) for key, future in batch if not future.done()]
+        if not batch:
+            return
+
+        keys = list(dict.fromkeys(key for key, _ in batch))
+        try:
+            results = await self.fetch(keys)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for key, future in batch:
+            if not future.done():
+                future.set_result(results.get(key))
+
+
+class AsyncTruStar(object):
+    """
+    An asyncio counterpart of |TruStar|.  Every endpoint method of |TruStar| is available here as a coroutine with the
+    same name and parameters, and every generator as an async generator, where ``max_workers`` is a number of tasks
+    rather than threads.  The exceptions are the ``max_workers``, ``read_ahead`` and ``streaming`` parameters of the
+    page-number paginated generators, which fetch one page at a time here.  Accepts the same configuration as
+    |TruStar|, plus ``max_concurrency`` (default ``10``), the maximum number of requests in flight at once.
+
+    Example:
+
+    >>> async with AsyncTruStar(config_role="trustar") as ts:
+    >>>     async for report in ts.get_reports(from_time=from_time):
+    >>>         print(report.id)
+    """
+
+    logger = logging.getLogger(__name__)
+
+    def __init__(self, config_file=None, config_role=None, config=None):
+
+        config = TruStar.build_config(config_file=config_file, config_role=config_role, config=config)
+
+        self.enclave_ids = config.get('enclave_ids')
+
+        if isinstance(self.enclave_ids, str):
+            self.enclave_ids = [self.enclave_ids]
+
+        # cache indicator lookups if a cache is provided
+        self.indicator_cache = config.get('indicator_cache')
+
+        # decode indicators and reports on first access if configured
+        if config.get('lazy_models'):
+            self._indicator_model, self._report_model = LazyIndicator, LazyReport
+        else:
+            self._indicator_model, self._report_model = Indicator, Report
+
+        # whitelist indexes to keep in sync with whitelist changes made through this client
+        self._whitelist_indexes = weakref.WeakSet()
+
+        # combine single indicator lookups into batched requests if configured
+        self._metadata_batcher = None
+        if config.get('batch_lookups'):
+            self._metadata_batcher = _AsyncMicroBatcher(fetch=self._get_metadata_batch,
+                                                        window=config.get('batch_window'),
+                                                        max_batch_size=config.get('batch_max_size'))
+
+        # initialize api client
+        self._client = AsyncApiClient(config=config)
+
+        # bytes sent and received, and time spent compressing
+        self.transfer_stats = self._client.transfer_stats
+
+        # requests retried, and why
+        self.retry_stats = self._client.retry_stats
+
+        # destinations of per-request measurements
+        self.metrics_sinks = self._client.metrics_sinks
+
+        # GET requests coalesced with identical ones in flight
+        self.coalescing_stats = self._client.coalescing_stats
+
+        TruStar._check_api_version(self._client.base)
+
+    async def close(self):
+        """
+        Close all pooled connections.
+        """
+
+        await self._client.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
+
+    ##################
+    ### Pagination ###
+    ##################
+
+    @staticmethod
+    async def _get_page_generator(func, start_page=0, page_size=None, checkpoint=None, resume_from=None):
+        """
+        Async counterpart of |Page|'s ``get_page_generator``.
+        """
+
+        page_number = start_page
+        more_pages = True
+
+        if resume_from is not None:
+            page_number = resume_from['page_number']
+            more_pages = not resume_from.get('done')
+
+        while more_pages:
+            page = await func(page_number=page_number, page_size=page_size)
+            yield page
+            more_pages = page.has_more_pages()
+            page_number += 1
+            if more_pages and checkpoint is not None:
+                checkpoint.save({'page_number': page_number})
+
+        if checkpoint is not None:
+            checkpoint.save({'page_number': page_number, 'done': True})
+
+    @staticmethod
+    async def _get_time_based_page_generator(get_page, get_next_to_time, from_time=None, to_time=None,
+                                             checkpoint=None, resume_from=None):
+        """
+        Async counterpart of ``trustar.utils.get_time_based_page_generator``.
+        """
+
+        if resume_from is not None:
+            if resume_from.get('done'):
+                return
+            from_time = resume_from['from_time']
+            to_time = resume_from['to_time']
+        else:
+            if to_time is None:
+                to_time = get_current_time_millis()
+
+            if from_time is None:
+                from_time = to_time - DAY
+
+        while to_time is not None and from_time <= to_time:
+            result = await get_page(from_time=from_time, to_time=to_time)
+            yield result
+            new_to_time = get_next_to_time(result)
+            if new_to_time is not None:
+                if new_to_time > to_time:
+                    raise Exception("to_time should not increase between page iterations.  "
+                                    "This can result in an endless loop.")
+                new_to_time -= 1
+            to_time = new_to_time
+            if checkpoint is not None and to_time is not None:
+                checkpoint.save({'from_time': from_time, 'to_time': to_time})
+
+        if checkpoint is not None:
+            checkpoint.save({'from_time': from_time, 'to_time': to_time, 'done': True})
+
+    @staticmethod
+    async def _run_workers(work, max_workers):
+        """
+        Run ``max_workers`` copies of the coroutine function ``work`` concurrently, cancelling the others if one fails.
+        """
+
+        workers = [asyncio.ensure_future(work()) for _ in range(max_workers)]
+        try:
+            await asyncio.gather(*workers)
+        finally:
+            for worker in workers:
+                worker.cancel()
+
+    @staticmethod
+    async def _get_generator(page_generator):
+        """
+        Async counterpart of |Page|'s ``get_generator``.
+        """
+
+        async for page in page_generator:
+            for item in page.items:
+                yield item
+
+    @staticmethod
+    async def _get_column_generator(page_generator):
+        """
+        Async counterpart of |Page|'s ``get_column_generator``.
+        """
+
+        async for page in page_generator:
+            yield page.items
+
+    #####################
+    ### API Endpoints ###
+    #####################
+
+    async def ping(self):
+        """
+        Ping the API.
+        """
+
+        result = (await self._client.get("ping")).content
+
+        if isinstance(result, bytes):
+            result = result.decode('utf-8')
+
+        return result.strip('\n')
+
+    async def get_version(self):
+        """
+        Get the version number of the API.
+        """
+
+        result = (await self._client.get("version")).content
+
+        if isinstance(result, bytes):
+            result = result.decode('utf-8')
+
+        return result.strip('\n')
+
+    async def get_user_enclaves(self):
+        """
+        See |get_user_enclaves|.
+        """
+
+        resp = await self._client.get("enclaves")
+        return [EnclavePermissions.from_dict(enclave) for enclave in self._client.decode(resp)]
+
+    async def get_request_quotas(self):
+        """
+        See |get_request_quotas|.
+        """
+
+        resp = await self._client.get("request-quotas")
+        return [RequestQuota.from_dict(quota) for quota in self._client.decode(resp)]
+
+    ###############
+    ### Reports ###
+    ###############
+
+    async def get_report_details(self, report_id, id_type=None):
+        """
+        See |get_report_details|.
+        """
+
+        params = {'idType': id_type}
+        resp = await self._client.get("reports/%s" % report_id, params=params)
+        return self._report_model.from_dict(self._client.decode(resp))
+
+    async def get_reports_page(self, is_enclave=None, enclave_ids=None, tag=None, excluded_tags=None,
+                               from_time=None, to_time=None):
+        """
+        See |get_reports_page|.
+        """
+
+        # explicitly compare to True and False to distinguish from None (which is treated as False in a conditional)
+        if is_enclave:
+            distribution_type = DistributionType.ENCLAVE
+        else:
+            distribution_type = DistributionType.COMMUNITY
+
+        if enclave_ids is None:
+            enclave_ids = self.enclave_ids
+
+        params = {
+            'from': from_time,
+            'to': to_time,
+            'distributionType': distribution_type,
+            'enclaveIds': enclave_ids,
+            'tags': tag,
+            'excludedTags': excluded_tags
+        }
+        resp = await self._client.get("reports", params=params)
+        return Page.from_dict(self._client.decode(resp), content_type=self._report_model)
+
+    def _get_reports_page_generator(self, is_enclave=None, enclave_ids=None, tag=None, excluded_tags=None,
+                                    from_time=None, to_time=None, checkpoint=None, resume_from=None):
+        """
+        Async counterpart of |TruStar|'s ``_get_reports_page_generator``.
+        """
+
+        get_page = functools.partial(self.get_reports_page, is_enclave, enclave_ids, tag, excluded_tags)
+        return self._get_time_based_page_generator(
+            get_page=get_page,
+            get_next_to_time=lambda x: x.items[-1].updated if len(x.items) > 0 else None,
+            from_time=from_time,
+            to_time=to_time,
+            checkpoint=checkpoint,
+            resume_from=resume_from
+        )
+
+    def get_reports(self, is_enclave=None, enclave_ids=None, tag=None, excluded_tags=None, from_time=None,
+                    to_time=None, max_workers=None, window_size=None, ordered=True, checkpoint=None, resume_from=None,
+                    read_ahead=None):
+        """
+        See |get_reports|.  If ``max_workers`` is greater than 1, sub-windows are harvested by that many tasks at once.
+
+        :return: An async generator of |Report| objects.
+        """
+
+        if max_workers is None or max_workers <= 1:
+            return self._get_generator(self._get_reports_page_generator(is_enclave, enclave_ids, tag, excluded_tags,
+                                                                        from_time, to_time, checkpoint=checkpoint,
+                                                                        resume_from=resume_from))
+
+        if checkpoint is not None and not ordered:
+            raise ValueError("Checkpointing a concurrent harvest requires 'ordered'.")
+
+        from_time, windows = ReportClient._get_harvest_windows(from_time, to_time, max_workers,
+                                                               window_size=window_size, resume_from=resume_from)
+
+        async def harvest(window):
+            window_from_time, window_to_time = window
+            async for page in self._get_reports_page_generator(is_enclave, enclave_ids, tag, excluded_tags,
+                                                               window_from_time, window_to_time):
+                yield page
+            yield _WINDOW_END
+
+        if read_ahead is None:
+            read_ahead = REPORTS_READ_AHEAD
+        pages = _parallel_chain(harvest, windows, max_workers=max_workers, read_ahead=read_ahead, ordered=ordered)
+        return self._get_harvested_reports(pages, windows, from_time, checkpoint)
+
+    @staticmethod
+    async def _get_harvested_reports(pages, windows, from_time, checkpoint=None):
+        """
+        Async counterpart of |TruStar|'s ``_checkpoint_windows`` and ``_get_deduplicated_reports`` together.
+        """
+
+        deduplicator = _ReportDeduplicator()
+        consumed = 0
+        async for index, page in pages:
+            # every sub-window before this page's has been consumed, including any that were empty
+            if checkpoint is not None and index > consumed:
+                checkpoint.save(ReportClient._get_window_cursor(windows, from_time, index))
+                consumed = index
+            if page is _WINDOW_END:
+                deduplicator.end_window(index)
+                continue
+            for report in deduplicator.get_new_reports(index, page):
+                yield report
+
+        if checkpoint is not None:
+            checkpoint.save(ReportClient._get_window_cursor(windows, from_time, len(windows)))
+
+    async def submit_report(self, report):
+        """
+        See |submit_report|.
+        """
+
+        # make distribution type default to "enclave"
+        if report.is_enclave is None:
+            report.is_enclave = True
+
+        if report.enclave_ids is None:
+            # use configured enclave_ids by default if distribution type is ENCLAVE
+            if report.is_enclave:
+                report.enclave_ids = self.enclave_ids
+            # if distribution type is COMMUNITY, API still expects non-null list of enclaves
+            else:
+                report.enclave_ids = []
+
+        if report.is_enclave and len(report.enclave_ids) == 0:
+            raise Exception("Cannot submit a report of distribution type 'ENCLAVE' with an empty set of enclaves.")
+
+        # default time began is current time
+        if report.time_began is None:
+            report.time_began = datetime.now()
+
+        data = self._client.encode(report.to_dict())
+        resp = await self._client.post("reports", data=data, timeout=60)
+
+        # get report id from response body
+        report_id = resp.content
+
+        if isinstance(report_id, bytes):
+            report_id = report_id.decode('utf-8')
+
+        report.id = report_id
+
+        return report
+
+    async def submit_reports(self, reports, max_workers=None, rate=None, max_attempts=3, ordered=True):
+        """
+        See |submit_reports|.
+        """
+
+        interval = 1.0 / rate if rate is not None else None
+        # the time at which the next submission may start, if submissions are paced
+        next_start = [0]
+
+        async def wait_for_turn():
+            now = time.time()
+            start = max(now, next_start[0])
+            next_start[0] = start + interval
+            if start > now:
+                await asyncio.sleep(start - now)
+
+        async def submit(index, report):
+            result = SubmissionResult(index=index, report=report)
+            while True:
+                result.attempts += 1
+                try:
+                    if interval is not None:
+                        await wait_for_turn()
+
+                    # an earlier attempt may have created the report even though it failed
+                    if result.attempts > 1:
+                        existing = await self._get_report_by_external_id(report.external_id)
+                        if existing is not None:
+                            report.id = existing.id
+                            result.error = None
+                            return result
+
+                    await self.submit_report(report)
+                    result.error = None
+                    return result
+                except Exception as e:
+                    result.error = str(e)
+                    status_code = getattr(getattr(e, 'response', None), 'status_code', None)
+                    connection_errors = (requests.RequestException, aiohttp.ClientError, asyncio.TimeoutError)
+                    if (not isinstance(e, connection_errors) or (status_code is not None and 400 <= status_code < 500)
+                            or not report.external_id or result.attempts >= max_attempts):
+                        logger.warning("Failed to submit report %d (external ID %s) after %d attempt(s): %s",
+                                       index, report.external_id, result.attempts, e)
+                        return result
+                    await asyncio.sleep(min(2 ** (result.attempts - 1), self._client.max_wait_time))
+
+        results = []
+        items = enumerate(reports)
+
+        # each worker takes the next report once it is free, so reports are read from the iterable as they are needed
+        async def work():
+            for index, report in items:
+                results.append(await submit(index, report))
+
+        await self._run_workers(work, max(max_workers or self._client.max_concurrency, 1))
+
+        if ordered:
+            results.sort(key=lambda result: result.index)
+        return results
+
+    async def _get_report_by_external_id(self, external_id):
+        """
+        :return: The |Report| with the external ID, or ``None`` if there is none.
+        """
+
+        try:
+            return await self.get_report_details(external_id, id_type=IdType.EXTERNAL)
+        except requests.HTTPError as e:
+            if e.response is not None and e.response.status_code == 404:
+                return None
+            raise
+
+    async def update_report(self, report):
+        """
+        See |update_report|.
+        """
+
+        # default to interal ID type if ID field is present
+        if report.id is not None:
+            id_type = IdType.INTERNAL
+            report_id = report.id
+        # if no ID field is present, but external ID field is, default to external ID type
+        elif report.external_id is not None:
+            id_type = IdType.EXTERNAL
+            report_id = report.external_id
+        # if no ID fields exist, raise exception
+        else:
+            raise Exception("Cannot update report without either an ID or an external ID.")
+
+        params = {'idType': id_type}
+
+        data = self._client.encode(report.to_dict())
+        await self._client.put("reports/%s" % report_id, data=data, params=params)
+
+        return report
+
+    async def delete_report(self, report_id, id_type=None):
+        """
+        See |delete_report|.
+        """
+
+        params = {'idType': id_type}
+        await self._client.delete("reports/%s" % report_id, params=params)
+
+    async def get_correlated_report_ids(self, indicators):
+        """
+        See |get_correlated_report_ids|.
+        """
+
+        params = {'indicators': indicators}
+        resp = await self._client.get("reports/correlate", params=params)
+        return self._client.decode(resp)
+
+    async def get_correlated_reports_page(self, indicators, enclave_ids=None, is_enclave=True,
+                                          page_size=None, page_number=None):
+        """
+        See |get_correlated_reports_page|.
+        """
+
+        if is_enclave:
+            distribution_type = DistributionType.ENCLAVE
+        else:
+            distribution_type = DistributionType.COMMUNITY
+
+        params = {
+            'indicators': indicators,
+            'enclaveIds': enclave_ids,
+            'distributionType': distribution_type,
+            'pageNumber': page_number,
+            'pageSize': page_size
+        }
+        resp = await self._client.get("reports/correlated", params=params)
+        return Page.from_dict(self._client.decode(resp), content_type=self._report_model)
+
+    def get_correlated_reports(self, indicators, enclave_ids=None, is_enclave=True):
+        """
+        See |get_correlated_reports|.
+
+        :return: An async generator of |Report| objects.
+        """
+
+        get_page = functools.partial(self.get_correlated_reports_page, indicators, enclave_ids, is_enclave)
+        return self._get_generator(self._get_page_generator(get_page))
+
+    async def search_reports_page(self, search_term, enclave_ids=None, page_size=None, page_number=None):
+        """
+        See |search_reports_page|.
+        """
+
+        params = {
+            'searchTerm': search_term,
+            'enclaveIds': enclave_ids,
+            'pageSize': page_size,
+            'pageNumber': page_number
+        }
+        resp = await self._client.get("reports/search", params=params)
+        return Page.from_dict(self._client.decode(resp), content_type=self._report_model)
+
+    def search_reports(self, search_term, enclave_ids=None):
+        """
+        See |search_reports|.
+
+        :return: An async generator of |Report| objects.
+        """
+
+        get_page = functools.partial(self.search_reports_page, search_term, enclave_ids)
+        return self._get_generator(self._get_page_generator(get_page))
+
+    ##################
+    ### Indicators ###
+    ##################
+
+    async def submit_indicators(self, indicators, enclave_ids=None, tags=None, chunk_size=None,
+                                max_payload_bytes=None, max_workers=None, max_attempts=1):
+        """
+        See |submit_indicators|.
+        """
+
+        if enclave_ids is None:
+            enclave_ids = self.enclave_ids
+
+        if tags is not None:
+            tags = [tag.to_dict() for tag in tags]
+
+        if chunk_size is None and max_payload_bytes is None:
+            body = IndicatorClient._get_submission_body(indicators, enclave_ids, tags)
+            await self._client.post("indicators", data=self._client.encode(body))
+            return
+
+        chunks = IndicatorClient._get_submission_chunks(indicators, enclave_ids, tags, chunk_size=chunk_size,
+                                                        max_payload_bytes=max_payload_bytes,
+                                                        encode=self._client.encode)
+
+        async def submit_chunk(result, body):
+            while True:
+                result.attempts += 1
+                try:
+                    await self._client.post("indicators", data=body)
+                    result.error = None
+                    return
+                except Exception as e:
+                    delay = IndicatorClient._get_chunk_retry_delay(result, e, max_attempts, self._client.max_wait_time)
+                    if delay is None:
+                        return
+                    await asyncio.sleep(delay)
+
+        results = []
+        chunks = iter(chunks)
+
+        # each worker takes the next chunk once it is free, so indicators are encoded only as chunks are needed, and
+        # results are in the order of the chunks
+        async def work():
+            for result, body in chunks:
+                results.append(result)
+                await submit_chunk(result, body)
+
+        await self._run_workers(work, max(max_workers or 1, 1))
+        return results
+
+    async def get_indicators_page(self, from_time=None, to_time=None, page_number=None, page_size=None,
+                                  enclave_ids=None, included_tag_ids=None, excluded_tag_ids=None,
+                                  columnar=False, columns=None, use_numpy=False):
+        """
+        See |get_indicators_page|.
+        """
+
+        params = {
+            'from': from_time,
+            'to': to_time,
+            'pageSize': page_size,
+            'pageNumber': page_number,
+            'enclaveIds': enclave_ids,
+            'tagIds': included_tag_ids,
+            'excludedTagIds': excluded_tag_ids
+        }
+        resp = await self._client.get("indicators", params=params)
+        return Page.from_dict(self._client.decode(resp), content_type=self._indicator_model, columnar=columnar,
+                              columns=columns, use_numpy=use_numpy)
+
+    def get_indicators(self, from_time=None, to_time=None, enclave_ids=None,
+                       included_tag_ids=None, excluded_tag_ids=None,
+                       start_page=0, page_size=None, checkpoint=None, resume_from=None):
+        """
+        See |get_indicators|.
+
+        :return: An async generator of |Indicator| objects.
+        """
+
+        get_page = functools.partial(
+            self.get_indicators_page,
+            from_time=from_time,
+            to_time=to_time,
+            enclave_ids=enclave_ids,
+            included_tag_ids=included_tag_ids,
+            excluded_tag_ids=excluded_tag_ids
+        )
+        return self._get_generator(self._get_page_generator(get_page, start_page, page_size,
+                                                            checkpoint=checkpoint, resume_from=resume_from))
+
+    def get_indicator_columns(self, from_time=None, to_time=None, enclave_ids=None,
+                              included_tag_ids=None, excluded_tag_ids=None, columns=None, use_numpy=False,
+                              start_page=0, page_size=None, checkpoint=None, resume_from=None):
+        """
+        See |get_indicator_columns|.
+
+        :return: An async generator of |ColumnBatch| objects.
+        """
+
+        get_page = functools.partial(
+            self.get_indicators_page,
+            from_time=from_time,
+            to_time=to_time,
+            enclave_ids=enclave_ids,
+            included_tag_ids=included_tag_ids,
+            excluded_tag_ids=excluded_tag_ids,
+            columnar=True,
+            columns=columns,
+            use_numpy=use_numpy
+        )
+        return self._get_column_generator(self._get_page_generator(get_page, start_page, page_size,
+                                                                   checkpoint=checkpoint, resume_from=resume_from))
+
+    async def search_indicators_page(self, search_term, enclave_ids=None, page_size=None, page_number=None):
+        """
+        See |search_indicators_page|.
+        """
+
+        params = {
+            'searchTerm': search_term,
+            'enclaveIds': enclave_ids,
+            'pageSize': page_size,
+            'pageNumber': page_number
+        }
+        resp = await self._client.get("indicators/search", params=params)
+        return Page.from_dict(self._client.decode(resp), content_type=self._indicator_model)
+
+    def search_indicators(self, search_term, enclave_ids=None):
+        """
+        See |search_indicators|.
+
+        :return: An async generator of |Indicator| objects.
+        """
+
+        get_page = functools.partial(self.search_indicators_page, search_term, enclave_ids)
+        return self._get_generator(self._get_page_generator(get_page))
+
+    async def get_related_indicators_page(self, indicators=None, enclave_ids=None, page_size=None, page_number=None):
+        """
+        See |get_related_indicators_page|.
+        """
+
+        params = {
+            'indicators': indicators,
+            'enclaveIds': enclave_ids,
+            'pageNumber': page_number,
+            'pageSize': page_size
+        }
+        resp = await self._client.get("indicators/related", params=params)
+        return Page.from_dict(self._client.decode(resp), content_type=self._indicator_model)
+
+    def get_related_indicators(self, indicators=None, enclave_ids=None):
+        """
+        See |get_related_indicators|.
+
+        :return: An async generator of |Indicator| objects.
+        """
+
+        get_page = functools.partial(self.get_related_indicators_page, indicators, enclave_ids)
+        return self._get_generator(self._get_page_generator(get_page))
+
+    async def get_indicators_for_report_page(self, report_id, page_number=None, page_size=None):
+        """
+        See |get_indicators_for_report_page|.
+        """
+
+        params = {
+            'pageNumber': page_number,
+            'pageSize': page_size
+        }
+        resp = await self._client.get("reports/%s/indicators" % report_id, params=params)
+        return Page.from_dict(self._client.decode(resp), content_type=self._indicator_model)
+
+    def get_indicators_for_report(self, report_id):
+        """
+        See |get_indicators_for_report|.
+
+        :return: An async generator of |Indicator| objects.
+        """
+
+        get_page = functools.partial(self.get_indicators_for_report_page, report_id=report_id)
+        return self._get_generator(self._get_page_generator(get_page))
+
+    async def get_indicator_metadata(self, value):
+        """
+        See |get_indicator_metadata|.
+
+        .. warning:: This method is deprecated.  Please use |get_indicators_metadata| instead.
+        """
+
+        if self._metadata_batcher is not None:
+            indicator = await self._metadata_batcher.get(value)
+        else:
+            result = await self.get_indicators_metadata([Indicator(value=value)])
+            indicator = result[0] if len(result) > 0 else None
+
+        if indicator is not None:
+            return {
+                'indicator': indicator,
+                'tags': indicator.tags,
+                'enclaveIds': indicator.enclave_ids
+            }
+        else:
+            return None
+
+    async def _get_metadata_batch(self, values):
+        """
+        Look up the metadata of a batch of single indicator lookups for the batcher of |get_indicator_metadata|.
+        """
+
+        indicators = await self.get_indicators_metadata([Indicator(value=value) for value in values])
+        return IndicatorClient._match_metadata_batch(values, indicators)
+
+    async def get_indicators_metadata(self, indicators, max_workers=None):
+        """
+        See |get_indicators_metadata|.
+        """
+
+        async def get_batch(batch):
+            params = {
+                'values': [value for value, _ in batch],
+                'types': [type for _, type in batch]
+            }
+            resp = await self._client.get("indicators/metadata", params=params)
+            return self._client.decode(resp)
+
+        async def get_metadata(queries):
+            batches = get_url_chunks(queries,
+                                     get_params=lambda query: [('values', query[0]), ('types', query[1])],
+                                     url="%s/indicators/metadata" % self._client.base,
+                                     max_length=self._client.max_url_length)
+            return await self._get_batches(get_batch, batches, max_workers=max_workers)
+
+        queries = [(i.value, i.type) for i in indicators]
+        results = await self._lookup_indicators("metadata", queries, fetch=get_metadata)
+        return [self._indicator_model.from_dict(x) for x in results]
+
+    async def get_indicator_details(self, indicators, enclave_ids=None, max_workers=None):
+        """
+        See |get_indicator_details|.
+        """
+
+        # if the indicators parameter is a string, make it a singleton
+        if isinstance(indicators, string_types):
+            indicators = [indicators]
+
+        async def get_batch(batch):
+            params = {
+                'enclaveIds': enclave_ids,
+                'indicatorValues': [value for value, _ in batch]
+            }
+            resp = await self._client.get("indicators/details", params=params)
+            return self._client.decode(resp)
+
+        async def get_details(queries):
+            batches = get_url_chunks(queries,
+                                     get_params=lambda query: [('indicatorValues', query[0])],
+                                     url="%s/indicators/details" % self._client.base,
+                                     max_length=self._client.max_url_length,
+                                     params={'enclaveIds': enclave_ids})
+            return await self._get_batches(get_batch, batches, max_workers=max_workers)
+
+        queries = [(value, None) for value in indicators]
+        results = await self._lookup_indicators("details", queries, fetch=get_details, enclave_ids=enclave_ids)
+        return [self._indicator_model.from_dict(indicator) for indicator in results]
+
+    async def _lookup_indicators(self, lookup, queries, fetch, enclave_ids=None):
+        """
+        Look up indicators with the coroutine ``fetch``, going through the indicator cache if there is one.
+        """
+
+        if self.indicator_cache is None:
+            return await fetch(queries)
+
+        keys, entries, missed = self.indicator_cache.get_cached(lookup, queries, enclave_ids=enclave_ids)
+        fetched = await fetch([query for _, query in missed]) if missed else []
+        return self.indicator_cache.add_fetched(keys, entries, missed, fetched)
+
+    async def _get_batches(self, get_batch, batches, max_workers=None):
+        """
+        Request batches concurrently, at most ``max_workers`` (defaults to the ``max_concurrency`` config value) at
+        once, and concatenate the results in the order of ``batches``.
+        """
+
+        semaphore = asyncio.Semaphore(max(max_workers or self._client.max_concurrency, 1))
+
+        async def get_bounded_batch(batch):
+            async with semaphore:
+                return await get_batch(batch)
+
+        batch_results = await asyncio.gather(*[get_bounded_batch(batch) for batch in batches])
+        return [result for batch_result in batch_results for result in batch_result]
+
+    async def get_whitelist_page(self, page_number=None, page_size=None):
+        """
+        See |get_whitelist_page|.
+        """
+
+        params = {
+            'pageNumber': page_number,
+            'pageSize': page_size
+        }
+        resp = await self._client.get("whitelist", params=params)
+        return Page.from_dict(self._client.decode(resp), content_type=self._indicator_model)
+
+    def get_whitelist(self):
+        """
+        See |get_whitelist|.
+
+        :return: An async generator of |Indicator| objects.
+        """
+
+        return self._get_generator(self._get_page_generator(self.get_whitelist_page))
+
+    async def add_terms_to_whitelist(self, terms):
+        """
+        See |add_terms_to_whitelist|.
+        """
+
+        resp = await self._client.post("whitelist", data=self._client.encode(terms))
+        indicators = [self._indicator_model.from_dict(indicator) for indicator in self._client.decode(resp)]
+
+        for whitelist_index in list(self._whitelist_indexes):
+            whitelist_index.update(indicators)
+
+        return indicators
+
+    async def delete_indicator_from_whitelist(self, indicator):
+        """
+        See |delete_indicator_from_whitelist|.
+        """
+
+        params = indicator.to_dict()
+        await self._client.delete("whitelist", params=params)
+
+        for whitelist_index in list(self._whitelist_indexes):
+            whitelist_index.remove(indicator)
+
+    async def get_whitelist_index(self, page_size=None):
+        """
+        See |get_whitelist_index|.
+        """
+
+        whitelist_index = WhitelistIndex()
+
+        # register the index first, so that changes made while it is loading are not missed
+        self._whitelist_indexes.add(whitelist_index)
+
+        async for page in self._get_page_generator(self.get_whitelist_page, page_size=page_size):
+            whitelist_index.update(page.items)
+
+        return whitelist_index
+
+    async def get_community_trends(self, indicator_type=None, days_back=None):
+        """
+        See |get_community_trends|.
+        """
+
+        params = {
+            'type': indicator_type,
+            'daysBack': days_back
+        }
+        resp = await self._client.get("indicators/community-trending", params=params)
+        return [self._indicator_model.from_dict(indicator) for indicator in self._client.decode(resp)]
+
+    ############
+    ### Tags ###
+    ############
+
+    async def get_enclave_tags(self, report_id, id_type=None):
+        """
+        See |get_enclave_tags|.
+        """
+
+        params = {'idType': id_type}
+        resp = await self._client.get("reports/%s/tags" % report_id, params=params)
+        return [Tag.from_dict(tag) for tag in self._client.decode(resp)]
+
+    async def add_enclave_tag(self, report_id, name, enclave_id, id_type=None):
+        """
+        See |add_enclave_tag|.
+        """
+
+        params = {
+            'idType': id_type,
+            'name': name,
+            'enclaveId': enclave_id
+        }
+        resp = await self._client.post("reports/%s/tags" % report_id, params=params)
+        return str(resp.content)
+
+    async def delete_enclave_tag(self, report_id, tag_id, id_type=None):
+        """
+        See |delete_enclave_tag|.
+        """
+
+        params = {'idType': id_type}
+        await self._client.delete("reports/%s/tags/%s" % (report_id, tag_id), params=params)
+
+    async def get_all_enclave_tags(self, enclave_ids=None):
+        """
+        See |get_all_enclave_tags|.
+        """
+
+        params = {'enclaveIds': enclave_ids}
+        resp = await self._client.get("reports/tags", params=params)
+        return [Tag.from_dict(tag) for tag in self._client.decode(resp)]
+
+    async def get_all_indicator_tags(self, enclave_ids=None):
+        """
+        See |get_all_indicator_tags|.
+        """
+
+        if enclave_ids is None:
+            enclave_ids = self.enclave_ids
+
+        params = {'enclaveIds': enclave_ids}
+        resp = await self._client.get("indicators/tags", params=params)
+        return [Tag.from_dict(tag) for tag in self._client.decode(resp)]
+
+    async def add_indicator_tag(self, indicator_value, name, enclave_id):
+        """
+        See |add_indicator_tag|.
+        """
+
+        params = {
+            'name': name,
+            'enclaveId': enclave_id
+        }
+        resp = await self._client.post("indicators/%s/tags" % indicator_value, params=params)
+        return Tag.from_dict(self._client.decode(resp))
+
+    async def delete_indicator_tag(self, indicator_value, tag_id):
+        """
+        See |delete_indicator_tag|.
+        """
+
+        await self._client.delete("indicators/%s/tags/%s" % (indicator_value, tag_id))
@@ -0,0 +1,155 @@
+# python 2 backwards compatibility
+from __future__ import print_function, division
+from builtins import object
+from future import standard_library
+
+# external imports
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+# python 2 backwards compatibility
+standard_library.install_aliases()
+
+logger = logging.getLogger(__name__)
+
+
+class MicroBatcher(object):
+    """
+    Collects single lookups submitted by any number of threads into batches, so that code that looks up one key at a
+    time gets the efficiency of one request per batch.  A batch is sent once ``max_batch_size`` keys are waiting, or
+    ``window`` seconds after its first key was submitted, whichever comes first.  Batches are fetched on a pool of
+    ``max_workers`` threads, so a slow batch does not hold up the next one.
+
+    Used by |get_indicator_metadata| when the ``batch_lookups`` config value is set:
+
+    >>> batcher = MicroBatcher(fetch=lambda values: {i.value: i for i in ts.get_indicators_metadata(
+    ...     [Indicator(value) for value in values])})
+    >>> batcher.submit("1.2.3.4").result()
+
+    The thread that forms batches exits after ``idle_timeout`` seconds without any lookups, and is started again by the
+    next one.
+
+    :param fetch: A function that takes a list of distinct keys and returns a dictionary of results by key.  Keys
+        missing from the dictionary have the result ``None``.
+    :param float window: The maximum number of seconds a key waits for others to join its batch.
+    :param int max_batch_size: The maximum number of keys in a batch.
+    :param int max_workers: The maximum number of batches fetched at once.
+    :param float idle_timeout: The number of seconds without lookups after which the batching thread exits.
+    :ivar lookups: The number of keys submitted.
+    :ivar batches: The number of batches fetched.
+    """
+
+    def __init__(self, fetch, window=0.01, max_batch_size=100, max_workers=4, idle_timeout=5.0):
+        self.fetch = fetch
+        self.window = window
+        self.max_batch_size = max_batch_size
+        self.idle_timeout = idle_timeout
+        self.lookups = 0
+        self.batches = 0
+        # the keys waiting to be batched, with the futures of their callers and when they were submitted
+        self._pending = []
+        self._condition = threading.Condition()
+        self._thread = None
+        self._closed = False
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+
+    def submit(self, key):
+        """
+        :param key: The key to look up.
+        :return: A ``concurrent.futures.Future`` of the result.  If fetching the key's batch raises an exception, the
+            future raises it too.
+        """
+
+        future = Future()
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("Cannot submit lookups to a closed MicroBatcher.")
+            self._pending.append((key, future, time.time()))
+            self.lookups += 1
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="trustar-micro-batcher")
+                self._thread.daemon = True
+                self._thread.start()
+            # wake the batching thread only when it has something new to do
+            elif len(self._pending) == 1 or len(self._pending) >= self.max_batch_size:
+                self._condition.notify()
+        return future
+
+    def get(self, key):
+        """
+        Look up a single key, waiting for the batch it joins to be fetched.
+
+        :param key: The key to look up.
+        :return: The result.
+        """
+
+        return self.submit(key).result()
+
+    def _next_batch(self):
+        """
+        Wait until a batch is due.
+
+        :return: The batch, as a list of ``(key, future)`` tuples, or ``None`` if the thread should exit.
+        """
+
+        with self._condition:
+            while not self._pending:
+                if self._closed:
+                    self._thread = None
+                    return None
+                self._condition.wait(self.idle_timeout)
+                if not self._pending and not self._closed:
+                    self._thread = None
+                    return None
+
+            # the window is measured from when the oldest waiting key was submitted
+            deadline = self._pending[0][2] + self.window
+            while len(self._pending) < self.max_batch_size and not self._closed:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+
+            batch = [(key, future) for key, future, _ in self._pending[:self.max_batch_size]]
+            del self._pending[:self.max_batch_size]
+            self.batches += 1
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            self._executor.submit(self._fetch_batch, batch)
+
+    def _fetch_batch(self, batch):
+        # callers may have cancelled their futures while they waited
+        batch = [(key, future) for key, future in batch if future.set_running_or_notify_cancel()]
+        if not batch:
+            return
+
+        keys = list(dict.fromkeys(key for key, _ in batch))
+        try:
+            results = self.fetch(keys)
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+
+        for key, future in batch:
+            future.set_result(results.get(key))
+
+    def close(self):
+        """
+        Fetch the lookups that are still waiting, then stop the batching thread and the fetching threads.
+        """
+
+        with self._condition:
+            self._closed = True
+            thread = self._thread
+            self._condition.notify()
+        if thread is not None:
+            thread.join()
+        self._executor.shutdown(wait=True)
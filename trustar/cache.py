@@ -0,0 +1,307 @@
+# python 2 backwards compatibility
+from __future__ import print_function, division
+from builtins import object, range, super
+from future import standard_library
+
+# external imports
+from collections import OrderedDict
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+# python 2 backwards compatibility
+standard_library.install_aliases()
+
+logger = logging.getLogger(__name__)
+
+
+class IndicatorCache(object):
+    """
+    Base class for caches of indicator lookups, such as |get_indicators_metadata| and |get_indicator_details|.  Pass an
+    instance as the ``indicator_cache`` config value to put it in front of those methods.
+
+    Entries are keyed by the lookup, the indicator value and type, and the enclave IDs searched, and hold the raw
+    results the server returned for that key.  A lookup that found nothing is cached as well, for ``negative_ttl``
+    seconds, so that unknown values are not looked up again on every call.  When a call looks up many indicators, only
+    the ones missing from the cache are requested from the server.
+
+    Subclasses implement storage by overriding ``get_many``, ``set_many``, ``clear``, and ``__len__``.
+
+    :ivar max_size: The maximum number of entries; the least recently used entries are evicted beyond this.
+    :ivar ttl: The number of seconds an entry with results is kept for.
+    :ivar negative_ttl: The number of seconds an entry without results is kept for.
+    :ivar hits: The number of indicators found in the cache.
+    :ivar misses: The number of indicators that had to be requested from the server.
+    """
+
+    def __init__(self, max_size=10000, ttl=300, negative_ttl=60):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.hits = 0
+        self.misses = 0
+        self._stats_lock = threading.Lock()
+
+    @property
+    def hit_ratio(self):
+        """
+        :return: The fraction of indicators found in the cache, or ``None`` if none have been looked up.
+        """
+
+        total = self.hits + self.misses
+        return self.hits / total if total else None
+
+    @staticmethod
+    def get_key(lookup, value, type=None, enclave_ids=None):
+        """
+        :param str lookup: The name of the lookup, e.g. ``"metadata"``.
+        :param str value: The indicator value.
+        :param str type: The indicator type, if one was specified.
+        :param list(str) enclave_ids: The enclave IDs searched, if any were specified.
+        :return: The cache key for the lookup of an indicator.
+        """
+
+        if enclave_ids is not None:
+            enclave_ids = sorted(enclave_ids)
+        return json.dumps([lookup, value, type, enclave_ids])
+
+    def lookup(self, lookup, queries, fetch, enclave_ids=None):
+        """
+        Get the results of looking up indicators, requesting only the ones missing from the cache from the server.
+
+        :param str lookup: The name of the lookup, e.g. ``"metadata"``.
+        :param queries: A list of ``(value, type)`` tuples, where ``type`` may be ``None``.
+        :param fetch: A function that takes a list of ``(value, type)`` tuples, looks them up on the server, and
+            returns a list of raw result dictionaries.
+        :param list(str) enclave_ids: The enclave IDs searched, if any were specified.
+        :return: The raw result dictionaries of every distinct query, in the order of ``queries``.
+        """
+
+        keys, entries, missed = self.get_cached(lookup, queries, enclave_ids=enclave_ids)
+        fetched = fetch([query for _, query in missed]) if missed else []
+        return self.add_fetched(keys, entries, missed, fetched)
+
+    def get_cached(self, lookup, queries, enclave_ids=None):
+        """
+        The first half of ``lookup``, for callers that cannot pass ``fetch`` as a plain function, e.g. coroutines.
+
+        :return: A tuple of the key of each query, the cached entries by key, and a list of ``(key, query)`` tuples
+            for each distinct query missing from the cache.  Pass these and the results of looking up the missing
+            queries to ``add_fetched``.
+        """
+
+        keys = [self.get_key(lookup, value, type, enclave_ids) for value, type in queries]
+        entries = self.get_many(set(keys))
+
+        missed = []
+        missed_keys = set()
+        for key, query in zip(keys, queries):
+            if key not in entries and key not in missed_keys:
+                missed_keys.add(key)
+                missed.append((key, query))
+
+        with self._stats_lock:
+            self.hits += len(keys) - len(missed)
+            self.misses += len(missed)
+
+        return keys, entries, missed
+
+    def add_fetched(self, keys, entries, missed, fetched):
+        """
+        The second half of ``lookup``: cache the results of looking up the missing queries, and merge them with the
+        cached entries.
+
+        :return: The raw result dictionaries of every distinct query, in the order of the queries, followed by any
+            fetched results that match none of the queries.
+        """
+
+        unmatched = []
+        if missed:
+            # the server may normalize values, e.g. to lower case, so fall back to matching them case-insensitively
+            fetched_by_value = {}
+            fetched_by_lower_value = {}
+            for result in fetched:
+                value = result.get('value')
+                fetched_by_value.setdefault(value, []).append(result)
+                if value is not None:
+                    fetched_by_lower_value.setdefault(value.lower(), []).append(result)
+
+            # a query without a type matches results of every type
+            new_entries = {}
+            matched = set()
+            for key, (value, type) in missed:
+                candidates = fetched_by_value.get(value) or fetched_by_lower_value.get(value.lower(), [])
+                new_entries[key] = [result for result in candidates
+                                    if type is None or result.get('indicatorType') == type]
+                matched.update(id(result) for result in new_entries[key])
+
+            # results that match no query are still returned, but not cached
+            unmatched = [result for result in fetched if id(result) not in matched]
+
+            self.set_many(new_entries)
+            entries.update(new_entries)
+
+        results = []
+        seen_keys = set()
+        for key in keys:
+            if key not in seen_keys:
+                seen_keys.add(key)
+                results.extend(entries[key])
+        return results + unmatched
+
+    def _get_ttl(self, results):
+        return self.ttl if results else self.negative_ttl
+
+    def get_many(self, keys):
+        """
+        :param keys: An iterable of cache keys.
+        :return: A dictionary of the live entries among ``keys``, each a list of raw result dictionaries.
+        """
+
+        raise NotImplementedError()
+
+    def set_many(self, entries):
+        """
+        Store entries, evicting the least recently used entries if the cache grows beyond ``max_size``.
+
+        :param dict entries: A dictionary of lists of raw result dictionaries, by cache key.
+        """
+
+        raise NotImplementedError()
+
+    def clear(self):
+        """
+        Remove all entries.
+        """
+
+        raise NotImplementedError()
+
+    def __len__(self):
+        raise NotImplementedError()
+
+
+class MemoryIndicatorCache(IndicatorCache):
+    """
+    An |IndicatorCache| held in memory, shared by the threads of a single process.
+    """
+
+    def __init__(self, max_size=10000, ttl=300, negative_ttl=60):
+        super().__init__(max_size=max_size, ttl=ttl, negative_ttl=negative_ttl)
+        # entries by key, as tuples of the expiry time and results, from least to most recently used
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_many(self, keys):
+
+        now = time.time()
+        entries = {}
+        with self._lock:
+            for key in keys:
+                entry = self._entries.pop(key, None)
+                if entry is None:
+                    continue
+                expires_at, results = entry
+                if expires_at <= now:
+                    continue
+                # re-insert the entry to mark it as most recently used
+                self._entries[key] = entry
+                entries[key] = results
+        return entries
+
+    def set_many(self, entries):
+
+        now = time.time()
+        with self._lock:
+            for key, results in entries.items():
+                self._entries.pop(key, None)
+                self._entries[key] = (now + self._get_ttl(results), results)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SQLiteIndicatorCache(IndicatorCache):
+    """
+    An |IndicatorCache| stored in a local SQLite database file, so that entries survive restarts and can be shared by
+    several processes on the same host.
+
+    :ivar path: The path of the database file.
+    """
+
+    # SQLite limits the number of parameters in a statement to 999 by default
+    MAX_PARAMETERS = 500
+
+    def __init__(self, path, max_size=100000, ttl=300, negative_ttl=60):
+        super().__init__(max_size=max_size, ttl=ttl, negative_ttl=negative_ttl)
+        self.path = os.path.expanduser(path)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        with self._lock, self._connection:
+            # the cache can be rebuilt from the server, so trade durability for write speed
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=NORMAL")
+            self._connection.execute("CREATE TABLE IF NOT EXISTS indicator_cache ("
+                                     "key TEXT PRIMARY KEY, results TEXT NOT NULL, "
+                                     "expires_at REAL NOT NULL, accessed_at REAL NOT NULL)")
+            self._connection.execute("CREATE INDEX IF NOT EXISTS indicator_cache_accessed_at "
+                                     "ON indicator_cache (accessed_at)")
+
+    def close(self):
+        """
+        Close the database connection.
+        """
+
+        with self._lock:
+            self._connection.close()
+
+    def get_many(self, keys):
+
+        keys = list(keys)
+        now = time.time()
+        entries = {}
+        with self._lock, self._connection:
+            for i in range(0, len(keys), self.MAX_PARAMETERS):
+                batch = keys[i:i + self.MAX_PARAMETERS]
+                placeholders = ", ".join("?" * len(batch))
+                rows = self._connection.execute("SELECT key, results FROM indicator_cache "
+                                                "WHERE key IN (%s) AND expires_at > ?" % placeholders,
+                                                batch + [now]).fetchall()
+                for key, results in rows:
+                    entries[key] = json.loads(results)
+                self._connection.execute("UPDATE indicator_cache SET accessed_at = ? "
+                                         "WHERE key IN (%s) AND expires_at > ?" % placeholders,
+                                         [now] + batch + [now])
+        return entries
+
+    def set_many(self, entries):
+
+        now = time.time()
+        rows = [(key, json.dumps(results), now + self._get_ttl(results), now) for key, results in entries.items()]
+        with self._lock, self._connection:
+            self._connection.executemany("INSERT OR REPLACE INTO indicator_cache "
+                                         "(key, results, expires_at, accessed_at) VALUES (?, ?, ?, ?)", rows)
+            self._connection.execute("DELETE FROM indicator_cache WHERE expires_at <= ?", (now,))
+            count = self._connection.execute("SELECT COUNT(*) FROM indicator_cache").fetchone()[0]
+            if count > self.max_size:
+                self._connection.execute("DELETE FROM indicator_cache WHERE key IN ("
+                                         "SELECT key FROM indicator_cache ORDER BY accessed_at LIMIT ?)",
+                                         (count - self.max_size,))
+
+    def clear(self):
+
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM indicator_cache")
+
+    def __len__(self):
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM indicator_cache").fetchone()[0]
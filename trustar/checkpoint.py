@@ -0,0 +1,210 @@
+# python 2 backwards compatibility
+from __future__ import print_function
+from builtins import object
+from future import standard_library
+
+# external imports
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+# python 2 backwards compatibility
+standard_library.install_aliases()
+
+logger = logging.getLogger(__name__)
+
+# ``os.replace`` only exists in Python 3.3+; ``os.rename`` also replaces the destination atomically on POSIX
+_replace = getattr(os, 'replace', os.rename)
+
+
+class CheckpointStore(object):
+    """
+    Base class for durable stores of harvesting progress.  Each entry is a cursor, a JSON-serializable dictionary
+    recording where a paginated generator such as |get_reports| or |get_indicators| should pick up after a restart,
+    stored under a key that names the job, e.g. ``"reports-backfill"``.
+
+    A time-based generator's cursor holds its ``from_time`` and the ``to_time`` of the next page to request; a
+    page-number-based generator's cursor holds the ``page_number`` of the next page to request.  Once the generator is
+    exhausted, its cursor also holds ``"done": True``.
+
+    Subclasses implement storage by overriding ``load``, ``save``, and ``delete``.
+    """
+
+    def checkpoint(self, key):
+        """
+        :param str key: The name of the job.
+        :return: A |Checkpoint| that loads and saves the cursor of the job in this store.
+        """
+
+        return Checkpoint(self, key)
+
+    def load(self, key):
+        """
+        :param str key: The name of the job.
+        :return: The last cursor saved for the job, or ``None`` if there is none.
+        """
+
+        raise NotImplementedError()
+
+    def save(self, key, cursor):
+        """
+        Durably store the cursor of a job, replacing any previous one.
+
+        :param str key: The name of the job.
+        :param dict cursor: The cursor.
+        """
+
+        raise NotImplementedError()
+
+    def delete(self, key):
+        """
+        Remove the cursor of a job, if there is one, so that the job starts from the beginning next time.
+
+        :param str key: The name of the job.
+        """
+
+        raise NotImplementedError()
+
+
+class Checkpoint(object):
+    """
+    The cursor of one job in a |CheckpointStore|.  Pass it as the ``checkpoint`` argument of a generator such as
+    |get_reports| to record progress after each page, and pass the result of ``load`` as its ``resume_from`` argument to
+    skip straight to where the last run left off:
+
+    >>> checkpoint = FileCheckpointStore("harvest.json").checkpoint("reports-backfill")
+    >>> for report in ts.get_reports(from_time=from_time, to_time=to_time,
+    ...                              checkpoint=checkpoint, resume_from=checkpoint.load()):
+    ...     process(report)
+
+    A page's cursor is saved once the generator is asked for the item after the page's last item, so a page whose
+    items were being processed when the job died is generated again on resume.
+
+    :ivar store: The |CheckpointStore|.
+    :ivar key: The name of the job.
+    """
+
+    def __init__(self, store, key):
+        self.store = store
+        self.key = key
+
+    def load(self):
+        """
+        :return: The last cursor saved, or ``None`` if there is none.
+        """
+
+        return self.store.load(self.key)
+
+    def save(self, cursor):
+        """
+        :param dict cursor: The cursor to save.
+        """
+
+        self.store.save(self.key, cursor)
+
+    def clear(self):
+        """
+        Remove the saved cursor, so that the job starts from the beginning next time.
+        """
+
+        self.store.delete(self.key)
+
+
+class FileCheckpointStore(CheckpointStore):
+    """
+    A |CheckpointStore| kept in a JSON file.  Each save rewrites the file to a temporary file, flushes it to disk, and
+    renames it over the original, so a crash never leaves a partially written file behind.
+
+    :ivar path: The path of the file.
+    """
+
+    def __init__(self, path):
+        self.path = os.path.expanduser(path)
+        self._lock = threading.Lock()
+
+    def _read(self):
+        try:
+            with open(self.path, 'r') as f:
+                return json.load(f)
+        except (IOError, OSError):
+            return {}
+
+    def _write(self, cursors):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".checkpoint-")
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(cursors, f, sort_keys=True)
+                f.flush()
+                os.fsync(f.fileno())
+            _replace(temp_path, self.path)
+        except Exception:
+            os.remove(temp_path)
+            raise
+
+    def load(self, key):
+
+        with self._lock:
+            return self._read().get(key)
+
+    def save(self, key, cursor):
+
+        with self._lock:
+            cursors = self._read()
+            cursors[key] = cursor
+            self._write(cursors)
+
+    def delete(self, key):
+
+        with self._lock:
+            cursors = self._read()
+            if cursors.pop(key, None) is not None:
+                self._write(cursors)
+
+
+class SQLiteCheckpointStore(CheckpointStore):
+    """
+    A |CheckpointStore| kept in a local SQLite database file, which can be shared by several processes on the same host.
+
+    :ivar path: The path of the database file.
+    """
+
+    def __init__(self, path):
+        self.path = os.path.expanduser(path)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        with self._lock, self._connection:
+            # unlike a cache, progress must survive a power loss
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=FULL")
+            self._connection.execute("CREATE TABLE IF NOT EXISTS checkpoints ("
+                                     "key TEXT PRIMARY KEY, cursor TEXT NOT NULL, updated_at REAL NOT NULL)")
+
+    def close(self):
+        """
+        Close the database connection.
+        """
+
+        with self._lock:
+            self._connection.close()
+
+    def load(self, key):
+
+        with self._lock:
+            row = self._connection.execute("SELECT cursor FROM checkpoints WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row is not None else None
+
+    def save(self, key, cursor):
+
+        with self._lock, self._connection:
+            self._connection.execute("INSERT OR REPLACE INTO checkpoints (key, cursor, updated_at) VALUES (?, ?, ?)",
+                                     (key, json.dumps(cursor, sort_keys=True), time.time()))
+
+    def delete(self, key):
+
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM checkpoints WHERE key = ?", (key,))
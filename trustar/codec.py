@@ -0,0 +1,154 @@
+# python 2 backwards compatibility
+from __future__ import print_function
+from builtins import object, super
+from future import standard_library
+from six import string_types
+
+# external imports
+import json
+import logging
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+# python 2 backwards compatibility
+standard_library.install_aliases()
+
+logger = logging.getLogger(__name__)
+
+
+class JsonCodec(object):
+    """
+    Encodes request bodies and decodes response bodies.  This base class uses the standard library's ``json`` module;
+    subclasses use faster JSON libraries, falling back to ``json`` for values those libraries do not support, so that
+    every codec accepts the same values.
+
+    Set the ``json_codec`` config value to the name of a codec, or to an instance of a subclass, to choose the codec a
+    client uses; see |get_codec|.
+    """
+
+    # the name the codec is selected by, and the module it requires
+    name = 'json'
+    module = json
+
+    def dumps(self, obj):
+        """
+        :param obj: A JSON-serializable object.
+        :return: The JSON encoding of the object, as a ``str``.
+        """
+
+        return json.dumps(obj)
+
+    def loads(self, data):
+        """
+        :param data: A JSON document, as ``str`` or UTF-8 encoded ``bytes``.
+        :return: The decoded object.
+        """
+
+        if not isinstance(data, string_types):
+            data = data.decode('utf-8')
+        return json.loads(data)
+
+    @classmethod
+    def is_available(cls):
+        """
+        :return: Whether the library the codec requires is installed.
+        """
+
+        return cls.module is not None
+
+
+class OrjsonCodec(JsonCodec):
+    """
+    A |JsonCodec| using ``orjson``.  Integers too large for 64 bits, and dictionaries with keys that are not strings,
+    are encoded with ``json`` instead.  Note that ``orjson`` decodes integers too large for 64 bits as floats; the API
+    does not return any.
+    """
+
+    name = 'orjson'
+    module = orjson
+
+    def dumps(self, obj):
+        try:
+            return orjson.dumps(obj).decode('utf-8')
+        except TypeError:
+            return super().dumps(obj)
+
+    def loads(self, data):
+        try:
+            return orjson.loads(data)
+        except ValueError:
+            # e.g. NaN; also raises the standard library's error for invalid JSON
+            return super().loads(data)
+
+
+class UjsonCodec(JsonCodec):
+    """
+    A |JsonCodec| using ``ujson``.
+    """
+
+    name = 'ujson'
+    module = ujson
+
+    def dumps(self, obj):
+        try:
+            return ujson.dumps(obj, escape_forward_slashes=False)
+        except (TypeError, OverflowError):
+            return super().dumps(obj)
+
+    def loads(self, data):
+        try:
+            return ujson.loads(data)
+        except ValueError:
+            return super().loads(data)
+
+
+# codec classes by name
+CODECS = {codec.name: codec for codec in (OrjsonCodec, UjsonCodec, JsonCodec)}
+
+# codec names, fastest first
+_PREFERENCE = ('orjson', 'ujson', 'json')
+
+# codecs are stateless, so one instance of each is shared
+_instances = {}
+
+
+def get_codec(codec=None):
+    """
+    Get a |JsonCodec|.
+
+    :param codec: An instance of |JsonCodec|, returned as is; or the name of a codec: ``"json"``, ``"orjson"``,
+        ``"ujson"``, or ``"auto"`` for the fastest one installed.  Defaults to ``"json"``.  If the library a named codec
+        requires is not installed, a warning is logged and the ``json`` codec is returned instead.
+    :return: The codec.
+    """
+
+    if isinstance(codec, JsonCodec):
+        return codec
+
+    name = codec or 'json'
+    if not isinstance(name, string_types):
+        raise ValueError("'json_codec' must be the name of a codec or a JsonCodec, not %r." % (codec,))
+
+    name = name.lower()
+    if name == 'auto':
+        name = next(name for name in _PREFERENCE if CODECS[name].is_available())
+    elif name not in CODECS:
+        raise ValueError("Unknown JSON codec '%s'; expected one of %s or 'auto'."
+                         % (name, ", ".join("'%s'" % name for name in _PREFERENCE)))
+    elif not CODECS[name].is_available():
+        logger.warning("The '%s' package is not installed; using the 'json' codec instead.  "
+                       "Install it with 'pip install trustar[%s]'.", name, name)
+        name = 'json'
+
+    instance = _instances.get(name)
+    if instance is None:
+        instance = _instances[name] = CODECS[name]()
+    return instance
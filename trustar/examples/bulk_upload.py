@@ -13,7 +13,6 @@ from __future__ import print_function
 
 import argparse
 import os
-import time
 import json
 import pdfminer.pdfinterp
 import logging
@@ -82,6 +81,8 @@ def main():
     parser.add_argument('--ts_config', '-c', help='Path containing trustar api config', nargs='?', default="./trustar.conf")
     parser.add_argument('-i', '--ignore', dest='ignore', action='store_true',
                         help='Ignore history and resubmit already procesed files')
+    parser.add_argument('--workers', '-w', type=int, default=4, help='Number of reports to submit concurrently')
+    parser.add_argument('--rate', '-r', type=float, default=None, help='Max number of reports to submit per second')
 
     args = parser.parse_args()
     source_report_dir = args.dir
@@ -99,60 +100,76 @@ def main():
         processed_files = set(line.strip() for line in open(processed_files_file))
 
     skipped_files_file = os.path.join(source_report_dir, "skipped_files.log")
-
-    with open(processed_files_file, 'a', 0) as pf:
-        for (dirpath, dirnames, filenames) in os.walk(source_report_dir):
-            for source_file in filenames:
-
-                if (source_file == "processed_files.log" or
-                    source_file == "skipped_files.log"):
-                    continue
-
-                if source_file in processed_files:
-                    logger.debug("File {} was already processed. Ignoring."
-                                 .format(source_file))
-                    continue
-
-                logger.info("Processing source file %s " % source_file)
-                try:
-                    path = os.path.join(source_report_dir, source_file)
-                    report_body = process_file(path)
-                    if not report_body:
-                        logger.debug("File {} ignored for no data".format(source_file))
-                        raise
-
-                    # response_json = ts.submit_report(token, report_body, "COMMUNITY: " + file)
-                    logger.info("Report {}".format(report_body))
-                    try:
-                        report = Report(title="ENCLAVE: %s" % source_file,
-                                        body=report_body,
-                                        is_enclave=True,
-                                        enclave_ids=ts.enclave_ids)
-                        report = ts.submit_report(report)
-                        logger.info("SUCCESSFULLY SUBMITTED REPORT, " +
-                                    "TRUSTAR REPORT as Incident Report ID %s" % report.id)
-                        pf.write("%s\n" % source_file)
-
-                        if report.indicators is not None:
-                            print("Extracted the following indicators: {}"
-                                  .format(json.dumps([x.to_dict() for x in report.indicators], indent=2)))
-                        else:
-                            print("No indicators returned from  report id {0}".format(report.id))
-                    except Exception as e:
-                        if '413' in e.message:
-                            logger.warn("Could not submit file {}. Contains more indicators than currently supported."
-                                        .format(source_file))
-                        else:
-                            raise
-
-                except Exception as e:
-                    logger.error("Problem with file %s, exception: %s " % (source_file, e))
-                    with open(skipped_files_file, 'w', 0) as sf:
-                        sf.write("{}\n".format(source_file))
-                    continue
-
-                time.sleep(2)
-
+    skipped_files = []
+
+    # extract a report from each file that has not been processed yet
+    reports = []
+    for (dirpath, dirnames, filenames) in os.walk(source_report_dir):
+        for source_file in filenames:
+
+            if (source_file == "processed_files.log" or
+                source_file == "skipped_files.log"):
+                continue
+
+            if source_file in processed_files:
+                logger.debug("File {} was already processed. Ignoring."
+                             .format(source_file))
+                continue
+
+            logger.info("Processing source file %s " % source_file)
+            try:
+                path = os.path.join(source_report_dir, source_file)
+                report_body = process_file(path)
+            except Exception as e:
+                logger.error("Problem with file %s, exception: %s " % (source_file, e))
+                skipped_files.append(source_file)
+                continue
+
+            if not report_body:
+                logger.debug("File {} ignored for no data".format(source_file))
+                skipped_files.append(source_file)
+                continue
+
+            logger.info("Report {}".format(report_body))
+
+            # the file name is the external ID, which makes it safe for the SDK to retry failed submissions
+            reports.append(Report(title="ENCLAVE: %s" % source_file,
+                                  body=report_body,
+                                  external_id=source_file,
+                                  is_enclave=True,
+                                  enclave_ids=ts.enclave_ids))
+
+    # submit the reports concurrently; the SDK paces them, and retries failed submissions
+    results = ts.submit_reports(reports, max_workers=args.workers, rate=args.rate)
+
+    with open(processed_files_file, 'a') as pf:
+        for result in results:
+            report = result.report
+            source_file = report.external_id
+
+            if result.succeeded:
+                logger.info("SUCCESSFULLY SUBMITTED REPORT, " +
+                            "TRUSTAR REPORT as Incident Report ID %s" % report.id)
+                pf.write("%s\n" % source_file)
+
+                indicators = getattr(report, 'indicators', None)
+                if indicators is not None:
+                    print("Extracted the following indicators: {}"
+                          .format(json.dumps([x.to_dict() for x in indicators], indent=2)))
+                else:
+                    print("No indicators returned from  report id {0}".format(report.id))
+            elif '413' in result.error:
+                logger.warn("Could not submit file {}. Contains more indicators than currently supported."
+                            .format(source_file))
+                skipped_files.append(source_file)
+            else:
+                logger.error("Problem with file %s after %d attempt(s), exception: %s "
+                             % (source_file, result.attempts, result.error))
+                skipped_files.append(source_file)
+
+    with open(skipped_files_file, 'a') as sf:
+        for source_file in skipped_files:
+            sf.write("{}\n".format(source_file))
 
 if __name__ == '__main__':
     main()
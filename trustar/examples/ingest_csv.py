@@ -15,9 +15,6 @@ from builtins import range
 from trustar import TruStar, Report
 
 import argparse
-import sys
-import time
-import traceback
 
 import cef
 
@@ -46,6 +43,10 @@ def main():
                         help='Common Event Format (CEF) output log file, one event is generated per successful submission')
     parser.add_argument('-ci', '--case-id', required=False, dest='caseid_col',
                         help='Name of column to use as report case ID for CEF export')
+    parser.add_argument('-w', '--workers', required=False, dest='workers', type=int, default=4,
+                        help='Number of reports to submit concurrently')
+    parser.add_argument('-r', '--rate', required=False, dest='rate', type=float, default=None,
+                        help='Max number of reports to submit per second')
     args = parser.parse_args()
 
     allowed_keys_content = []
@@ -102,61 +103,54 @@ def main():
         all_reports.append(report)
 
     if do_enclave_submissions:
+        # submit the reports concurrently; the SDK paces them, and retries failed submissions of reports with case IDs
+        results = ts.submit_reports(all_reports, max_workers=args.workers, rate=args.rate, max_attempts=5)
+
         num_submitted = 0
-        for staged_report in all_reports:
-
-            successful = False
-            attempts = 0
-            while not successful and attempts < 5:
-                attempts += 1
-                try:
-                    report = ts.submit_report(report=staged_report)
-                    num_submitted += 1
-                    successful = True
-
-                    print("Submitted report #%s-%s title %s as TruSTAR IR %s with case ID: %s" % (
-                        num_submitted, attempts,
-                        report.title,
-                        report.id,
-                        report.external_id))
-
-                    print("URL: %s" % ts.get_report_url(report.id))
-
-                    # Build CEF output:
-                    # - HTTP_USER_AGENT is the cs1 field
-                    # - example CEF output: CEF:version|vendor|product|device_version|signature|name|severity|cs1=(num_submitted) cs2=(report_url)
-                    config = {
-                        'cef.version': '0.5',
-                        'cef.vendor': 'TruSTAR',
-                        'cef.device_version': '2.0',
-                        'cef.product': 'API',
-                        'cef': True,
-                        'cef.file': args.cef_output_file
-                    }
-
-                    environ = {
-                        'REMOTE_ADDR': '127.0.0.1',
-                        'HTTP_HOST': '127.0.0.1',
-                        'HTTP_USER_AGENT': report.title
-                    }
-
-                    log_cef('SUBMISSION', 1, environ, config, signature="INFO",
-                            cs2=report.external_id,
-                            cs3=ts.get_report_url(report.id))
-
-                    ####
-                    # TODO: ADD YOUR CUSTOM POST-PROCESSING CODE FOR THIS SUBMISSION HERE
-                    ####
-
-                    print()
-
-                except Exception as e:
-                    traceback.print_exc(file=sys.stdout)
-                    print("Problem submitting report: %s" % e)
-                    time.sleep(5)
-
-            # Sleep between submissions
-            time.sleep(5)
+        for result in results:
+            if not result.succeeded:
+                print("Problem submitting report #%s after %s attempt(s): %s" % (
+                    result.index, result.attempts, result.error))
+                continue
+
+            report = result.report
+            num_submitted += 1
+
+            print("Submitted report #%s-%s title %s as TruSTAR IR %s with case ID: %s" % (
+                num_submitted, result.attempts,
+                report.title,
+                report.id,
+                report.external_id))
+
+            print("URL: %s" % ts.get_report_url(report.id))
+
+            # Build CEF output:
+            # - HTTP_USER_AGENT is the cs1 field
+            # - example CEF output: CEF:version|vendor|product|device_version|signature|name|severity|cs1=(num_submitted) cs2=(report_url)
+            config = {
+                'cef.version': '0.5',
+                'cef.vendor': 'TruSTAR',
+                'cef.device_version': '2.0',
+                'cef.product': 'API',
+                'cef': True,
+                'cef.file': args.cef_output_file
+            }
+
+            environ = {
+                'REMOTE_ADDR': '127.0.0.1',
+                'HTTP_HOST': '127.0.0.1',
+                'HTTP_USER_AGENT': report.title
+            }
+
+            log_cef('SUBMISSION', 1, environ, config, signature="INFO",
+                    cs2=report.external_id,
+                    cs3=ts.get_report_url(report.id))
+
+            ####
+            # TODO: ADD YOUR CUSTOM POST-PROCESSING CODE FOR THIS SUBMISSION HERE
+            ####
+
+            print()
 
 
 if __name__ == '__main__':
@@ -21,6 +21,7 @@ CSV_PATH = "reports.csv"
 ts = TruStar()
 
 # read in CSV
+reports = []
 with open(CSV_PATH, 'r') as f:
     reader = csv.DictReader(f)
 
@@ -38,7 +39,11 @@ with open(CSV_PATH, 'r') as f:
                         is_enclave=True,
                         enclave_ids=ts.enclave_ids)
 
-        # submit report
-        ts.submit_report(report)
+        reports.append(report)
 
-        logger.info("Submitted report: %s" % report)
+# submit reports concurrently; failed submissions are retried, which the external IDs make safe
+for result in ts.submit_reports(reports, max_workers=4):
+    if result.succeeded:
+        logger.info("Submitted report: %s" % result.report)
+    else:
+        logger.error("Failed to submit report %s: %s" % (result.report.external_id, result.error))
@@ -6,11 +6,15 @@ from six import string_types
 
 # external imports
 import functools
+import itertools
 import json
 import logging
+import time
 
 # package imports
-from .models import Indicator, Page, Tag
+from .models import ChunkResult, Indicator, Page, StreamingPage, Tag
+from .utils import get_url_chunks, parallel_map
+from .whitelist_index import WhitelistIndex
 
 # python 2 backwards compatibility
 standard_library.install_aliases()
@@ -20,7 +24,8 @@ logger = logging.getLogger(__name__)
 
 class IndicatorClient(object):
 
-    def submit_indicators(self, indicators, enclave_ids=None, tags=None):
+    def submit_indicators(self, indicators, enclave_ids=None, tags=None, chunk_size=None, max_payload_bytes=None,
+                          max_workers=None, max_attempts=1):
         """
         Submit indicators directly.  The indicator field ``value`` is required; all other metadata fields are optional:
         ``firstSeen``, ``lastSeen``, ``sightings``, ``notes``, and ``source``. The submission must specify enclaves for
@@ -39,6 +44,25 @@ class IndicatorClient(object):
             can be modified in TruSTAR by using this function.
         :param list(string) enclave_ids: a list of enclave IDs.
         :param list(string) tags: a list of |Tag| objects that will be applied to ALL indicators in the submission.
+        :param int chunk_size: the maximum number of indicators to send per request.
+        :param int max_payload_bytes: the maximum size of each request body.  An indicator too large to fit in a chunk
+            on its own is sent in a chunk by itself.
+        :param int max_workers: the number of chunks to send concurrently.
+        :param int max_attempts: the number of times to send a chunk before giving up on it.  Chunks are not re-sent
+            after client errors (status codes 400-499), since the server would reject them again.
+
+        If neither ``chunk_size`` nor ``max_payload_bytes`` is given, all indicators are sent in a single request, and
+        any error is raised.  Otherwise, the indicators are split into chunks, a failed chunk does not stop the
+        others from being sent, and a list of |ChunkResult| objects describing each chunk is returned, in order.
+        The ``items`` of each failed chunk can be passed back to this method to re-submit just that chunk.
+
+        :return: ``None`` if neither ``chunk_size`` nor ``max_payload_bytes`` is given, as before they were added;
+            otherwise a list of |ChunkResult| objects.
+
+        Example:
+
+        >>> results = ts.submit_indicators(indicators, chunk_size=1000, max_payload_bytes=1000000, max_workers=4)
+        >>> failed = [indicator for result in results if not result.succeeded for indicator in result.items]
         """
 
         if enclave_ids is None:
@@ -47,16 +71,124 @@ class IndicatorClient(object):
         if tags is not None:
             tags = [tag.to_dict() for tag in tags]
 
-        body = {
+        if chunk_size is None and max_payload_bytes is None:
+            body = self._get_submission_body(indicators, enclave_ids, tags)
+            self._client.post("indicators", data=self._client.encode(body))
+            return
+
+        chunks = self._get_submission_chunks(indicators, enclave_ids, tags, chunk_size=chunk_size,
+                                             max_payload_bytes=max_payload_bytes, encode=self._client.encode)
+
+        def submit_chunk(chunk):
+            result, body = chunk
+            while True:
+                result.attempts += 1
+                try:
+                    self._client.post("indicators", data=body)
+                    result.error = None
+                    return result
+                except Exception as e:
+                    delay = self._get_chunk_retry_delay(result, e, max_attempts, self._client.max_wait_time)
+                    if delay is None:
+                        return result
+                    time.sleep(delay)
+
+        return list(parallel_map(submit_chunk, chunks, max_workers=max(max_workers or 1, 1)))
+
+    @staticmethod
+    def _get_submission_body(indicators, enclave_ids, tags):
+        """
+        :param indicators: a list of |Indicator| objects.
+        :param enclave_ids: a list of enclave IDs.
+        :param tags: a list of dictionary representations of tags, or ``None``.
+        :return: The request body submitting the indicators, as a dictionary.
+        """
+
+        return {
             "enclaveIds": enclave_ids,
             "content": [indicator.to_dict() for indicator in indicators],
             "tags": tags
         }
-        self._client.post("indicators", data=json.dumps(body))
+
+    @staticmethod
+    def _get_chunk_retry_delay(result, exception, max_attempts, max_wait_time):
+        """
+        Record that an attempt to submit a chunk failed, and decide whether to send it again.  Chunks are not re-sent
+        after client errors (status codes 400-499), since the server would reject them again.
+
+        :param ChunkResult result: the chunk's result.
+        :param exception: the exception the attempt raised.
+        :param int max_attempts: the number of times to send a chunk before giving up on it.
+        :param max_wait_time: the longest to wait before sending a chunk again, in seconds.
+        :return: The number of seconds to wait before sending the chunk again, or ``None`` to give up on it.
+        """
+
+        result.error = str(exception)
+        status_code = getattr(getattr(exception, 'response', None), 'status_code', None)
+        if result.attempts >= max_attempts or (status_code is not None and 400 <= status_code < 500):
+            logger.warning("Failed to submit chunk %d (%d indicators) after %d attempt(s): %s",
+                           result.index, result.count, result.attempts, exception)
+            return None
+        return min(2 ** (result.attempts - 1), max_wait_time)
+
+    @staticmethod
+    def _get_submission_chunks(indicators, enclave_ids, tags, chunk_size=None, max_payload_bytes=None,
+                               encode=json.dumps):
+        """
+        Split indicators to submit into chunks of at most ``chunk_size`` indicators whose encoded request bodies are at
+        most ``max_payload_bytes`` long.
+
+        :param indicators: an iterable of |Indicator| objects.  It is consumed lazily.
+        :param enclave_ids: a list of enclave IDs.
+        :param tags: a list of dictionary representations of tags, or ``None``.
+        :param int chunk_size: the maximum number of indicators per chunk.
+        :param int max_payload_bytes: the maximum size of each request body.
+        :param encode: the function used to encode request bodies.
+        :return: A generator of tuples of a |ChunkResult| and the chunk's encoded request body.
+        """
+
+        def make_chunk(index, start, items, content):
+            body = encode({"enclaveIds": enclave_ids, "content": content, "tags": tags})
+            result = ChunkResult(index=index, start=start, count=len(items), num_bytes=len(body.encode('utf-8')),
+                                 items=items)
+            return result, body
+
+        # the size of a body without any indicators, and of each indicator with the separator before it, bound the
+        # size of a chunk's body without encoding it after every indicator
+        if max_payload_bytes is not None:
+            overhead = len(encode({"enclaveIds": enclave_ids, "content": [], "tags": tags}).encode('utf-8'))
+
+        index = 0
+        start = 0
+        items = []
+        content = []
+        num_bytes = 0
+        for indicator in indicators:
+            indicator_dict = indicator.to_dict()
+            size = 0
+            if max_payload_bytes is not None:
+                size = len(encode(indicator_dict).encode('utf-8')) + 2
+
+            if items and ((chunk_size is not None and len(items) >= chunk_size)
+                          or (max_payload_bytes is not None and overhead + num_bytes + size > max_payload_bytes)):
+                yield make_chunk(index, start, items, content)
+                index += 1
+                start += len(items)
+                items = []
+                content = []
+                num_bytes = 0
+
+            items.append(indicator)
+            content.append(indicator_dict)
+            num_bytes += size
+
+        if items:
+            yield make_chunk(index, start, items, content)
 
     def get_indicators(self, from_time=None, to_time=None, enclave_ids=None,
                        included_tag_ids=None, excluded_tag_ids=None,
-                       start_page=0, page_size=None):
+                       start_page=0, page_size=None, max_workers=None, read_ahead=None, streaming=False,
+                       checkpoint=None, resume_from=None):
         """
         Creates a generator from the |get_indicators_page| method that returns each successive indicator as an
         |Indicator| object containing values for the 'value' and 'type' attributes only; all
@@ -71,6 +203,18 @@ class IndicatorClient(object):
         :param int page_size: Passing the integer 1000 as the argument to this parameter should result in your script 
         making fewer API calls because it returns the largest quantity of indicators with each API call.  An API call 
         has to be made to fetch each |Page|.   
+        :param int max_workers: if greater than 1, pages after the first are fetched concurrently on this many threads.
+            Items are still generated in order.
+        :param int read_ahead: the maximum number of pages fetched ahead of the consumer (defaults to
+            ``2 * max_workers``).
+        :param bool streaming: whether to decode each indicator from the response stream as it is generated, rather
+            than decoding each page at once.  Keeps only one indicator rather than one page in memory at a time, so
+            is best used without ``max_workers``.
+        :param checkpoint: a |Checkpoint| to save the cursor to after each page, so that a restarted job can pass it as
+            ``resume_from``.  Pass an explicit ``to_time`` as well, so that the restarted job pages through the same
+            time window.
+        :param dict resume_from: a cursor saved by a previous generator, e.g. ``checkpoint.load()``.  If given,
+            ``start_page`` is ignored, and the generator continues from the page the previous one left off at.
         :return: A generator of |Indicator| objects containing values for the "value" and "type" attributes only.
         All other attributes of the |Indicator| object will contain Null values. 
         
@@ -82,15 +226,57 @@ class IndicatorClient(object):
             included_tag_ids=included_tag_ids,
             excluded_tag_ids=excluded_tag_ids,
             page_number=start_page,
-            page_size=page_size
+            page_size=page_size,
+            max_workers=max_workers,
+            read_ahead=read_ahead,
+            streaming=streaming,
+            checkpoint=checkpoint,
+            resume_from=resume_from
         )
 
         indicators_generator = Page.get_generator(page_generator=indicators_page_generator)
 
         return indicators_generator
 
+    def get_indicator_columns(self, from_time=None, to_time=None, enclave_ids=None,
+                              included_tag_ids=None, excluded_tag_ids=None, columns=None, use_numpy=False,
+                              start_page=0, page_size=None, max_workers=None, read_ahead=None, checkpoint=None,
+                              resume_from=None):
+        """
+        The columnar counterpart of |get_indicators|: creates a generator from the |get_indicators_page| method that
+        returns the indicators of each successive page as a |ColumnBatch|, without building an |Indicator| object per
+        indicator.  Accepts the same parameters as |get_indicators|, plus:
+
+        :param list(str) columns: the names of the response fields to decode, i.e. ``["value", "indicatorType"]``
+            (defaults to every field returned).
+        :param bool use_numpy: whether to decode the columns into NumPy arrays rather than lists.  Requires the
+            ``numpy`` package.
+        :return: A generator of |ColumnBatch| objects.
+        """
+
+        indicators_page_generator = self._get_indicators_page_generator(
+            from_time=from_time,
+            to_time=to_time,
+            enclave_ids=enclave_ids,
+            included_tag_ids=included_tag_ids,
+            excluded_tag_ids=excluded_tag_ids,
+            page_number=start_page,
+            page_size=page_size,
+            max_workers=max_workers,
+            read_ahead=read_ahead,
+            columnar=True,
+            columns=columns,
+            use_numpy=use_numpy,
+            checkpoint=checkpoint,
+            resume_from=resume_from
+        )
+
+        return Page.get_column_generator(page_generator=indicators_page_generator)
+
     def _get_indicators_page_generator(self, from_time=None, to_time=None, page_number=0, page_size=None,
-                                       enclave_ids=None, included_tag_ids=None, excluded_tag_ids=None):
+                                       enclave_ids=None, included_tag_ids=None, excluded_tag_ids=None,
+                                       max_workers=None, read_ahead=None, columnar=False, columns=None,
+                                       use_numpy=False, streaming=False, checkpoint=None, resume_from=None):
         """
         Creates a generator from the |get_indicators_page| method that returns each successive page.
 
@@ -101,6 +287,16 @@ class IndicatorClient(object):
         :param list(string) enclave_ids: a list of enclave IDs to filter by
         :param list(string) included_tag_ids: only indicators containing ALL of these tags will be returned
         :param list(string) excluded_tag_ids: only indicators containing NONE of these tags will be returned
+        :param int max_workers: if greater than 1, pages after the first are fetched concurrently on this many threads.
+            Items are still generated in order.
+        :param int read_ahead: the maximum number of pages fetched ahead of the consumer (defaults to
+            ``2 * max_workers``).
+        :param bool columnar: whether to decode each page's indicators into a |ColumnBatch|.
+        :param list(str) columns: in columnar mode, the names of the fields to decode (defaults to all fields).
+        :param bool use_numpy: in columnar mode, whether to decode the columns into NumPy arrays.
+        :param bool streaming: whether to return each page as a |StreamingPage|.
+        :param checkpoint: a |Checkpoint| to save the cursor to after each page.
+        :param dict resume_from: a cursor saved by a previous generator to continue from.
         :return: a |Page| of |Indicator| objects
         """
 
@@ -112,12 +308,19 @@ class IndicatorClient(object):
             page_size=page_size,
             enclave_ids=enclave_ids,
             included_tag_ids=included_tag_ids,
-            excluded_tag_ids=excluded_tag_ids
+            excluded_tag_ids=excluded_tag_ids,
+            columnar=columnar,
+            columns=columns,
+            use_numpy=use_numpy,
+            streaming=streaming
         )
-        return Page.get_page_generator(get_page, page_number, page_size)
+        return Page.get_page_generator(get_page, page_number, page_size,
+                                       max_workers=max_workers, read_ahead=read_ahead,
+                                       checkpoint=checkpoint, resume_from=resume_from)
 
     def get_indicators_page(self, from_time=None, to_time=None, page_number=None, page_size=None,
-                            enclave_ids=None, included_tag_ids=None, excluded_tag_ids=None):
+                            enclave_ids=None, included_tag_ids=None, excluded_tag_ids=None,
+                            columnar=False, columns=None, use_numpy=False, streaming=False):
         """
         Get a page of indicators matching the provided filters.
 
@@ -128,9 +331,17 @@ class IndicatorClient(object):
         :param list(string) enclave_ids: a list of enclave IDs to filter by
         :param list(string) included_tag_ids: only indicators containing ALL of these tags will be returned
         :param list(string) excluded_tag_ids: only indicators containing NONE of these tags will be returned
+        :param bool columnar: whether to decode the indicators into a |ColumnBatch| rather than |Indicator| objects
+        :param list(str) columns: in columnar mode, the names of the fields to decode (defaults to all fields)
+        :param bool use_numpy: in columnar mode, whether to decode the columns into NumPy arrays
+        :param bool streaming: whether to return a |StreamingPage|, which decodes each indicator from the response
+            stream as it is iterated over, rather than decoding the whole response at once
         :return: a |Page| of indicators
         """
 
+        if streaming and columnar:
+            raise ValueError("A page cannot be decoded in both columnar and streaming mode.")
+
         params = {
             'from': from_time,
             'to': to_time,
@@ -141,25 +352,37 @@ class IndicatorClient(object):
             'excludedTagIds': excluded_tag_ids
         }
 
+        if streaming:
+            resp = self._client.get("indicators", params=params, stream=True)
+            return StreamingPage.from_response(resp, content_type=self._indicator_model)
+
         resp = self._client.get("indicators", params=params)
 
-        page_of_indicators = Page.from_dict(resp.json(), content_type=Indicator)
+        page_of_indicators = Page.from_dict(self._client.decode(resp), content_type=self._indicator_model,
+                                            columnar=columnar, columns=columns, use_numpy=use_numpy)
 
         return page_of_indicators
 
-    def search_indicators(self, search_term, enclave_ids=None):
+    def search_indicators(self, search_term, enclave_ids=None, max_workers=None, read_ahead=None):
         """
         Uses the |search_indicators_page| method to create a generator that returns each successive indicator.
 
         :param str search_term: The term to search for.
         :param list(str) enclave_ids: list of enclave ids used to restrict indicators to specific enclaves (optional - by
             default indicators from all of user's enclaves are returned)
+        :param int max_workers: if greater than 1, pages after the first are fetched concurrently on this many threads.
+            Items are still generated in order.
+        :param int read_ahead: the maximum number of pages fetched ahead of the consumer (defaults to
+            ``2 * max_workers``).
         :return: The generator.
         """
 
-        return Page.get_generator(page_generator=self._search_indicators_page_generator(search_term, enclave_ids))
+        return Page.get_generator(page_generator=self._search_indicators_page_generator(search_term, enclave_ids,
+                                                                                       max_workers=max_workers,
+                                                                                       read_ahead=read_ahead))
 
-    def _search_indicators_page_generator(self, search_term, enclave_ids=None, start_page=0, page_size=None):
+    def _search_indicators_page_generator(self, search_term, enclave_ids=None, start_page=0, page_size=None,
+                                          max_workers=None, read_ahead=None):
         """
         Creates a generator from the |search_indicators_page| method that returns each successive page.
 
@@ -168,11 +391,14 @@ class IndicatorClient(object):
             default indicators from all of user's enclaves are returned)
         :param int start_page: The page to start on.
         :param page_size: The size of each page.
+        :param int max_workers: The number of pages to fetch concurrently.
+        :param int read_ahead: The maximum number of pages fetched ahead of the consumer.
         :return: The generator.
         """
 
         get_page = functools.partial(self.search_indicators_page, search_term, enclave_ids)
-        return Page.get_page_generator(get_page, start_page, page_size)
+        return Page.get_page_generator(get_page, start_page, page_size,
+                                       max_workers=max_workers, read_ahead=read_ahead)
 
     def search_indicators_page(self, search_term, enclave_ids=None, page_size=None, page_number=None):
         """
@@ -195,28 +421,39 @@ class IndicatorClient(object):
 
         resp = self._client.get("indicators/search", params=params)
 
-        return Page.from_dict(resp.json(), content_type=Indicator)
+        return Page.from_dict(self._client.decode(resp), content_type=self._indicator_model)
 
-    def get_related_indicators(self, indicators=None, enclave_ids=None):
+    def get_related_indicators(self, indicators=None, enclave_ids=None, max_workers=None, read_ahead=None):
         """
         Uses the |get_related_indicators_page| method to create a generator that returns each successive report.
 
         :param list(string) indicators: list of indicator values to search for
         :param list(string) enclave_ids: list of GUIDs of enclaves to search in
+        :param int max_workers: if greater than 1, pages after the first are fetched concurrently on this many threads.
+            Items are still generated in order.
+        :param int read_ahead: the maximum number of pages fetched ahead of the consumer (defaults to
+            ``2 * max_workers``).
         :return: The generator.
         """
 
-        return Page.get_generator(page_generator=self._get_related_indicators_page_generator(indicators, enclave_ids))
+        return Page.get_generator(page_generator=self._get_related_indicators_page_generator(indicators, enclave_ids,
+                                                                                           max_workers=max_workers,
+                                                                                           read_ahead=read_ahead))
 
-    def get_indicators_for_report(self, report_id):
+    def get_indicators_for_report(self, report_id, max_workers=None, read_ahead=None):
         """
         Creates a generator that returns each successive indicator for a given report.
 
         :param str report_id: The ID of the report to get indicators for.
+        :param int max_workers: if greater than 1, pages after the first are fetched concurrently on this many threads.
+            Items are still generated in order.
+        :param int read_ahead: the maximum number of pages fetched ahead of the consumer (defaults to
+            ``2 * max_workers``).
         :return: The generator.
         """
 
-        return Page.get_generator(page_generator=self._get_indicators_for_report_page_generator(report_id))
+        return Page.get_generator(page_generator=self._get_indicators_for_report_page_generator(
+            report_id, max_workers=max_workers, read_ahead=read_ahead))
 
     def get_indicator_metadata(self, value):
         """
@@ -224,6 +461,10 @@ class IndicatorClient(object):
         sightings, lastSeen, enclaveIds, and tags. The metadata is determined based on the enclaves the user making the
         request has READ access to.
 
+        If the ``batch_lookups`` config value is set, lookups made by any number of threads within
+        ``batch_window`` seconds of each other are combined into a single |get_indicators_metadata| call by a
+        |MicroBatcher|.
+
         :param value: an indicator value to query.
         :return: A dict containing three fields: 'indicator' (an |Indicator| object), 'tags' (a list of |Tag|
             objects), and 'enclaveIds' (a list of enclave IDs that the indicator was found in).
@@ -231,9 +472,13 @@ class IndicatorClient(object):
         .. warning:: This method is deprecated.  Please use |get_indicators_metadata| instead.
         """
 
-        result = self.get_indicators_metadata([Indicator(value=value)])
-        if len(result) > 0:
-            indicator = result[0]
+        if self._metadata_batcher is not None:
+            indicator = self._metadata_batcher.get(value)
+        else:
+            result = self.get_indicators_metadata([Indicator(value=value)])
+            indicator = result[0] if len(result) > 0 else None
+
+        if indicator is not None:
             return {
                 'indicator': indicator,
                 'tags': indicator.tags,
@@ -242,33 +487,88 @@ class IndicatorClient(object):
         else:
             return None
 
-    def get_indicators_metadata(self, indicators):
+    def _get_metadata_batch(self, values):
+        """
+        Look up the metadata of a batch of single indicator lookups for the |MicroBatcher| of |get_indicator_metadata|.
+
+        :param values: A list of indicator values.
+        :return: A dictionary of |Indicator| objects by value.  Values that were not found are missing.
+        """
+
+        indicators = self.get_indicators_metadata([Indicator(value=value) for value in values])
+        return self._match_metadata_batch(values, indicators)
+
+    @staticmethod
+    def _match_metadata_batch(values, indicators):
+        """
+        Match the indicators returned for a batch of single indicator lookups to the values that were looked up.
+
+        :param values: A list of indicator values.
+        :param indicators: The |Indicator| objects returned for the values.
+        :return: A dictionary of |Indicator| objects by value.  Values that were not found are missing.
+        """
+
+        # the server may normalize values, e.g. to lower case; items without a value match nothing
+        by_value = {}
+        by_lower_value = {}
+        for indicator in indicators:
+            if indicator.value is None:
+                continue
+            by_value.setdefault(indicator.value, indicator)
+            by_lower_value.setdefault(indicator.value.lower(), indicator)
+
+        results = {}
+        for value in values:
+            indicator = by_value.get(value) or by_lower_value.get(value.lower())
+            if indicator is not None:
+                results[value] = indicator
+        return results
+
+    def get_indicators_metadata(self, indicators, max_workers=None):
         """
         Provide metadata associated with an list of indicators, including value, indicatorType, noteCount, sightings,
         lastSeen, enclaveIds, and tags. The metadata is determined based on the enclaves the user making the request has
         READ access to.
 
-        :param indicators: a list of |Indicator| objects to query.  Values are required, types are optional.  Types
+        Indicators are sent as query parameters, so a large number of them is split into batches whose URLs are at most
+        ``max_url_length`` (a config value) characters long.  The batches are requested concurrently.
+
+        :param indicators: an iterable of |Indicator| objects to query.  Values are required, types are optional.  Types
             might be required to distinguish in a case where one indicator value has been associated with multiple types
             based on different contexts.
+        :param int max_workers: the number of batches to request concurrently (defaults to the ``max_concurrency``
+            config value).
         :return: A list of |Indicator| objects.  The following attributes of the objects will be returned:  
             correlation_count, last_seen, sightings, notes, tags, enclave_ids.  All other attributes of the Indicator
-            objects will have Null values.  
-        """
+            objects will have Null values.  Batches are returned in the order of ``indicators``.
 
-        params = {
-            'values': [i.value for i in indicators],
-            'types': [i.type for i in indicators]
-        }
-
-        if len(params.get('types')) == 0:
-            params['types'] = None
+        If the ``indicator_cache`` config value is set, indicators found in the cache are not requested from the server.
+        """
 
-        resp = self._client.get("indicators/metadata", params=params)
+        def get_batch(batch):
+            params = {
+                'values': [value for value, _ in batch],
+                'types': [type for _, type in batch]
+            }
+            resp = self._client.get("indicators/metadata", params=params)
+            return self._client.decode(resp)
+
+        def get_metadata(queries):
+            batches = get_url_chunks(queries,
+                                     get_params=lambda query: [('values', query[0]), ('types', query[1])],
+                                     url="%s/indicators/metadata" % self._client.base,
+                                     max_length=self._client.max_url_length)
+            return self._get_batches(get_batch, batches, max_workers=max_workers)
+
+        queries = ((i.value, i.type) for i in indicators)
+        if self.indicator_cache is None:
+            results = get_metadata(queries)
+        else:
+            results = self.indicator_cache.lookup("metadata", list(queries), fetch=get_metadata)
 
-        return [Indicator.from_dict(x) for x in resp.json()]
+        return [self._indicator_model.from_dict(x) for x in results]
 
-    def get_indicator_details(self, indicators, enclave_ids=None):
+    def get_indicator_details(self, indicators, enclave_ids=None, max_workers=None):
         """
         NOTE: This method uses an API endpoint that is intended for internal use only, and is not officially supported.
 
@@ -277,32 +577,86 @@ class IndicatorClient(object):
         values in Station exactly.  If the exact value of an indicator is not known, it should be obtained either through
         the search endpoint first.
 
-        :param indicators: A list of indicator values of any type.
+        Like |get_indicators_metadata|, a large number of values is split into batches that are requested concurrently.
+
+        :param indicators: An iterable of indicator values of any type.
         :param enclave_ids: Only find details for indicators in these enclaves.
+        :param int max_workers: the number of batches to request concurrently (defaults to the ``max_concurrency``
+            config value).
 
         :return: a list of |Indicator| objects with all fields (except possibly ``reason``) filled out
+
+        If the ``indicator_cache`` config value is set, indicators found in the cache are not requested from the server.
         """
 
         # if the indicators parameter is a string, make it a singleton
         if isinstance(indicators, string_types):
             indicators = [indicators]
 
-        params = {
-            'enclaveIds': enclave_ids,
-            'indicatorValues': indicators
-        }
-        resp = self._client.get("indicators/details", params=params)
+        def get_batch(batch):
+            params = {
+                'enclaveIds': enclave_ids,
+                'indicatorValues': [value for value, _ in batch]
+            }
+            resp = self._client.get("indicators/details", params=params)
+            return self._client.decode(resp)
+
+        def get_details(queries):
+            batches = get_url_chunks(queries,
+                                     get_params=lambda query: [('indicatorValues', query[0])],
+                                     url="%s/indicators/details" % self._client.base,
+                                     max_length=self._client.max_url_length,
+                                     params={'enclaveIds': enclave_ids})
+            return self._get_batches(get_batch, batches, max_workers=max_workers)
+
+        queries = ((value, None) for value in indicators)
+        if self.indicator_cache is None:
+            results = get_details(queries)
+        else:
+            results = self.indicator_cache.lookup("details", list(queries), fetch=get_details, enclave_ids=enclave_ids)
+
+        return [self._indicator_model.from_dict(indicator) for indicator in results]
 
-        return [Indicator.from_dict(indicator) for indicator in resp.json()]
+    def _get_batches(self, get_batch, batches, max_workers=None):
+        """
+        Request batches concurrently and concatenate the results.
 
-    def get_whitelist(self):
+        :param get_batch: a function that requests a batch and returns a list of results.
+        :param batches: an iterable of batches.
+        :param int max_workers: the number of batches to request concurrently (defaults to the ``max_concurrency``
+            config value).
+        :return: The concatenated list of results, in the order of ``batches``.
+        """
+
+        if max_workers is None:
+            max_workers = self._client.max_concurrency
+
+        # avoid starting threads for the common case of a single batch
+        batches = iter(batches)
+        first_batches = list(itertools.islice(batches, 2))
+        if len(first_batches) < 2 or max_workers <= 1:
+            batch_results = (get_batch(batch) for batch in itertools.chain(first_batches, batches))
+        else:
+            batch_results = parallel_map(get_batch, itertools.chain(first_batches, batches), max_workers=max_workers)
+
+        results = []
+        for batch_result in batch_results:
+            results.extend(batch_result)
+        return results
+
+    def get_whitelist(self, max_workers=None, read_ahead=None):
         """
         Uses the |get_whitelist_page| method to create a generator that returns each successive whitelisted indicator.
 
+        :param int max_workers: if greater than 1, pages after the first are fetched concurrently on this many threads.
+            Items are still generated in order.
+        :param int read_ahead: the maximum number of pages fetched ahead of the consumer (defaults to
+            ``2 * max_workers``).
         :return: The generator.
         """
 
-        return Page.get_generator(page_generator=self._get_whitelist_page_generator())
+        return Page.get_generator(page_generator=self._get_whitelist_page_generator(max_workers=max_workers,
+                                                                                    read_ahead=read_ahead))
 
     def add_terms_to_whitelist(self, terms):
         """
@@ -312,8 +666,13 @@ class IndicatorClient(object):
         :return: The list of extracted |Indicator| objects that were whitelisted.
         """
 
-        resp = self._client.post("whitelist", json=terms)
-        return [Indicator.from_dict(indicator) for indicator in resp.json()]
+        resp = self._client.post("whitelist", data=self._client.encode(terms))
+        indicators = [self._indicator_model.from_dict(indicator) for indicator in self._client.decode(resp)]
+
+        for whitelist_index in list(self._whitelist_indexes):
+            whitelist_index.update(indicators)
+
+        return indicators
 
     def delete_indicator_from_whitelist(self, indicator):
         """
@@ -325,6 +684,31 @@ class IndicatorClient(object):
         params = indicator.to_dict()
         self._client.delete("whitelist", params=params)
 
+        for whitelist_index in list(self._whitelist_indexes):
+            whitelist_index.remove(indicator)
+
+    def get_whitelist_index(self, page_size=None, max_workers=None):
+        """
+        Load the user's company's whitelist into a |WhitelistIndex|, for checking whether values are whitelisted
+        without calling the API.  The index is kept up to date with |add_terms_to_whitelist| and
+        |delete_indicator_from_whitelist| calls made through this client, but not with changes made elsewhere; load a
+        new index periodically to pick those up.
+
+        :param int page_size: the number of whitelisted indicators to get per request.
+        :param int max_workers: if greater than 1, pages after the first are fetched concurrently on this many threads.
+        :return: The |WhitelistIndex|.
+        """
+
+        whitelist_index = WhitelistIndex()
+
+        # register the index first, so that changes made while it is loading are not missed
+        self._whitelist_indexes.add(whitelist_index)
+
+        for page in self._get_whitelist_page_generator(page_size=page_size, max_workers=max_workers):
+            whitelist_index.update(page.items)
+
+        return whitelist_index
+
     def get_community_trends(self, indicator_type=None, days_back=None):
         """
         Find indicators that are trending in the community.
@@ -341,10 +725,10 @@ class IndicatorClient(object):
         }
 
         resp = self._client.get("indicators/community-trending", params=params)
-        body = resp.json()
+        body = self._client.decode(resp)
 
         # parse items in response as indicators
-        return [Indicator.from_dict(indicator) for indicator in body]
+        return [self._indicator_model.from_dict(indicator) for indicator in body]
 
     def get_whitelist_page(self, page_number=None, page_size=None):
         """
@@ -360,7 +744,7 @@ class IndicatorClient(object):
             'pageSize': page_size
         }
         resp = self._client.get("whitelist", params=params)
-        return Page.from_dict(resp.json(), content_type=Indicator)
+        return Page.from_dict(self._client.decode(resp), content_type=self._indicator_model)
     
     def get_indicators_for_report_page(self, report_id, page_number=None, page_size=None):
         """
@@ -377,7 +761,7 @@ class IndicatorClient(object):
             'pageSize': page_size
         }
         resp = self._client.get("reports/%s/indicators" % report_id, params=params)
-        return Page.from_dict(resp.json(), content_type=Indicator)
+        return Page.from_dict(self._client.decode(resp), content_type=self._indicator_model)
 
     def get_related_indicators_page(self, indicators=None, enclave_ids=None, page_size=None, page_number=None):
         """
@@ -399,22 +783,27 @@ class IndicatorClient(object):
 
         resp = self._client.get("indicators/related", params=params)
 
-        return Page.from_dict(resp.json(), content_type=Indicator)
+        return Page.from_dict(self._client.decode(resp), content_type=self._indicator_model)
 
-    def _get_indicators_for_report_page_generator(self, report_id, start_page=0, page_size=None):
+    def _get_indicators_for_report_page_generator(self, report_id, start_page=0, page_size=None,
+                                                  max_workers=None, read_ahead=None):
         """
         Creates a generator from the |get_indicators_for_report_page| method that returns each successive page.
 
         :param str report_id: The ID of the report to get indicators for.
         :param int start_page: The page to start on.
         :param int page_size: The size of each page.
+        :param int max_workers: The number of pages to fetch concurrently.
+        :param int read_ahead: The maximum number of pages fetched ahead of the consumer.
         :return: The generator.
         """
 
         get_page = functools.partial(self.get_indicators_for_report_page, report_id=report_id)
-        return Page.get_page_generator(get_page, start_page, page_size)
+        return Page.get_page_generator(get_page, start_page, page_size,
+                                       max_workers=max_workers, read_ahead=read_ahead)
 
-    def _get_related_indicators_page_generator(self, indicators=None, enclave_ids=None, start_page=0, page_size=None):
+    def _get_related_indicators_page_generator(self, indicators=None, enclave_ids=None, start_page=0, page_size=None,
+                                               max_workers=None, read_ahead=None):
         """
         Creates a generator from the |get_related_indicators_page| method that returns each
         successive page.
@@ -423,19 +812,25 @@ class IndicatorClient(object):
         :param enclave_ids: list of IDs of enclaves to search in
         :param start_page: The page to start on.
         :param page_size: The size of each page.
+        :param int max_workers: The number of pages to fetch concurrently.
+        :param int read_ahead: The maximum number of pages fetched ahead of the consumer.
         :return: The generator.
         """
 
         get_page = functools.partial(self.get_related_indicators_page, indicators, enclave_ids)
-        return Page.get_page_generator(get_page, start_page, page_size)
+        return Page.get_page_generator(get_page, start_page, page_size,
+                                       max_workers=max_workers, read_ahead=read_ahead)
 
-    def _get_whitelist_page_generator(self, start_page=0, page_size=None):
+    def _get_whitelist_page_generator(self, start_page=0, page_size=None, max_workers=None, read_ahead=None):
         """
         Creates a generator from the |get_whitelist_page| method that returns each successive page.
 
         :param int start_page: The page to start on.
         :param int page_size: The size of each page.
+        :param int max_workers: The number of pages to fetch concurrently.
+        :param int read_ahead: The maximum number of pages fetched ahead of the consumer.
         :return: The generator.
         """
 
-        return Page.get_page_generator(self.get_whitelist_page, start_page, page_size)
+        return Page.get_page_generator(self.get_whitelist_page, start_page, page_size,
+                                       max_workers=max_workers, read_ahead=read_ahead)
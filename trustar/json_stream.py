@@ -0,0 +1,209 @@
+# python 2 backwards compatibility
+from __future__ import print_function
+from builtins import object
+from future import standard_library
+
+# external imports
+import codecs
+import json
+
+# python 2 backwards compatibility
+standard_library.install_aliases()
+
+# the number of bytes read from the response at a time
+CHUNK_SIZE = 64 * 1024
+
+_WHITESPACE = ' \t\n\r'
+
+# the characters that can follow a prefix of a number within the same number
+_NUMBER_CONTINUATIONS = '.eE+-0123456789'
+
+
+class PageStreamParser(object):
+    """
+    An incremental parser of the JSON body of a page response, i.e. an object with an ``items`` array and other fields
+    such as ``totalElements`` and ``hasNext``.  Text is fed to the parser as it arrives, and each element of ``items``
+    is returned as soon as it is complete, so that only the element being parsed is held in memory rather than the
+    whole body.
+
+    Elements are decoded with ``json.JSONDecoder.raw_decode``.  A value that ends exactly at the end of the text fed
+    so far is not accepted until more text or the end of the body arrives, since a number could continue in the next
+    chunk.
+    """
+
+    def __init__(self, set_field=None):
+        """
+        :param set_field: A function called with the name and value of each top-level field other than ``items``, as
+            soon as it is parsed.
+        """
+
+        self._set_field = set_field
+        self._decoder = json.JSONDecoder()
+        self._text = ''
+        self._pos = 0
+        self._eof = False
+        self._key = None
+        # one of: 'start', 'key', 'colon', 'items', 'value', 'item', 'item_separator', 'next_item',
+        # 'separator', 'done'
+        self._state = 'start'
+
+    def feed(self, text):
+        """
+        :param str text: The next piece of the body.
+        :return: A list of the elements of ``items`` completed by this piece.
+        """
+
+        # drop the text that has already been parsed, so the buffer only holds the element being parsed
+        self._text = self._text[self._pos:] + text
+        self._pos = 0
+        return self._parse()
+
+    def close(self):
+        """
+        Signal the end of the body.
+
+        :return: A list of any elements of ``items`` that were completed by the end of the body.
+        """
+
+        self._eof = True
+        items = self._parse()
+        if self._state != 'done':
+            raise ValueError("The page response ended before its JSON body was complete.")
+        if self._text[self._pos:].strip(_WHITESPACE):
+            raise ValueError("Extra data after the JSON body of the page response.")
+        return items
+
+    def _skip_whitespace(self):
+        text = self._text
+        pos = self._pos
+        while pos < len(text) and text[pos] in _WHITESPACE:
+            pos += 1
+        self._pos = pos
+        return text[pos] if pos < len(text) else None
+
+    def _expect(self, char, expected):
+        if char not in expected:
+            raise ValueError("Invalid JSON in page response: expected one of %r at position %d, found %r."
+                             % (expected, self._pos, char))
+        self._pos += 1
+
+    def _decode_value(self):
+        """
+        :return: A tuple of whether a complete value was decoded, and the value.
+        """
+
+        try:
+            value, end = self._decoder.raw_decode(self._text, self._pos)
+        except ValueError:
+            if self._eof:
+                raise
+            # the value is incomplete; wait for more text
+            return False, None
+
+        if end == len(self._text) and not self._eof:
+            return False, None
+
+        # a number cut short within its fraction or exponent, e.g. "1500." or "1e", is decoded without the cut-off part
+        if (isinstance(value, (int, float)) and not isinstance(value, bool) and not self._eof
+                and self._text[end] in _NUMBER_CONTINUATIONS):
+            return False, None
+
+        self._pos = end
+        return True, value
+
+    def _parse(self):
+        items = []
+        while True:
+            char = self._skip_whitespace()
+            if char is None:
+                return items
+
+            state = self._state
+            if state == 'start':
+                self._expect(char, '{')
+                self._state = 'key'
+
+            elif state == 'key':
+                if char == '}':
+                    self._pos += 1
+                    self._state = 'done'
+                    continue
+                complete, key = self._decode_value()
+                if not complete:
+                    return items
+                self._key = key
+                self._state = 'colon'
+
+            elif state == 'colon':
+                self._expect(char, ':')
+                self._state = 'items' if self._key == 'items' else 'value'
+
+            elif state == 'items':
+                # the items are parsed one by one, unless they are not an array, e.g. null
+                if char == '[':
+                    self._pos += 1
+                    self._state = 'item'
+                else:
+                    self._state = 'value'
+
+            elif state == 'value':
+                complete, value = self._decode_value()
+                if not complete:
+                    return items
+                if self._set_field is not None:
+                    self._set_field(self._key, value)
+                self._state = 'separator'
+
+            elif state == 'item':
+                if char == ']':
+                    self._pos += 1
+                    self._state = 'separator'
+                    continue
+                complete, value = self._decode_value()
+                if not complete:
+                    return items
+                items.append(value)
+                self._state = 'item_separator'
+
+            elif state == 'item_separator':
+                self._expect(char, ',]')
+                self._state = 'next_item' if char == ',' else 'separator'
+
+            elif state == 'next_item':
+                if char == ']':
+                    raise ValueError("Invalid JSON in page response: trailing comma in 'items'.")
+                self._state = 'item'
+
+            elif state == 'separator':
+                self._expect(char, ',}')
+                self._state = 'key' if char == ',' else 'done'
+
+            else:
+                raise ValueError("Extra data after the JSON body of the page response.")
+
+
+def iter_page_items(stream, set_field=None, chunk_size=CHUNK_SIZE):
+    """
+    Parse the JSON body of a page response incrementally with a |PageStreamParser|, yielding each raw element of its
+    ``items`` array as soon as it is parsed.
+
+    :param stream: A binary file-like object the body can be read from, e.g. ``response.raw``.
+    :param set_field: A function called with the name and value of each top-level field other than ``items``, as soon
+        as it is parsed.
+    :param int chunk_size: The number of bytes to read at a time.
+    :return: A generator of the raw elements of ``items``, i.e. dictionaries.
+    """
+
+    parser = PageStreamParser(set_field=set_field)
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        for item in parser.feed(decoder.decode(chunk)):
+            yield item
+
+    for item in parser.feed(decoder.decode(b'', final=True)):
+        yield item
+    for item in parser.close():
+        yield item
@@ -0,0 +1,548 @@
+# python 2 backwards compatibility
+from __future__ import print_function, division
+from builtins import object, range
+from future import standard_library
+
+# external imports
+import threading
+
+# python 2 backwards compatibility
+standard_library.install_aliases()
+
+
+class TransferStats(object):
+    """
+    Counts the bytes an |ApiClient| sends and receives, and the time it spends compressing request bodies.  Every
+    client has one, available as the ``transfer_stats`` attribute of |TruStar| and |AsyncTruStar|.  Safe to update from
+    any number of threads.
+
+    Bytes are counted for request and response bodies only, not headers.  For responses to streamed requests, such as
+    pages requested with ``streaming=True``, only the ``Content-Length`` the server sent is known.
+
+    :ivar requests: The number of requests made.
+    :ivar request_bytes: The number of request body bytes sent, after compression.
+    :ivar uncompressed_request_bytes: The number of request body bytes before compression.
+    :ivar compressed_requests: The number of requests whose bodies were compressed.
+    :ivar compression_time: The number of seconds spent compressing request bodies.
+    :ivar response_bytes: The number of response body bytes received, before decompression.
+    :ivar decoded_response_bytes: The number of response body bytes after decompression.
+    :ivar compressed_responses: The number of responses the server compressed.
+    """
+
+    FIELDS = ('requests', 'request_bytes', 'uncompressed_request_bytes', 'compressed_requests', 'compression_time',
+              'response_bytes', 'decoded_response_bytes', 'compressed_responses')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """
+        Set every counter to zero.
+        """
+
+        with self._lock:
+            for field in self.FIELDS:
+                setattr(self, field, 0)
+
+    def record_compression(self, uncompressed_bytes, compressed_bytes, elapsed):
+        """
+        :param int uncompressed_bytes: The size of a request body before compression.
+        :param int compressed_bytes: The size of the request body after compression.
+        :param float elapsed: The number of seconds spent compressing it.
+        """
+
+        with self._lock:
+            self.compressed_requests += 1
+            self.compression_time += elapsed
+            # record_request counts the compressed body; count how much it saved
+            self.uncompressed_request_bytes += uncompressed_bytes - compressed_bytes
+
+    def record_request(self, request_bytes, response_bytes, decoded_response_bytes, compressed_response):
+        """
+        :param int request_bytes: The size of the request body sent.
+        :param int response_bytes: The size of the response body received, before decompression.
+        :param int decoded_response_bytes: The size of the response body after decompression.
+        :param bool compressed_response: Whether the server compressed the response.
+        """
+
+        with self._lock:
+            self.requests += 1
+            self.request_bytes += request_bytes
+            self.uncompressed_request_bytes += request_bytes
+            self.response_bytes += response_bytes
+            self.decoded_response_bytes += decoded_response_bytes
+            if compressed_response:
+                self.compressed_responses += 1
+
+    @property
+    def request_compression_ratio(self):
+        """
+        :return: The ratio of request body bytes sent to their size before compression, or ``None`` if none were sent.
+        """
+
+        return self.request_bytes / self.uncompressed_request_bytes if self.uncompressed_request_bytes else None
+
+    @property
+    def response_compression_ratio(self):
+        """
+        :return: The ratio of response body bytes received to their size after decompression, or ``None`` if none were
+            received.
+        """
+
+        return self.response_bytes / self.decoded_response_bytes if self.decoded_response_bytes else None
+
+    def to_dict(self):
+        """
+        :return: A dictionary of the counters, by name.
+        """
+
+        with self._lock:
+            return {field: getattr(self, field) for field in self.FIELDS}
+
+    def __str__(self):
+        return ", ".join("%s=%s" % item for item in sorted(self.to_dict().items()))
+
+
+class RetryStats(object):
+    """
+    Counts the requests an |ApiClient| retried, and why.  Every client has one, available as the ``retry_stats``
+    attribute of |TruStar| and |AsyncTruStar|.  Safe to update from any number of threads.
+
+    :ivar retries: The number of times a request was retried.
+    :ivar retries_by_reason: The number of retries by reason: a status code, e.g. ``"503"``, the name of an exception
+        class, e.g. ``"ConnectionError"``, or ``"expired_token"``.
+    :ivar retry_wait_time: The number of seconds spent waiting before retries.
+    :ivar gave_up: The number of requests that were retried but failed anyway.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """
+        Set every counter to zero.
+        """
+
+        with self._lock:
+            self.retries = 0
+            self.retries_by_reason = {}
+            self.retry_wait_time = 0
+            self.gave_up = 0
+
+    def record_retry(self, reason, wait_time=0):
+        """
+        :param str reason: Why the request is being retried.
+        :param float wait_time: The number of seconds waited before retrying.
+        """
+
+        with self._lock:
+            self.retries += 1
+            self.retries_by_reason[reason] = self.retries_by_reason.get(reason, 0) + 1
+            self.retry_wait_time += wait_time
+
+    def record_give_up(self):
+        """
+        Count a request that was retried but failed anyway.
+        """
+
+        with self._lock:
+            self.gave_up += 1
+
+    def to_dict(self):
+        """
+        :return: A dictionary of the counters, by name.
+        """
+
+        with self._lock:
+            return {'retries': self.retries, 'retries_by_reason': dict(self.retries_by_reason),
+                    'retry_wait_time': self.retry_wait_time, 'gave_up': self.gave_up}
+
+    def __str__(self):
+        return ", ".join("%s=%s" % item for item in sorted(self.to_dict().items()))
+
+
+class CoalescingStats(object):
+    """
+    Counts the ``GET`` requests an |ApiClient| coalesced with ``coalesce_requests`` enabled.  Every client has one,
+    available as the ``coalescing_stats`` attribute of |TruStar| and |AsyncTruStar|.  Safe to update from any number of
+    threads.
+
+    :ivar requests: The number of ``GET`` requests eligible for coalescing.
+    :ivar coalesced: The number of those that waited for an identical request already in flight, rather than being
+        sent.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """
+        Set every counter to zero.
+        """
+
+        with self._lock:
+            self.requests = 0
+            self.coalesced = 0
+
+    def record_request(self, coalesced):
+        """
+        :param bool coalesced: Whether the request waited for an identical request already in flight.
+        """
+
+        with self._lock:
+            self.requests += 1
+            if coalesced:
+                self.coalesced += 1
+
+    @property
+    def coalescing_ratio(self):
+        """
+        :return: The fraction of eligible requests that were coalesced, or ``None`` if there were none.
+        """
+
+        return self.coalesced / self.requests if self.requests else None
+
+    def to_dict(self):
+        """
+        :return: A dictionary of the counters, by name.
+        """
+
+        with self._lock:
+            return {'requests': self.requests, 'coalesced': self.coalesced}
+
+    def __str__(self):
+        return ", ".join("%s=%s" % item for item in sorted(self.to_dict().items()))
+
+
+# the collections of the API whose next path segment starts an ID or value, unless it is one of STATIC_SEGMENTS, and
+# the placeholder that replaces it in path templates
+PATH_PARAMETERS = {'reports': '{id}', 'indicators': '{value}', 'tags': '{tag_id}'}
+STATIC_SEGMENTS = frozenset(['search', 'correlate', 'correlated', 'tags', 'metadata', 'details', 'related',
+                             'community-trending'])
+
+# the sub-collections that may follow an ID or value, and the placeholder of the ID that may follow them, if any
+SUB_COLLECTIONS = {'tags': '{tag_id}', 'indicators': None}
+
+
+def get_path_template(path):
+    """
+    Replace the IDs and values in the path of a request with placeholders, so that requests to the same endpoint are
+    counted together, e.g. ``"reports/1a09f14b/tags"`` becomes ``"reports/{id}/tags"``.  Indicator values, such as
+    URLs, may contain slashes, so everything between a collection and the sub-collection at the end of the path, if
+    any, is replaced, e.g. ``"indicators/http://evil.com/a/tags"`` becomes ``"indicators/{value}/tags"``.
+
+    :param str path: The path of the request, i.e. the piece of the URL after the base URL.
+    :return: The path template.
+    """
+
+    segments = path.strip('/').split('/')
+    placeholder = PATH_PARAMETERS.get(segments[0])
+    if placeholder is None or len(segments) < 2 or segments[1] in STATIC_SEGMENTS:
+        return '/'.join(segments)
+
+    tail = []
+    if len(segments) > 3 and SUB_COLLECTIONS.get(segments[-2]) is not None:
+        tail = [segments[-2], SUB_COLLECTIONS[segments[-2]]]
+    elif len(segments) > 2 and segments[-1] in SUB_COLLECTIONS:
+        tail = [segments[-1]]
+    return '/'.join([segments[0], placeholder] + tail)
+
+
+class RequestMetrics(object):
+    """
+    The measurements of one call to an |ApiClient|'s ``request`` method, including every retry, passed to each
+    |MetricsSink| once the call completes.
+
+    :ivar method: The method of the request, e.g. ``"GET"``.
+    :ivar path: The path template of the request, e.g. ``"reports/{id}"``; see ``get_path_template``.
+    :ivar status_code: The status code of the last response, or ``None`` if no response was received.
+    :ivar error: The name of the class of the exception the call raised, if any, e.g. ``"HTTPError"``.
+    :ivar attempts: The number of times the request was sent.
+    :ivar total_time: The number of seconds the call took, including retries and waits.
+    :ivar connect_time: The number of seconds spent opening new connections, including DNS resolution and TLS
+        handshakes.  ``0`` when pooled connections were reused.
+    :ivar ttfb: The number of seconds from sending the last attempt to receiving its response headers.
+    :ivar request_bytes: The number of request body bytes sent, over every attempt.
+    :ivar response_bytes: The number of response body bytes received, over every attempt.
+    :ivar retry_wait_time: The number of seconds waited before retrying server and connection errors.
+    :ivar rate_limit_wait_time: The number of seconds waited before retrying requests rejected with a 429.
+    """
+
+    __slots__ = ('method', 'path', 'status_code', 'error', 'attempts', 'total_time', 'connect_time', 'ttfb',
+                 'request_bytes', 'response_bytes', 'retry_wait_time', 'rate_limit_wait_time')
+
+    def __init__(self, method, path):
+        self.method = method
+        self.path = path
+        self.status_code = None
+        self.error = None
+        self.attempts = 0
+        self.total_time = 0.0
+        self.connect_time = 0.0
+        self.ttfb = None
+        self.request_bytes = 0
+        self.response_bytes = 0
+        self.retry_wait_time = 0.0
+        self.rate_limit_wait_time = 0.0
+
+    @property
+    def retries(self):
+        """
+        :return: The number of times the request was retried.
+        """
+
+        return max(self.attempts - 1, 0)
+
+    def to_dict(self):
+        """
+        :return: A dictionary of the measurements, by name.
+        """
+
+        d = {name: getattr(self, name) for name in self.__slots__}
+        d['retries'] = self.retries
+        return d
+
+    def __repr__(self):
+        return "RequestMetrics(%s %s, status_code=%s, total_time=%.4f)" % (self.method, self.path, self.status_code,
+                                                                           self.total_time)
+
+
+class MetricsSink(object):
+    """
+    Base class for destinations of per-request |RequestMetrics|.  Pass a list of sinks as the ``metrics_sinks`` config
+    value to have every request measured; when the list is empty, nothing is measured.  A plain function in that list
+    is wrapped in a |CallbackSink|.
+
+    Subclasses override ``record``, which is called on the thread that made the request, so it must be quick and
+    thread-safe.  Exceptions it raises are logged and otherwise ignored.
+    """
+
+    def record(self, metrics):
+        """
+        :param metrics: The |RequestMetrics| of a completed request.
+        """
+
+        raise NotImplementedError()
+
+
+class CallbackSink(MetricsSink):
+    """
+    A |MetricsSink| that passes the |RequestMetrics| of each request to a function, e.g. to forward them to StatsD.
+    """
+
+    def __init__(self, callback):
+        """
+        :param callback: A function of one argument, the |RequestMetrics|.
+        """
+
+        self.callback = callback
+
+    def record(self, metrics):
+        self.callback(metrics)
+
+
+class _Histogram(object):
+    """
+    A cumulative histogram of observations, with the count and sum of every observation.
+    """
+
+    __slots__ = ('buckets', 'counts', 'count', 'sum')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+
+    def cumulative_counts(self):
+        total = 0
+        for count in self.counts:
+            total += count
+            yield total
+
+    def quantile(self, q):
+        """
+        :return: The upper bound of the bucket holding the ``q`` quantile, ``inf`` if it is above every bucket, or
+            ``None`` if nothing has been observed.
+        """
+
+        if not self.count:
+            return None
+        rank = q * self.count
+        for bound, cumulative in zip(self.buckets, self.cumulative_counts()):
+            if cumulative >= rank:
+                return bound
+        return float('inf')
+
+
+class _EndpointStats(object):
+    """
+    The aggregated |RequestMetrics| of one method and path template.
+    """
+
+    TIMINGS = ('total_time', 'connect_time', 'ttfb')
+
+    def __init__(self, buckets):
+        self.histograms = {timing: _Histogram(buckets) for timing in self.TIMINGS}
+        self.requests = 0
+        self.errors = 0
+        self.status_codes = {}
+        self.request_bytes = 0
+        self.response_bytes = 0
+        self.retries = 0
+        self.retry_wait_time = 0.0
+        self.rate_limit_wait_time = 0.0
+
+    def add(self, metrics):
+        self.requests += 1
+        if metrics.error is not None:
+            self.errors += 1
+        status = str(metrics.status_code) if metrics.status_code is not None else (metrics.error or 'None')
+        self.status_codes[status] = self.status_codes.get(status, 0) + 1
+        self.request_bytes += metrics.request_bytes
+        self.response_bytes += metrics.response_bytes
+        self.retries += metrics.retries
+        self.retry_wait_time += metrics.retry_wait_time
+        self.rate_limit_wait_time += metrics.rate_limit_wait_time
+        self.histograms['total_time'].observe(metrics.total_time)
+        self.histograms['connect_time'].observe(metrics.connect_time)
+        if metrics.ttfb is not None:
+            self.histograms['ttfb'].observe(metrics.ttfb)
+
+    def to_dict(self):
+        d = {
+            'requests': self.requests,
+            'errors': self.errors,
+            'status_codes': dict(self.status_codes),
+            'request_bytes': self.request_bytes,
+            'response_bytes': self.response_bytes,
+            'retries': self.retries,
+            'retry_wait_time': self.retry_wait_time,
+            'rate_limit_wait_time': self.rate_limit_wait_time
+        }
+        for timing, histogram in self.histograms.items():
+            d[timing] = {
+                'count': histogram.count,
+                'sum': histogram.sum,
+                'mean': histogram.sum / histogram.count if histogram.count else None,
+                'p50': histogram.quantile(0.5),
+                'p90': histogram.quantile(0.9),
+                'p99': histogram.quantile(0.99)
+            }
+        return d
+
+
+class HistogramSink(MetricsSink):
+    """
+    A |MetricsSink| that aggregates |RequestMetrics| in memory, per method and path template: latency histograms of the
+    total time, connect time and time to first byte, and counters of requests, errors, status codes, bytes, retries and
+    wait times.  Read them with ``get_stats``, or render them in the Prometheus text exposition format with
+    ``to_prometheus``, e.g. to serve from a ``/metrics`` endpoint.
+
+    Example:
+
+    >>> sink = HistogramSink()
+    >>> ts = TruStar(config_role="trustar", config={..., 'metrics_sinks': [sink]})
+    >>> reports = list(ts.get_reports())
+    >>> print(sink.get_stats()[('GET', 'reports')]['total_time']['p90'])
+    0.25
+    """
+
+    # bucket upper bounds, in seconds
+    DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        """
+        :param buckets: The upper bounds of the histogram buckets, in seconds, in increasing order.
+        """
+
+        self.buckets = tuple(buckets)
+        self._endpoints = {}
+        self._lock = threading.Lock()
+
+    def record(self, metrics):
+
+        key = (metrics.method, metrics.path)
+        with self._lock:
+            endpoint = self._endpoints.get(key)
+            if endpoint is None:
+                endpoint = self._endpoints[key] = _EndpointStats(self.buckets)
+            endpoint.add(metrics)
+
+    def reset(self):
+        """
+        Discard everything recorded.
+        """
+
+        with self._lock:
+            self._endpoints = {}
+
+    def get_stats(self):
+        """
+        :return: A dictionary of the aggregated measurements of each endpoint, by ``(method, path template)`` tuples.
+            Quantiles are the upper bounds of the buckets they fall in.
+        """
+
+        with self._lock:
+            return {key: endpoint.to_dict() for key, endpoint in self._endpoints.items()}
+
+    def to_prometheus(self, prefix="trustar_api"):
+        """
+        :param str prefix: The prefix of each metric name.
+        :return: The measurements in the Prometheus text exposition format.
+        """
+
+        counters = [('requests_total', 'requests', "Requests made."),
+                    ('errors_total', 'errors', "Requests that raised an exception."),
+                    ('request_bytes_total', 'request_bytes', "Request body bytes sent."),
+                    ('response_bytes_total', 'response_bytes', "Response body bytes received."),
+                    ('retries_total', 'retries', "Retries of failed requests."),
+                    ('retry_wait_seconds_total', 'retry_wait_time', "Seconds waited before retrying errors."),
+                    ('rate_limit_wait_seconds_total', 'rate_limit_wait_time', "Seconds waited after 429 responses.")]
+        histograms = [('request_duration_seconds', 'total_time', "Time taken by requests, including retries."),
+                      ('connect_duration_seconds', 'connect_time', "Time spent opening connections."),
+                      ('ttfb_seconds', 'ttfb', "Time from sending a request to receiving its response headers.")]
+
+        lines = []
+        with self._lock:
+            endpoints = sorted(self._endpoints.items())
+
+            for name, attribute, description in counters:
+                name = "%s_%s" % (prefix, name)
+                lines.append("# HELP %s %s" % (name, description))
+                lines.append("# TYPE %s counter" % name)
+                for (method, path), endpoint in endpoints:
+                    lines.append('%s{method="%s",path="%s"} %s' % (name, method, path, getattr(endpoint, attribute)))
+
+            name = "%s_responses_total" % prefix
+            lines.append("# HELP %s Responses by status code, or by exception if none was received." % name)
+            lines.append("# TYPE %s counter" % name)
+            for (method, path), endpoint in endpoints:
+                for status, count in sorted(endpoint.status_codes.items()):
+                    lines.append('%s{method="%s",path="%s",status="%s"} %d' % (name, method, path, status, count))
+
+            for name, timing, description in histograms:
+                name = "%s_%s" % (prefix, name)
+                lines.append("# HELP %s %s" % (name, description))
+                lines.append("# TYPE %s histogram" % name)
+                for (method, path), endpoint in endpoints:
+                    histogram = endpoint.histograms[timing]
+                    labels = 'method="%s",path="%s"' % (method, path)
+                    for bound, cumulative in zip(self.buckets, histogram.cumulative_counts()):
+                        lines.append('%s_bucket{%s,le="%s"} %d' % (name, labels, bound, cumulative))
+                    lines.append('%s_bucket{%s,le="+Inf"} %d' % (name, labels, histogram.count))
+                    lines.append('%s_sum{%s} %s' % (name, labels, histogram.sum))
+                    lines.append('%s_count{%s} %d' % (name, labels, histogram.count))
+
+        return "\n".join(lines) + "\n"
@@ -1,7 +1,11 @@
 from .enclave import Enclave, EnclavePermissions
 from .indicator import Indicator
-from .page import Page
+from .page import Page, StreamingPage
+from .column_batch import ColumnBatch
 from .report import Report
 from .tag import Tag
 from .request_quota import RequestQuota
+from .chunk_result import ChunkResult
+from .submission_result import SubmissionResult
+from .lazy import LazyModel, LazyIndicator, LazyReport
 from .enum import *
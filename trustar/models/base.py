@@ -7,12 +7,18 @@ from six import string_types
 # external imports
 import json
 
+# package imports
+from ..codec import get_codec
+
 
 class ModelBase(object):
     """
     This is the base class for all models.
     """
 
+    # subclasses may declare their attributes in __slots__ to avoid a per-instance __dict__
+    __slots__ = ()
+
     def to_dict(self, remove_nones=False):
         """
         Creates a dictionary representation of the object.
@@ -34,6 +40,29 @@ class ModelBase(object):
         """
         raise NotImplementedError()
 
+    def to_json(self, remove_nones=False, codec=None):
+        """
+        Creates a JSON representation of the object.
+
+        :param remove_nones: Whether ``None`` values should be filtered out.  Defaults to ``False``.
+        :param codec: The |JsonCodec|, or the name of one, to encode with (see |get_codec|).
+        :return: The JSON representation.
+        """
+
+        return get_codec(codec).dumps(self.to_dict(remove_nones=remove_nones))
+
+    @classmethod
+    def from_json(cls, data, codec=None):
+        """
+        Creates an instance of the class from a JSON representation.
+
+        :param data: The JSON representation, as ``str`` or UTF-8 encoded ``bytes``.
+        :param codec: The |JsonCodec|, or the name of one, to decode with (see |get_codec|).
+        :return: The instance.
+        """
+
+        return cls.from_dict(get_codec(codec).loads(data))
+
     def __str__(self):
         """
         :return: A json representation of the object.
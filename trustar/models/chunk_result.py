@@ -0,0 +1,66 @@
+# python 2 backwards compatibility
+from __future__ import print_function
+from builtins import object, super
+from future import standard_library
+from six import string_types
+
+from .base import ModelBase
+
+
+class ChunkResult(ModelBase):
+    """
+    Models the outcome of submitting one chunk of a bulk submission.
+
+    :ivar index: The position of the chunk within the submission, starting at 0.
+    :ivar start: The position of the chunk's first item within the submitted items.
+    :ivar count: The number of items in the chunk.
+    :ivar num_bytes: The size of the chunk's encoded request body.
+    :ivar attempts: The number of times the chunk was sent.
+    :ivar error: A description of the error that caused the chunk to fail, or ``None`` if it succeeded.
+    :ivar items: The items in the chunk, so that a failed chunk can be re-submitted on its own.
+    """
+
+    def __init__(self, index, start, count, num_bytes=None, attempts=0, error=None, items=None):
+
+        self.index = index
+        self.start = start
+        self.count = count
+        self.num_bytes = num_bytes
+        self.attempts = attempts
+        self.error = error
+        self.items = items
+
+    @property
+    def succeeded(self):
+        """
+        :return: ``True`` if the chunk was submitted successfully.
+        """
+
+        return self.error is None
+
+    def to_dict(self, remove_nones=False):
+
+        if remove_nones:
+            return super().to_dict(remove_nones=True)
+
+        return {
+            'index': self.index,
+            'start': self.start,
+            'count': self.count,
+            'numBytes': self.num_bytes,
+            'attempts': self.attempts,
+            'error': self.error
+        }
+
+    @classmethod
+    def from_dict(cls, d):
+
+        if d is None:
+            return None
+
+        return ChunkResult(index=d.get('index'),
+                           start=d.get('start'),
+                           count=d.get('count'),
+                           num_bytes=d.get('numBytes'),
+                           attempts=d.get('attempts'),
+                           error=d.get('error'))
@@ -0,0 +1,136 @@
+# python 2 backwards compatibility
+from __future__ import print_function
+from builtins import object, super, zip
+from future import standard_library
+
+# external imports
+from collections import OrderedDict
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from .base import ModelBase
+
+
+class ColumnBatch(ModelBase):
+    """
+    Models the items of a |Page| decoded column by column, rather than into one model object per item.  Useful for
+    bulk exports that would otherwise build model objects only to flatten them back into rows.
+
+    Columns are named after the fields of the API response, i.e. ``value``, ``indicatorType``, ``firstSeen``, and
+    hold one entry per item, with ``None`` where an item lacks the field.  Nested fields, such as ``tags``, are left as
+    raw dictionaries.
+
+    Example:
+
+    >>> for batch in ts.get_indicator_columns(columns=['value', 'indicatorType'], page_size=1000):
+    >>>     writer.writerows(batch)
+
+    :ivar columns: An ordered dictionary of the columns, each a list (or NumPy array), by field name.
+    """
+
+    __slots__ = ('columns',)
+
+    def __init__(self, columns=None):
+        self.columns = columns if columns is not None else OrderedDict()
+
+    @classmethod
+    def from_items(cls, items, columns=None, use_numpy=False):
+        """
+        Decode a list of raw item dictionaries into columns.
+
+        :param list(dict) items: The items.
+        :param list(str) columns: The names of the fields to decode.  Defaults to every field found in the items, in
+            order of first appearance.
+        :param bool use_numpy: Whether to return the columns as NumPy arrays rather than lists.  Requires the
+            ``numpy`` package.
+        :return: The |ColumnBatch|.
+        """
+
+        if use_numpy and numpy is None:
+            raise ImportError("Decoding columns into NumPy arrays requires the 'numpy' package.  "
+                              "Install it with 'pip install trustar[numpy]'.")
+
+        if columns is None:
+            names = OrderedDict()
+            for item in items:
+                for name in item:
+                    names[name] = True
+            columns = list(names)
+
+        # one pass over the items per column keeps each pass a tight loop
+        result = OrderedDict((name, [item.get(name) for item in items]) for name in columns)
+
+        if use_numpy:
+            for name, column in result.items():
+                result[name] = cls._to_array(column)
+
+        return cls(columns=result)
+
+    @staticmethod
+    def _to_array(column):
+        """
+        :return: A NumPy array of the entries of a column.
+        """
+
+        first = next((entry for entry in column if entry is not None), None)
+        if isinstance(first, (dict, list)):
+            # nested lists would otherwise become extra dimensions of the array
+            array = numpy.empty(len(column), dtype=object)
+            for i, entry in enumerate(column):
+                array[i] = entry
+            return array
+
+        # missing entries would otherwise be coerced to the string "None" in a column of strings
+        if None in column:
+            return numpy.array(column, dtype=object)
+
+        return numpy.array(column)
+
+    @property
+    def names(self):
+        """
+        :return: The names of the columns, in order.
+        """
+
+        return list(self.columns)
+
+    def __len__(self):
+        for column in self.columns.values():
+            return len(column)
+        return 0
+
+    def __getitem__(self, name):
+        """
+        :param str name: The name of a column.
+        :return: The column.
+        """
+
+        return self.columns[name]
+
+    def __iter__(self):
+        """
+        :return: An iterator over the rows, each a tuple of the entries of every column, in order.
+        """
+
+        return zip(*self.columns.values())
+
+    def to_dict(self, remove_nones=False):
+        """
+        Creates a dictionary of the columns, each as a list.
+
+        :param remove_nones: Ignored; columns keep ``None`` entries so that they stay aligned.
+        :return: The dictionary representation.
+        """
+
+        return OrderedDict((name, list(column)) for name, column in self.columns.items())
+
+    @classmethod
+    def from_dict(cls, d):
+
+        if d is None:
+            return None
+
+        return ColumnBatch(columns=OrderedDict((name, list(column)) for name, column in d.items()))
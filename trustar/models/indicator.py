@@ -34,6 +34,9 @@ class Indicator(ModelBase):
 
     TYPES = IndicatorType.values()
 
+    __slots__ = ('value', 'type', 'priority_level', 'correlation_count', 'whitelisted', 'weight', 'reason',
+                 'first_seen', 'last_seen', 'sightings', 'source', 'notes', 'tags', 'enclave_ids')
+
     def __init__(self,
                  value,
                  type=None,
@@ -0,0 +1,173 @@
+# python 2 backwards compatibility
+from __future__ import print_function
+from builtins import object, super
+from future import standard_library
+from six import string_types
+
+from ..utils import normalize_timestamp
+from .enum import DistributionType
+from .indicator import Indicator
+from .report import Report
+from .tag import Tag
+
+
+class LazyModel(object):
+    """
+    A mixin for model classes that wrap a raw response dictionary and decode each attribute only when it is first
+    read, caching the result.  This saves the cost of decoding attributes that are never read, such as the nested tags
+    of an indicator or the timestamps of a report, when a caller only reads ``id`` or ``value``.
+
+    Until an attribute is assigned, ``to_dict`` returns a copy of the raw dictionary rather than re-encoding every
+    attribute.  Changes made in place to nested objects decoded into new model objects, such as |Tag| objects, cannot
+    be detected, so reading those attributes also disables this fast path.
+
+    Subclasses set ``_DECODERS`` and ``_DETACHED_FIELDS``, and declare the ``_raw`` and ``_dirty`` slots.
+    """
+
+    __slots__ = ()
+
+    # functions that decode each attribute from the raw dictionary, by attribute name
+    _DECODERS = {}
+
+    # attributes whose decoded values are new mutable objects, rather than parts of the raw dictionary
+    _DETACHED_FIELDS = ()
+
+    def __init__(self, raw):
+        """
+        :param dict raw: The raw response dictionary.
+        """
+
+        object.__setattr__(self, '_raw', raw)
+        object.__setattr__(self, '_dirty', False)
+
+    def __getattr__(self, name):
+        # only called for attributes that have not been set yet, i.e. that have not been decoded
+        decode = type(self)._DECODERS.get(name)
+        if decode is None:
+            raise AttributeError("'%s' object has no attribute '%s'" % (type(self).__name__, name))
+
+        value = decode(self._raw)
+        object.__setattr__(self, name, value)
+        if name in self._DETACHED_FIELDS:
+            object.__setattr__(self, '_dirty', True)
+        return value
+
+    def __setattr__(self, name, value):
+        if name in self._DECODERS:
+            object.__setattr__(self, '_dirty', True)
+        object.__setattr__(self, name, value)
+
+    def __getstate__(self):
+        # include only the attributes that have been decoded or assigned, since reading the others would decode them
+        state = {'_raw': self._raw, '_dirty': self._dirty}
+        for name in self._DECODERS:
+            try:
+                state[name] = object.__getattribute__(self, name)
+            except AttributeError:
+                pass
+        return state
+
+    def __setstate__(self, state):
+        for name, value in state.items():
+            object.__setattr__(self, name, value)
+
+    @classmethod
+    def from_dict(cls, d):
+        """
+        Wrap a raw response dictionary, without decoding it.
+
+        :param dict d: The dictionary.
+        :return: The lazy model object.
+        """
+
+        if d is None:
+            return None
+
+        return cls(d)
+
+    def to_dict(self, remove_nones=False):
+        """
+        Creates a dictionary representation of the object.  If no attribute has been changed, this is a copy of the
+        raw dictionary the object was created from.
+
+        :param remove_nones: Whether ``None`` values should be filtered out of the dictionary.  Defaults to ``False``.
+        :return: The dictionary representation.
+        """
+
+        if not self._dirty:
+            if remove_nones:
+                return {k: v for k, v in self._raw.items() if v is not None}
+            return dict(self._raw)
+
+        return super().to_dict(remove_nones=remove_nones)
+
+
+def _get_tags(indicator):
+    tags = indicator.get('tags')
+    if tags is not None:
+        tags = [Tag.from_dict(tag) for tag in tags]
+    return tags
+
+
+class LazyIndicator(LazyModel, Indicator):
+    """
+    An |Indicator| that decodes its attributes from the raw response dictionary on first access; see |LazyModel|.
+    Set the ``lazy_models`` config value to have the client return these instead of |Indicator| objects.
+    """
+
+    __slots__ = ('_raw', '_dirty')
+
+    _DECODERS = {
+        'value': lambda d: d.get('value'),
+        'type': lambda d: d.get('indicatorType'),
+        'priority_level': lambda d: d.get('priorityLevel'),
+        'correlation_count': lambda d: d.get('correlationCount'),
+        'whitelisted': lambda d: d.get('whitelisted'),
+        'weight': lambda d: d.get('weight'),
+        'reason': lambda d: d.get('reason'),
+        'first_seen': lambda d: d.get('firstSeen'),
+        'last_seen': lambda d: d.get('lastSeen'),
+        'sightings': lambda d: d.get('sightings'),
+        'source': lambda d: d.get('source'),
+        'notes': lambda d: d.get('notes'),
+        'tags': _get_tags,
+        'enclave_ids': lambda d: d.get('enclaveIds'),
+    }
+
+    _DETACHED_FIELDS = ('tags',)
+
+
+def _is_enclave(report):
+    distribution_type = report.get('distributionType')
+    if distribution_type is None:
+        return True
+    return distribution_type.upper() != DistributionType.COMMUNITY
+
+
+def _get_enclave_ids(report):
+    enclave_ids = report.get('enclaveIds')
+    if isinstance(enclave_ids, string_types):
+        enclave_ids = [enclave_ids]
+    return enclave_ids
+
+
+class LazyReport(LazyModel, Report):
+    """
+    A |Report| that decodes its attributes from the raw response dictionary on first access; see |LazyModel|.
+    Set the ``lazy_models`` config value to have the client return these instead of |Report| objects.
+    """
+
+    __slots__ = ('_raw', '_dirty')
+
+    _DECODERS = {
+        'id': lambda d: d.get('id'),
+        'title': lambda d: d.get('title'),
+        'body': lambda d: d.get('reportBody'),
+        'time_began': lambda d: normalize_timestamp(d.get('timeBegan')),
+        'external_id': lambda d: d.get('externalTrackingId'),
+        'external_url': lambda d: d.get('externalUrl'),
+        'is_enclave': _is_enclave,
+        'enclave_ids': _get_enclave_ids,
+        'created': lambda d: d.get('created'),
+        'updated': lambda d: d.get('updated'),
+    }
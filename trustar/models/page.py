@@ -5,11 +5,17 @@ from future import standard_library
 
 # package imports
 from .base import ModelBase
-from ..utils import get_time_based_page_generator
+from .column_batch import ColumnBatch
+from ..json_stream import iter_page_items
+from ..utils import get_time_based_page_generator, parallel_map
 
 # external imports
+from collections import deque
 import math
 
+# marks the end of a |StreamingPage|'s items, since an item may itself be null
+_END = object()
+
 
 class Page(ModelBase):
     """
@@ -17,7 +23,8 @@ class Page(ModelBase):
     pagination.  Not all paginated endpoints will use ``page_number``.  For instance, the |get_reports_page| method
     requires pagination to be performed by continuously adjusting the ``from`` and ``to`` parameters.
 
-    :ivar items: The list of items of the page; i.e. a list of indicators, reports, etc.
+    :ivar items: The list of items of the page; i.e. a list of indicators, reports, etc.  If the page was decoded in
+        columnar mode, a |ColumnBatch| instead.
     :ivar page_number: The number of the page out of all total pages, indexed from 0.  i.e. if there are
         4 total pages of size 25, then page 0 will contain the first 25 elements, page 1 will contain the next 25, etc.
     :ivar page_size: The size of the page that was request.  Note that, if this is the last page, then this might
@@ -27,6 +34,8 @@ class Page(ModelBase):
         pages.  Note that it is possible for this value to change between pages, since data can change between queries.
     """
 
+    __slots__ = ('items', 'page_number', 'page_size', 'total_elements', 'has_next')
+
     def __init__(self, items=None, page_number=None, page_size=None, total_elements=None, has_next=None):
         self.items = items
         self.page_number = page_number
@@ -64,13 +73,17 @@ class Page(ModelBase):
         return len(self.items)
 
     @staticmethod
-    def from_dict(page, content_type=None):
+    def from_dict(page, content_type=None, columnar=False, columns=None, use_numpy=False):
         """
         Create a |Page| object from a dictionary.  This method is intended for internal use, to construct a
         |Page| object from the body of a response json from a paginated endpoint.
 
         :param page: The dictionary.
         :param content_type: The class that the contents should be deserialized into.
+        :param bool columnar: If ``True``, the items are decoded into a |ColumnBatch| instead, and ``content_type`` is
+            ignored.
+        :param list(str) columns: In columnar mode, the names of the fields to decode (defaults to all fields).
+        :param bool use_numpy: In columnar mode, whether to decode the columns into NumPy arrays.
         :return: The resulting |Page| object.
         """
 
@@ -80,7 +93,9 @@ class Page(ModelBase):
                       total_elements=page.get('totalElements'),
                       has_next=page.get('hasNext'))
 
-        if content_type is not None:
+        if columnar:
+            result.items = ColumnBatch.from_items(result.items or [], columns=columns, use_numpy=use_numpy)
+        elif content_type is not None:
             if not issubclass(content_type, ModelBase):
                 raise ValueError("'content_type' must be a subclass of ModelBase.")
 
@@ -98,12 +113,15 @@ class Page(ModelBase):
 
         items = []
 
-        # attempt to replace each item with its dictionary representation if possible
-        for item in self.items:
-            if hasattr(item, 'to_dict'):
-                items.append(item.to_dict(remove_nones=remove_nones))
-            else:
-                items.append(item)
+        if isinstance(self.items, ColumnBatch):
+            items = self.items.to_dict()
+        else:
+            # attempt to replace each item with its dictionary representation if possible
+            for item in self.items:
+                if hasattr(item, 'to_dict'):
+                    items.append(item.to_dict(remove_nones=remove_nones))
+                else:
+                    items.append(item)
 
         return {
             'items': items,
@@ -114,14 +132,26 @@ class Page(ModelBase):
         }
 
     @staticmethod
-    def get_page_generator(func, start_page=0, page_size=None):
+    def get_page_generator(func, start_page=0, page_size=None, max_workers=None, read_ahead=None, checkpoint=None,
+                           resume_from=None):
         """
         Constructs a generator for retrieving pages from a paginated endpoint.  This method is intended for internal
         use.
 
+        If ``max_workers`` is greater than 1, then once the first page reveals the total number of pages, the remaining
+        pages are fetched concurrently on that many threads, up to ``read_ahead`` pages ahead of the consumer.  Pages
+        are still generated in order.
+
         :param func: Should take parameters ``page_number`` and ``page_size`` and return the corresponding |Page| object.
         :param start_page: The page to start on.
         :param page_size: The size of each page.
+        :param int max_workers: The number of pages to fetch concurrently.  By default, pages are fetched one at a time.
+        :param int read_ahead: The maximum number of pages fetched ahead of the consumer.  Defaults to
+            ``2 * max_workers``.
+        :param checkpoint: A |Checkpoint| to save the cursor to after each page, i.e. ``{"page_number": ...}`` with the
+            number of the next page.
+        :param dict resume_from: A cursor saved by a previous generator.  If given, ``start_page`` is ignored, and the
+            generator continues where the previous one left off.
         :return: A generator that generates each successive page.
         """
 
@@ -129,6 +159,43 @@ class Page(ModelBase):
         page_number = start_page
         more_pages = True
 
+        if resume_from is not None:
+            page_number = resume_from['page_number']
+            more_pages = not resume_from.get('done')
+
+        def save(done=False):
+            if checkpoint is not None:
+                cursor = {'page_number': page_number}
+                if done:
+                    cursor['done'] = True
+                checkpoint.save(cursor)
+
+        if more_pages and max_workers is not None and max_workers > 1:
+
+            # the first page reveals how many pages there are
+            page = func(page_number=page_number, page_size=page_size)
+            yield page
+            more_pages = page.has_more_pages()
+            page_number += 1
+            total_pages = page.get_total_pages()
+            if more_pages:
+                save()
+
+            if more_pages and total_pages is not None:
+
+                def get_page(number):
+                    return func(page_number=number, page_size=page_size)
+
+                for page in parallel_map(get_page, range(page_number, int(total_pages)),
+                                         max_workers=max_workers, read_ahead=read_ahead):
+                    yield page
+                    page_number += 1
+                    save()
+
+                # elements may have been added since the first page was fetched; pick up any stragglers serially
+                more_pages = page.has_more_pages()
+                page_number = int(total_pages)
+
         # continuously request the next page as long as more pages exist
         while more_pages:
 
@@ -140,13 +207,20 @@ class Page(ModelBase):
             # determine whether more pages exist
             more_pages = page.has_more_pages()
             page_number += 1
+            if more_pages:
+                save()
+
+        save(done=True)
 
     @staticmethod
-    def get_time_based_page_generator(get_page, get_next_to_time, from_time=None, to_time=None):
+    def get_time_based_page_generator(get_page, get_next_to_time, from_time=None, to_time=None, checkpoint=None,
+                                      resume_from=None):
         return get_time_based_page_generator(get_page=get_page,
                                              get_next_to_time=lambda page: get_next_to_time(page.items),
                                              from_time=from_time,
-                                             to_time=to_time)
+                                             to_time=to_time,
+                                             checkpoint=checkpoint,
+                                             resume_from=resume_from)
 
     @classmethod
     def get_generator(cls, page_generator):
@@ -164,8 +238,132 @@ class Page(ModelBase):
             for item in page.items:
                 yield item
 
+    @classmethod
+    def get_column_generator(cls, page_generator):
+        """
+        The columnar counterpart of ``get_generator``: gets a generator of the |ColumnBatch| of each page from a
+        paginated endpoint, for pages decoded in columnar mode.  This method is intended for internal use.
+
+        :param page_generator: A generator to be used to generate each successive |Page|.
+        :return: A generator that generates the |ColumnBatch| of each successive page.
+        """
+
+        for page in page_generator:
+            yield page.items
+
     def __iter__(self):
         return self.items.__iter__()
 
     def __getitem__(self, item):
         return self.items[item]
+
+
+class StreamingPage(Page):
+    """
+    A |Page| whose items are decoded from the response stream as they are iterated over, rather than all at once when
+    the page is created, so that only one item at a time is held in memory rather than the whole page.  The items can
+    be iterated over only once.
+
+    The ``page_number``, ``page_size``, ``total_elements`` and ``has_next`` attributes are set as soon as they are
+    parsed.  If the server sends them after the items, reading them with ``get_total_pages`` or ``has_more_pages``
+    before the items have been iterated over reads the rest of the response, holding the remaining items in memory.
+    """
+
+    __slots__ = ('_content_type', '_raw_items', '_buffer', '_complete')
+
+    # the attributes set from each top-level field of the response
+    FIELDS = {
+        'pageNumber': 'page_number',
+        'pageSize': 'page_size',
+        'totalElements': 'total_elements',
+        'hasNext': 'has_next'
+    }
+
+    def __init__(self, response, content_type=None):
+        """
+        :param response: A response object, requested with ``stream=True``.
+        :param content_type: The class that the contents should be deserialized into.
+        """
+
+        super().__init__()
+        if content_type is not None and not issubclass(content_type, ModelBase):
+            raise ValueError("'content_type' must be a subclass of ModelBase.")
+
+        self._content_type = content_type
+        self._buffer = deque()
+        self._complete = False
+        self._raw_items = self._read_items(response)
+        self.items = self._get_items()
+
+    @classmethod
+    def from_response(cls, response, content_type=None):
+        """
+        Create a |StreamingPage| from a response.  This method is intended for internal use.
+
+        :param response: A response object, requested with ``stream=True``.
+        :param content_type: The class that the contents should be deserialized into.
+        :return: The resulting |StreamingPage| object.
+        """
+
+        return cls(response, content_type=content_type)
+
+    def _set_field(self, name, value):
+        attribute = self.FIELDS.get(name)
+        if attribute is not None:
+            setattr(self, attribute, value)
+
+    def _read_items(self, response):
+        """
+        :return: A generator of the raw items of the response, which closes the response once it is exhausted.
+        """
+
+        try:
+            # decompress the body if the server compressed it
+            response.raw.decode_content = True
+            for item in iter_page_items(response.raw, set_field=self._set_field):
+                yield item
+        finally:
+            self._complete = True
+            response.close()
+
+    def _get_items(self):
+        content_type = self._content_type
+        while True:
+            if self._buffer:
+                item = self._buffer.popleft()
+            else:
+                item = next(self._raw_items, _END)
+                if item is _END:
+                    return
+            yield content_type.from_dict(item) if content_type is not None else item
+
+    def _read_rest(self):
+        """
+        Read the rest of the response, holding any items that have not been iterated over yet in memory.
+        """
+
+        if not self._complete:
+            self._buffer.extend(self._raw_items)
+
+    def get_total_pages(self):
+
+        if self.total_elements is None or self.page_size is None:
+            self._read_rest()
+        return super().get_total_pages()
+
+    def has_more_pages(self):
+
+        if self.has_next is None:
+            self._read_rest()
+        return super().has_more_pages()
+
+    def __bool__(self):
+        return True
+
+    __nonzero__ = __bool__
+
+    def __len__(self):
+        raise TypeError("The number of items of a StreamingPage is not known until they have been read.")
+
+    def __getitem__(self, item):
+        raise TypeError("The items of a StreamingPage can only be iterated over.")
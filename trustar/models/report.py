@@ -32,6 +32,9 @@ class Report(ModelBase):
     DISTRIBUTION_TYPE_ENCLAVE = DistributionType.ENCLAVE
     DISTRIBUTION_TYPE_COMMUNITY = DistributionType.COMMUNITY
 
+    __slots__ = ('id', 'title', 'body', 'time_began', 'external_id', 'external_url', 'is_enclave', 'enclave_ids',
+                 'created', 'updated')
+
     def __init__(self,
                  id=None,
                  title=None,
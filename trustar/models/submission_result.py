@@ -0,0 +1,66 @@
+# python 2 backwards compatibility
+from __future__ import print_function
+from builtins import object, super
+from future import standard_library
+from six import string_types
+
+from .base import ModelBase
+from .report import Report
+
+
+class SubmissionResult(ModelBase):
+    """
+    Models the outcome of submitting one report of a bulk submission.
+
+    :ivar index: The position of the report within the submitted reports, starting at 0.
+    :ivar report: The |Report| object submitted, with its ``id`` field set if the submission succeeded.
+    :ivar attempts: The number of attempts made to submit the report.
+    :ivar error: A description of the error that caused the submission to fail, or ``None`` if it succeeded.
+    """
+
+    def __init__(self, index, report=None, attempts=0, error=None):
+
+        self.index = index
+        self.report = report
+        self.attempts = attempts
+        self.error = error
+
+    @property
+    def succeeded(self):
+        """
+        :return: ``True`` if the report was submitted successfully.
+        """
+
+        return self.error is None
+
+    @property
+    def id(self):
+        """
+        :return: The ID TruSTAR assigned to the report, or ``None`` if the submission failed.
+        """
+
+        return self.report.id if self.succeeded and self.report is not None else None
+
+    def to_dict(self, remove_nones=False):
+
+        if remove_nones:
+            return super().to_dict(remove_nones=True)
+
+        return {
+            'index': self.index,
+            'id': self.id,
+            'externalTrackingId': self.report.external_id if self.report is not None else None,
+            'attempts': self.attempts,
+            'error': self.error
+        }
+
+    @classmethod
+    def from_dict(cls, d):
+
+        if d is None:
+            return None
+
+        return SubmissionResult(index=d.get('index'),
+                                report=Report(id=d.get('id'), external_id=d.get('externalTrackingId')),
+                                attempts=d.get('attempts'),
+                                error=d.get('error'))
@@ -17,6 +17,8 @@ class Tag(ModelBase):
     :ivar enclave_id: The :class:`Enclave` object representing the enclave that the tag belongs to.
     """
 
+    __slots__ = ('name', 'id', 'enclave_id')
+
     def __init__(self, name, id=None, enclave_id=None):
         """
         Constructs a tag object.
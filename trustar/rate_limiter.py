@@ -0,0 +1,257 @@
+# python 2 backwards compatibility
+from __future__ import print_function, division
+from builtins import object
+from future import standard_library
+
+# external imports
+import logging
+import threading
+import time
+
+# python 2 backwards compatibility
+standard_library.install_aliases()
+
+logger = logging.getLogger(__name__)
+
+
+class _TokenBucket(object):
+    """
+    A token bucket modelling a single |RequestQuota|.  Not thread-safe; guarded by the owning |RateLimiter|.
+
+    If the time at which the quota's window next resets is known, the bucket refills all at once at that time, and at
+    the end of every window after it, as the server's counter does.  Otherwise it refills continuously.
+    """
+
+    def __init__(self, capacity, rate, tokens, reset_time=None, window=None):
+        self.capacity = float(capacity)
+        self.rate = float(rate)
+        self.tokens = min(float(tokens), self.capacity)
+        self.timestamp = time.time()
+        self.reset_time = reset_time
+        self.window = window
+
+    def refill(self, now):
+        if self.reset_time is not None:
+            if now >= self.reset_time:
+                self.tokens = self.capacity
+                self.reset_time += self.window * (1 + (now - self.reset_time) // self.window)
+            return
+
+        # the timestamp may be in the future while the bucket is paused
+        self.tokens = min(self.capacity, self.tokens + max(0, now - self.timestamp) * self.rate)
+        self.timestamp = max(self.timestamp, now)
+
+    def get_wait_time(self, now):
+        """
+        :return: The number of seconds until a token will be available.
+        """
+
+        if self.tokens >= 1:
+            return 0
+        if self.reset_time is not None:
+            return self.reset_time - now
+        return (1 - self.tokens) / self.rate
+
+
+class RateLimiter(object):
+    """
+    A thread-safe token-bucket rate limiter that paces outgoing requests so that they stay within the request quotas of
+    the user's company, rather than discovering the limit by receiving a 429 response.
+
+    There is one bucket per |RequestQuota|.  Each bucket holds up to ``max_requests`` tokens, and is seeded with the
+    requests remaining in the current window.  Like the server's counter, it refills completely at the quota's
+    ``next_reset_time`` and every ``time_window`` after that; quotas without a ``next_reset_time`` refill continuously at
+    a rate of ``max_requests`` per ``time_window`` instead.  A request is sent only once every bucket has a token.
+    Buckets are re-seeded from the server's counters every ``sync_interval`` seconds, which corrects for requests made
+    by other processes.  Until they are first seeded, requests wait for the sync.
+
+    A single instance may be shared by any number of threads and |TruStar| instances; use |RateLimiter|'s
+    ``get_shared`` method, or the ``rate_limit`` config option, to share one instance per API key within a process.
+
+    :ivar sync_interval: The number of seconds between re-syncs with the server's counters.
+    """
+
+    _shared = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(self, sync_interval=60):
+        self.sync_interval = sync_interval
+        self._buckets = {}
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._last_sync_time = None
+        self._paused_until = 0
+
+    @classmethod
+    def get_shared(cls, key, sync_interval=60):
+        """
+        Get the rate limiter shared by all clients within this process that use the same key, creating it if necessary.
+
+        :param key: Identifies the quota being limited, i.e. the API key.
+        :param int sync_interval: The sync interval to use if the rate limiter is created.
+        :return: The |RateLimiter|.
+        """
+
+        with cls._shared_lock:
+            rate_limiter = cls._shared.get(key)
+            if rate_limiter is None:
+                rate_limiter = cls(sync_interval=sync_interval)
+                cls._shared[key] = rate_limiter
+            return rate_limiter
+
+    @property
+    def synced(self):
+        """
+        :return: ``True`` once the buckets have been seeded from the server's counters, or a first attempt to do so has
+            failed.
+        """
+
+        return self._last_sync_time is not None
+
+    def update(self, quotas):
+        """
+        Re-seed the buckets from the server's request quota counters.
+
+        :param quotas: A list of |RequestQuota| objects, as returned by |get_request_quotas|.
+        """
+
+        now = time.time()
+        buckets = {}
+        for quota in quotas:
+            if not quota.max_requests or not quota.time_window:
+                continue
+            window = quota.time_window / 1000.0
+            reset_time = quota.next_reset_time / 1000.0 if quota.next_reset_time else None
+            # a reset time that has already passed means the counters are from the previous window
+            tokens = quota.max_requests if reset_time is not None and reset_time <= now \
+                else quota.max_requests - (quota.used_requests or 0)
+            buckets[quota.guid] = _TokenBucket(capacity=quota.max_requests,
+                                               rate=quota.max_requests / window,
+                                               tokens=tokens,
+                                               reset_time=reset_time,
+                                               window=window)
+
+        with self._lock:
+            for guid, bucket in buckets.items():
+                # requests still in flight may not have been counted by the server yet
+                previous = self._buckets.get(guid)
+                if previous is not None and bucket.reset_time is not None and previous.reset_time == bucket.reset_time:
+                    bucket.tokens = min(bucket.tokens, previous.tokens)
+            self._buckets = buckets
+            self._last_sync_time = now
+
+    def sync(self, get_quotas):
+        """
+        Re-seed the buckets using ``get_quotas`` if ``sync_interval`` seconds have passed since the last sync.  If
+        another thread is already syncing, returns immediately rather than waiting, unless the buckets have never been
+        seeded.  A failed sync is logged, and the current buckets stay in effect.
+
+        :param get_quotas: A function that returns a list of |RequestQuota| objects.
+        """
+
+        if not self.begin_sync(blocking=not self.synced):
+            return
+
+        quotas = None
+        try:
+            quotas = get_quotas()
+        except Exception as e:
+            logger.warning("Unable to sync rate limiter with request quotas: %s", e)
+        finally:
+            self.end_sync(quotas)
+
+    def begin_sync(self, blocking=False):
+        """
+        Claim the sync, for callers that fetch the request quotas themselves rather than through ``sync``, such as
+        coroutines.  A caller that claims the sync must call ``end_sync`` afterwards.
+
+        :param bool blocking: Whether to wait for another thread that is already syncing, rather than returning.
+        :return: ``True`` if the caller claimed the sync, or ``False`` if no sync is due or another thread is syncing.
+        """
+
+        if not self._needs_sync():
+            return False
+
+        if not self._sync_lock.acquire(blocking):
+            return False
+
+        # another thread may have finished syncing while this one was checking
+        if not self._needs_sync():
+            self._sync_lock.release()
+            return False
+        return True
+
+    def end_sync(self, quotas):
+        """
+        Finish a sync claimed with ``begin_sync``.
+
+        :param quotas: A list of |RequestQuota| objects, or ``None`` if they could not be fetched, in which case the
+            current buckets stay in effect until the next sync is due.
+        """
+
+        try:
+            if quotas is not None:
+                self.update(quotas)
+            else:
+                with self._lock:
+                    self._last_sync_time = time.time()
+        finally:
+            self._sync_lock.release()
+
+    def _needs_sync(self):
+        last_sync_time = self._last_sync_time
+        return last_sync_time is None or time.time() - last_sync_time >= self.sync_interval
+
+    def pause(self, seconds):
+        """
+        Block all requests for the given number of seconds, i.e. after the server has responded with a 429.
+
+        :param seconds: The number of seconds to wait.
+        """
+
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.time() + seconds)
+            for bucket in self._buckets.values():
+                # buckets that refill at the server's reset time already wait for it
+                if bucket.reset_time is None:
+                    bucket.tokens = min(bucket.tokens, 0)
+                    bucket.timestamp = max(bucket.timestamp, self._paused_until)
+
+    def try_acquire(self):
+        """
+        Consume a token from every bucket if a request may be sent now.  Callers that must not block, such as
+        coroutines, wait for the returned number of seconds themselves and try again.
+
+        :return: ``0`` if the tokens were consumed, or else the number of seconds until a request may be sent.
+        """
+
+        with self._lock:
+            now = time.time()
+            wait_time = self._paused_until - now
+            if wait_time > 0:
+                return wait_time
+
+            for bucket in self._buckets.values():
+                bucket.refill(now)
+            wait_time = max([bucket.get_wait_time(now) for bucket in self._buckets.values()] or [0])
+            if wait_time > 0:
+                return wait_time
+
+            for bucket in self._buckets.values():
+                bucket.tokens -= 1
+            return 0
+
+    def acquire(self):
+        """
+        Block until a request may be sent, then consume a token from every bucket.
+
+        :return: The number of seconds spent waiting.
+        """
+
+        waited = 0
+        while True:
+            wait_time = self.try_acquire()
+            if wait_time <= 0:
+                return waited
+            time.sleep(wait_time)
+            waited += wait_time
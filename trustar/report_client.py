@@ -5,20 +5,78 @@ from future import standard_library
 from six import string_types
 
 # external imports
-import json
 from datetime import datetime
 import functools
 import logging
+import time
+from requests import HTTPError, RequestException
 
 # package imports
-from .models import Page, Report, DistributionType, IdType
-from .utils import get_time_based_page_generator
+from .models import Page, Report, DistributionType, IdType, RequestQuota, SubmissionResult
+from .rate_limiter import RateLimiter
+from .utils import (get_time_based_page_generator, get_time_windows, get_current_time_millis, parallel_chain,
+                    parallel_map, DAY)
 
 # python 2 backwards compatibility
 standard_library.install_aliases()
 
 logger = logging.getLogger(__name__)
 
+# the reports endpoint will not return reports from a time window larger than this
+MAX_REPORTS_WINDOW = 14 * DAY
+
+# the number of pages, of up to 25 reports each, that each sub-window of a concurrent harvest fetches ahead by default
+REPORTS_READ_AHEAD = 40
+
+
+# yielded by each sub-window of a concurrent harvest after its last page
+_WINDOW_END = object()
+
+
+class _ReportDeduplicator(object):
+    """
+    Skips reports already generated by a concurrent harvest, since a report that is updated during the harvest can move
+    from one sub-window to the next.  Only the IDs of each sub-window and its neighbours are checked, and a
+    sub-window's IDs are dropped once it and both its neighbours have ended, so memory is bounded by the size of the
+    sub-windows in progress rather than by the whole harvest.
+    """
+
+    def __init__(self):
+        # the IDs generated from each sub-window that may still be needed, by the sub-window's index
+        self._seen_ids = {}
+        self._ended = set()
+
+    def get_new_reports(self, index, page):
+        """
+        :param int index: The index of the sub-window the page belongs to.
+        :param page: A |Page| of |Report| objects.
+        :return: The reports of the page that have not been generated yet.
+        """
+
+        seen_ids = self._seen_ids.setdefault(index, set())
+        neighbour_ids = [self._seen_ids[i] for i in (index - 1, index + 1) if i in self._seen_ids]
+
+        reports = []
+        for report in page:
+            if report.id in seen_ids or any(report.id in ids for ids in neighbour_ids):
+                continue
+            seen_ids.add(report.id)
+            reports.append(report)
+        return reports
+
+    def end_window(self, index):
+        """
+        Record that every page of a sub-window has been passed to ``get_new_reports``, and drop the IDs no longer
+        needed.
+
+        :param int index: The index of the sub-window.
+        """
+
+        self._ended.add(index)
+        for i in (index - 1, index, index + 1):
+            if all(j in self._ended or j < 0 for j in (i - 1, i, i + 1)):
+                self._seen_ids.pop(i, None)
+
 
 class ReportClient(object):
 
@@ -52,7 +110,7 @@ class ReportClient(object):
 
         params = {'idType': id_type}
         resp = self._client.get("reports/%s" % report_id, params=params)
-        return Report.from_dict(resp.json())
+        return self._report_model.from_dict(self._client.decode(resp))
 
     def get_reports_page(self, is_enclave=None, enclave_ids=None, tag=None, excluded_tags=None,
                          from_time=None, to_time=None):
@@ -100,7 +158,7 @@ class ReportClient(object):
             'excludedTags': excluded_tags
         }
         resp = self._client.get("reports", params=params)
-        result = Page.from_dict(resp.json(), content_type=Report)
+        result = Page.from_dict(self._client.decode(resp), content_type=self._report_model)
 
         # create a Page object from the dict
         return result
@@ -148,7 +206,7 @@ class ReportClient(object):
         if report.time_began is None:
             report.time_began = datetime.now()
 
-        data = json.dumps(report.to_dict())
+        data = self._client.encode(report.to_dict())
         resp = self._client.post("reports", data=data, timeout=60)
 
         # get report id from response body
@@ -161,6 +219,90 @@ class ReportClient(object):
 
         return report
 
+    def submit_reports(self, reports, max_workers=None, rate=None, max_attempts=3, ordered=True):
+        """
+        Submit many reports concurrently with |submit_report|.  A failed report does not stop the others from being
+        submitted; the outcome of each report is returned as a |SubmissionResult|.
+
+        A report whose submission failed with a server or connection error may have been created anyway, e.g. if the
+        connection dropped before the response arrived.  So a report is only re-submitted if it has an
+        ``external_id``, and only after checking that no report with that external ID exists; if one does, its ID is
+        used and the submission counts as successful.  Reports without an ``external_id`` are attempted once.  Reports
+        are never re-submitted after client errors (status codes 400-499), since the server would reject them again.
+        Responses with status code 429 are waited out and retried by the client itself, as for every request.
+
+        This is a blocking bulk call: it returns once every report has been submitted or has failed.  Reports are read
+        from ``reports`` only as workers become free, so it may be a generator over a large source.
+
+        :param reports: an iterable of |Report| objects.
+        :param int max_workers: the number of reports to submit concurrently (defaults to the ``max_concurrency``
+            config value).
+        :param float rate: if given, the maximum number of reports to submit per second, shared by all workers.  The
+            client's own rate limiter, if the ``rate_limit`` config value is set, applies as well.
+        :param int max_attempts: the number of times to attempt each report that has an ``external_id``.
+        :param bool ordered: whether to return the results in the order of ``reports``, rather than in the order
+            the submissions completed.
+        :return: A list of |SubmissionResult| objects.
+
+        Example:
+
+        >>> results = ts.submit_reports(reports, max_workers=8, rate=5)
+        >>> failed = [result.report for result in results if not result.succeeded]
+        """
+
+        limiter = None
+        if rate is not None:
+            # a bucket of one token paces submissions evenly rather than letting them burst
+            limiter = RateLimiter(sync_interval=float('inf'))
+            limiter.update([RequestQuota(guid="submit_reports", max_requests=1, used_requests=0,
+                                         time_window=1000.0 / rate, last_reset_time=None, next_reset_time=None)])
+
+        def submit(item):
+            index, report = item
+            result = SubmissionResult(index=index, report=report)
+            while True:
+                result.attempts += 1
+                try:
+                    if limiter is not None:
+                        limiter.acquire()
+
+                    # an earlier attempt may have created the report even though it failed
+                    if result.attempts > 1:
+                        existing = self._get_report_by_external_id(report.external_id)
+                        if existing is not None:
+                            report.id = existing.id
+                            result.error = None
+                            return result
+
+                    self.submit_report(report)
+                    result.error = None
+                    return result
+                except Exception as e:
+                    result.error = str(e)
+                    status_code = getattr(getattr(e, 'response', None), 'status_code', None)
+                    if (not isinstance(e, RequestException) or (status_code is not None and 400 <= status_code < 500)
+                            or not report.external_id or result.attempts >= max_attempts):
+                        logger.warning("Failed to submit report %d (external ID %s) after %d attempt(s): %s",
+                                       index, report.external_id, result.attempts, e)
+                        return result
+                    time.sleep(min(2 ** (result.attempts - 1), self._client.max_wait_time))
+
+        max_workers = max(max_workers or self._client.max_concurrency, 1)
+        return list(parallel_map(submit, enumerate(reports), max_workers=max_workers, ordered=ordered))
+
+    def _get_report_by_external_id(self, external_id):
+        """
+        :param str external_id: The external ID of a report.
+        :return: The |Report| with the external ID, or ``None`` if there is none.
+        """
+
+        try:
+            return self.get_report_details(external_id, id_type=IdType.EXTERNAL)
+        except HTTPError as e:
+            if e.response is not None and e.response.status_code == 404:
+                return None
+            raise
+
     def update_report(self, report):
         """
         Updates the report identified by the ``report.id`` field; if this field does not exist, then
@@ -199,7 +341,7 @@ class ReportClient(object):
 
         params = {'idType': id_type}
 
-        data = json.dumps(report.to_dict())
+        data = self._client.encode(report.to_dict())
         self._client.put("reports/%s" % report_id, data=data, params=params)
 
         return report
@@ -237,7 +379,7 @@ class ReportClient(object):
 
         params = {'indicators': indicators}
         resp = self._client.get("reports/correlate", params=params)
-        return resp.json()
+        return self._client.decode(resp)
 
     def get_correlated_reports_page(self, indicators, enclave_ids=None, is_enclave=True,
                                     page_size=None, page_number=None):
@@ -272,7 +414,7 @@ class ReportClient(object):
         }
         resp = self._client.get("reports/correlated", params=params)
 
-        return Page.from_dict(resp.json(), content_type=Report)
+        return Page.from_dict(self._client.decode(resp), content_type=self._report_model)
 
     def search_reports_page(self, search_term, enclave_ids=None, page_size=None, page_number=None):
         """
@@ -294,12 +436,12 @@ class ReportClient(object):
         }
 
         resp = self._client.get("reports/search", params=params)
-        page = Page.from_dict(resp.json(), content_type=Report)
+        page = Page.from_dict(self._client.decode(resp), content_type=self._report_model)
 
         return page
 
     def _get_reports_page_generator(self, is_enclave=None, enclave_ids=None, tag=None, excluded_tags=None,
-                                    from_time=None, to_time=None):
+                                    from_time=None, to_time=None, checkpoint=None, resume_from=None):
         """
         Creates a generator from the |get_reports_page| method that returns each successive page.
 
@@ -312,6 +454,8 @@ class ReportClient(object):
             enclave ID if necessary.
         :param int from_time: start of time window in milliseconds since epoch
         :param int to_time: end of time window in milliseconds since epoch (optional, defaults to current time)
+        :param checkpoint: a |Checkpoint| to save the cursor to after each page (optional)
+        :param dict resume_from: a cursor saved by a previous generator to continue from (optional)
         :return: The generator.
         """
 
@@ -320,14 +464,23 @@ class ReportClient(object):
             get_page=get_page,
             get_next_to_time=lambda x: x.items[-1].updated if len(x.items) > 0 else None,
             from_time=from_time,
-            to_time=to_time
+            to_time=to_time,
+            checkpoint=checkpoint,
+            resume_from=resume_from
         )
 
-    def get_reports(self, is_enclave=None, enclave_ids=None, tag=None, excluded_tags=None, from_time=None, to_time=None):
+    def get_reports(self, is_enclave=None, enclave_ids=None, tag=None, excluded_tags=None, from_time=None, to_time=None,
+                    max_workers=None, window_size=None, ordered=True, checkpoint=None, resume_from=None,
+                    read_ahead=None):
         """
         Uses the |get_reports_page| method to create a generator that returns each successive report as a trustar
         report object.
 
+        If ``max_workers`` is greater than 1, the time window is split into consecutive sub-windows of at most
+        ``window_size`` milliseconds, which are harvested concurrently.  Reports are de-duplicated by ID, since a report
+        that is updated during the harvest can move from one sub-window to another.  Each sub-window fetches at most
+        ``read_ahead`` pages ahead of the consumer, so memory stays bounded however many reports a sub-window holds.
+
         :param boolean is_enclave: restrict reports to specific distribution type (optional - by default all accessible
             reports are returned).
         :param list(str) enclave_ids: list of enclave ids used to restrict reports to specific
@@ -339,6 +492,21 @@ class ReportClient(object):
         :param list(str) excluded_tags: a list of tags; reports containing ANY of these tags will not be returned. 
         :param int from_time: start of time window in milliseconds since epoch (optional)
         :param int to_time: end of time window in milliseconds since epoch (optional)
+        :param int max_workers: the number of sub-windows to harvest concurrently (optional - by default the whole
+            window is harvested serially)
+        :param int window_size: the size of each sub-window in milliseconds (optional - defaults to the window divided
+            evenly among the workers, capped at 2 weeks)
+        :param boolean ordered: if ``True``, reports are generated in order of their ``updated`` time, newest first, as
+            they are when harvesting serially.  If ``False``, each sub-window's reports are generated as soon as the
+            sub-window completes, which keeps all workers busy when sub-windows vary in size.
+        :param checkpoint: a |Checkpoint| to save the harvest's cursor to as it progresses, so that a restarted harvest
+            can pass it as ``resume_from`` (optional).  The cursor is saved after each page, or after each sub-window
+            when harvesting concurrently, which requires ``ordered``.
+        :param dict resume_from: a cursor saved by a previous harvest, e.g. ``checkpoint.load()``.  If given,
+            ``from_time`` and ``to_time`` are ignored, and only the part of the window that the previous harvest had
+            not finished is harvested (optional).
+        :param int read_ahead: the maximum number of pages each sub-window fetches ahead of the consumer when
+            harvesting concurrently (optional - defaults to 40).
         :return: A generator of Report objects.
 
         Note:  If a report contains all of the tags in the list passed as argument to the 'tag' parameter and also 
@@ -357,11 +525,121 @@ class ReportClient(object):
 
         """
 
-        return Page.get_generator(page_generator=self._get_reports_page_generator(is_enclave, enclave_ids, tag,
-                                                                                  excluded_tags, from_time, to_time))
-    
+        if max_workers is None or max_workers <= 1:
+            return Page.get_generator(page_generator=self._get_reports_page_generator(is_enclave, enclave_ids, tag,
+                                                                                      excluded_tags, from_time, to_time,
+                                                                                      checkpoint=checkpoint,
+                                                                                      resume_from=resume_from))
+
+        if checkpoint is not None and not ordered:
+            raise ValueError("Checkpointing a concurrent harvest requires 'ordered'.")
+
+        from_time, windows = self._get_harvest_windows(from_time, to_time, max_workers, window_size=window_size,
+                                                       resume_from=resume_from)
+
+        def harvest(window):
+            window_from_time, window_to_time = window
+            for page in self._get_reports_page_generator(is_enclave, enclave_ids, tag, excluded_tags,
+                                                         window_from_time, window_to_time):
+                yield page
+            yield _WINDOW_END
+
+        if read_ahead is None:
+            read_ahead = REPORTS_READ_AHEAD
+        pages = parallel_chain(harvest, windows, max_workers=max_workers, read_ahead=read_ahead, ordered=ordered)
+        if checkpoint is not None:
+            pages = self._checkpoint_windows(pages, windows, from_time, checkpoint)
+        return self._get_deduplicated_reports(pages)
+
+    @staticmethod
+    def _get_harvest_windows(from_time, to_time, max_workers, window_size=None, resume_from=None):
+        """
+        Split the time window of a concurrent harvest into sub-windows, applying the same defaults as the serial
+        generator.
+
+        :param int from_time: The start of the time window, or ``None``.
+        :param int to_time: The end of the time window, or ``None``.
+        :param int max_workers: The number of sub-windows to harvest concurrently.
+        :param int window_size: The size of each sub-window, or ``None`` to divide the window evenly among the workers.
+        :param dict resume_from: A cursor saved by a previous harvest, or ``None``.
+        :return: A tuple of the start of the time window and the list of ``(from_time, to_time)`` tuples of the
+            sub-windows, newest first.  The list is empty if the harvest being resumed was already done.
+        """
+
+        if resume_from is not None:
+            if resume_from.get('done'):
+                return resume_from['from_time'], []
+            from_time = resume_from['from_time']
+            to_time = resume_from['to_time']
+        if to_time is None:
+            to_time = get_current_time_millis()
+        if from_time is None:
+            from_time = to_time - DAY
+
+        if window_size is None:
+            window_size = min(MAX_REPORTS_WINDOW, -(-(to_time - from_time + 1) // max_workers))
+
+        return from_time, get_time_windows(from_time, to_time, window_size)
+
+    @staticmethod
+    def _checkpoint_windows(pages, windows, from_time, checkpoint):
+        """
+        Passes through the pages of consecutive sub-windows, saving a cursor that starts just before each sub-window
+        once its reports have been consumed.
+
+        :param pages: An iterable of ``(index, page)`` tuples, where ``index`` is the position in ``windows`` of the
+            page's sub-window, in the order of ``windows``.  ``page`` may be ``_WINDOW_END``.
+        :param windows: The ``(from_time, to_time)`` tuple of each sub-window, newest first.
+        :param int from_time: The start of the whole window.
+        :param checkpoint: The |Checkpoint| to save the cursor to.
+        :return: The generator.
+        """
+
+        consumed = 0
+        for index, page in pages:
+            # every sub-window before this page's has been consumed, including any that were empty
+            if index > consumed:
+                checkpoint.save(ReportClient._get_window_cursor(windows, from_time, index))
+                consumed = index
+            yield index, page
+
+        checkpoint.save(ReportClient._get_window_cursor(windows, from_time, len(windows)))
+
+    @staticmethod
+    def _get_window_cursor(windows, from_time, consumed):
+        """
+        :param windows: The ``(from_time, to_time)`` tuple of each sub-window of a concurrent harvest, newest first.
+        :param int from_time: The start of the whole window.
+        :param int consumed: The number of sub-windows whose reports have all been consumed.
+        :return: The cursor of a harvest of the rest of the window.
+        """
+
+        if consumed >= len(windows):
+            return {'from_time': from_time, 'to_time': from_time - 1, 'done': True}
+        return {'from_time': from_time, 'to_time': windows[consumed - 1][0] - 1}
+
+    @staticmethod
+    def _get_deduplicated_reports(pages):
+        """
+        Flattens the pages of the sub-windows of a concurrent harvest into a generator of reports, skipping any report
+        whose ID has already been generated by the same or a neighbouring sub-window.
+
+        :param pages: An iterable of ``(index, page)`` tuples, where ``index`` is the position of the page's
+            sub-window, and ``page`` is a |Page| of |Report| objects, or ``_WINDOW_END`` after the sub-window's last
+            page.
+        :return: The generator.
+        """
+
+        deduplicator = _ReportDeduplicator()
+        for index, page in pages:
+            if page is _WINDOW_END:
+                deduplicator.end_window(index)
+                continue
+            for report in deduplicator.get_new_reports(index, page):
+                yield report
+
     def _get_correlated_reports_page_generator(self, indicators, enclave_ids=None, is_enclave=True,
-                                               start_page=0, page_size=None):
+                                               start_page=0, page_size=None, max_workers=None, read_ahead=None):
         """
         Creates a generator from the |get_correlated_reports_page| method that returns each
         successive page.
@@ -369,27 +647,37 @@ class ReportClient(object):
         :param indicators: A list of indicator values to retrieve correlated reports for.
         :param enclave_ids:
         :param is_enclave:
+        :param int max_workers: The number of pages to fetch concurrently.
+        :param int read_ahead: The maximum number of pages fetched ahead of the consumer.
         :return: The generator.
         """
 
         get_page = functools.partial(self.get_correlated_reports_page, indicators, enclave_ids, is_enclave)
-        return Page.get_page_generator(get_page, start_page, page_size)
+        return Page.get_page_generator(get_page, start_page, page_size,
+                                       max_workers=max_workers, read_ahead=read_ahead)
 
-    def get_correlated_reports(self, indicators, enclave_ids=None, is_enclave=True):
+    def get_correlated_reports(self, indicators, enclave_ids=None, is_enclave=True, max_workers=None, read_ahead=None):
         """
         Uses the |get_correlated_reports_page| method to create a generator that returns each successive report.
 
         :param indicators: A list of indicator values to retrieve correlated reports for.
         :param enclave_ids: The enclaves to search in.
         :param is_enclave: Whether to search enclave reports or community reports.
+        :param int max_workers: if greater than 1, pages after the first are fetched concurrently on this many threads.
+            Items are still generated in order.
+        :param int read_ahead: the maximum number of pages fetched ahead of the consumer (defaults to
+            ``2 * max_workers``).
         :return: The generator.
         """
 
         return Page.get_generator(page_generator=self._get_correlated_reports_page_generator(indicators,
                                                                                              enclave_ids,
-                                                                                             is_enclave))
+                                                                                             is_enclave,
+                                                                                             max_workers=max_workers,
+                                                                                             read_ahead=read_ahead))
     
-    def _search_reports_page_generator(self, search_term, enclave_ids=None, start_page=0, page_size=None):
+    def _search_reports_page_generator(self, search_term, enclave_ids=None, start_page=0, page_size=None,
+                                       max_workers=None, read_ahead=None):
         """
         Creates a generator from the |search_reports_page| method that returns each successive page.
 
@@ -398,20 +686,29 @@ class ReportClient(object):
             default reports from all of user's enclaves are returned)
         :param int start_page: The page to start on.
         :param page_size: The size of each page.
+        :param int max_workers: The number of pages to fetch concurrently.
+        :param int read_ahead: The maximum number of pages fetched ahead of the consumer.
         :return: The generator.
         """
 
         get_page = functools.partial(self.search_reports_page, search_term, enclave_ids)
-        return Page.get_page_generator(get_page, start_page, page_size)
+        return Page.get_page_generator(get_page, start_page, page_size,
+                                       max_workers=max_workers, read_ahead=read_ahead)
 
-    def search_reports(self, search_term, enclave_ids=None):
+    def search_reports(self, search_term, enclave_ids=None, max_workers=None, read_ahead=None):
         """
         Uses the |search_reports_page| method to create a generator that returns each successive report.
 
         :param str search_term: The term to search for.  This string must be at least 3 characters in length.
         :param list(str) enclave_ids: list of enclave ids used to restrict reports to specific enclaves (optional - by
             default reports from all of user's enclaves are returned)
+        :param int max_workers: if greater than 1, pages after the first are fetched concurrently on this many threads.
+            Items are still generated in order.
+        :param int read_ahead: the maximum number of pages fetched ahead of the consumer (defaults to
+            ``2 * max_workers``).
         :return: The generator of Report objects.  Note that the body attributes of these reports will be ``None``.
         """
 
-        return Page.get_generator(page_generator=self._search_reports_page_generator(search_term, enclave_ids))
+        return Page.get_generator(page_generator=self._search_reports_page_generator(search_term, enclave_ids,
+                                                                                     max_workers=max_workers,
+                                                                                     read_ahead=read_ahead))
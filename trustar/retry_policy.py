@@ -0,0 +1,137 @@
+# python 2 backwards compatibility
+from __future__ import print_function, division
+from builtins import object
+from future import standard_library
+
+# external imports
+import random
+
+import requests
+
+# python 2 backwards compatibility
+standard_library.install_aliases()
+
+
+def _is_async_connection_error(exception):
+    """
+    :param exception: An exception raised instead of a response.
+    :return: Whether it is a dropped connection or a timeout raised by ``aiohttp``.  ``aiohttp`` is only imported
+        here, so that it is not needed unless the asynchronous client is used.
+    """
+
+    try:
+        import asyncio
+        import aiohttp
+    except ImportError:
+        return False
+    return isinstance(exception, (aiohttp.ClientConnectionError, asyncio.TimeoutError))
+
+
+class RetryPolicy(object):
+    """
+    Decides whether, and after how long, an |ApiClient| retries a request that failed with a server error or a
+    connection error.  Requests that fail with a 429 status code or an expired token are always retried, as before;
+    this policy covers everything else.
+
+    Retries back off exponentially with full jitter: the wait before retry ``n`` is drawn uniformly from
+    ``[0, min(max_delay, base_delay * 2 ** (n - 1))]``, so that many clients failing at once do not retry in lockstep.
+    Retrying stops once ``max_attempts`` attempts have been made, or once the next retry would end more than ``budget``
+    seconds after the first attempt began.
+
+    Only idempotent methods are retried by default, since a ``POST`` that reached the server before the connection
+    dropped would otherwise be applied twice, e.g. submitting a report twice.  Set ``retry_non_idempotent`` to retry
+    every method, or pass ``idempotent=True`` to |ApiClient|'s ``request`` method to retry a single request.  Requests
+    that failed to connect never reached the server, so they are retried regardless.
+
+    Server and connection errors are only retried if an instance is passed as the ``retry_policy`` config value;
+    without one they are raised, as before.  An instance may be shared by any number of threads and clients.
+
+    Example:
+
+    >>> ts = TruStar(config_role="trustar", config={'retry_policy': RetryPolicy(max_attempts=10, budget=600)})
+
+    :ivar max_attempts: The maximum number of attempts per request, including the first.
+    :ivar base_delay: The maximum wait in seconds before the first retry; it doubles with each retry after that.
+    :ivar max_delay: The maximum wait in seconds before any retry.
+    :ivar budget: The maximum number of seconds from the first attempt to the end of the wait before the last retry,
+        or ``None`` for no limit.
+    :ivar retry_statuses: The status codes that are retried.
+    :ivar retry_exceptions: The exception classes that are retried.  Defaults to the connection errors and timeouts of
+        ``requests`` and ``aiohttp``.
+    :ivar retry_non_idempotent: Whether to retry requests made with non-idempotent methods, i.e. ``POST``.
+    """
+
+    # methods that have the same effect whether they are applied once or several times
+    IDEMPOTENT_METHODS = frozenset(['GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'])
+
+    # the exceptions raised by ``requests`` for dropped connections and timeouts
+    DEFAULT_EXCEPTIONS = (requests.ConnectionError, requests.Timeout)
+
+    # exceptions raised before the request was sent, which are safe to retry for any method
+    CONNECT_EXCEPTIONS = (requests.exceptions.ConnectTimeout,)
+
+    def __init__(self, max_attempts=5, base_delay=0.5, max_delay=30, budget=300,
+                 retry_statuses=(500, 502, 503, 504), retry_exceptions=None, retry_non_idempotent=False):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.budget = budget
+        self.retry_statuses = frozenset(retry_statuses)
+        self.retry_exceptions = tuple(retry_exceptions) if retry_exceptions is not None else self.DEFAULT_EXCEPTIONS
+        self.retry_non_idempotent = retry_non_idempotent
+        self._random = random.Random()
+
+    def get_backoff(self, attempt):
+        """
+        :param int attempt: The number of attempts made so far.
+        :return: A random number of seconds to wait before the next attempt.
+        """
+
+        return self._random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+    def is_retry_exception(self, exception):
+        """
+        :param exception: The exception raised, if no response was received.
+        :return: Whether the exception is one of ``retry_exceptions``, or, if those are the defaults, a dropped
+            connection or a timeout raised by ``aiohttp``.
+        """
+
+        if isinstance(exception, self.retry_exceptions):
+            return True
+        return self.retry_exceptions is self.DEFAULT_EXCEPTIONS and _is_async_connection_error(exception)
+
+    def get_delay(self, method, attempt, elapsed, status_code=None, exception=None, idempotent=None):
+        """
+        Decide whether to retry a failed request.
+
+        :param str method: The method of the request.
+        :param int attempt: The number of attempts made so far, including the one that failed.
+        :param float elapsed: The number of seconds since the first attempt began.
+        :param int status_code: The status code of the response, if one was received.
+        :param exception: The exception raised, if no response was received.
+        :param bool idempotent: Whether the request is safe to repeat.  Defaults to whether ``method`` is idempotent.
+        :return: The number of seconds to wait before retrying, or ``None`` if the request should not be retried.
+        """
+
+        if exception is not None:
+            if not self.is_retry_exception(exception):
+                return None
+            safe = isinstance(exception, self.CONNECT_EXCEPTIONS)
+        else:
+            if status_code not in self.retry_statuses:
+                return None
+            safe = False
+
+        if idempotent is None:
+            idempotent = method.upper() in self.IDEMPOTENT_METHODS
+        if not (idempotent or safe or self.retry_non_idempotent):
+            return None
+
+        if attempt >= self.max_attempts:
+            return None
+
+        delay = self.get_backoff(attempt)
+        if self.budget is not None and elapsed + delay > self.budget:
+            return None
+
+        return delay
@@ -0,0 +1,500 @@
+# python 2 backwards compatibility
+from __future__ import print_function
+from builtins import object, range
+from future import standard_library
+
+# external imports
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+# package imports
+from .models import Indicator, Report, Tag
+from .utils import get_current_time_millis, parallel_map, DAY
+
+# python 2 backwards compatibility
+standard_library.install_aliases()
+
+logger = logging.getLogger(__name__)
+
+# the names of the high-water marks of each stream
+REPORTS = 'reports'
+INDICATORS = 'indicators'
+
+
+class SyncResult(object):
+    """
+    The outcome of a |LocalMirror| sync.
+
+    :ivar reports: The number of reports upserted.
+    :ivar indicators: The number of indicators upserted.
+    :ivar report_indicators: The number of report-to-indicator links written.
+    :ivar report_tags: The number of report-to-tag links written.
+    :ivar report_high_water_mark: The ``updated`` time of the newest report mirrored, in milliseconds since epoch.
+    :ivar indicator_high_water_mark: The ``lastSeen`` time of the newest indicator mirrored, in milliseconds since
+        epoch.
+    :ivar elapsed: The number of seconds the sync took.
+    """
+
+    def __init__(self):
+        self.reports = 0
+        self.indicators = 0
+        self.report_indicators = 0
+        self.report_tags = 0
+        self.report_high_water_mark = None
+        self.indicator_high_water_mark = None
+        self.elapsed = 0.0
+
+    def __repr__(self):
+        return ("SyncResult(reports=%d, indicators=%d, report_indicators=%d, report_tags=%d, elapsed=%.2f)"
+                % (self.reports, self.indicators, self.report_indicators, self.report_tags, self.elapsed))
+
+
+class LocalMirror(object):
+    """
+    A local SQLite mirror of reports, indicators, tags, and the links between reports and the indicators and tags they
+    contain, kept up to date incrementally.
+
+    Each sync only requests what changed since the last one: the mirror records the newest ``updated`` time of the
+    reports and ``lastSeen`` time of the indicators it has stored, and the next sync requests only reports and indicators
+    from that high-water mark onwards, minus ``overlap`` milliseconds to pick up changes that were committed late.
+    Everything fetched is upserted, so fetching an item twice is harmless.  The high-water marks are only advanced once
+    a sync completes, so an interrupted sync is repeated in full next time.
+
+    The links of each report that changed are refreshed with |get_indicators_for_report| and |get_enclave_tags|, so a
+    sync costs two requests per changed report on top of the pages of changes.  Deleted reports and indicators are not
+    detected, as the API does not list deletions.
+
+    Once synced, the mirror answers queries without calling the API:
+
+    >>> mirror = LocalMirror("trustar.db")
+    >>> mirror.sync(ts, from_time=get_current_time_millis() - 30 * DAY)
+    >>> for report in mirror.get_correlated_reports(["evil.com"]):
+    ...     print(report.title)
+
+    A mirror may be read from any number of threads, but should only be synced by one at a time.
+
+    :ivar path: The path of the database file.
+    """
+
+    # the number of rows written per transaction
+    BATCH_SIZE = 500
+
+    # SQLite limits the number of parameters in a statement to 999 by default
+    MAX_PARAMETERS = 500
+
+    # by default, re-request the last five minutes before each high-water mark
+    DEFAULT_OVERLAP = 5 * 60 * 1000
+
+    def __init__(self, path):
+        self.path = os.path.expanduser(path)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        with self._lock, self._connection:
+            # the mirror can be rebuilt from the server, so trade durability for write speed
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=NORMAL")
+            self._connection.executescript("""
+                CREATE TABLE IF NOT EXISTS reports (
+                    id TEXT PRIMARY KEY, updated INTEGER, data TEXT NOT NULL);
+                CREATE INDEX IF NOT EXISTS reports_updated ON reports (updated);
+                CREATE TABLE IF NOT EXISTS report_enclaves (
+                    report_id TEXT NOT NULL, enclave_id TEXT NOT NULL, PRIMARY KEY (report_id, enclave_id));
+                CREATE INDEX IF NOT EXISTS report_enclaves_enclave_id ON report_enclaves (enclave_id);
+                CREATE TABLE IF NOT EXISTS indicators (
+                    value TEXT PRIMARY KEY, last_seen INTEGER, data TEXT NOT NULL);
+                CREATE INDEX IF NOT EXISTS indicators_last_seen ON indicators (last_seen);
+                CREATE TABLE IF NOT EXISTS tags (
+                    id TEXT PRIMARY KEY, name TEXT, enclave_id TEXT);
+                CREATE INDEX IF NOT EXISTS tags_name ON tags (name);
+                CREATE TABLE IF NOT EXISTS report_indicators (
+                    report_id TEXT NOT NULL, value TEXT NOT NULL, PRIMARY KEY (report_id, value));
+                CREATE INDEX IF NOT EXISTS report_indicators_value ON report_indicators (value);
+                CREATE TABLE IF NOT EXISTS report_tags (
+                    report_id TEXT NOT NULL, tag_id TEXT NOT NULL, PRIMARY KEY (report_id, tag_id));
+                CREATE INDEX IF NOT EXISTS report_tags_tag_id ON report_tags (tag_id);
+                CREATE TABLE IF NOT EXISTS indicator_tags (
+                    value TEXT NOT NULL, tag_id TEXT NOT NULL, PRIMARY KEY (value, tag_id));
+                CREATE INDEX IF NOT EXISTS indicator_tags_tag_id ON indicator_tags (tag_id);
+                CREATE TABLE IF NOT EXISTS sync_state (
+                    name TEXT PRIMARY KEY, high_water_mark INTEGER, synced_at REAL NOT NULL);
+            """)
+
+    def close(self):
+        """
+        Close the database connection.
+        """
+
+        with self._lock:
+            self._connection.close()
+
+    ############
+    ### Sync ###
+    ############
+
+    def sync(self, client, enclave_ids=None, from_time=None, overlap=DEFAULT_OVERLAP, report_indicators=True,
+             report_tags=True, page_size=1000, max_workers=None):
+        """
+        Bring the mirror up to date with the reports and indicators changed since the last sync.
+
+        :param client: The |TruStar| client to sync from.
+        :param list(str) enclave_ids: The enclaves to mirror (defaults to all the user can read).
+        :param int from_time: Where the first sync starts, in milliseconds since epoch (defaults to a day ago for
+            reports, and to the API's default of a week ago for indicators).  Later syncs start from the high-water
+            marks instead.
+        :param int overlap: The number of milliseconds before each high-water mark to request again.
+        :param bool report_indicators: Whether to mirror the indicators each changed report contains.
+        :param bool report_tags: Whether to mirror the tags of each changed report.
+        :param int page_size: The number of indicators to request per page.
+        :param int max_workers: If greater than 1, reports are harvested, and the links of changed reports requested,
+            on this many threads.
+        :return: A |SyncResult|.
+        """
+
+        result = SyncResult()
+        start = time.time()
+        self._sync_reports(client, result, enclave_ids=enclave_ids, from_time=from_time, overlap=overlap,
+                           report_indicators=report_indicators, report_tags=report_tags, max_workers=max_workers)
+        self._sync_indicators(client, result, enclave_ids=enclave_ids, from_time=from_time, overlap=overlap,
+                              page_size=page_size, max_workers=max_workers)
+        result.elapsed = time.time() - start
+        return result
+
+    def sync_reports(self, client, enclave_ids=None, from_time=None, overlap=DEFAULT_OVERLAP, report_indicators=True,
+                     report_tags=True, max_workers=None):
+        """
+        Sync only the reports and their links.  See ``sync``.
+
+        :return: A |SyncResult|.
+        """
+
+        result = SyncResult()
+        start = time.time()
+        self._sync_reports(client, result, enclave_ids=enclave_ids, from_time=from_time, overlap=overlap,
+                           report_indicators=report_indicators, report_tags=report_tags, max_workers=max_workers)
+        result.elapsed = time.time() - start
+        return result
+
+    def sync_indicators(self, client, enclave_ids=None, from_time=None, overlap=DEFAULT_OVERLAP, page_size=1000,
+                        max_workers=None):
+        """
+        Sync only the indicators.  See ``sync``.
+
+        :return: A |SyncResult|.
+        """
+
+        result = SyncResult()
+        start = time.time()
+        self._sync_indicators(client, result, enclave_ids=enclave_ids, from_time=from_time, overlap=overlap,
+                              page_size=page_size, max_workers=max_workers)
+        result.elapsed = time.time() - start
+        return result
+
+    def _get_delta_window(self, name, from_time, overlap):
+        """
+        :return: The ``from_time`` to request changes from, and the current high-water mark.
+        """
+
+        high_water_mark = self.get_high_water_mark(name)
+        if high_water_mark is not None:
+            from_time = high_water_mark - overlap
+        return from_time, high_water_mark
+
+    def _sync_reports(self, client, result, enclave_ids=None, from_time=None, overlap=DEFAULT_OVERLAP,
+                      report_indicators=True, report_tags=True, max_workers=None):
+
+        from_time, high_water_mark = self._get_delta_window(REPORTS, from_time, overlap)
+        to_time = get_current_time_millis()
+        if from_time is None:
+            from_time = to_time - DAY
+
+        def get_links(report):
+            indicators = list(client.get_indicators_for_report(report.id)) if report_indicators else None
+            tags = client.get_enclave_tags(report.id) if report_tags else None
+            return report, indicators, tags
+
+        reports = client.get_reports(enclave_ids=enclave_ids, from_time=from_time, to_time=to_time,
+                                     max_workers=max_workers)
+        if report_indicators or report_tags:
+            reports = parallel_map(get_links, reports, max_workers=max_workers or 1)
+        else:
+            reports = ((report, None, None) for report in reports)
+
+        batch = []
+        for item in reports:
+            batch.append(item)
+            report = item[0]
+            if report.updated is not None and (high_water_mark is None or report.updated > high_water_mark):
+                high_water_mark = report.updated
+            if len(batch) >= self.BATCH_SIZE:
+                self._write_reports(batch, result)
+                batch = []
+        self._write_reports(batch, result)
+
+        self._set_high_water_mark(REPORTS, high_water_mark)
+        result.report_high_water_mark = high_water_mark
+
+    def _sync_indicators(self, client, result, enclave_ids=None, from_time=None, overlap=DEFAULT_OVERLAP,
+                         page_size=1000, max_workers=None):
+
+        from_time, high_water_mark = self._get_delta_window(INDICATORS, from_time, overlap)
+        to_time = get_current_time_millis()
+
+        batch = []
+        for indicator in client.get_indicators(from_time=from_time, to_time=to_time, enclave_ids=enclave_ids,
+                                               page_size=page_size, max_workers=max_workers):
+            batch.append(indicator)
+            last_seen = indicator.last_seen
+            if last_seen is not None and (high_water_mark is None or last_seen > high_water_mark):
+                high_water_mark = last_seen
+            if len(batch) >= self.BATCH_SIZE:
+                self._write_indicators(batch, result)
+                batch = []
+        self._write_indicators(batch, result)
+
+        self._set_high_water_mark(INDICATORS, high_water_mark)
+        result.indicator_high_water_mark = high_water_mark
+
+    def _write_reports(self, batch, result):
+        """
+        Upsert a batch of reports and replace their links, in one transaction.
+
+        :param batch: A list of tuples of a |Report|, and the list of its |Indicator| objects and of its |Tag| objects,
+            either of which is ``None`` if it was not requested.
+        """
+
+        if not batch:
+            return
+
+        with self._lock, self._connection:
+            connection = self._connection
+            for report, indicators, tags in batch:
+                connection.execute("INSERT OR REPLACE INTO reports (id, updated, data) VALUES (?, ?, ?)",
+                                   (report.id, report.updated, json.dumps(report.to_dict())))
+                connection.execute("DELETE FROM report_enclaves WHERE report_id = ?", (report.id,))
+                connection.executemany("INSERT OR IGNORE INTO report_enclaves (report_id, enclave_id) VALUES (?, ?)",
+                                       [(report.id, enclave_id) for enclave_id in report.enclave_ids or []])
+
+                if indicators is not None:
+                    connection.execute("DELETE FROM report_indicators WHERE report_id = ?", (report.id,))
+                    connection.executemany("INSERT OR IGNORE INTO report_indicators (report_id, value) VALUES (?, ?)",
+                                           [(report.id, indicator.value) for indicator in indicators])
+                    # do not overwrite the fuller records synced from the indicators endpoint
+                    connection.executemany("INSERT OR IGNORE INTO indicators (value, last_seen, data) VALUES (?, ?, ?)",
+                                           [(indicator.value, indicator.last_seen, json.dumps(indicator.to_dict()))
+                                            for indicator in indicators])
+                    result.report_indicators += len(indicators)
+
+                if tags is not None:
+                    connection.execute("DELETE FROM report_tags WHERE report_id = ?", (report.id,))
+                    tags = self._write_tags(tags)
+                    connection.executemany("INSERT OR IGNORE INTO report_tags (report_id, tag_id) VALUES (?, ?)",
+                                           [(report.id, tag.id) for tag in tags])
+                    result.report_tags += len(tags)
+
+            result.reports += len(batch)
+
+    def _write_indicators(self, batch, result):
+        """
+        Upsert a batch of |Indicator| objects and replace their tags, in one transaction.
+        """
+
+        if not batch:
+            return
+
+        with self._lock, self._connection:
+            connection = self._connection
+            connection.executemany("INSERT OR REPLACE INTO indicators (value, last_seen, data) VALUES (?, ?, ?)",
+                                   [(indicator.value, indicator.last_seen, json.dumps(indicator.to_dict()))
+                                    for indicator in batch])
+            for indicator in batch:
+                if indicator.tags is not None:
+                    connection.execute("DELETE FROM indicator_tags WHERE value = ?", (indicator.value,))
+                    tags = self._write_tags(indicator.tags)
+                    connection.executemany("INSERT OR IGNORE INTO indicator_tags (value, tag_id) VALUES (?, ?)",
+                                           [(indicator.value, tag.id) for tag in tags])
+            result.indicators += len(batch)
+
+    def _write_tags(self, tags):
+        """
+        Upsert |Tag| objects.  Tags without an ID are skipped, since links to them could not be stored.
+
+        :return: The list of tags written.
+        """
+
+        tags = [tag for tag in tags if tag.id is not None]
+        self._connection.executemany("INSERT OR REPLACE INTO tags (id, name, enclave_id) VALUES (?, ?, ?)",
+                                     [(tag.id, tag.name, tag.enclave_id) for tag in tags])
+        return tags
+
+    def get_high_water_mark(self, name):
+        """
+        :param str name: ``"reports"`` or ``"indicators"``.
+        :return: The newest ``updated`` time of the reports, or ``lastSeen`` time of the indicators, mirrored so far, or
+            ``None`` if none have been.
+        """
+
+        with self._lock:
+            row = self._connection.execute("SELECT high_water_mark FROM sync_state WHERE name = ?",
+                                           (name,)).fetchone()
+        return row[0] if row is not None else None
+
+    def _set_high_water_mark(self, name, high_water_mark):
+
+        with self._lock, self._connection:
+            self._connection.execute("INSERT OR REPLACE INTO sync_state (name, high_water_mark, synced_at) "
+                                     "VALUES (?, ?, ?)", (name, high_water_mark, time.time()))
+
+    def clear(self):
+        """
+        Remove everything mirrored, so that the next sync starts from scratch.
+        """
+
+        with self._lock, self._connection:
+            for table in ['reports', 'report_enclaves', 'indicators', 'tags', 'report_indicators', 'report_tags',
+                          'indicator_tags', 'sync_state']:
+                self._connection.execute("DELETE FROM %s" % table)
+
+    #####################
+    ### Local queries ###
+    #####################
+
+    def _query(self, sql, params=()):
+        with self._lock:
+            return self._connection.execute(sql, params).fetchall()
+
+    def _query_in(self, sql, values, params=()):
+        """
+        Run a query with an ``IN (%s)`` clause once per batch of ``values``.
+        """
+
+        values = list(values)
+        rows = []
+        for i in range(0, len(values), self.MAX_PARAMETERS):
+            batch = values[i:i + self.MAX_PARAMETERS]
+            rows.extend(self._query(sql % ", ".join("?" * len(batch)), batch + list(params)))
+        return rows
+
+    def get_report_details(self, report_id):
+        """
+        :param str report_id: The ID of the report.
+        :return: The mirrored |Report|, or ``None`` if it has not been mirrored.
+        """
+
+        rows = self._query("SELECT data FROM reports WHERE id = ?", (report_id,))
+        return Report.from_dict(json.loads(rows[0][0])) if rows else None
+
+    def get_reports(self, from_time=None, to_time=None, enclave_ids=None, tag=None):
+        """
+        :param int from_time: Only return reports updated at or after this time, in milliseconds since epoch.
+        :param int to_time: Only return reports updated at or before this time, in milliseconds since epoch.
+        :param list(str) enclave_ids: Only return reports in any of these enclaves.
+        :param str tag: Only return reports with a tag of this name.
+        :return: A list of the mirrored |Report| objects, most recently updated first.
+        """
+
+        clauses = []
+        params = []
+        if from_time is not None:
+            clauses.append("updated >= ?")
+            params.append(from_time)
+        if to_time is not None:
+            clauses.append("updated <= ?")
+            params.append(to_time)
+        if enclave_ids:
+            clauses.append("id IN (SELECT report_id FROM report_enclaves WHERE enclave_id IN (%s))"
+                           % ", ".join("?" * len(enclave_ids)))
+            params.extend(enclave_ids)
+        if tag is not None:
+            clauses.append("id IN (SELECT report_id FROM report_tags JOIN tags ON tags.id = report_tags.tag_id "
+                           "WHERE tags.name = ?)")
+            params.append(tag)
+
+        where = " WHERE " + " AND ".join(clauses) if clauses else ""
+        rows = self._query("SELECT data FROM reports%s ORDER BY updated DESC" % where, params)
+        return [Report.from_dict(json.loads(data)) for data, in rows]
+
+    def get_indicator(self, value):
+        """
+        :param str value: The indicator value.
+        :return: The mirrored |Indicator|, or ``None`` if it has not been mirrored.
+        """
+
+        rows = self._query("SELECT data FROM indicators WHERE value = ?", (value,))
+        return Indicator.from_dict(json.loads(rows[0][0])) if rows else None
+
+    def get_indicators(self, from_time=None, to_time=None):
+        """
+        :param int from_time: Only return indicators last seen at or after this time, in milliseconds since epoch.
+        :param int to_time: Only return indicators last seen at or before this time, in milliseconds since epoch.
+        :return: A list of the mirrored |Indicator| objects.
+        """
+
+        clauses = []
+        params = []
+        if from_time is not None:
+            clauses.append("last_seen >= ?")
+            params.append(from_time)
+        if to_time is not None:
+            clauses.append("last_seen <= ?")
+            params.append(to_time)
+
+        where = " WHERE " + " AND ".join(clauses) if clauses else ""
+        rows = self._query("SELECT data FROM indicators%s" % where, params)
+        return [Indicator.from_dict(json.loads(data)) for data, in rows]
+
+    def get_indicators_for_report(self, report_id):
+        """
+        :param str report_id: The ID of the report.
+        :return: A list of the mirrored |Indicator| objects the report contains.
+        """
+
+        rows = self._query("SELECT indicators.data FROM report_indicators "
+                           "JOIN indicators ON indicators.value = report_indicators.value "
+                           "WHERE report_indicators.report_id = ?", (report_id,))
+        return [Indicator.from_dict(json.loads(data)) for data, in rows]
+
+    def get_correlated_reports(self, indicators):
+        """
+        :param list(str) indicators: A list of indicator values.
+        :return: A list of the mirrored |Report| objects containing any of the indicators, most recently updated first.
+        """
+
+        rows = self._query_in("SELECT DISTINCT reports.data, reports.updated FROM report_indicators "
+                              "JOIN reports ON reports.id = report_indicators.report_id "
+                              "WHERE report_indicators.value IN (%s)", indicators)
+        rows.sort(key=lambda row: row[1] or 0, reverse=True)
+        return [Report.from_dict(json.loads(data)) for data, _ in rows]
+
+    def get_enclave_tags(self, report_id):
+        """
+        :param str report_id: The ID of the report.
+        :return: A list of the mirrored |Tag| objects of the report.
+        """
+
+        rows = self._query("SELECT tags.id, tags.name, tags.enclave_id FROM report_tags "
+                           "JOIN tags ON tags.id = report_tags.tag_id WHERE report_tags.report_id = ?", (report_id,))
+        return [Tag(name=name, id=tag_id, enclave_id=enclave_id) for tag_id, name, enclave_id in rows]
+
+    def get_indicator_tags(self, value):
+        """
+        :param str value: The indicator value.
+        :return: A list of the mirrored |Tag| objects of the indicator.
+        """
+
+        rows = self._query("SELECT tags.id, tags.name, tags.enclave_id FROM indicator_tags "
+                           "JOIN tags ON tags.id = indicator_tags.tag_id WHERE indicator_tags.value = ?", (value,))
+        return [Tag(name=name, id=tag_id, enclave_id=enclave_id) for tag_id, name, enclave_id in rows]
+
+    def count(self):
+        """
+        :return: A dictionary of the number of rows in each table.
+        """
+
+        with self._lock:
+            return {table: self._connection.execute("SELECT COUNT(*) FROM %s" % table).fetchone()[0]
+                    for table in ['reports', 'indicators', 'tags', 'report_indicators', 'report_tags',
+                                  'indicator_tags']}
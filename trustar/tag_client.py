@@ -27,7 +27,7 @@ class TagClient(object):
 
         params = {'idType': id_type}
         resp = self._client.get("reports/%s/tags" % report_id, params=params)
-        return [Tag.from_dict(indicator) for indicator in resp.json()]
+        return [Tag.from_dict(indicator) for indicator in self._client.decode(resp)]
 
     def add_enclave_tag(self, report_id, name, enclave_id, id_type=None):
         """
@@ -74,7 +74,7 @@ class TagClient(object):
 
         params = {'enclaveIds': enclave_ids}
         resp = self._client.get("reports/tags", params=params)
-        return [Tag.from_dict(indicator) for indicator in resp.json()]
+        return [Tag.from_dict(indicator) for indicator in self._client.decode(resp)]
 
     def get_all_indicator_tags(self, enclave_ids=None):
         """
@@ -89,7 +89,7 @@ class TagClient(object):
 
         params = {'enclaveIds': enclave_ids}
         resp = self._client.get("indicators/tags", params=params)
-        return [Tag.from_dict(indicator) for indicator in resp.json()]
+        return [Tag.from_dict(indicator) for indicator in self._client.decode(resp)]
 
     def add_indicator_tag(self, indicator_value, name, enclave_id):
         """
@@ -106,7 +106,7 @@ class TagClient(object):
             'enclaveId': enclave_id
         }
         resp = self._client.post("indicators/%s/tags" % indicator_value, params=params)
-        return Tag.from_dict(resp.json())
+        return Tag.from_dict(self._client.decode(resp))
 
     def delete_indicator_tag(self, indicator_value, tag_id):
         """
@@ -0,0 +1,152 @@
+# python 2 backwards compatibility
+from __future__ import print_function, division
+from builtins import object
+from future import standard_library
+
+# external imports
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+
+# python 2 backwards compatibility
+standard_library.install_aliases()
+
+logger = logging.getLogger(__name__)
+
+
+class TokenManager(object):
+    """
+    Holds the OAuth2 token used by an |ApiClient|, and refreshes it shortly before it expires so that requests are not
+    wasted on an expired token.  Refreshes are single-flight: when many threads need a new token at once, exactly one
+    of them fetches it and the rest wait for and reuse the result.
+
+    If ``cache_path`` is given, tokens are also cached in that file, so that short-lived processes using the same
+    credentials can skip the authentication round trip.  Entries are keyed by a hash of the auth endpoint and API key;
+    the API secret is never written to disk.
+
+    :ivar token: The current token, or ``None`` if none has been fetched yet.
+    :ivar expires_at: When the current token expires, in seconds since epoch, or ``None`` if unknown.
+    """
+
+    def __init__(self, fetch_token, refresh_margin=60, cache_path=None, cache_key=None):
+        """
+        :param fetch_token: A function that requests a new token from the server and returns a tuple of the token and
+            its lifetime in seconds (or ``None`` if unknown).
+        :param int refresh_margin: How many seconds before expiry to refresh the token.
+        :param str cache_path: Path of a file to cache tokens in (optional).
+        :param str cache_key: Identifies the credentials the token belongs to within the cache file.
+        """
+
+        self._fetch_token = fetch_token
+        self.refresh_margin = refresh_margin
+        self.cache_path = os.path.expanduser(cache_path) if cache_path else None
+        self.cache_key = hashlib.sha256(cache_key.encode('utf-8')).hexdigest() if cache_key else None
+        self.token = None
+        self.expires_at = None
+        self._refresh_at = None
+        self._lock = threading.Lock()
+
+    def get_token(self):
+        """
+        :return: A token that is not about to expire, refreshing it first if necessary.
+        """
+
+        token = self.get_valid_token()
+        if token is None:
+            token = self.refresh(stale_token=self.token)
+        return token
+
+    def get_valid_token(self):
+        """
+        :return: The current token if it is not about to expire, otherwise ``None``.  Never contacts the server, but
+            may load a token from the cache file.
+        """
+
+        if self.token is not None and not self._needs_refresh():
+            return self.token
+
+        if self.cache_path is not None:
+            self._load_cache()
+            if self.token is not None and not self._needs_refresh():
+                return self.token
+
+        return None
+
+    def refresh(self, stale_token=None):
+        """
+        Fetch a new token, unless another thread has already replaced ``stale_token`` with a valid one.
+
+        :param stale_token: The token the caller found to be expired or about to expire.
+        :return: The new token.
+        """
+
+        with self._lock:
+            token = self.get_valid_token()
+            if token is not None and token != stale_token:
+                return token
+
+            token, expires_in = self._fetch_token()
+            self.set_token(token, expires_in)
+            return token
+
+    def set_token(self, token, expires_in=None):
+        """
+        Store a token that was just fetched from the server, and write it to the cache file if one is configured.
+
+        :param token: The token.
+        :param expires_in: The token's lifetime in seconds, or ``None`` if unknown.
+        """
+
+        now = time.time()
+        self.token = token
+        if expires_in is None:
+            self.expires_at = None
+            self._refresh_at = None
+        else:
+            self.expires_at = now + expires_in
+            # the server returns the current token if it is still live, possibly with little lifetime left; refreshing
+            # halfway through the remaining lifetime in that case avoids refreshing on every request
+            self._refresh_at = self.expires_at - min(self.refresh_margin, expires_in / 2)
+
+        if self.cache_path is not None:
+            self._save_cache()
+
+    def _needs_refresh(self):
+        return self._refresh_at is not None and time.time() >= self._refresh_at
+
+    def _read_cache_file(self):
+        try:
+            with open(self.cache_path, 'r') as f:
+                return json.load(f)
+        except (IOError, OSError, ValueError):
+            return {}
+
+    def _load_cache(self):
+        entry = self._read_cache_file().get(self.cache_key)
+        if not entry or entry.get('token') is None:
+            return
+
+        refresh_at = entry.get('refresh_at')
+        if refresh_at is not None and time.time() >= refresh_at:
+            return
+
+        self.token = entry['token']
+        self.expires_at = entry.get('expires_at')
+        self._refresh_at = refresh_at
+
+    def _save_cache(self):
+        entries = self._read_cache_file()
+        entries[self.cache_key] = {'token': self.token, 'expires_at': self.expires_at, 'refresh_at': self._refresh_at}
+
+        # write to a temporary file only readable by the current user, then move it into place
+        tmp_path = "%s.%d.tmp" % (self.cache_path, os.getpid())
+        try:
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, 'w') as f:
+                json.dump(entries, f)
+            getattr(os, 'replace', os.rename)(tmp_path, self.cache_path)
+        except (IOError, OSError) as e:
+            logger.warning("Unable to write token cache file %s: %s", self.cache_path, e)
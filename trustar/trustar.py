@@ -9,14 +9,16 @@ import configparser
 import os
 import yaml
 import logging
+import weakref
 
 # package imports
 from .api_client import ApiClient
+from .batcher import MicroBatcher
 from .report_client import ReportClient
 from .indicator_client import IndicatorClient
 from .tag_client import TagClient
-from .models import EnclavePermissions, RequestQuota
-from .utils import normalize_timestamp
+from .models import EnclavePermissions, Indicator, LazyIndicator, LazyReport, Report, RequestQuota
+from .utils import normalize_timestamp, normalize_timestamps
 
 from .version import __version__, __api_version__
 
@@ -48,9 +50,32 @@ class TruStar(ReportClient, IndicatorClient, TagClient):
         'client_metatag': None,
         'verify': True,
         'retry': True,
+        'retry_policy': None,
         'max_wait_time': 60,
         'http_proxy': None,
-        'https_proxy': None
+        'https_proxy': None,
+        'pool_connections': 10,
+        'pool_maxsize': 10,
+        'max_retries': 0,
+        'keep_alive': True,
+        'max_concurrency': 10,
+        'max_url_length': 8000,
+        'rate_limit': False,
+        'rate_limiter': None,
+        'quota_sync_interval': 60,
+        'token_refresh_margin': 60,
+        'token_cache_path': None,
+        'indicator_cache': None,
+        'lazy_models': False,
+        'json_codec': 'json',
+        'compress_requests': False,
+        'compress_threshold': 4096,
+        'compress_level': 6,
+        'metrics_sinks': None,
+        'coalesce_requests': False,
+        'batch_lookups': False,
+        'batch_window': 0.01,
+        'batch_max_size': 100
     }
 
     def __init__(self, config_file=None, config_role=None, config=None):
@@ -79,7 +104,13 @@ class TruStar(ReportClient, IndicatorClient, TagClient):
         +-------------------------+-----------+--------------------------------------------------+--------------------------------------------------------+
         | ``verify``              | No        | ``True``                                         | whether to use SSL verification                        |
         +-------------------------+-----------+--------------------------------------------------+--------------------------------------------------------+
-        | ``retry``               | No        | ``True``                                         | whether to wait and retry requests that fail with 429  |
+        | ``retry``               | No        | ``True``                                         | whether to wait and retry requests that fail with 429, |
+        |                         |           |                                                  | and server and connection errors allowed by the retry  |
+        |                         |           |                                                  | policy                                                 |
+        +-------------------------+-----------+--------------------------------------------------+--------------------------------------------------------+
+        | ``retry_policy``        | No        | ``None``                                         | the backoff policy for server and connection errors,   |
+        |                         |           |                                                  | which are not retried without one; retries are counted |
+        |                         |           |                                                  | in the client's ``retry_stats`` (|RetryStats|)         |
         +-------------------------+-----------+--------------------------------------------------+--------------------------------------------------------+
         | ``max_wait_time``       | No        | ``60``                                           | fail if 429 wait time is greater than this (seconds)   |
         +-------------------------+-----------+--------------------------------------------------+--------------------------------------------------------+
@@ -93,6 +124,67 @@ class TruStar(ReportClient, IndicatorClient, TagClient):
         +-------------------------+-----------+--------------------------------------------------+--------------------------------------------------------+
         | ``https_proxy``         | No        | ``None``                                         | https proxy being used - http(s)://user:pwd@{ip}:{port}|
         +-------------------------+-----------+--------------------------------------------------+--------------------------------------------------------+
+        | ``pool_connections``    | No        | ``10``                                           | number of per-host connection pools to cache           |
+        +-------------------------+-----------+--------------------------------------------------+--------------------------------------------------------+
+        | ``pool_maxsize``        | No        | ``10``                                           | max connections kept alive per host; raise this to at  |
+        |                         |           |                                                  | least the number of threads sharing the client         |
+        +-------------------------+-----------+--------------------------------------------------+--------------------------------------------------------+
+        | ``max_retries``         | No        | ``0``                                            | connection-level retries performed by the adapter      |
+        +-------------------------+-----------+--------------------------------------------------+--------------------------------------------------------+
+        | ``keep_alive``          | No        | ``True``                                         | whether to reuse connections between requests          |
+        +-------------------------+-----------+--------------------------------------------------+--------------------------------------------------------+
+        | ``max_concurrency``     | No        | ``10``                                           | max requests in flight at once, both in                |
+        |                         |           |                                                  | |AsyncTruStar| and in batched lookups                  |
+        +-------------------------+-----------+--------------------------------------------------+--------------------------------------------------------+
+        | ``max_url_length``      | No        | ``8000``                                         | max URL length; lookups of many values are split into  |
+        |                         |           |                                                  | batches that stay within it                            |
+        +-------------------------+-----------+--------------------------------------------------+--------------------------------------------------------+
+        | ``rate_limit``          | No        | ``False``                                        | whether to pace requests to stay within the request    |
+        |                         |           |                                                  | quotas, sharing one |RateLimiter| per API key          |
+        +-------------------------+-----------+--------------------------------------------------+--------------------------------------------------------+
+        | ``rate_limiter``        | No        | ``None``                                         | a |RateLimiter| to use instead of the shared one       |
+        +-------------------------+-----------+--------------------------------------------------+--------------------------------------------------------+
+        | ``quota_sync_interval`` | No        | ``60``                                           | seconds between rate limiter syncs with request quotas |
+        +-------------------------+-----------+--------------------------------------------------+--------------------------------------------------------+
+        | ``token_refresh_margin``| No        | ``60``                                           | seconds before expiry to refresh the OAuth2 token      |
+        +-------------------------+-----------+--------------------------------------------------+--------------------------------------------------------+
+        | ``token_cache_path``    | No        | ``None``                                         | file to cache OAuth2 tokens in, so that new processes  |
+        |                         |           |                                                  | can reuse a live token                                 |
+        +-------------------------+-----------+--------------------------------------------------+--------------------------------------------------------+
+        | ``indicator_cache``     | No        | ``None``                                         | an |IndicatorCache| for indicator metadata and details |
+        +-------------------------+-----------+--------------------------------------------------+--------------------------------------------------------+
+        | ``lazy_models``         | No        | ``False``                                        | whether to return |LazyIndicator| and |LazyReport|     |
+        |                         |           |                                                  | objects, which decode attributes on first access       |
+        +-------------------------+-----------+--------------------------------------------------+--------------------------------------------------------+
+        | ``json_codec``          | No        | ``"json"``                                       | the |JsonCodec| used for request and response bodies:  |
+        |                         |           |                                                  | ``"json"``, ``"orjson"``, ``"ujson"``, or ``"auto"``   |
+        +-------------------------+-----------+--------------------------------------------------+--------------------------------------------------------+
+        | ``compress_requests``   | No        | ``False``                                        | whether to gzip request bodies of at least             |
+        |                         |           |                                                  | ``compress_threshold`` bytes; the byte counts are in   |
+        |                         |           |                                                  | the client's ``transfer_stats`` (|TransferStats|)      |
+        +-------------------------+-----------+--------------------------------------------------+--------------------------------------------------------+
+        | ``compress_threshold``  | No        | ``4096``                                         | min request body size in bytes to compress             |
+        +-------------------------+-----------+--------------------------------------------------+--------------------------------------------------------+
+        | ``compress_level``      | No        | ``6``                                            | gzip compression level, from 1 (fastest) to 9          |
+        +-------------------------+-----------+--------------------------------------------------+--------------------------------------------------------+
+        | ``metrics_sinks``       | No        | ``None``                                         | a list of |MetricsSink| objects (e.g. a                |
+        |                         |           |                                                  | |HistogramSink|) or functions, passed the              |
+        |                         |           |                                                  | |RequestMetrics| of every request; nothing is measured |
+        |                         |           |                                                  | if it is empty                                         |
+        +-------------------------+-----------+--------------------------------------------------+--------------------------------------------------------+
+        | ``coalesce_requests``   | No        | ``False``                                        | whether a ``GET`` request identical to one already in  |
+        |                         |           |                                                  | flight waits for its response instead of being sent;   |
+        |                         |           |                                                  | counted in the client's ``coalescing_stats``           |
+        |                         |           |                                                  | (|CoalescingStats|)                                    |
+        +-------------------------+-----------+--------------------------------------------------+--------------------------------------------------------+
+        | ``batch_lookups``       | No        | ``False``                                        | whether to combine |get_indicator_metadata| calls made |
+        |                         |           |                                                  | by any number of threads into batched requests, with   |
+        |                         |           |                                                  | a |MicroBatcher|                                       |
+        +-------------------------+-----------+--------------------------------------------------+--------------------------------------------------------+
+        | ``batch_window``        | No        | ``0.01``                                         | max seconds a batched lookup waits for others          |
+        +-------------------------+-----------+--------------------------------------------------+--------------------------------------------------------+
+        | ``batch_max_size``      | No        | ``100``                                          | max indicator values in a batched lookup               |
+        +-------------------------+-----------+--------------------------------------------------+--------------------------------------------------------+
 
         :param str config_file: Path to configuration file (conf, json, or yaml).  If no value is passed, the environment
             variable TRUSTAR_PYTHON_CONFIG_FILE will be used.  If that is not defined, defaults to "trustar.conf".
@@ -102,6 +194,65 @@ class TruStar(ReportClient, IndicatorClient, TagClient):
             the ``config_file`` parameter.
         """
 
+        config = self.build_config(config_file=config_file, config_role=config_role, config=config)
+
+        self.enclave_ids = config.get('enclave_ids')
+
+        if isinstance(self.enclave_ids, str):
+            self.enclave_ids = [self.enclave_ids]
+
+        # cache indicator lookups if a cache is provided
+        self.indicator_cache = config.get('indicator_cache')
+
+        # decode indicators and reports on first access if configured
+        if config.get('lazy_models'):
+            self._indicator_model, self._report_model = LazyIndicator, LazyReport
+        else:
+            self._indicator_model, self._report_model = Indicator, Report
+
+        # whitelist indexes to keep in sync with whitelist changes made through this client
+        self._whitelist_indexes = weakref.WeakSet()
+
+        # initialize api client
+        self._client = ApiClient(config=config)
+
+        # bytes sent and received, and time spent compressing
+        self.transfer_stats = self._client.transfer_stats
+
+        # requests retried, and why
+        self.retry_stats = self._client.retry_stats
+
+        # destinations of per-request measurements
+        self.metrics_sinks = self._client.metrics_sinks
+
+        # GET requests coalesced with identical ones in flight
+        self.coalescing_stats = self._client.coalescing_stats
+
+        # combine single indicator lookups into batched requests if configured
+        self._metadata_batcher = None
+        if config.get('batch_lookups'):
+            self._metadata_batcher = MicroBatcher(fetch=self._get_metadata_batch,
+                                                  window=config.get('batch_window'),
+                                                  max_batch_size=config.get('batch_max_size'),
+                                                  max_workers=self._client.max_concurrency)
+
+        self._check_api_version(self._client.base)
+
+        # initialize token property
+        self.token = None
+
+    @classmethod
+    def build_config(cls, config_file=None, config_role=None, config=None):
+        """
+        Resolve the configuration dictionary used to construct the |ApiClient|, applying key remapping, type coercion
+        and default values.  See the constructor for the meaning of each parameter.
+
+        :param str config_file: Path to configuration file (conf, json, or yaml).
+        :param str config_role: The section in the configuration file to use.
+        :param dict config: A dictionary of configuration options.  This will override ``config_file``.
+        :return: The configuration dictionary.
+        """
+
         # attempt to use configuration file if one exists
         if config is None:
 
@@ -121,51 +272,66 @@ class TruStar(ReportClient, IndicatorClient, TagClient):
             if config_role is None:
                 config_role = 'trustar'
 
-            config = self.config_from_file(config_file, config_role)
+            config = cls.config_from_file(config_file, config_role)
 
         else:
             # copy so that the dictionary that was passed is not mutated
             config = config.copy()
 
         # remap config keys names
-        for k, v in self.REMAPPED_KEYS.items():
+        for k, v in cls.REMAPPED_KEYS.items():
             if k in config and v not in config:
                 config[v] = config[k]
 
         # coerce value to boolean
         verify = config.get('verify')
-        config['verify'] = self.parse_boolean(verify)
+        config['verify'] = cls.parse_boolean(verify)
 
         # coerce value to boolean
         retry = config.get('retry')
-        config['retry'] = self.parse_boolean(retry)
+        config['retry'] = cls.parse_boolean(retry)
 
-        max_wait_time = config.get('max_wait_time')
-        if max_wait_time is not None:
-            config['max_wait_time'] = int(max_wait_time)
+        # coerce values to boolean
+        for key in ['keep_alive', 'rate_limit', 'lazy_models', 'compress_requests', 'coalesce_requests',
+                    'batch_lookups']:
+            config[key] = cls.parse_boolean(config.get(key))
+
+        # coerce values to int
+        for key in ['max_wait_time', 'pool_connections', 'pool_maxsize', 'max_retries', 'max_concurrency',
+                    'max_url_length', 'quota_sync_interval', 'token_refresh_margin', 'compress_threshold',
+                    'compress_level', 'batch_max_size']:
+            if config.get(key) is not None:
+                config[key] = int(config[key])
+
+        # coerce values to float
+        for key in ['batch_window']:
+            if config.get(key) is not None:
+                config[key] = float(config[key])
 
         # override Nones with default values if they exist
-        for key, val in self.DEFAULTS.items():
+        for key, val in cls.DEFAULTS.items():
             if config.get(key) is None:
                 config[key] = val
 
         # ensure required properties are present
-        for key in self.REQUIRED_KEYS:
+        for key in cls.REQUIRED_KEYS:
             if config.get(key) is None:
                 raise Exception("Missing config value for %s" % key)
 
-        self.enclave_ids = config.get('enclave_ids')
+        return config
 
-        if isinstance(self.enclave_ids, str):
-            self.enclave_ids = [self.enclave_ids]
+    @classmethod
+    def _check_api_version(cls, base):
+        """
+        Log a warning if the API version in the base URL does not match the version this SDK was written for.
 
-        # initialize api client
-        self._client = ApiClient(config=config)
+        :param str base: The base URL used for making API calls.
+        """
 
         # get API version and strip "beta" tag
         # This comes from base url passed in config
         # e.g. https://api.trustar.co/api/1.3-beta will give 1.3
-        api_version = self._client.base.strip("/").split("/")[-1]
+        api_version = base.strip("/").split("/")[-1]
 
         # strip beta tag
         BETA_TAG = "-beta"
@@ -177,13 +343,9 @@ class TruStar(ReportClient, IndicatorClient, TagClient):
 
         # if API version does not match expected version, log a warning
         if api_version.strip(BETA_TAG) != __api_version__.strip(BETA_TAG):
-            self.logger.warning("This version (%s) of the TruStar Python SDK is only compatible with version %s of"
-                                " the TruStar Rest API, but is attempting to contact version %s of the Rest API."
-                                % (__version__, __api_version__, api_version))
-
-        # initialize token property
-        self.token = None
-
+            cls.logger.warning("This version (%s) of the TruStar Python SDK is only compatible with version %s of"
+                               " the TruStar Rest API, but is attempting to contact version %s of the Rest API."
+                               % (__version__, __api_version__, api_version))
 
     @staticmethod
     def parse_boolean(value):
@@ -260,6 +422,10 @@ class TruStar(ReportClient, IndicatorClient, TagClient):
     def normalize_timestamp(date_time):
         return normalize_timestamp(date_time)
 
+    @staticmethod
+    def normalize_timestamps(date_times):
+        return normalize_timestamps(date_times)
+
     #####################
     ### API Endpoints ###
     #####################
@@ -307,7 +473,7 @@ class TruStar(ReportClient, IndicatorClient, TagClient):
         """
 
         resp = self._client.get("enclaves")
-        return [EnclavePermissions.from_dict(enclave) for enclave in resp.json()]
+        return [EnclavePermissions.from_dict(enclave) for enclave in self._client.decode(resp)]
 
     def get_request_quotas(self):
         """
@@ -317,4 +483,4 @@ class TruStar(ReportClient, IndicatorClient, TagClient):
         """
 
         resp = self._client.get("request-quotas")
-        return [RequestQuota.from_dict(quota) for quota in resp.json()]
+        return [RequestQuota.from_dict(quota) for quota in self._client.decode(resp)]
@@ -1,10 +1,16 @@
 # python 2 backwards compatibility
 from __future__ import print_function
 from six import string_types
+from six.moves.queue import Queue
+from six.moves.urllib.parse import urlencode
 
 # external imports
 import logging
+import re
+import threading
 import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from datetime import datetime
 import dateutil.parser
 import pytz
@@ -14,20 +20,61 @@ from tzlocal import get_localzone
 DAY = 24 * 60 * 60 * 1000
 
 
-def normalize_timestamp(date_time):
+# a strict ISO-8601 date, optionally with a time, fraction of a second, and UTC offset
+_ISO_TIMESTAMP = re.compile(r"\d{4}-\d{2}-\d{2}"
+                            r"(?:[T ]\d{2}:\d{2}(?::\d{2}(?:\.\d{1,6})?)?(?:Z|[+-]\d{2}(?::?\d{2})?)?)?$")
+
+# ``datetime.fromisoformat`` only exists in Python 3.7+, and only accepts a "Z" or "+HHMM" offset in Python 3.11+
+_fromisoformat = getattr(datetime, 'fromisoformat', None)
+
+_local_timezone = None
+
+
+def get_local_timezone():
     """
-    Attempt to convert a string timestamp in to a TruSTAR compatible format for submission.
-    Will return current time with UTC time zone if None
-    :param date_time: int that is seconds or milliseconds since epoch, or string/datetime object containing date, time,
-    and (ideally) timezone.
-    Examples of supported timestamp formats: 1487890914, 1487890914000, "2017-02-23T23:01:54", "2017-02-23T23:01:54+0000"
-    :return If input is an int, will return milliseconds since epoch.  Otherwise, will return a normalized isoformat
-    timestamp.
+    :return: The system time zone.  It is looked up on the first call and cached, since ``tzlocal`` reads system files
+        every time it is asked.
     """
-    datetime_dt = datetime.now()
 
-    # get current time in seconds-since-epoch
-    current_time = int(time.time()) * 1000
+    global _local_timezone
+    if _local_timezone is None:
+        _local_timezone = get_localzone()
+    return _local_timezone
+
+
+def _localize(datetime_dt, timezone):
+    """
+    Attach a time zone to a timezone-naive datetime, and convert it to UTC.  ``pytz`` time zones (returned by
+    ``tzlocal`` before version 3) must be attached with ``localize``; others can be attached with ``replace``.
+    """
+
+    localize = getattr(timezone, 'localize', None)
+    if localize is not None:
+        datetime_dt = localize(datetime_dt)
+    else:
+        datetime_dt = datetime_dt.replace(tzinfo=timezone)
+    return datetime_dt.astimezone(pytz.utc)
+
+
+def _parse_timestamp_string(date_time):
+    """
+    Parse a timestamp string, using the standard library parser for strict ISO-8601 strings and ``dateutil`` for
+    anything else.
+    """
+
+    if _fromisoformat is not None and _ISO_TIMESTAMP.match(date_time):
+        try:
+            return _fromisoformat(date_time)
+        except ValueError:
+            # e.g. an offset this version of Python does not accept
+            pass
+    return dateutil.parser.parse(date_time)
+
+
+def _normalize_timestamp(date_time, current_time, timezone):
+    """
+    Implements ``normalize_timestamp``, given the current time in milliseconds since epoch and the system time zone.
+    """
 
     try:
         # identify type of timestamp and convert to datetime object
@@ -43,10 +90,12 @@ def normalize_timestamp(date_time):
 
             return date_time
 
-        if isinstance(date_time, str):
-            datetime_dt = dateutil.parser.parse(date_time)
+        if isinstance(date_time, string_types):
+            datetime_dt = _parse_timestamp_string(date_time)
         elif isinstance(date_time, datetime):
             datetime_dt = date_time
+        else:
+            datetime_dt = datetime.now()
 
     # if timestamp is none of the formats above, error message is printed and timestamp is set to current time by
     # default
@@ -55,15 +104,55 @@ def normalize_timestamp(date_time):
         logger.warning("Using current time as replacement.")
         datetime_dt = datetime.now()
 
-    # if timestamp is timezone naive, add timezone
+    # if timestamp is timezone naive, add system timezone and convert to UTC
     if not datetime_dt.tzinfo:
-        # add system timezone and convert to UTC
-        datetime_dt = get_localzone().localize(datetime_dt).astimezone(pytz.utc)
+        datetime_dt = _localize(datetime_dt, timezone)
 
     # converts datetime to iso8601
     return datetime_dt.isoformat()
 
 
+def normalize_timestamp(date_time):
+    """
+    Attempt to convert a string timestamp in to a TruSTAR compatible format for submission.
+    Will return current time with UTC time zone if None
+    :param date_time: int that is seconds or milliseconds since epoch, or string/datetime object containing date, time,
+    and (ideally) timezone.
+    Examples of supported timestamp formats: 1487890914, 1487890914000, "2017-02-23T23:01:54", "2017-02-23T23:01:54+0000"
+    :return If input is an int, will return milliseconds since epoch.  Otherwise, will return a normalized isoformat
+    timestamp.
+    """
+
+    return _normalize_timestamp(date_time, int(time.time()) * 1000, get_local_timezone())
+
+
+def normalize_timestamps(date_times):
+    """
+    Normalize a column of timestamps, such as the ``timeBegan`` values of a page of reports, as ``normalize_timestamp``
+    would normalize each one.  Repeated values are only parsed once.
+    :param date_times: An iterable of timestamps, in any of the formats accepted by ``normalize_timestamp``.
+    :return: A list of the normalized timestamps, in the same order.
+    """
+
+    current_time = int(time.time()) * 1000
+    timezone = get_local_timezone()
+
+    normalized = {}
+    results = []
+    for date_time in date_times:
+        # datetimes and None are normalized individually, since a naive datetime and None depend on the current time
+        if isinstance(date_time, (int, string_types)):
+            # an int and a string of the same digits must not share an entry
+            key = (type(date_time), date_time)
+            result = normalized.get(key)
+            if result is None:
+                result = normalized[key] = _normalize_timestamp(date_time, current_time, timezone)
+        else:
+            result = _normalize_timestamp(date_time, current_time, timezone)
+        results.append(result)
+    return results
+
+
 def get_current_time_millis():
     """
     :return: the current time in milliseconds since epoch.
@@ -88,13 +177,34 @@ def get_logger(name=None):
     return logging.getLogger(name)
 
 
-def get_time_based_page_generator(get_page, get_next_to_time, from_time=None, to_time=None):
+def get_time_based_page_generator(get_page, get_next_to_time, from_time=None, to_time=None, checkpoint=None,
+                                  resume_from=None):
+    """
+    Constructs a generator for retrieving pages from an endpoint that is paginated by moving the ``to`` parameter back
+    in time, to just before the oldest item of the previous page.  This method is intended for internal use.
+
+    :param get_page: Should take parameters ``from_time`` and ``to_time`` and return the corresponding page.
+    :param get_next_to_time: Should take a page and return the time of its oldest item, or ``None`` if it is empty.
+    :param int from_time: start of the time window in milliseconds since epoch (defaults to a day before ``to_time``)
+    :param int to_time: end of the time window in milliseconds since epoch (defaults to the current time)
+    :param checkpoint: A |Checkpoint| to save the cursor to after each page, i.e.
+        ``{"from_time": ..., "to_time": ...}`` with the ``to_time`` of the next page.
+    :param dict resume_from: A cursor saved by a previous generator.  If given, ``from_time`` and ``to_time`` are
+        ignored, and the generator continues where the previous one left off.
+    :return: A generator that generates each successive page.
+    """
 
-    if to_time is None:
-        to_time = get_current_time_millis()
+    if resume_from is not None:
+        if resume_from.get('done'):
+            return
+        from_time = resume_from['from_time']
+        to_time = resume_from['to_time']
+    else:
+        if to_time is None:
+            to_time = get_current_time_millis()
 
-    if from_time is None:
-        from_time = to_time - DAY
+        if from_time is None:
+            from_time = to_time - DAY
 
     while to_time is not None and from_time <= to_time:
         result = get_page(from_time, to_time)
@@ -106,6 +216,203 @@ def get_time_based_page_generator(get_page, get_next_to_time, from_time=None, to
                                 "This can result in an endless loop.")
             new_to_time -= 1
         to_time = new_to_time
+        if checkpoint is not None and to_time is not None:
+            checkpoint.save({'from_time': from_time, 'to_time': to_time})
+
+    if checkpoint is not None:
+        checkpoint.save({'from_time': from_time, 'to_time': to_time, 'done': True})
+
+
+def get_time_windows(from_time, to_time, window_size):
+    """
+    Splits the time window ``[from_time, to_time]`` into consecutive, non-overlapping sub-windows, newest first.
+
+    :param int from_time: start of the time window in milliseconds since epoch (inclusive)
+    :param int to_time: end of the time window in milliseconds since epoch (inclusive)
+    :param int window_size: the maximum size of each sub-window, in milliseconds
+    :return: A list of ``(from_time, to_time)`` tuples.
+    """
+
+    if window_size <= 0:
+        raise ValueError("window_size must be positive.")
+
+    windows = []
+    while to_time >= from_time:
+        window_from_time = max(from_time, to_time - window_size + 1)
+        windows.append((window_from_time, to_time))
+        to_time = window_from_time - 1
+
+    return windows
+
+
+def parallel_map(func, iterable, max_workers, read_ahead=None, ordered=True):
+    """
+    Apply ``func`` to each element of ``iterable`` on a pool of threads, and generate the results.  At most
+    ``read_ahead`` results are in flight or waiting to be consumed at any time, so memory stays bounded even if the
+    consumer is slower than the workers.  If the consumer stops early, calls that have not started yet are cancelled.
+
+    :param func: A function of one argument.
+    :param iterable: The arguments to call ``func`` with.  It is consumed lazily.
+    :param int max_workers: The number of threads.
+    :param int read_ahead: The maximum number of calls in flight or buffered.  Defaults to ``2 * max_workers``.
+    :param boolean ordered: If ``True``, results are generated in the order of ``iterable``; otherwise they are
+        generated as soon as they complete.
+    :return: A generator of results.  An exception raised by ``func`` is re-raised when its result is reached.
+    """
+
+    if read_ahead is None:
+        read_ahead = 2 * max_workers
+    read_ahead = max(read_ahead, 1)
+
+    arguments = iter(iterable)
+    pending = deque()
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+
+    def fill():
+        while len(pending) < read_ahead:
+            try:
+                argument = next(arguments)
+            except StopIteration:
+                return
+            pending.append(executor.submit(func, argument))
+
+    try:
+        fill()
+        while pending:
+            if ordered:
+                future = pending.popleft()
+            else:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                future = done.pop()
+                pending.remove(future)
+
+            result = future.result()
+
+            # keep the workers busy while the consumer handles this result
+            fill()
+            yield result
+    finally:
+        for future in pending:
+            future.cancel()
+        executor.shutdown(wait=False)
+
+
+# marks the end of a call's items in ``parallel_chain``
+_DONE = object()
+
+
+def parallel_chain(func, iterable, max_workers, read_ahead=None, ordered=True):
+    """
+    Apply ``func``, which returns an iterable such as a generator, to each element of ``iterable`` on a pool of
+    threads, and generate the items of every call.  Unlike ``parallel_map``, which holds each call's whole result, a
+    call that gets more than ``read_ahead`` items ahead of the consumer waits for it to catch up, so memory stays
+    bounded however many items each call produces.  If the consumer stops early, the calls are stopped too.
+
+    :param func: A function of one argument that returns an iterable.
+    :param iterable: The arguments to call ``func`` with.  It is consumed lazily.
+    :param int max_workers: The number of threads.
+    :param int read_ahead: The maximum number of items each call buffers ahead of the consumer.  Defaults to ``2``.
+    :param boolean ordered: If ``True``, the items of each call are generated after those of the calls before it,
+        while up to ``2 * max_workers`` later calls run ahead as far as their buffers allow.  Otherwise items are
+        generated as soon as any of ``max_workers`` calls produces them.
+    :return: A generator of ``(index, item)`` tuples, where ``index`` is the position in ``iterable`` of the argument
+        of the call that produced the item.  An exception raised by a call is re-raised when it is reached.
+    """
+
+    if read_ahead is None:
+        read_ahead = 2
+    read_ahead = max(read_ahead, 1)
+
+    arguments = enumerate(iterable)
+    stopped = threading.Event()
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    # the calls started and not yet finished by the consumer, as tuples of their index, queue, and future
+    pending = deque()
+    shared_queue = None if ordered else Queue(read_ahead * max_workers)
+
+    def produce(index, argument, queue):
+        # after each item put, the consumer may have stopped and drained the queue to release this thread
+        try:
+            for item in func(argument):
+                if stopped.is_set():
+                    return
+                queue.put((index, item, None))
+        except Exception as e:
+            if not stopped.is_set():
+                queue.put((index, None, e))
+            return
+        if not stopped.is_set():
+            queue.put((index, _DONE, None))
+
+    def start_next():
+        try:
+            index, argument = next(arguments)
+        except StopIteration:
+            return False
+        queue = shared_queue if shared_queue is not None else Queue(read_ahead)
+        pending.append((index, queue, executor.submit(produce, index, argument, queue)))
+        return True
+
+    def fill():
+        while len(pending) < (2 * max_workers if ordered else max_workers) and start_next():
+            pass
+
+    try:
+        fill()
+        while pending:
+            queue = pending[0][1]
+            index, item, error = queue.get()
+            if error is not None:
+                raise error
+            if item is _DONE:
+                for i, (pending_index, _, _) in enumerate(pending):
+                    if pending_index == index:
+                        del pending[i]
+                        break
+                fill()
+                continue
+            yield index, item
+    finally:
+        stopped.set()
+        for _, queue, future in pending:
+            future.cancel()
+            while not queue.empty():
+                queue.get()
+        executor.shutdown(wait=False)
+
+
+def get_url_chunks(items, get_params, url, max_length, params=None):
+    """
+    Split items into chunks small enough that a GET request to ``url``, with a query string holding ``params`` plus the
+    query parameters of every item in a chunk, has a URL of at most ``max_length`` characters.  An item whose query
+    parameters alone exceed the limit is put in a chunk by itself.
+
+    :param items: An iterable of items.  It is consumed lazily.
+    :param get_params: A function that returns a list of ``(key, value)`` query parameters for an item.  Parameters
+        whose value is ``None`` are ignored, as they are omitted from requests.
+    :param str url: The URL without a query string.
+    :param int max_length: The maximum URL length.
+    :param dict params: Query parameters sent with every chunk.
+    :return: A generator of lists of items.
+    """
+
+    params = [(key, value) for key, value in (params or {}).items() if value is not None]
+    # each parameter is preceded by a "?" or "&"
+    base_length = len(url) + len(urlencode(params, doseq=True)) + 1
+
+    chunk = []
+    length = base_length
+    for item in items:
+        size = sum(len(urlencode([(key, value)])) + 1 for key, value in get_params(item) if value is not None)
+        if chunk and length + size > max_length:
+            yield chunk
+            chunk = []
+            length = base_length
+        chunk.append(item)
+        length += size
+
+    if chunk:
+        yield chunk
 
 
 def parse_boolean(value):
@@ -0,0 +1,234 @@
+# python 2 backwards compatibility
+from __future__ import print_function
+from builtins import object
+from future import standard_library
+from six import string_types
+
+# external imports
+import binascii
+import socket
+import struct
+import threading
+
+# package imports
+from .models import IndicatorType
+
+# python 2 backwards compatibility
+standard_library.install_aliases()
+
+# the number of bits in an address, by IP version
+ADDRESS_BITS = {4: 32, 6: 128}
+
+
+_AF_INET = socket.AF_INET
+_inet_pton = socket.inet_pton
+_unpack_ipv4 = struct.Struct("!I").unpack
+
+
+def _parse_address(value):
+    """
+    Parse an IPv4 or IPv6 address.
+
+    :param str value: The address.
+    :return: A tuple of the IP version and the address as an integer, or ``None`` if ``value`` is not an address.
+    """
+
+    try:
+        if ':' in value:
+            return 6, _parse_ipv6(value)
+        return 4, _parse_ipv4(value)
+    except (socket.error, ValueError, UnicodeError):
+        return None
+
+
+def _parse_ipv4(value):
+    return _unpack_ipv4(_inet_pton(_AF_INET, value))[0]
+
+
+def _parse_ipv6(value):
+    return int(binascii.hexlify(_inet_pton(socket.AF_INET6, value)), 16)
+
+
+def _parse_network(value):
+    """
+    Parse an IPv4 or IPv6 CIDR block.
+
+    :param str value: The CIDR block, e.g. ``"10.0.0.0/8"``.
+    :return: A tuple of the IP version, the prefix length, and the network prefix as an integer, or ``None`` if
+        ``value`` is not a CIDR block.
+    """
+
+    address, _, prefix_length = value.partition('/')
+    if not prefix_length.isdigit():
+        return None
+
+    address = _parse_address(address)
+    if address is None:
+        return None
+
+    version, number = address
+    prefix_length = int(prefix_length)
+    bits = ADDRESS_BITS[version]
+    if prefix_length > bits:
+        return None
+
+    return version, prefix_length, number >> (bits - prefix_length)
+
+
+class WhitelistIndex(object):
+    """
+    An in-memory index of the user's company's whitelist, answering whether a value is whitelisted without calling the
+    API.  Values are held in a hash set, compared case-insensitively; ``CIDR_BLOCK`` entries are held in one hash set
+    of network prefixes per prefix length, so that an IP address is checked against every block with one lookup per
+    distinct prefix length.
+
+    Use |get_whitelist_index| to load an index that stays in sync with |add_terms_to_whitelist| and
+    |delete_indicator_from_whitelist| calls made through the same client.  An index is safe to read from any number of
+    threads while it is being updated.
+
+    Example:
+
+    >>> index = ts.get_whitelist_index()
+    >>> events = [event for event in events if event['ip'] not in index]
+    """
+
+    def __init__(self, indicators=None):
+        """
+        :param indicators: An iterable of |Indicator| objects or values to add to the index.
+        """
+
+        self._values = set()
+        # a tuple of (shift, prefixes) tuples per IP version, where shift is the number of host bits; it is replaced
+        # rather than modified, so that readers never iterate over it while it changes
+        self._networks = {4: (), 6: ()}
+        self._lock = threading.Lock()
+
+        if indicators is not None:
+            self.update(indicators)
+
+    def __contains__(self, value):
+        """
+        :param str value: An indicator value.
+        :return: ``True`` if the value is whitelisted, or is an IP address within a whitelisted CIDR block.
+        """
+
+        values = self._values
+        if value in values or value.lower() in values:
+            return True
+
+        # checks are expected to be mostly of values that are not IP addresses, so rule those out before paying for
+        # raising and catching an exception
+        try:
+            if ':' in value:
+                networks = self._networks[6]
+                if not networks or '/' in value:
+                    return False
+                number = _parse_ipv6(value)
+            else:
+                networks = self._networks[4]
+                if not networks or not value[-1:].isdigit():
+                    return False
+                number = _unpack_ipv4(_inet_pton(_AF_INET, value))[0]
+        except (socket.error, ValueError, UnicodeError):
+            return False
+
+        for shift, prefixes in networks:
+            if number >> shift in prefixes:
+                return True
+        return False
+
+    def is_whitelisted(self, value):
+        """
+        Equivalent to ``value in index``.
+
+        :param str value: An indicator value.
+        :return: ``True`` if the value is whitelisted.
+        """
+
+        return value in self
+
+    def __len__(self):
+        return len(self._values) + sum(len(prefixes) for networks in self._networks.values()
+                                       for _, prefixes in networks)
+
+    def add(self, indicator):
+        """
+        Add an entry to the index.
+
+        :param indicator: An |Indicator| object or value.
+        """
+
+        with self._lock:
+            self._add(indicator)
+
+    def update(self, indicators):
+        """
+        Add entries to the index.
+
+        :param indicators: An iterable of |Indicator| objects or values.
+        """
+
+        with self._lock:
+            for indicator in indicators:
+                self._add(indicator)
+
+    def remove(self, indicator):
+        """
+        Remove an entry from the index, if it is present.
+
+        :param indicator: An |Indicator| object or value.
+        """
+
+        value, network = self._get_entry(indicator)
+        with self._lock:
+            if network is None:
+                self._values.discard(value.lower())
+                return
+
+            version, prefix_length, prefix = network
+            for shift, prefixes in self._networks[version]:
+                if shift == ADDRESS_BITS[version] - prefix_length:
+                    prefixes.discard(prefix)
+
+    def clear(self):
+        """
+        Remove all entries from the index.
+        """
+
+        with self._lock:
+            self._values = set()
+            self._networks = {4: (), 6: ()}
+
+    @staticmethod
+    def _get_entry(indicator):
+        """
+        :return: A tuple of the indicator's value, and its parsed network if it is a CIDR block, otherwise ``None``.
+        """
+
+        if isinstance(indicator, string_types):
+            value, indicator_type = indicator, None
+        else:
+            value, indicator_type = indicator.value, indicator.type
+
+        network = None
+        if indicator_type in (None, IndicatorType.CIDR_BLOCK) and '/' in value:
+            network = _parse_network(value)
+        return value, network
+
+    def _add(self, indicator):
+        value, network = self._get_entry(indicator)
+        if network is None:
+            self._values.add(value.lower())
+            return
+
+        version, prefix_length, prefix = network
+        shift = ADDRESS_BITS[version] - prefix_length
+        for existing_shift, prefixes in self._networks[version]:
+            if existing_shift == shift:
+                prefixes.add(prefix)
+                return
+
+        # a new prefix length; replace the tuple, longest prefixes first since they are the most specific
+        networks = dict(self._networks)
+        networks[version] = tuple(sorted(networks[version] + ((shift, {prefix}),), key=lambda network: network[0]))
+        self._networks = networks